@@ -0,0 +1,148 @@
+"""
+Synthetic T-SQL Corpus Generator
+
+Generates seeded, reproducible stored procedures with controllable size,
+nesting depth, IF/WHILE counts, dynamic SQL density and comment ratio.
+Used by the benchmark suite to produce inputs from 1 KB to 50 MB.
+"""
+import random
+from pathlib import Path
+from typing import List
+
+
+class SyntheticCorpusGenerator:
+    """Generate synthetic stored procedures for benchmarking."""
+    
+    STATEMENT_TEMPLATES = [
+        "SELECT o.OrderId, o.Total FROM dbo.Orders{n} o WHERE o.CustomerId = @CustomerId;",
+        "UPDATE dbo.Customers{n} SET LastSeen = GETDATE() WHERE CustomerId = @CustomerId;",
+        "INSERT INTO dbo.AuditLog{n} (EventType, CreatedAt) VALUES ('Event{n}', GETDATE());",
+        "DELETE FROM dbo.Staging{n} WHERE BatchId = @BatchId;",
+        "SET @Counter = @Counter + {n};",
+        "SELECT @Total = SUM(Amount) FROM dbo.Payments{n} WITH (NOLOCK) WHERE Status = 'OPEN';",
+        "SELECT c.Name, a.City FROM dbo.Customers{n} c INNER JOIN dbo.Addresses a ON a.CustomerId = c.CustomerId;",
+        "EXEC dbo.usp_LogStep{n} @Step = {n};",
+    ]
+    
+    DYNAMIC_TEMPLATES = [
+        "SET @sql = 'SELECT * FROM dbo.Table{n} WHERE Name = ''' + @Filter + '''';\nEXEC(@sql);",
+        "EXEC sp_executesql N'SELECT Id FROM dbo.Table{n} WHERE Id = @Id', N'@Id INT', @Id = {n};",
+    ]
+    
+    COMMENT_TEMPLATES = [
+        "-- Step {n}: process the current batch",
+        "/* Legacy logic kept for compatibility, see ticket {n} */",
+        "-- TODO: revisit this query ({n})",
+    ]
+    
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+        self.rng = random.Random(seed)
+    
+    def generate_procedure(self, name: str = 'dbo.usp_Synthetic', size_bytes: int = 10_240,
+                           nesting_depth: int = 2, if_count: int = 5, while_count: int = 2,
+                           dynamic_sql_density: float = 0.05, comment_ratio: float = 0.1) -> str:
+        """
+        Generate one stored procedure of approximately size_bytes.
+        
+        Args:
+            name: Procedure name
+            size_bytes: Target size of the generated text
+            nesting_depth: Maximum nesting depth of IF/WHILE blocks
+            if_count: Exact number of IF blocks
+            while_count: Exact number of WHILE loops
+            dynamic_sql_density: Probability a statement is dynamic SQL (0-1)
+            comment_ratio: Probability a statement is preceded by a comment (0-1)
+            
+        Returns:
+            T-SQL text of the procedure
+        """
+        controls = ['IF'] * if_count + ['WHILE'] * while_count
+        self.rng.shuffle(controls)
+        
+        lines = [
+            f"CREATE PROCEDURE {name}",
+            "    @CustomerId INT,",
+            "    @BatchId INT,",
+            "    @Filter NVARCHAR(100) = NULL",
+            "AS",
+            "BEGIN",
+            "    SET NOCOUNT ON;",
+            "    DECLARE @Counter INT = 0, @Total MONEY, @Id INT, @sql NVARCHAR(MAX);",
+        ]
+        size = sum(len(line) + 1 for line in lines)
+        footer = "END"
+        
+        # Spread the control structures evenly over the body
+        body_budget = max(size_bytes - size - len(footer), 0)
+        groups = self._group_controls(controls, max(nesting_depth, 1))
+        interval = body_budget / (len(groups) + 1)
+        next_control_at = size + interval
+        counter = 0
+        
+        while size < size_bytes - len(footer) or groups:
+            if groups and size >= next_control_at:
+                block = self._control_block(groups.pop(0), counter, 1, dynamic_sql_density, comment_ratio)
+                next_control_at += interval
+            else:
+                block = self._statements(counter, 1, dynamic_sql_density, comment_ratio)
+            counter += 1
+            lines.extend(block)
+            size += sum(len(line) + 1 for line in block)
+        
+        lines.append(footer)
+        return "\n".join(lines) + "\n"
+    
+    def generate_corpus(self, directory: str, count: int, **options) -> List[str]:
+        """
+        Write count procedures into directory and return their paths.
+        
+        Keyword options are passed through to generate_procedure().
+        """
+        out_dir = Path(directory)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        
+        paths = []
+        for i in range(count):
+            path = out_dir / f"usp_Synthetic{i:05d}.sql"
+            path.write_text(self.generate_procedure(f"dbo.usp_Synthetic{i:05d}", **options), encoding='utf-8')
+            paths.append(str(path))
+        return paths
+    
+    def _group_controls(self, controls: List[str], depth: int) -> List[List[str]]:
+        """Split controls into nested groups of at most depth levels."""
+        return [controls[i:i + depth] for i in range(0, len(controls), depth)]
+    
+    def _control_block(self, kinds: List[str], n: int, indent: int,
+                       dynamic_sql_density: float, comment_ratio: float) -> List[str]:
+        """Emit nested IF/WHILE blocks, outermost first."""
+        pad = '    ' * indent
+        kind, inner = kinds[0], kinds[1:]
+        
+        if kind == 'IF':
+            lines = [f"{pad}IF @Counter > {n} AND @CustomerId IS NOT NULL", f"{pad}BEGIN"]
+        else:
+            lines = [f"{pad}WHILE @Counter < {n + 10}", f"{pad}BEGIN"]
+        
+        lines.extend(self._statements(n, indent + 1, dynamic_sql_density, comment_ratio))
+        if inner:
+            lines.extend(self._control_block(inner, n, indent + 1, dynamic_sql_density, comment_ratio))
+        if kind == 'WHILE':
+            lines.append(f"{pad}    SET @Counter = @Counter + 1;")
+        lines.append(f"{pad}END")
+        return lines
+    
+    def _statements(self, n: int, indent: int, dynamic_sql_density: float, comment_ratio: float) -> List[str]:
+        """Emit one filler statement, optionally with a comment or as dynamic SQL."""
+        pad = '    ' * indent
+        lines = []
+        
+        if self.rng.random() < comment_ratio:
+            lines.append(pad + self.rng.choice(self.COMMENT_TEMPLATES).format(n=n))
+        
+        if self.rng.random() < dynamic_sql_density:
+            template = self.rng.choice(self.DYNAMIC_TEMPLATES)
+        else:
+            template = self.rng.choice(self.STATEMENT_TEMPLATES)
+        lines.extend(pad + line for line in template.format(n=n % 97).split('\n'))
+        return lines
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""
+Benchmark Runner for the SP Analysis Pipeline
+
+Measures per-stage and end-to-end throughput (MB/s, procs/s) over a
+synthetic corpus at several procedure sizes, producing a scaling curve.
+Results are saved as JSON; the compare command fails when any stage
+regresses by more than a given percentage against a stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py run --output bench.json
+    python benchmarks/run_benchmarks.py run --sizes 1KB,1MB,50MB --output bench.json
+    python benchmarks/run_benchmarks.py compare baseline.json bench.json --threshold 10
+"""
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from benchmarks.corpus_generator import SyntheticCorpusGenerator
+from sp_analyze import SPAnalyzer
+
+DEFAULT_SIZES = '1KB,10KB,100KB,1MB'
+UNITS = {'KB': 1024, 'MB': 1024 * 1024}
+
+
+def parse_size(text: str) -> int:
+    """Parse sizes like '10KB', '50MB' or '2048' into bytes."""
+    text = text.strip().upper()
+    for suffix, factor in UNITS.items():
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * factor)
+    return int(text)
+
+
+def run_point(analyzer: SPAnalyzer, generator: SyntheticCorpusGenerator, size_bytes: int,
+              budget_bytes: int, options: Dict) -> Dict:
+    """
+    Benchmark one point of the scaling curve.
+    
+    Enough procedures of size_bytes are generated to cover budget_bytes
+    (at least one), then analyzed end to end.
+    """
+    count = max(1, budget_bytes // size_bytes)
+    procs = [generator.generate_procedure(f"dbo.usp_Bench{i:05d}", size_bytes=size_bytes, **options)
+             for i in range(count)]
+    total_bytes = sum(len(p.encode('utf-8')) for p in procs)
+    
+    stage_ms: Dict[str, float] = {}
+    start = perf_counter()
+    for i, sql_text in enumerate(procs):
+        result = analyzer.analyze_text(sql_text, f"bench_{i}.sql")
+        for stage, elapsed_ms in result.get('timings', {}).items():
+            stage_ms[stage] = stage_ms.get(stage, 0.0) + elapsed_ms
+    elapsed = perf_counter() - start
+    
+    megabytes = total_bytes / 1_000_000
+    return {
+        'size_bytes': size_bytes,
+        'procs': count,
+        'total_bytes': total_bytes,
+        'stages': {
+            stage: {
+                'ms': round(ms, 3),
+                'mb_per_s': round(megabytes / (ms / 1000), 3) if ms > 0 else None
+            }
+            for stage, ms in stage_ms.items()
+        },
+        'end_to_end': {
+            'seconds': round(elapsed, 4),
+            'mb_per_s': round(megabytes / elapsed, 3) if elapsed > 0 else None,
+            'procs_per_s': round(count / elapsed, 2) if elapsed > 0 else None
+        }
+    }
+
+
+def run_command(args) -> int:
+    """Run the benchmark suite and save results as JSON."""
+    sizes = [parse_size(s) for s in args.sizes.split(',')]
+    budget = parse_size(args.budget)
+    options = {
+        'nesting_depth': args.nesting_depth,
+        'if_count': args.if_count,
+        'while_count': args.while_count,
+        'dynamic_sql_density': args.dynamic_sql_density,
+        'comment_ratio': args.comment_ratio,
+    }
+    
+    analyzer = SPAnalyzer(include_risk_scoring=True)
+    points = []
+    for size_bytes in sizes:
+        generator = SyntheticCorpusGenerator(seed=args.seed)
+        point = run_point(analyzer, generator, size_bytes, budget, options)
+        points.append(point)
+        e2e = point['end_to_end']
+        print(f"{size_bytes:>12} B  x{point['procs']:<6} {e2e['mb_per_s']:>10} MB/s {e2e['procs_per_s']:>10} procs/s")
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'options': options
+        },
+        'points': points
+    }
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nBenchmark results: {args.output}")
+    return 0
+
+
+def compare_results(baseline: Dict, current: Dict, threshold_pct: float, min_ms: float = 1.0) -> List[Dict]:
+    """
+    Compare two benchmark reports point by point.
+    
+    A stage regresses when its throughput drops by more than threshold_pct.
+    Stages whose baseline time is below min_ms are skipped as noise.
+    
+    Returns:
+        One entry per compared (size, stage) with a 'regressed' flag
+    """
+    current_points = {p['size_bytes']: p for p in current.get('points', [])}
+    comparisons = []
+    
+    for base_point in baseline.get('points', []):
+        cur_point = current_points.get(base_point['size_bytes'])
+        if cur_point is None:
+            continue
+        
+        pairs = [(stage, data, cur_point['stages'].get(stage)) for stage, data in base_point['stages'].items()]
+        pairs.append(('end_to_end', {'ms': base_point['end_to_end']['seconds'] * 1000, **base_point['end_to_end']},
+                      cur_point['end_to_end']))
+        
+        for stage, base, cur in pairs:
+            if not cur or not base.get('mb_per_s') or not cur.get('mb_per_s') or base['ms'] < min_ms:
+                continue
+            change_pct = (cur['mb_per_s'] - base['mb_per_s']) / base['mb_per_s'] * 100
+            comparisons.append({
+                'size_bytes': base_point['size_bytes'],
+                'stage': stage,
+                'baseline_mb_per_s': base['mb_per_s'],
+                'current_mb_per_s': cur['mb_per_s'],
+                'change_pct': round(change_pct, 2),
+                'regressed': change_pct < -threshold_pct
+            })
+    
+    return comparisons
+
+
+def compare_command(args) -> int:
+    """Compare a benchmark run against a baseline; fail on regressions."""
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+    
+    comparisons = compare_results(baseline, current, args.threshold, args.min_ms)
+    for c in comparisons:
+        flag = 'REGRESSION' if c['regressed'] else 'ok'
+        print(f"{c['size_bytes']:>12} B  {c['stage']:<14}{c['baseline_mb_per_s']:>10} -> "
+              f"{c['current_mb_per_s']:>10} MB/s {c['change_pct']:>+8.1f}%  {flag}")
+    
+    regressions = [c for c in comparisons if c['regressed']]
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) regressed more than {args.threshold}%")
+        return 1
+    
+    print(f"\nNo regressions beyond {args.threshold}%")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SP analysis benchmark suite')
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+    
+    run = subparsers.add_parser('run', help='Run benchmarks and save JSON results')
+    run.add_argument('--output', '-o', default='bench_results.json', help='JSON results file')
+    run.add_argument('--sizes', default=DEFAULT_SIZES, help=f'Procedure sizes for the scaling curve (default: {DEFAULT_SIZES})')
+    run.add_argument('--budget', default='2MB', help='Approximate corpus bytes per size point (default: 2MB)')
+    run.add_argument('--seed', type=int, default=42, help='Generator seed (default: 42)')
+    run.add_argument('--nesting-depth', type=int, default=2)
+    run.add_argument('--if-count', type=int, default=5)
+    run.add_argument('--while-count', type=int, default=2)
+    run.add_argument('--dynamic-sql-density', type=float, default=0.05)
+    run.add_argument('--comment-ratio', type=float, default=0.1)
+    
+    compare = subparsers.add_parser('compare', help='Fail if a stage regressed against a baseline')
+    compare.add_argument('baseline', help='Baseline JSON results')
+    compare.add_argument('current', help='Current JSON results')
+    compare.add_argument('--threshold', type=float, default=10.0, help='Allowed throughput drop in percent (default: 10)')
+    compare.add_argument('--min-ms', type=float, default=1.0, help='Ignore stages faster than this in the baseline (default: 1.0)')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'run':
+        return run_command(args)
+    elif args.command == 'compare':
+        return compare_command(args)
+    
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
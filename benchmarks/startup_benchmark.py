@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+"""
+CLI Startup Benchmark
+
+Runs `sp_analyze.py analyze FILE` (no report flags) under `-X importtime`
+and fails when the import cost of the CLI exceeds a budget, or when a
+module that should only be loaded on demand (sqlglot, report generators,
+exporters, tracemalloc) shows up on the plain analyze path.
+
+Import cost is the sum of the cumulative times of top-level imports that
+a bare interpreter (`python -c pass`) does not already perform. Wall-clock
+time for the full command is reported alongside it.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --file examples/GetUserOrders.sql --budget-ms 100 --runs 7
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).parent.parent
+CLI = ROOT / 'sp_analyze.py'
+DEFAULT_FILE = ROOT / 'examples' / 'GetUserOrders.sql'
+
+# Modules that must not be imported by `analyze FILE` without report flags
+LAZY_MODULES = [
+    'sqlglot',
+    'xml.etree.ElementTree',
+    'reports.html_generator',
+    'reports.markdown_generator',
+    'analyzer.visualizer',
+    'analyzer.test_generator',
+    'analysis.risk_scorer',
+    'analysis.call_graph',
+    'analysis.dependency_index',
+    'analysis.impact',
+    'analysis.dead_code',
+    'analysis.clone_detector',
+    'analysis.lock_contention',
+    'analysis.rollup',
+    'numpy',
+    'analyzer.incremental',
+    'analyzer.statement_memo',
+    'analyzer.statement_cfg',
+    'analyzer.taint_analyzer',
+    'export.junit_exporter',
+    'testing.test_data_generator',
+    'testing.table_mocker',
+    'tracemalloc',
+    'cProfile',
+]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse `-X importtime` output into (module, cumulative_us, depth) tuples.
+
+    Depth 0 entries are imports issued directly by the program (or by the
+    interpreter during startup); nested imports are indented by two spaces.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), int(cumulative), depth))
+    return entries
+
+
+def _run(args: List[str]) -> Tuple[float, str]:
+    start = perf_counter()
+    proc = subprocess.run([sys.executable] + args, cwd=str(ROOT),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    return (perf_counter() - start) * 1000, proc.stderr
+
+
+def measure(sql_file: Path, runs: int) -> Dict:
+    """Measure import cost and wall-clock time of the plain analyze command."""
+    _, bare_stderr = _run(['-X', 'importtime', '-c', 'pass'])
+    bare_modules = {name for name, _, _ in parse_importtime(bare_stderr)}
+
+    import_ms: List[float] = []
+    wall_ms: List[float] = []
+    bare_wall_ms: List[float] = []
+    modules = set()
+    top_imports: Dict[str, int] = {}
+
+    for _ in range(runs):
+        _, stderr = _run(['-X', 'importtime', str(CLI), 'analyze', str(sql_file)])
+        entries = parse_importtime(stderr)
+        modules.update(name for name, _, _ in entries)
+        total_us = 0
+        for name, cumulative, depth in entries:
+            if depth == 0 and name not in bare_modules:
+                total_us += cumulative
+                top_imports[name] = min(top_imports.get(name, cumulative), cumulative)
+        import_ms.append(total_us / 1000)
+
+        # Wall time is measured without the importtime instrumentation overhead
+        wall_ms.append(_run([str(CLI), 'analyze', str(sql_file)])[0])
+        bare_wall_ms.append(_run(['-c', 'pass'])[0])
+
+    return {
+        'import_ms': statistics.median(import_ms),
+        'wall_ms': statistics.median(wall_ms),
+        'interpreter_ms': statistics.median(bare_wall_ms),
+        'top_imports': sorted(top_imports.items(), key=lambda kv: kv[1], reverse=True),
+        'eager_lazy_modules': [m for m in LAZY_MODULES if m in modules],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='sp_analyze.py startup budget check')
+    parser.add_argument('--file', default=str(DEFAULT_FILE), help='SQL file to analyze')
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='Maximum import cost in milliseconds (default: 100)')
+    parser.add_argument('--runs', type=int, default=5, help='Runs to take the median over (default: 5)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    args = parser.parse_args()
+
+    stats = measure(Path(args.file), max(1, args.runs))
+
+    print("=" * 70)
+    print("CLI STARTUP")
+    print("=" * 70)
+    print(f"  Import cost:      {stats['import_ms']:8.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"  Wall clock:       {stats['wall_ms']:8.1f} ms")
+    print(f"  Bare interpreter: {stats['interpreter_ms']:8.1f} ms")
+    print()
+    print("  Slowest top-level imports:")
+    for name, cumulative in stats['top_imports'][:args.top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if stats['eager_lazy_modules']:
+        failed = True
+        print()
+        print("  Loaded on the plain analyze path (should be lazy):")
+        for name in stats['eager_lazy_modules']:
+            print(f"    - {name}")
+    if stats['import_ms'] > args.budget_ms:
+        failed = True
+        print()
+        print(f"  Import cost exceeds budget by {stats['import_ms'] - args.budget_ms:.1f} ms")
+
+    print()
+    print("FAILED" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,13 +5,26 @@ WORLD-CLASS ENTERPRISE EDITION
 Complete analysis with security, quality, performance insights
 """
 import argparse
+import os
 import sys
-import json
+import time
 from pathlib import Path
 from glob import glob
 
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
 
+# `analyze ... --client SOCKET` forwards to a running daemon before any
+# analyzer is imported; it falls through to a local run if none answers.
+if __name__ == '__main__' and any(a == '--client' or a.startswith('--client=') for a in sys.argv[1:]):
+    from daemon.client import run_client, split_client_args
+    _socket_path, _argv = split_client_args(sys.argv[1:])
+    _exit_code = run_client(_socket_path, _argv) if _socket_path else None
+    if _exit_code is not None:
+        sys.exit(_exit_code)
+
+# Only the core analysis pipeline is imported eagerly. Report generators,
+# exporters, test generation (sqlglot) and profiling helpers are imported
+# inside the commands and options that use them to keep CLI startup fast.
 from parser.tsql_text_parser import TSQLTextParser
 from parser.control_flow_extractor import ControlFlowExtractor
 from analyzer.security_analyzer import SecurityAnalyzer
@@ -20,15 +33,9 @@ from analyzer.performance_analyzer import PerformanceAnalyzer
 from analyzer.cfg_builder import CFGBuilder
 from analyzer.path_analyzer import PathAnalyzer
 from analyzer.logic_explainer import LogicExplainer
-from analyzer.visualizer import Visualizer
-from analyzer.test_generator import SPTestGenerator
-from reports.html_generator import HTMLReportGenerator
-from reports.markdown_generator import MarkdownReportGenerator
-from reports.csv_generator import CSVSummaryGenerator
-from analysis.risk_scorer import RiskScorer
-from export.junit_exporter import JUnitExporter
-from testing.test_data_generator import TestDataGenerator
-from testing.table_mocker import TableMocker
+from analyzer.result_model import ProcResult, Metrics
+from profiling.stage_timer import StageTimer
+from profiling.rule_stats import RULE_STATS
 
 sys.path.insert(0, str(Path(__file__).parent / 'src' / 'core'))
 from logger import setup_logging, get_logger
@@ -36,16 +43,28 @@ from logger import setup_logging, get_logger
 class SPAnalyzer:
     """Main analyzer orchestrator."""
     
-    def __init__(self, include_risk_scoring=False):
+    def __init__(self, include_risk_scoring=False, result_cache=None, incremental=False, statement_memo=None,
+                 taint=False):
         self.logger = get_logger(__name__)
         self.text_parser = TSQLTextParser()
         self.cf_extractor = ControlFlowExtractor()
-        self.security_analyzer = SecurityAnalyzer()
+        self.security_analyzer = SecurityAnalyzer(taint=taint)
         self.quality_analyzer = CodeQualityAnalyzer()
         self.performance_analyzer = PerformanceAnalyzer()
-        self.risk_scorer = RiskScorer() if include_risk_scoring else None
+        self.risk_scorer = None
+        if include_risk_scoring:
+            from analysis.risk_scorer import RiskScorer
+            self.risk_scorer = RiskScorer()
+        self.memory_profiler = None
+        self.result_cache = result_cache
+        # One IncrementalAnalyzer per source, so re-analyzing an edited file
+        # only re-runs statement rules on the statements that changed
+        self.incremental_analyzers = {} if incremental else None
+        # Shared StatementMemo: statement rule results are reused across
+        # procedures for statements that differ only in literals and layout
+        self.statement_memo = statement_memo
     
-    def analyze_file(self, filepath: str) -> dict:
+    def analyze_file(self, filepath: str) -> ProcResult:
         """Comprehensive analysis of a single SP file with error handling."""
         try:
             self.logger.info(f"Analyzing file: {filepath}")
@@ -72,60 +91,95 @@ class SPAnalyzer:
             self.logger.exception(f"Unexpected error analyzing {filepath}")
             return self._error_result(filepath, f"Analysis failed: {str(e)}")
     
-    def analyze_text(self, sql_text: str, source: str = "unknown") -> dict:
+    def analyze_text(self, sql_text: str, source: str = "unknown") -> ProcResult:
         """Analyze SQL text and return comprehensive results with error handling."""
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.key(sql_text)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug(f"Result cache hit for: {source}")
+                return cached.replace(source=source, timings={})
+        
         try:
             self.logger.debug(f"Starting analysis for: {source}")
             
+            timer = StageTimer(self.memory_profiler)
+            
             # Basic parsing
-            basic_info = self.text_parser.parse(sql_text)
+            with timer.stage('parse'):
+                basic_info = self.text_parser.parse(sql_text)
             sp_name = basic_info['name']
             
             # Control flow
-            control_flow = self.cf_extractor.extract_all(sql_text)
+            with timer.stage('control_flow'):
+                control_flow = self.cf_extractor.extract_all(sql_text)
             
             # CFG and path analysis
-            builder = CFGBuilder()
-            cfg = builder.build_from_source(sql_text)
-            
-            path_analyzer = PathAnalyzer()
-            unreachable = path_analyzer.detect_unreachable(cfg)
-            infinite_loops = path_analyzer.detect_infinite_loops(cfg)
-            
-            # Complexity
-            explainer = LogicExplainer()
-            complexity = explainer.summarize_control_flow(cfg)
-            
-            # Security analysis
-            security = self.security_analyzer.analyze(sql_text)
-            security['score'] = self.security_analyzer.get_security_score(sql_text)
-            
-            # Quality analysis
-            quality = self.quality_analyzer.analyze(sql_text, sp_name)
+            with timer.stage('cfg'):
+                builder = CFGBuilder()
+                cfg = builder.build_from_source(sql_text)
+                
+                path_analyzer = PathAnalyzer()
+                unreachable = path_analyzer.detect_unreachable(cfg)
+                infinite_loops = path_analyzer.detect_infinite_loops(cfg)
+                
+                # Complexity
+                explainer = LogicExplainer()
+                complexity = explainer.summarize_control_flow(cfg)
             
-            # Performance analysis
-            performance = self.performance_analyzer.analyze(sql_text)
+            if self.incremental_analyzers is not None or self.statement_memo is not None:
+                # Security, quality and performance rules, reusing unchanged statements
+                with timer.stage('rules'):
+                    rules = self._incremental_analyzer(source).analyze(sql_text, sp_name)
+                    security, quality, performance = rules['security'], rules['quality'], rules['performance']
+                    security['score'] = self.security_analyzer.calculate_security_score(security)
+            else:
+                # Security analysis
+                with timer.stage('security'):
+                    security = self.security_analyzer.analyze(sql_text)
+                    security['score'] = self.security_analyzer.calculate_security_score(security)
+                
+                # Quality analysis
+                with timer.stage('quality'):
+                    quality = self.quality_analyzer.analyze(sql_text, sp_name)
+                
+                # Performance analysis
+                with timer.stage('performance'):
+                    performance = self.performance_analyzer.analyze(sql_text)
             
-            # Build result dictionary
-            result = {
-                'success': True,
-                'source': source,
-                'sp_name': sp_name,
-                'basic': basic_info,
-                'control_flow': control_flow,
-                'cfg_nodes': len(cfg.nodes),
-                'unreachable_blocks': len(unreachable),
-                'infinite_loops': len(infinite_loops),
-                'complexity': complexity,
-                'security': security,
-                'quality': quality,
-                'performance': performance,
-                'dependencies': {
+            # Build result
+            result = ProcResult(
+                success=True,
+                source=source,
+                sp_name=sp_name,
+                basic=basic_info,
+                control_flow=control_flow,
+                cfg_nodes=len(cfg.nodes),
+                unreachable_blocks=len(unreachable),
+                infinite_loops=len(infinite_loops),
+                complexity=complexity,
+                security=security,
+                quality=quality,
+                performance=performance,
+                dependencies={
                     'tables': basic_info['tables'],
-                    'procedures': basic_info['exec_calls']
-                }
-            }
-        
+                    'procedures': basic_info['exec_calls'],
+                    'table_access': basic_info['table_access']
+                },
+                metrics=Metrics(
+                    lines_of_code=basic_info['lines_of_code'],
+                    security_score=security['score'],
+                    quality_score=quality['quality_score'],
+                    quality_grade=quality['grade'],
+                    performance_score=performance['performance_score'],
+                    performance_grade=performance['grade'],
+                    complexity=complexity['complexity'],
+                    issue_count=sum(len(security[k]) for k in ('sql_injection_risks', 'permission_issues', 'security_warnings'))
+                                + len(quality['issues']) + len(performance['issues'])
+                )
+            )
+            
             # Risk assessment (optional)
             if self.risk_scorer:
                 # Prepare analysis data for risk scorer
@@ -139,32 +193,106 @@ class SPAnalyzer:
                     'quality': quality,
                     'performance': performance
                 }
-                result['risk_assessment'] = self.risk_scorer.calculate_risk_score(analysis_data)
+                with timer.stage('risk'):
+                    result.risk_assessment = self.risk_scorer.calculate_risk_score(analysis_data)
             
+            result.timings = timer.as_dict()
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result)
             return result
         
         except Exception as e:
             self.logger.exception(f"Error during analysis of {source}")
             return self._error_result(source, f"Analysis failed: {str(e)}")
     
-    def _error_result(self, source: str, error_msg: str) -> dict:
+    def _incremental_analyzer(self, source: str):
+        analyzer = self.incremental_analyzers.get(source) if self.incremental_analyzers is not None else None
+        if analyzer is None:
+            from analyzer.incremental import IncrementalAnalyzer
+            analyzer = IncrementalAnalyzer(self.security_analyzer, self.quality_analyzer,
+                                           self.performance_analyzer, memo=self.statement_memo)
+            # Without incremental mode each text is analyzed from scratch
+            if self.incremental_analyzers is not None:
+                self.incremental_analyzers[source] = analyzer
+        return analyzer
+    
+    def forget(self, source: str):
+        """Drop per-source incremental state (e.g. when the file is deleted)."""
+        if self.incremental_analyzers is not None:
+            self.incremental_analyzers.pop(source, None)
+    
+    def _error_result(self, source: str, error_msg: str) -> ProcResult:
         """Return partial result when analysis fails"""
-        return {
-            'success': False,
-            'source': source,
-            'error': error_msg,
-            'sp_name': 'UNKNOWN',
-            'basic': {},
-            'security': {'score': 0, 'sql_injection_risks': [], 'permission_issues': [], 'security_warnings': []},
-            'quality': {'grade': 'F', 'quality_score': 0, 'issues': []},
-            'performance': {'grade': 'F', 'performance_score': 0, 'issues': []},
-            'complexity': {'complexity': 0},
-            'dependencies': {'tables': [], 'procedures': []}
-        }
+        return ProcResult(
+            success=False,
+            source=source,
+            error=error_msg,
+            sp_name='UNKNOWN',
+            basic={},
+            security={'score': 0, 'sql_injection_risks': [], 'permission_issues': [], 'security_warnings': []},
+            quality={'grade': 'F', 'quality_score': 0, 'issues': []},
+            performance={'grade': 'F', 'performance_score': 0, 'issues': []},
+            complexity={'complexity': 0},
+            dependencies={'tables': [], 'procedures': [], 'table_access': {}},
+            timings={},
+            metrics=Metrics()
+        )
+
+DEFAULT_CACHE_DIR = '.sp_analyze_cache'
+DEFAULT_INDEX_FILE = '.sp_analyze_index.db'
+# `rollup --sort` choice -> RolledUpProcedure field
+ROLLUP_SORT_KEYS = {'risk': 'transitive_risk', 'complexity': 'transitive_complexity',
+                    'depth': 'call_depth', 'tables': 'tables'}
 
-def analyze_command(args):
+def result_cache_salt(include_risk_scoring: bool, taint: bool = False) -> str:
+    """Fingerprint of the analysis code and options for on-disk cache keys."""
+    import hashlib
+    
+    src = Path(__file__).parent / 'src'
+    paths = [Path(__file__)]
+    for package in ('parser', 'analyzer', 'analysis'):
+        paths.extend(sorted((src / package).glob('*.py')))
+    
+    digest = hashlib.sha256(f"risk={include_risk_scoring} taint={taint}".encode('utf-8'))
+    for path in paths:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def write_html_report(result: ProcResult, filepath: str) -> str:
+    """Write the HTML report next to the source file and return its path."""
+    from reports.html_generator import HTMLReportGenerator
+    html_file = filepath.replace('.sql', '_report.html')
+    with open(html_file, 'w', encoding='utf-8') as f:
+        f.write(HTMLReportGenerator().generate(result, result['sp_name']))
+    return html_file
+
+def write_markdown_report(result: ProcResult, filepath: str) -> str:
+    """Write the Markdown report next to the source file and return its path."""
+    from reports.markdown_generator import MarkdownReportGenerator
+    md_file = filepath.replace('.sql', '_report.md')
+    with open(md_file, 'w', encoding='utf-8') as f:
+        f.write(MarkdownReportGenerator().generate(result, result['sp_name']))
+    return md_file
+
+def write_json_report(result: ProcResult, filepath: str) -> str:
+    """Write the JSON analysis next to the source file and return its path."""
+    import json
+    json_file = filepath.replace('.sql', '_analysis.json')
+    with open(json_file, 'w', encoding='utf-8') as f:
+        json.dump(result.to_dict(), f, indent=2, default=str)
+    return json_file
+
+def wants_risk(args) -> bool:
+    """Risk scoring is on with --risk, and always when building the dependency index."""
+    # `impact` ranks procedures by the risk stored in the index
+    return args.risk or bool(args.index)
+
+def analyze_command(args, analyzer: SPAnalyzer = None):
     """Enhanced analyze command with all features."""
-    analyzer = SPAnalyzer(include_risk_scoring=args.risk)
+    from reports.batch_aggregator import StreamingBatchAggregator
+    
+    if analyzer is None:
+        analyzer = SPAnalyzer(include_risk_scoring=wants_risk(args), taint=args.taint)
     
     # Batch mode or single file
     files = []
@@ -174,43 +302,153 @@ def analyze_command(args):
     else:
         files = [args.file]
     
-    results = []
+    if args.skip_dead:
+        try:
+            graph, report = scan_dead_procedures(files, args.entry_points)
+        except OSError as e:
+            print(f"Error: cannot read entry points: {e}")
+            return 1
+        dead = {graph.sources[graph.id_of(name)] for name in report.dead}
+        files = [f for f in files if f not in dead]
+        print(f"Skipping {len(dead)} dead procedure file(s) unreachable from "
+              f"{len(report.entry_points)} entry point(s); list them with `sp_analyze.py dead`")
+    
+    if args.skip_clones:
+        clusters = find_clone_clusters(files, args.clone_threshold)
+        # Only copies of the analyzed representative are skipped; other members are analyzed
+        clones = {key for cluster in clusters for key in cluster.duplicates(args.clone_threshold)}
+        files = [f for f in files if f not in clones]
+        print(f"Skipping {len(clones)} near-duplicate file(s) in {len(clusters)} clone cluster(s); "
+              f"one representative each is analyzed (see `sp_analyze.py clones`)")
+    
+    # Identical files are analyzed once; the other copies reuse the result
+    duplicates = None
+    if len(files) > 1 and not args.no_dedupe:
+        from analyzer.result_cache import DuplicateFiles
+        duplicates = DuplicateFiles(files)
+        if duplicates.unique < duplicates.total:
+            print(f"Deduplicated {duplicates.total} files to {duplicates.unique} unique procedure texts "
+                  f"(dedup ratio {duplicates.ratio:.2f}x)")
+    
+    # Incremental mode: only files changed since the ref are reported on;
+    # the rest are merged into the batch totals from the on-disk cache
+    changes = None
+    if args.changed_since:
+        from utils.git_changes import GitChangesError, changed_sql_files
+        try:
+            changes = changed_sql_files(args.changed_since)
+        except GitChangesError as e:
+            print(f"Error: cannot compute changes since {args.changed_since}: {e}")
+            return 1
+        changed_count = sum(1 for f in files if f in changes)
+        print(f"Changed since {args.changed_since}: {changed_count} of {len(files)} files "
+              f"({len(files) - changed_count} unchanged, merged from cache)")
+    
+    if args.statement_memo:
+        from analyzer.statement_memo import StatementMemo
+        analyzer.statement_memo = StatementMemo(args.statement_memo)
+    
+    if args.cache_dir or changes is not None:
+        from analyzer.result_cache import DiskResultCache
+        analyzer.result_cache = DiskResultCache(args.cache_dir or DEFAULT_CACHE_DIR,
+                                                salt=result_cache_salt(wants_risk(args), args.taint))
+    
+    profile = None
+    if args.profile:
+        from profiling.profile_report import ProfileAggregator
+        profile = ProfileAggregator()
+    if args.rule_stats:
+        RULE_STATS.reset()
+        RULE_STATS.enabled = True
+    cprofiler = None
+    if args.profile_out:
+        import cProfile
+        cprofiler = cProfile.Profile()
+        cprofiler.enable()
+    
+    mem_profiler = None
+    if args.mem_profile or args.mem_profile_out:
+        from profiling.memory_profiler import MemoryProfiler
+        mem_profiler = MemoryProfiler()
+        analyzer.memory_profiler = mem_profiler
+        mem_profiler.start()
+    
+    # Stream results into running totals; full result dicts are dropped per file
+    batch = StreamingBatchAggregator(
+        csv_file=args.csv if args.csv and len(files) > 1 else None,
+        min_quality=args.min_quality,
+        min_security=args.min_security,
+        min_performance=args.min_performance
+    )
+    call_graph = None
+    if args.call_graph:
+        from analysis.call_graph import CallGraph
+        call_graph = CallGraph()
+    dependency_index = None
+    if args.index:
+        import sqlite3
+        from analysis.dependency_index import DependencyIndex
+        try:
+            dependency_index = DependencyIndex(args.index)
+        except (ValueError, sqlite3.Error) as e:
+            print(f"Error: cannot open dependency index {args.index}: {e}")
+            return 1
+    
+    def analyze_file(filepath):
+        result = duplicates.result_for(filepath) if duplicates else None
+        if result is None:
+            result = analyzer.analyze_file(filepath)
+            if duplicates:
+                duplicates.record(filepath, result)
+        return result
+    
+    def collect(result):
+        batch.add(result)
+        if call_graph is not None:
+            call_graph.add_result(result)
+        if dependency_index is not None:
+            dependency_index.add_result(result)
+    
     for filepath in files:
+        if changes is not None and filepath not in changes:
+            # Cache hit unless this file has never been analyzed
+            collect(analyze_file(filepath))
+            continue
+        
         print(f"\n{'='*60}")
         print(f"Analyzing: {filepath}")
         print('='*60)
         
+        if changes is not None:
+            renamed_from = changes.renamed_from(filepath)
+            if renamed_from:
+                print(f"Renamed from: {Path(renamed_from).name}")
+        
+        mem_token = mem_profiler.begin() if mem_profiler else None
         try:
-            result = analyzer.analyze_file(filepath)
-            results.append(result)
+            result = analyze_file(filepath)
+            collect(result)
+            if profile:
+                profile.add(filepath, result.get('timings', {}))
             
             # Console output
             print_analysis_summary(result, show_risk=args.risk)
             
             # Generate reports
             if args.html:
-                html_gen = HTMLReportGenerator()
-                html_content = html_gen.generate(result, result['sp_name'])
-                html_file = filepath.replace('.sql', '_report.html')
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
+                html_file = write_html_report(result, filepath)
                 print(f"\nHTML report: {html_file}")
             
             if args.markdown:
-                md_gen = MarkdownReportGenerator()
-                md_content = md_gen.generate(result, result['sp_name'])
-                md_file = filepath.replace('.sql', '_report.md')
-                with open(md_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
+                md_file = write_markdown_report(result, filepath)
                 print(f"Markdown report: {md_file}")
             
             if args.json:
-                json_file = filepath.replace('.sql', '_analysis.json')
-                with open(json_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, indent=2, default=str)
+                json_file = write_json_report(result, filepath)
                 print(f"JSON report: {json_file}")
             
             if args.visualize:
+                from analyzer.visualizer import Visualizer
                 builder = CFGBuilder()
                 cfg = builder.build_from_source(open(filepath, 'r').read())
                 viz = Visualizer()
@@ -219,6 +457,7 @@ def analyze_command(args):
             
             # JUnit XML export (NEW!)
             if args.junit:
+                from export.junit_exporter import JUnitExporter
                 exporter = JUnitExporter()
                 junit_file = args.junit if len(files) == 1 else filepath.replace('.sql', '_junit.xml')
                 exporter.export_to_file(result, junit_file)
@@ -227,27 +466,69 @@ def analyze_command(args):
         except Exception as e:
             print(f"Error analyzing {filepath}: {e}")
             if args.strict:
+                batch.close()
                 return 1
+        
+        if mem_profiler:
+            mem_profiler.record_file(filepath, *mem_profiler.end(mem_token))
+    
+    if cprofiler:
+        cprofiler.disable()
+        cprofiler.dump_stats(args.profile_out)
+        print(f"\ncProfile stats: {args.profile_out}")
+    
+    if profile:
+        print()
+        print(profile.generate_report())
+    
+    if mem_profiler:
+        mem_profiler.stop()
+        print()
+        print(mem_profiler.generate_report())
+        if args.mem_profile_out:
+            mem_profiler.write_summary(args.mem_profile_out)
+            print(f"Memory summary: {args.mem_profile_out}")
+    
+    if args.rule_stats:
+        RULE_STATS.enabled = False
+        print()
+        print(RULE_STATS.generate_report())
+    
+    if args.statement_memo:
+        print()
+        print(analyzer.statement_memo.generate_report())
+    
+    batch.close()
     
     # Batch summary
-    if len(results) > 1:
-        print_batch_summary(results)
+    if batch.count > 1:
+        print_batch_summary(batch)
         
-        # Export CSV summary if requested
-        if args.csv:
-            csv_gen = CSVSummaryGenerator()
-            csv_gen.generate(results, args.csv)
-            print(f"\nCSV summary: {args.csv}")
+        if batch.csv_file:
+            print(f"\nCSV summary: {batch.csv_file}")
+    
+    if call_graph is not None:
+        call_graph.save(args.call_graph)
+        print_call_graph_summary(call_graph, args.call_graph)
+    
+    if dependency_index is not None:
+        dependency_index.commit()
+        print(f"\nDependency index: {dependency_index.procedure_count()} procedures -> {args.index}")
+        dependency_index.close()
     
     # CI/CD integration - exit code based on thresholds
-    if args.fail_on_quality and any(r['quality']['quality_score'] < args.min_quality for r in results):
+    if args.fail_on_quality and batch.quality_failures:
         print(f"\nQuality threshold not met (minimum: {args.min_quality})")
         return 1
     
-    if args.fail_on_security and any(r['security']['score'] < args.min_security for r in results):
+    if args.fail_on_security and batch.security_failures:
         print(f"\nSecurity threshold not met (minimum: {args.min_security})")
         return 1
     
+    if args.fail_on_performance and batch.performance_failures:
+        print(f"\nPerformance threshold not met (minimum: {args.min_performance})")
+        return 1
+    
     return 0
 
 def print_analysis_summary(result: dict, show_risk: bool = False):
@@ -290,23 +571,132 @@ def print_analysis_summary(result: dict, show_risk: bool = False):
         print(f"\nFOUND {total_issues} ISSUES")
         print("   Run with --html for detailed report")
 
-def print_batch_summary(results: list):
+def print_batch_summary(batch):
     """Print batch analysis summary."""
     print(f"\n{'='*60}")
-    print(f"BATCH SUMMARY ({len(results)} files)")
+    print(f"BATCH SUMMARY ({batch.count} files)")
     print('='*60)
     
-    avg_security = sum(r['security']['score'] for r in results) / len(results)
-    avg_quality = sum(r['quality']['quality_score'] for r in results) / len(results)
-    total_issues = sum(len(r['security']['sql_injection_risks']) + 
-                      len(r['quality']['issues']) for r in results)
+    print(f"Average Security Score: {batch.avg_security:.1f}/100")
+    print(f"Average Quality Score: {batch.avg_quality:.1f}/100")
+    print(f"Total Issues: {batch.total_issues}")
+
+def scan_dead_procedures(files, entry_points_file=None):
+    """Call graph of `files` (from a quick EXEC scan) and its dead code report."""
+    from analysis.dead_code import call_graph_from_files, find_dead_procedures, load_entry_points
     
-    print(f"Average Security Score: {avg_security:.1f}/100")
-    print(f"Average Quality Score: {avg_quality:.1f}/100")
-    print(f"Total Issues: {total_issues}")
+    entry_points = load_entry_points(entry_points_file) if entry_points_file else None
+    graph, scripts = call_graph_from_files(files)
+    return graph, find_dead_procedures(graph, entry_points, scripts)
+
+def dead_command(args):
+    """Report procedures nothing calls and groups no entry point reaches."""
+    files = glob(args.files)
+    try:
+        graph, report = scan_dead_procedures(files, args.entry_points)
+    except OSError as e:
+        print(f"Error: cannot read entry points: {e}")
+        return 1
+    
+    defined = sum(1 for source in graph.sources if source is not None)
+    print(f"{defined} procedures in {len(files)} files, {len(report.entry_points)} entry point(s)")
+    print(f"\nUnreferenced ({len(report.unreferenced)}): not called by any other procedure")
+    for name in report.unreferenced:
+        print(f"  {name:<40} {graph.sources[graph.id_of(name)]}")
+    print(f"\nUnreachable ({len(report.dead)} in {len(report.unreachable)} group(s)): "
+          f"never run from an entry point")
+    for group in report.unreachable:
+        print(f"  {', '.join(group)}")
+    return 0
+
+def find_clone_clusters(files, threshold: float):
+    """Near-duplicate clusters among `files` (keys are the file paths)."""
+    from analysis.clone_detector import CloneDetector
+    
+    detector = CloneDetector(threshold=threshold)
+    for filepath in files:
+        try:
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                detector.add(filepath, f.read())
+        except OSError:
+            continue  # reported by the full analysis
+    return detector.clusters()
+
+def clones_command(args):
+    """Report clusters of copy-pasted procedure variants."""
+    files = glob(args.files)
+    clusters = find_clone_clusters(files, args.threshold)
+    
+    clones = sum(len(cluster.members) for cluster in clusters)
+    print(f"{len(files)} files, {len(clusters)} clone cluster(s), {clones} near-duplicate(s) "
+          f"at similarity >= {args.threshold}")
+    for cluster in clusters:
+        print(f"\n{cluster.representative} ({cluster.size} procedures)")
+        for key, similarity in cluster.members:
+            print(f"  {similarity:.3f}  {key}")
+    return 0
+
+def conflicts_command(args):
+    """Rank pairs of procedures likely to block each other on shared tables."""
+    from analysis.lock_contention import ConflictMatrix
+    
+    files = glob(args.files)
+    parser = TSQLTextParser()
+    matrix = ConflictMatrix()
+    for filepath in files:
+        try:
+            with open(filepath, 'r', encoding='utf-8', errors='replace') as f:
+                matrix.add(filepath, parser.extract_statement_access(f.read()))
+        except OSError as e:
+            print(f"Skipping {filepath}: {e}")
+    
+    pairs = matrix.pairs(top=args.top or None, min_score=args.min_score)
+    print(f"{len(matrix)} procedures, {len(matrix.tables)} tables, "
+          f"{len(pairs)} conflicting pair(s) shown")
+    for pair in pairs:
+        print(f"  {pair.score:6.1f}  ww {pair.write_write:g}  rw {pair.read_write:g}  "
+              f"{pair.first} <-> {pair.second}  [{', '.join(pair.tables)}]")
+    return 0
+
+def rollup_command(args):
+    """Rank procedures by complexity, risk, call depth or tables including everything they call."""
+    from analysis.rollup import CallTreeRollup
+    
+    files = glob(args.files)
+    analyzer = SPAnalyzer(include_risk_scoring=True)
+    rollup = CallTreeRollup()
+    for filepath in files:
+        result = analyzer.analyze_file(filepath)
+        if not result.get('success', False):
+            print(f"Skipping {filepath}: {result.get('error', 'analysis failed')}")
+            continue
+        rollup.add_result(result)
+    
+    ranked = rollup.ranked(ROLLUP_SORT_KEYS[args.sort], top=args.top or None)
+    cycles = sum(1 for item in rollup.procedures() if item.recursive)
+    print(f"{len(rollup)} procedures, {rollup.graph.edge_count} calls, {len(rollup.tables)} tables, "
+          f"{cycles} in recursion cycles")
+    if ranked:
+        print(f"{'RISK':<14} {'OWN':>4} {'CPLX':>5} {'OWN':>4} {'DEPTH':>5} {'TABLES':>6}  PROCEDURE")
+    for item in ranked:
+        risk = f"{item.risk_level} {item.transitive_risk}"
+        recursive = ' (recursive)' if item.recursive else ''
+        print(f"{risk:<14} {item.risk_score:>4} {item.transitive_complexity:>5} {item.complexity:>4} "
+              f"{item.call_depth:>5} {len(item.tables):>6}  {item.procedure}{recursive}")
+    return 0
+
+def print_call_graph_summary(call_graph, path: str):
+    """Print call graph size and recursion cycles."""
+    cycles = call_graph.recursion_cycles()
+    print(f"\nCall graph: {len(call_graph)} procedures, {call_graph.edge_count} calls, "
+          f"{len(cycles)} recursion cycle(s) -> {path}")
+    for cycle in cycles:
+        print(f"  Cycle: {', '.join(cycle)}")
 
 def test_command(args):
     """Generate unit tests."""
+    from analyzer.test_generator import SPTestGenerator
+    
     analyzer = SPAnalyzer()
     result = analyzer.analyze_file(args.file)
     
@@ -330,7 +720,214 @@ def test_command(args):
     
     return 0
 
-def main():
+def query_command(args):
+    """Look up procedures in the dependency index built by `analyze --index`."""
+    import sqlite3
+    from analysis.dependency_index import DependencyIndex, READ, WRITE
+    
+    if not os.path.exists(args.index):
+        print(f"Error: dependency index not found: {args.index} (build it with `analyze --batch --index`)")
+        return 1
+    
+    for kind in ('table', 'column', 'procedure', 'rule'):
+        name = getattr(args, kind)
+        if name:
+            break
+    access = (READ if args.reads else 0) | (WRITE if args.writes else 0) or READ | WRITE
+    
+    try:
+        with DependencyIndex(args.index) as index:
+            hits = index.lookup(kind, name, access)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: cannot read dependency index {args.index}: {e}")
+        return 1
+    
+    # Tables and columns show how they are accessed
+    label = {'procedure': 'calls', 'rule': 'reported'}.get(kind)
+    for hit in hits:
+        print(f"{hit.procedure:<40} {label or ','.join(hit.access_names):<11} {hit.source or ''}")
+    print(f"{len(hits)} procedure(s)")
+    return 0
+
+def impact_command(args):
+    """Rank every procedure a change to a table or procedure reaches."""
+    import sqlite3
+    from analysis.dependency_index import DependencyIndex, READ, WRITE
+    from analysis.impact import impact_of
+    
+    if not os.path.exists(args.index):
+        print(f"Error: dependency index not found: {args.index} (build it with `analyze --batch --index`)")
+        return 1
+    
+    access = (READ if args.reads else 0) | (WRITE if args.writes else 0) or READ | WRITE
+    try:
+        with DependencyIndex(args.index) as index:
+            impacted = impact_of(index, args.object, kind=args.kind, access=access, max_depth=args.max_depth)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Error: cannot read dependency index {args.index}: {e}")
+        return 1
+    
+    direct = sum(1 for item in impacted if item.depth == 1)
+    print(f"Impact of changing {args.object}: {len(impacted)} procedure(s), {direct} direct")
+    shown = impacted[:args.limit] if args.limit else impacted
+    if shown:
+        print(f"{'RISK':<14} {'DEPTH':>5}  {'PROCEDURE':<40} {'VIA':<30} SOURCE")
+    for item in shown:
+        risk = f"{item.risk_level} {item.risk_score}" if item.risk_level else '-'
+        via = item.via if item.depth == 1 else f"-> {item.via}"
+        print(f"{risk:<14} {item.depth:>5}  {item.procedure:<40} {via:<30} {item.source or ''}")
+    if len(shown) < len(impacted):
+        print(f"... {len(impacted) - len(shown)} more")
+    return 0
+
+def serve_command(args):
+    """Run the analyzer daemon on a Unix domain socket."""
+    from analyzer.result_cache import ResultCache
+    from daemon.client import split_client_args
+    from daemon.server import AnalysisServer
+    
+    # One warm analyzer per (risk, taint) setting; each caches its own results.
+    # The taint ones are created on first use
+    analyzers = {(risk, False): SPAnalyzer(include_risk_scoring=risk, result_cache=ResultCache(max_entries=args.cache_size))
+                 for risk in (False, True)}
+    parser = build_parser()
+    
+    def run_command(argv):
+        _, argv = split_client_args(argv)
+        request_args = parser.parse_args(argv)
+        if request_args.command != 'analyze':
+            print(f"Daemon only serves 'analyze' (got {request_args.command!r})", file=sys.stderr)
+            return 2
+        options = (wants_risk(request_args), request_args.taint)
+        analyzer = analyzers.get(options)
+        if analyzer is None:
+            analyzer = analyzers[options] = SPAnalyzer(include_risk_scoring=options[0], taint=options[1],
+                                                       result_cache=ResultCache(max_entries=args.cache_size))
+        cache = analyzer.result_cache
+        try:
+            return analyze_command(request_args, analyzer=analyzer)
+        finally:
+            analyzer.memory_profiler = None
+            analyzer.statement_memo = None
+            analyzer.result_cache = cache
+    
+    def status():
+        caches = [a.result_cache for a in list(analyzers.values())]
+        return {
+            'cache_entries': sum(len(c) for c in caches),
+            'cache_hits': sum(c.hits for c in caches),
+            'cache_misses': sum(c.misses for c in caches),
+        }
+    
+    try:
+        server = AnalysisServer(args.socket, run_command,
+                                idle_timeout=args.idle_timeout or None, status=status)
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    
+    print(f"Analyzer daemon listening on {args.socket} (idle timeout: {args.idle_timeout or 'none'}s)")
+    sys.stdout.flush()
+    server.serve()
+    print("Analyzer daemon stopped")
+    return 0
+
+def report_watch_result(result: ProcResult, filepath: str, elapsed_ms: float):
+    """Print a one-line status for a re-analyzed file."""
+    stamp = time.strftime('%H:%M:%S')
+    name = os.path.relpath(filepath)
+    if not result.get('success', False):
+        print(f"[{stamp}] {name}: ERROR {result.get('error', 'analysis failed')} [{elapsed_ms:.1f} ms]")
+        return
+    metrics = result['metrics']
+    print(f"[{stamp}] {name}: security {metrics.security_score}/100, "
+          f"quality {metrics.quality_grade} ({metrics.quality_score}), "
+          f"performance {metrics.performance_grade} ({metrics.performance_score}), "
+          f"{metrics.issue_count} issues [{elapsed_ms:.1f} ms]")
+
+def process_changes(analyzer: SPAnalyzer, changed, removed, args, announce: bool = True) -> int:
+    """
+    Re-analyze changed files, refresh their reports and drop reports of removed files.
+    
+    Returns the number of files analyzed.
+    """
+    for filepath in sorted(changed):
+        start = time.perf_counter()
+        result = analyzer.analyze_file(filepath)
+        if result.get('success', False):
+            if args.html:
+                write_html_report(result, filepath)
+            if args.markdown:
+                write_markdown_report(result, filepath)
+            if args.json:
+                write_json_report(result, filepath)
+        if announce:
+            report_watch_result(result, filepath, (time.perf_counter() - start) * 1000)
+            if args.verbose:
+                print_analysis_summary(result, show_risk=args.risk)
+    
+    for filepath in sorted(removed):
+        analyzer.forget(filepath)
+        for suffix in ('_report.html', '_report.md', '_analysis.json'):
+            report_file = filepath.replace('.sql', suffix)
+            if report_file != filepath and os.path.exists(report_file):
+                os.remove(report_file)
+        if announce:
+            print(f"[{time.strftime('%H:%M:%S')}] {os.path.relpath(filepath)}: removed")
+    
+    return len(changed)
+
+def watch_command(args, should_stop=None):
+    """Watch a directory and re-analyze files as they are saved."""
+    from analyzer.result_cache import ResultCache
+    from analyzer.statement_memo import StatementMemo
+    from utils.file_watcher import FileWatcher
+    
+    if not os.path.isdir(args.directory):
+        print(f"Error: not a directory: {args.directory}")
+        return 1
+    
+    analyzer = SPAnalyzer(include_risk_scoring=args.risk, result_cache=ResultCache(), incremental=True,
+                          statement_memo=StatementMemo(), taint=args.taint)
+    watcher = FileWatcher(args.directory, pattern=args.pattern)
+    
+    # Warm the analyzer and cache, and bring reports up to date
+    start = time.perf_counter()
+    count = process_changes(analyzer, set(watcher.files), set(), args, announce=False)
+    print(f"Watching {args.directory}: {count} files matching {args.pattern} "
+          f"analyzed in {(time.perf_counter() - start) * 1000:.0f} ms (Ctrl+C to stop)")
+    print(analyzer.statement_memo.generate_report())
+    sys.stdout.flush()
+    
+    try:
+        while not (should_stop and should_stop()):
+            changed, removed = watcher.wait_for_changes(args.interval, args.debounce, should_stop)
+            if changed or removed:
+                process_changes(analyzer, changed, removed, args)
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    
+    return 0
+
+def lsp_command(args):
+    """Serve diagnostics to an editor over the Language Server Protocol on stdio."""
+    from lsp.server import LanguageServer
+    
+    # stdout carries the protocol; nothing else may be printed to it
+    return LanguageServer(sys.stdin.buffer, sys.stdout.buffer).serve()
+
+def similarity_threshold(value: str) -> float:
+    """argparse type for a clone similarity threshold in (0, 1]."""
+    try:
+        threshold = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid similarity: {value!r}")
+    if not 0 < threshold <= 1:
+        raise argparse.ArgumentTypeError(f"similarity must be in (0, 1], got {value}")
+    return threshold
+
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         description='World-Class SQL SP Analysis Suite',
         formatter_class=argparse.RawDescriptionHelpFormatter
@@ -352,6 +949,25 @@ def main():
     # QA Features (NEW!)
     analyze.add_argument('--risk', action='store_true', help='Include risk assessment')
     analyze.add_argument('--junit', type=str, metavar='FILE', help='Export JUnit XML for CI/CD')
+    analyze.add_argument('--changed-since', type=str, metavar='REF', help='Only analyze .sql files changed/renamed since a git ref; unchanged files come from the result cache')
+    analyze.add_argument('--cache-dir', type=str, metavar='DIR', help=f'On-disk result cache (default with --changed-since: {DEFAULT_CACHE_DIR})')
+    analyze.add_argument('--call-graph', type=str, metavar='FILE', help='Build the cross-procedure EXEC call graph and save it to FILE')
+    analyze.add_argument('--index', type=str, nargs='?', const=DEFAULT_INDEX_FILE, metavar='FILE', help=f'Add the analyzed procedures to a SQLite dependency index for `query` (default: {DEFAULT_INDEX_FILE})')
+    analyze.add_argument('--skip-dead', action='store_true', help='Skip procedures no entry point reaches (see `dead`)')
+    analyze.add_argument('--entry-points', type=str, metavar='FILE', help='Entry-point allow-list for --skip-dead: one name or glob per line (default: every procedure nothing calls)')
+    analyze.add_argument('--skip-clones', action='store_true', help='Analyze one representative per cluster of near-duplicate procedures (see `clones`)')
+    analyze.add_argument('--clone-threshold', type=similarity_threshold, default=0.8, metavar='SIM', help='Similarity for --skip-clones (default: 0.8)')
+    analyze.add_argument('--no-dedupe', action='store_true', help='Analyze every file even if another file in the batch has identical text')
+    analyze.add_argument('--statement-memo', type=int, nargs='?', const=65536, metavar='SIZE', help='Run statement rules per statement and reuse their results for statements repeated across procedures (up to literals, parameters and layout), keeping up to SIZE (default: 65536); reports the hit rate')
+    analyze.add_argument('--taint', action='store_true', help='Report SQL injection only where parameter data flows into EXEC/sp_executesql (QUOTENAME/REPLACE sanitize), instead of flagging every dynamic SQL and concatenation pattern')
+    analyze.add_argument('--client', type=str, metavar='SOCKET', help='Forward to a running `serve` daemon (falls back to local analysis)')
+    
+    # Profiling
+    analyze.add_argument('--profile', action='store_true', help='Report p50/p95/max per analysis stage and slowest files')
+    analyze.add_argument('--profile-out', type=str, metavar='FILE', help='Dump cProfile stats for the whole run')
+    analyze.add_argument('--mem-profile', action='store_true', help='Report tracemalloc peak/retained bytes per stage and file')
+    analyze.add_argument('--mem-profile-out', type=str, metavar='FILE', help='Write the memory profile summary as JSON (implies --mem-profile)')
+    analyze.add_argument('--rule-stats', action='store_true', help='Report per-rule calls, time and hits ranked by cost per finding')
     
     # CI/CD Integration
     analyze.add_argument('--fail-on-quality', action='store_true', help='Fail if quality below threshold')
@@ -368,6 +984,75 @@ def main():
     test.add_argument('--output', '-o', help='Test output file')
     test.add_argument('--enhanced', action='store_true', help='Generate tests with table mocks and test data')
     
+    # WATCH COMMAND
+    watch = subparsers.add_parser('watch', help='Re-analyze files in a directory as they change')
+    watch.add_argument('directory', help='Directory to watch (recursively)')
+    watch.add_argument('--pattern', default='*.sql', help='File name pattern (default: *.sql)')
+    watch.add_argument('--interval', type=float, default=0.05, help='Polling interval in seconds (default: 0.05)')
+    watch.add_argument('--debounce', type=float, default=0.03, help='Quiet period that ends a burst of saves, in seconds (default: 0.03)')
+    watch.add_argument('--html', action='store_true', help='Keep HTML reports up to date')
+    watch.add_argument('--markdown', '-m', action='store_true', help='Keep Markdown reports up to date')
+    watch.add_argument('--json', action='store_true', help='Keep JSON reports up to date')
+    watch.add_argument('--risk', action='store_true', help='Include risk assessment')
+    watch.add_argument('--taint', action='store_true', help='Data-flow SQL injection check (see analyze --taint)')
+    watch.add_argument('--verbose', action='store_true', help='Print the full summary for each change')
+    
+    # QUERY COMMAND
+    query = subparsers.add_parser('query', help='Find procedures that use a table, column, procedure or rule in the dependency index')
+    target = query.add_mutually_exclusive_group(required=True)
+    target.add_argument('--table', metavar='NAME', help='Procedures reading or writing a table (e.g. dbo.Orders)')
+    target.add_argument('--column', metavar='TABLE.COLUMN', help='Procedures writing a column (e.g. dbo.Orders.Status)')
+    target.add_argument('--procedure', metavar='NAME', help='Procedures that EXEC a procedure')
+    target.add_argument('--rule', metavar='ID', help='Procedures with findings for a rule (e.g. SEC001)')
+    query.add_argument('--reads', action='store_true', help='Only procedures reading the table')
+    query.add_argument('--writes', action='store_true', help='Only procedures writing the table or column')
+    query.add_argument('--index', default=DEFAULT_INDEX_FILE, help=f'Dependency index file (default: {DEFAULT_INDEX_FILE})')
+    
+    # DEAD COMMAND
+    dead = subparsers.add_parser('dead', help='Find unreferenced procedures and call subgraphs no entry point reaches')
+    dead.add_argument('files', help='SQL file pattern (e.g. "procs/*.sql")')
+    dead.add_argument('--entry-points', type=str, metavar='FILE', help='Entry-point allow-list: one name or glob per line (default: every procedure nothing calls)')
+    
+    # CLONES COMMAND
+    clones = subparsers.add_parser('clones', help='Find near-duplicate (copy-pasted) procedures')
+    clones.add_argument('files', help='SQL file pattern (e.g. "procs/*.sql")')
+    clones.add_argument('--threshold', type=similarity_threshold, default=0.8, metavar='SIM', help='Minimum estimated token-shingle similarity, 0-1 (default: 0.8)')
+    
+    # CONFLICTS COMMAND
+    conflicts = subparsers.add_parser('conflicts', help='Rank procedure pairs likely to block each other on shared tables')
+    conflicts.add_argument('files', help='SQL file pattern (e.g. "procs/*.sql")')
+    conflicts.add_argument('--top', type=int, default=20, metavar='N', help='Show the N highest-scoring pairs; 0 shows all (default: 20)')
+    conflicts.add_argument('--min-score', type=float, default=0.0, metavar='S', help='Only show pairs scoring above S')
+    
+    # ROLLUP COMMAND
+    rollup = subparsers.add_parser('rollup', help='Rank procedures by complexity and risk including every procedure they call')
+    rollup.add_argument('files', help='SQL file pattern (e.g. "procs/*.sql")')
+    rollup.add_argument('--sort', choices=sorted(ROLLUP_SORT_KEYS), default='risk', help='Rank by transitive risk, transitive complexity, call depth or table footprint (default: risk)')
+    rollup.add_argument('--top', type=int, default=20, metavar='N', help='Show the N highest-ranked procedures; 0 shows all (default: 20)')
+    
+    # IMPACT COMMAND
+    impact = subparsers.add_parser('impact', help='Rank the procedures affected by changing a table or procedure')
+    impact.add_argument('object', help='Table or procedure name (e.g. dbo.Orders)')
+    impact.add_argument('--kind', choices=['table', 'procedure'], help='Only look OBJECT up as this kind (default: both)')
+    impact.add_argument('--reads', action='store_true', help='Only start from procedures reading the table')
+    impact.add_argument('--writes', action='store_true', help='Only start from procedures writing the table')
+    impact.add_argument('--max-depth', type=int, metavar='N', help='Stop N calls away from the change')
+    impact.add_argument('--limit', type=int, default=50, metavar='N', help='Show the N riskiest procedures; 0 shows all (default: 50)')
+    impact.add_argument('--index', default=DEFAULT_INDEX_FILE, help=f'Dependency index file (default: {DEFAULT_INDEX_FILE})')
+    
+    # SERVE COMMAND
+    serve = subparsers.add_parser('serve', help='Run a long-lived analyzer daemon for --client requests')
+    serve.add_argument('--socket', required=True, help='Unix domain socket path (e.g. /tmp/spa.sock)')
+    serve.add_argument('--idle-timeout', type=float, default=600, help='Exit after this many idle seconds; 0 disables (default: 600)')
+    serve.add_argument('--cache-size', type=int, default=1024, help='Cached results per analyzer (default: 1024)')
+    
+    # LSP COMMAND
+    subparsers.add_parser('lsp', help='Run a Language Server Protocol server on stdio for editor diagnostics')
+    
+    return parser
+
+def main():
+    parser = build_parser()
     args = parser.parse_args()
     
     if not args.command:
@@ -378,6 +1063,24 @@ def main():
         return analyze_command(args)
     elif args.command == 'test':
         return test_command(args)
+    elif args.command == 'watch':
+        return watch_command(args)
+    elif args.command == 'query':
+        return query_command(args)
+    elif args.command == 'impact':
+        return impact_command(args)
+    elif args.command == 'dead':
+        return dead_command(args)
+    elif args.command == 'clones':
+        return clones_command(args)
+    elif args.command == 'conflicts':
+        return conflicts_command(args)
+    elif args.command == 'rollup':
+        return rollup_command(args)
+    elif args.command == 'serve':
+        return serve_command(args)
+    elif args.command == 'lsp':
+        return lsp_command(args)
     
     return 0
 
@@ -1,4 +1,27 @@
-"""Analysis module initialization."""
-from .risk_scorer import RiskScorer
+"""Analysis module initialization.
 
-__all__ = ['RiskScorer']
+Submodules are loaded on first attribute access so that `--risk` (which
+imports the risk scorer) does not also pull in pickle/sqlite3 for the
+call graph, dependency index, impact and dead-code analyses.
+"""
+import importlib
+
+_EXPORTS = {
+    'RiskScorer': '.risk_scorer',
+    'CallGraph': '.call_graph',
+    'normalize_proc_name': '.call_graph',
+    'DependencyIndex': '.dependency_index',
+    'impact_of': '.impact',
+    'find_dead_procedures': '.dead_code',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
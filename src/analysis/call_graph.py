@@ -0,0 +1,408 @@
+"""
+Call Graph - Cross-Procedure EXEC Dependencies
+
+Connect the per-file EXEC lists from batch results into one codebase-wide
+graph: recursion cycles (strongly connected components), a bottom-up
+ordering, and "what does usp_X end up calling" queries. The graph can be
+saved and reloaded so later runs do not rebuild it.
+"""
+import os
+import pickle
+import tempfile
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+FORMAT_VERSION = 1
+
+
+def normalize_proc_name(name: str) -> str:
+    """
+    Key under which a procedure name is interned.
+    
+    Brackets are dropped, names compare case-insensitively and an
+    unqualified name means the dbo schema, so 'usp_X', 'dbo.usp_X' and
+    '[DBO].[usp_x]' are the same procedure. Database and server prefixes
+    are ignored.
+    """
+    parts = name.replace('[', '').replace(']', '').strip().lower().split('.')
+    schema = parts[-2] if len(parts) > 1 and parts[-2] else 'dbo'
+    return f"{schema}.{parts[-1]}"
+
+
+class CallGraph:
+    """
+    Procedures as interned integer ids with EXEC edges between them.
+    
+    Procedures are added one at a time (add_procedure / add_result) while
+    streaming a batch. Queries run on a compact frozen form - callee ids
+    of procedure i are targets[offsets[i]:offsets[i + 1]] - which is built
+    on first use and is also what save() writes to disk.
+    """
+    
+    def __init__(self):
+        self.names: List[str] = []                 # id -> display name
+        self.sources: List[Optional[str]] = []     # id -> defining file, None if only called
+        self._ids: Dict[str, int] = {}             # normalized name -> id
+        self._calls: Optional[List[Set[int]]] = [] # mutable adjacency, None while frozen
+        self._offsets: Optional[array] = None
+        self._targets: Optional[array] = None
+        self._callers: Optional[tuple] = None      # reverse CSR, built on demand
+        self._components: Optional[array] = None   # id -> SCC number
+        self._caller_depths: Dict[frozenset, Dict[int, Tuple[int, int]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def __contains__(self, name: str) -> bool:
+        return normalize_proc_name(name) in self._ids
+    
+    def intern(self, name: str) -> int:
+        """Id of a procedure, allocating one the first time the name is seen."""
+        key = normalize_proc_name(name)
+        proc_id = self._ids.get(key)
+        if proc_id is None:
+            calls = self._mutable()  # thaw before the id count changes
+            proc_id = self._ids[key] = len(self.names)
+            self.names.append(name.replace('[', '').replace(']', ''))
+            self.sources.append(None)
+            calls.append(set())
+        return proc_id
+    
+    def id_of(self, name: str) -> int:
+        """
+        Id of a known procedure.
+        
+        Raises:
+            KeyError: if the procedure was neither defined nor called
+        """
+        return self._ids[normalize_proc_name(name)]
+    
+    def _mutable(self) -> List[Set[int]]:
+        if self._calls is None:
+            offsets, targets = self._offsets, self._targets
+            self._calls = [set(targets[offsets[i]:offsets[i + 1]]) for i in range(len(self.names))]
+        self._offsets = self._targets = self._callers = self._components = None
+        self._caller_depths = {}
+        return self._calls
+    
+    def add_procedure(self, name: str, calls: Iterable[str], source: Optional[str] = None) -> int:
+        """Record that procedure `name` (defined in `source`) EXECs each of `calls`."""
+        proc_id = self.intern(name)
+        if self.sources[proc_id] is None:
+            # The defining name is a better display name than a call site's
+            self.names[proc_id] = name.replace('[', '').replace(']', '')
+            self.sources[proc_id] = source or ''
+        callee_ids = [self.intern(callee) for callee in calls]
+        self._mutable()[proc_id].update(callee_ids)
+        return proc_id
+    
+    def add_result(self, result) -> Optional[int]:
+        """Add a procedure from an analysis result; failed analyses are skipped."""
+        if not result.get('success', False):
+            return None
+        return self.add_procedure(result.get('sp_name', 'Unknown'),
+                                  result.get('dependencies', {}).get('procedures', []),
+                                  result.get('source'))
+    
+    @classmethod
+    def from_results(cls, results: Iterable) -> 'CallGraph':
+        graph = cls()
+        for result in results:
+            graph.add_result(result)
+        return graph
+    
+    def _freeze(self):
+        if self._offsets is not None:
+            return
+        offsets = array('i', [0])
+        targets = array('i')
+        for callees in self._calls:
+            targets.extend(sorted(callees))
+            offsets.append(len(targets))
+        self._offsets, self._targets = offsets, targets
+        self._calls = None
+    
+    @property
+    def edge_count(self) -> int:
+        self._freeze()
+        return len(self._targets)
+    
+    def is_defined(self, name: str) -> bool:
+        """True if the procedure's own source was analyzed (not just called)."""
+        return self.sources[self.id_of(name)] is not None
+    
+    def callees(self, name: str) -> List[str]:
+        """Procedures `name` EXECs directly."""
+        self._freeze()
+        proc_id = self.id_of(name)
+        return [self.names[i] for i in self._targets[self._offsets[proc_id]:self._offsets[proc_id + 1]]]
+    
+    def callee_ids(self, proc_id: int) -> array:
+        """Ids of the procedures procedure `proc_id` EXECs directly."""
+        self._freeze()
+        return self._targets[self._offsets[proc_id]:self._offsets[proc_id + 1]]
+    
+    def _reverse(self):
+        if self._callers is None:
+            self._freeze()
+            offsets, targets = self._offsets, self._targets
+            counts = [0] * (len(self.names) + 1)
+            for target in targets:
+                counts[target + 1] += 1
+            for i in range(len(self.names)):
+                counts[i + 1] += counts[i]
+            reverse_offsets = array('i', counts)
+            reverse_targets = array('i', bytes(4 * len(targets)))
+            fill = counts[:-1]
+            for caller in range(len(self.names)):
+                for edge in range(offsets[caller], offsets[caller + 1]):
+                    target = targets[edge]
+                    reverse_targets[fill[target]] = caller
+                    fill[target] += 1
+            self._callers = (reverse_offsets, reverse_targets)
+        return self._callers
+    
+    def callers(self, name: str) -> List[str]:
+        """Procedures that EXEC `name` directly."""
+        offsets, targets = self._reverse()
+        proc_id = self.id_of(name)
+        return [self.names[i] for i in targets[offsets[proc_id]:offsets[proc_id + 1]]]
+    
+    def _reachable_ids(self, starts: Iterable[int], offsets: array, targets: array) -> bytearray:
+        seen = bytearray(len(self.names))
+        pending = []
+        for start in starts:
+            pending.extend(targets[offsets[start]:offsets[start + 1]])
+        while pending:
+            node = pending.pop()
+            if seen[node]:
+                continue
+            seen[node] = 1
+            pending.extend(targets[offsets[node]:offsets[node + 1]])
+        return seen
+    
+    def reachable_from(self, name: str) -> List[str]:
+        """
+        Every procedure `name` calls directly or transitively, sorted.
+        
+        `name` itself is included only if it is part of a recursion cycle.
+        """
+        self._freeze()
+        seen = self._reachable_ids((self.id_of(name),), self._offsets, self._targets)
+        return sorted(self.names[i] for i in range(len(seen)) if seen[i])
+    
+    def callers_of(self, name: str) -> List[str]:
+        """Every procedure that calls `name` directly or transitively, sorted."""
+        offsets, targets = self._reverse()
+        seen = self._reachable_ids((self.id_of(name),), offsets, targets)
+        return sorted(self.names[i] for i in range(len(seen)) if seen[i])
+    
+    def caller_depths(self, names: Iterable[str]) -> Dict[int, Tuple[int, int]]:
+        """
+        Shortest call-chain distance from every caller to any of `names`.
+        
+        Maps procedure id -> (depth, callee id the chain goes through), where
+        depth 1 means the procedure calls one of `names` directly. Unknown
+        names are ignored. Results are memoized until the graph changes, so
+        repeated impact queries do not walk the graph again.
+        """
+        seeds = frozenset(self._ids[key] for key in map(normalize_proc_name, names) if key in self._ids)
+        depths = self._caller_depths.get(seeds)
+        if depths is None:
+            offsets, targets = self._reverse()
+            depths = {}
+            frontier = sorted(seeds)
+            depth = 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for callee in frontier:
+                    for edge in range(offsets[callee], offsets[callee + 1]):
+                        caller = targets[edge]
+                        if caller not in depths:
+                            depths[caller] = (depth, callee)
+                            next_frontier.append(caller)
+                frontier = next_frontier
+            self._caller_depths[seeds] = depths
+        return depths
+    
+    def reaches(self, caller: str, callee: str) -> bool:
+        """True if `caller` calls `callee` directly or transitively."""
+        self._freeze()
+        return bool(self._reachable_ids((self.id_of(caller),), self._offsets, self._targets)[self.id_of(callee)])
+    
+    def reachable_ids(self, start_ids: Iterable[int]) -> bytearray:
+        """
+        Flag per procedure id: 1 if any of `start_ids` calls it directly or
+        transitively. Linear in the size of the graph.
+        """
+        self._freeze()
+        return self._reachable_ids(start_ids, self._offsets, self._targets)
+    
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        """Every (caller id, callee id) pair."""
+        self._freeze()
+        offsets, targets = self._offsets, self._targets
+        for caller in range(len(self.names)):
+            for edge in range(offsets[caller], offsets[caller + 1]):
+                yield caller, targets[edge]
+    
+    def component_ids(self) -> array:
+        """
+        Strongly connected component number of every procedure id.
+        
+        Components are numbered in reverse topological order: every
+        procedure's callees are in its own component or a lower-numbered one.
+        """
+        if self._components is None:
+            self._freeze()
+            self._components = self._tarjan()
+        return self._components
+    
+    def _tarjan(self) -> array:
+        # Iterative Tarjan; recursion would overflow on long call chains
+        offsets, targets = self._offsets, self._targets
+        count = len(self.names)
+        index = [-1] * count
+        low = [0] * count
+        on_stack = bytearray(count)
+        stack: List[int] = []
+        components = array('i', [-1]) * count
+        next_index = 0
+        next_component = 0
+        
+        for root in range(count):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = next_index
+            next_index += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                frame = work[-1]
+                node, edge = frame
+                if edge < offsets[node + 1]:
+                    frame[1] = edge + 1
+                    target = targets[edge]
+                    if index[target] == -1:
+                        index[target] = low[target] = next_index
+                        next_index += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append([target, offsets[target]])
+                    elif on_stack[target] and index[target] < low[node]:
+                        low[node] = index[target]
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        components[member] = next_component
+                        if member == node:
+                            break
+                    next_component += 1
+        return components
+    
+    def strongly_connected_components(self) -> List[List[str]]:
+        """Procedures grouped by component, callee components first."""
+        components = self.component_ids()
+        groups: List[List[str]] = [[] for _ in range(max(components, default=-1) + 1)]
+        for proc_id, component in enumerate(components):
+            groups[component].append(self.names[proc_id])
+        return groups
+    
+    def recursion_cycles(self) -> List[List[str]]:
+        """Components in which procedures call each other (or one calls itself)."""
+        components = self.component_ids()
+        offsets, targets = self._offsets, self._targets
+        recursive = set()
+        for proc_id in range(len(self.names)):
+            for edge in range(offsets[proc_id], offsets[proc_id + 1]):
+                if components[targets[edge]] == components[proc_id]:
+                    recursive.add(components[proc_id])
+                    break
+        return [sorted(group) for number, group in enumerate(self.strongly_connected_components())
+                if number in recursive]
+    
+    def topological_order(self) -> List[str]:
+        """
+        All procedures, callees before their callers.
+        
+        Procedures in a recursion cycle have no such order; they are
+        listed next to each other.
+        """
+        components = self.component_ids()
+        return [self.names[i] for i in sorted(range(len(self.names)), key=components.__getitem__)]
+    
+    def dumps(self) -> bytes:
+        """The frozen graph as bytes, for loads()."""
+        components = self.component_ids()
+        state = {
+            'version': FORMAT_VERSION,
+            'names': self.names,
+            'keys': list(self._ids),  # in id order
+            'sources': self.sources,
+            'offsets': self._offsets.tobytes(),
+            'targets': self._targets.tobytes(),
+            'components': components.tobytes(),
+        }
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    @classmethod
+    def loads(cls, data: bytes) -> 'CallGraph':
+        """
+        Rebuild a graph from dumps() output.
+        
+        Raises:
+            ValueError: if the data was written by an incompatible version
+        """
+        state = pickle.loads(data)
+        if not isinstance(state, dict) or state.get('version') != FORMAT_VERSION:
+            raise ValueError(f"not a call graph in format version {FORMAT_VERSION}")
+        graph = cls()
+        graph.names = state['names']
+        graph.sources = state['sources']
+        graph._ids = dict(zip(state['keys'], range(len(graph.names))))
+        graph._calls = None
+        graph._offsets = array('i')
+        graph._offsets.frombytes(state['offsets'])
+        graph._targets = array('i')
+        graph._targets.frombytes(state['targets'])
+        graph._components = array('i')
+        graph._components.frombytes(state['components'])
+        return graph
+    
+    def save(self, path: str):
+        """Write the frozen graph to `path` (atomically)."""
+        data = self.dumps()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    @classmethod
+    def load(cls, path: str) -> 'CallGraph':
+        """
+        Read a graph written by save().
+        
+        Raises:
+            ValueError: if the file was written by an incompatible version
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        try:
+            return cls.loads(data)
+        except ValueError:
+            raise ValueError(f"{path} is not a call graph in format version {FORMAT_VERSION}") from None
@@ -0,0 +1,183 @@
+"""
+Clone Detector - Near-Duplicate Procedures
+
+Find copy-pasted variants of the same procedure across a codebase.
+Each procedure becomes a set of token shingles (runs of consecutive
+normalized tokens), summarized by a MinHash signature; locality-sensitive
+hashing over bands of the signatures finds candidate pairs without
+comparing every procedure with every other one.
+
+Requires numpy.
+"""
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from parser.tokenizer import tokenize
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_HASH_MASK = np.uint64(0xFFFFFFFF)
+_SHINGLE_BASE = np.uint64(1000003)
+_CHUNK = 4096  # shingles hashed per step, bounding the num_perm x chunk matrix
+
+
+class CloneCluster(NamedTuple):
+    """Procedures that are near-duplicates of one representative."""
+    representative: str
+    members: List[Tuple[str, float]]   # (key, estimated similarity to the representative), representative excluded
+    
+    @property
+    def size(self) -> int:
+        return len(self.members) + 1
+    
+    def duplicates(self, threshold: float) -> List[str]:
+        """
+        Members at least `threshold` similar to the representative.
+        
+        Clusters are chained (A~B and B~C put A and C together), so
+        some members can be less similar to the representative.
+        """
+        return [key for key, similarity in self.members if similarity >= threshold]
+
+
+def _bands_for(threshold: float, num_perm: int) -> Tuple[int, int]:
+    # (bands, rows) whose S-curve (1/bands)^(1/rows) sits just below the
+    # threshold, so few true clones are missed and verification removes
+    # the extra candidates
+    best = (1, num_perm)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def _mode(values: np.ndarray):
+    unique, counts = np.unique(values, return_counts=True)
+    return unique[np.argmax(counts)]
+
+
+class CloneDetector:
+    """
+    MinHash/LSH near-duplicate detector.
+    
+    add() every procedure, then call clusters(). Similarity is the
+    Jaccard similarity of the procedures' token shingle sets, estimated
+    from num_perm MinHash values.
+    """
+    
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _bands_for(threshold, num_perm)
+        generator = np.random.RandomState(seed)
+        # Universal hashes (a * x + b) mod p, one per permutation, as a column
+        self._a = generator.randint(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._powers = _SHINGLE_BASE ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64)
+        self.keys: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._signatures: List[np.ndarray] = []
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def shingles(self, sql_text: str) -> np.ndarray:
+        """32-bit hashes of the distinct token shingles of sql_text."""
+        tokens = tokenize(sql_text)
+        if not tokens:
+            return np.empty(0, dtype=np.uint64)
+        token_hashes = np.fromiter((zlib.crc32(token.encode('utf-8')) for token in tokens),
+                                   dtype=np.uint64, count=len(tokens))
+        size = min(self.shingle_size, len(tokens))
+        windows = np.lib.stride_tricks.sliding_window_view(token_hashes, size)
+        return np.unique((windows * self._powers[-size:]).sum(axis=1) & _HASH_MASK)
+    
+    def signature(self, sql_text: str) -> Optional[np.ndarray]:
+        """MinHash signature of sql_text; None if it has no tokens."""
+        shingles = self.shingles(sql_text)
+        if not len(shingles):
+            return None
+        signature = np.full(self.num_perm, _HASH_MASK, dtype=np.uint64)
+        for start in range(0, len(shingles), _CHUNK):
+            # num_perm x chunk matrix of permuted hashes, minimum per row
+            hashed = (self._a * shingles[start:start + _CHUNK] + self._b) % _MERSENNE_PRIME & _HASH_MASK
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+    
+    def add(self, key: str, sql_text: str) -> bool:
+        """Add a procedure; returns False (and skips it) if it has no tokens."""
+        signature = self.signature(sql_text)
+        if signature is None:
+            return False
+        self._ids[key] = len(self.keys)
+        self.keys.append(key)
+        self._signatures.append(signature)
+        return True
+    
+    def similarity(self, first: str, second: str) -> float:
+        """Estimated Jaccard similarity of two added procedures."""
+        return float(np.mean(self._signatures[self._ids[first]] == self._signatures[self._ids[second]]))
+    
+    def _candidate_pairs(self, signatures: np.ndarray) -> Iterable[Tuple[int, int]]:
+        # Within each band's bucket every member is paired with the bucket's
+        # first member only; clones that share one band usually share
+        # several, so this stays linear even for huge buckets of copies
+        seen = set()
+        for band in range(self.bands):
+            buckets: Dict[bytes, int] = {}
+            rows = signatures[:, band * self.rows:(band + 1) * self.rows]
+            for proc_id in range(len(rows)):
+                first = buckets.setdefault(rows[proc_id].tobytes(), proc_id)
+                if first != proc_id and (first, proc_id) not in seen:
+                    seen.add((first, proc_id))
+                    yield first, proc_id
+    
+    def clusters(self) -> List[CloneCluster]:
+        """
+        Groups of near-duplicates (similarity >= threshold), largest first.
+        
+        The representative of each group is the member agreeing most with
+        the group's majority signature; singletons are not reported.
+        """
+        if not self._signatures:
+            return []
+        signatures = np.vstack(self._signatures)
+        parent = list(range(len(self.keys)))
+        
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        
+        for first, second in self._candidate_pairs(signatures):
+            if np.mean(signatures[first] == signatures[second]) >= self.threshold:
+                parent[find(second)] = find(first)
+        
+        groups: Dict[int, List[int]] = {}
+        for proc_id in range(len(self.keys)):
+            groups.setdefault(find(proc_id), []).append(proc_id)
+        
+        clusters = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            group = signatures[members]
+            majority = np.array([_mode(column) for column in group.T], dtype=group.dtype)
+            center = int(np.argmax((group == majority).sum(axis=1)))
+            representative = members[center]
+            similarity = (group == group[center]).mean(axis=1)
+            clusters.append(CloneCluster(
+                self.keys[representative],
+                sorted(((self.keys[proc_id], round(float(similarity[i]), 3))
+                        for i, proc_id in enumerate(members) if proc_id != representative),
+                       key=lambda member: (-member[1], member[0]))))
+        clusters.sort(key=lambda cluster: (-cluster.size, cluster.representative))
+        return clusters
@@ -0,0 +1,137 @@
+"""
+Dead Code - Unreferenced and Unreachable Procedures
+
+Find procedures nothing calls, and whole groups of procedures that can
+never run because no entry point (agent job, application call, ...)
+reaches them through EXEC chains. Everything here is linear in the size
+of the call graph.
+"""
+import fnmatch
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from analysis.call_graph import CallGraph, normalize_proc_name
+
+_GLOB_CHARS = frozenset('*?[')
+
+
+class DeadCodeReport(NamedTuple):
+    """Result of find_dead_procedures."""
+    unreferenced: List[str]        # defined, called by no other procedure, not an entry point
+    unreachable: List[List[str]]   # defined, reached from no entry point; grouped into connected subgraphs
+    entry_points: List[str]        # procedures the search started from
+    
+    @property
+    def dead(self) -> List[str]:
+        """Every unreachable procedure, sorted."""
+        return sorted(name for group in self.unreachable for name in group)
+
+
+def load_entry_points(path: str) -> List[str]:
+    """
+    Read an entry-point allow-list: one procedure name or glob pattern
+    (e.g. dbo.job_*) per line; blank lines and '#' comments are ignored.
+    """
+    entry_points = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                entry_points.append(line)
+    return entry_points
+
+
+def _entry_ids(graph: CallGraph, entry_points: Iterable[str]) -> List[int]:
+    ids = set()
+    patterns = []
+    for entry in entry_points:
+        if entry in graph:
+            ids.add(graph.id_of(entry))
+        elif _GLOB_CHARS.intersection(entry):
+            patterns.append(normalize_proc_name(entry))
+    if patterns:
+        keys = [normalize_proc_name(name) for name in graph.names]
+    for pattern in patterns:
+        ids.update(i for i, key in enumerate(keys) if fnmatch.fnmatchcase(key, pattern))
+    return sorted(ids)
+
+
+def find_dead_procedures(graph: CallGraph, entry_points: Optional[Iterable[str]] = None,
+                         scripts: Iterable[str] = ()) -> DeadCodeReport:
+    """
+    Unreferenced and unreachable procedures in a call graph.
+    
+    entry_points are names or glob patterns of procedures that run on
+    their own. Without them, every procedure nothing else calls is
+    assumed to be one, so only groups that call each other but are
+    called from nowhere else (orphan cycles) are unreachable. Only
+    procedures whose source was analyzed are ever reported.
+    
+    scripts (see call_graph_from_files) always run and are never reported.
+    """
+    count = len(graph)
+    referenced = bytearray(count)
+    for caller, callee in graph.edges():
+        if caller != callee:
+            referenced[callee] = 1
+    defined = [graph.sources[i] is not None for i in range(count)]
+    
+    entry = {graph.id_of(script) for script in scripts}
+    if entry_points is None:
+        roots = [i for i in range(count) if defined[i] and not referenced[i]]
+    else:
+        entry.update(_entry_ids(graph, entry_points))
+        roots = sorted(entry)
+    live = graph.reachable_ids(roots)
+    for root in roots:
+        live[root] = 1
+    
+    unreferenced = sorted(graph.names[i] for i in range(count)
+                          if defined[i] and not referenced[i] and i not in entry)
+    return DeadCodeReport(unreferenced, _connected_groups(graph, live, defined), [graph.names[i] for i in roots])
+
+
+def _connected_groups(graph: CallGraph, live: bytearray, defined: List[bool]) -> List[List[str]]:
+    # Union-find over the calls between dead procedures; biggest group first
+    parent = list(range(len(graph)))
+    
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    for caller, callee in graph.edges():
+        if not live[caller] and not live[callee] and defined[callee]:
+            parent[find(caller)] = find(callee)
+    groups = {}
+    for proc_id in range(len(graph)):
+        if defined[proc_id] and not live[proc_id]:
+            groups.setdefault(find(proc_id), []).append(graph.names[proc_id])
+    return sorted((sorted(group) for group in groups.values()), key=lambda group: (-len(group), group))
+
+
+def call_graph_from_files(paths: Iterable[str]) -> Tuple[CallGraph, List[str]]:
+    """
+    Call graph from a cheap name-and-EXEC scan of each file, for deciding
+    what to skip before running the full analysis.
+    
+    Returns the graph and the files that define no procedure; they are
+    scripts run directly, so callers should treat them as entry points.
+    """
+    from parser.tsql_text_parser import TSQLTextParser
+    
+    parser = TSQLTextParser()
+    graph = CallGraph()
+    scripts = []
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                sql_text = f.read()
+        except OSError:
+            continue  # reported by the full analysis
+        name = parser.extract_proc_name(sql_text)
+        if name == 'Unknown':
+            name = path
+            scripts.append(path)
+        graph.add_procedure(name, parser.extract_exec_calls(sql_text), path)
+    return graph, scripts
@@ -0,0 +1,273 @@
+"""
+Dependency Index - "Who Touches Table X" Lookups
+
+Inverted index from tables, written columns, called procedures and rule
+ids to the procedures that reference them, kept in SQLite so a schema
+change can be checked against the whole codebase without re-reading any
+analysis output. Each procedure's risk assessment is stored alongside so
+impact queries can rank what they find.
+"""
+import sqlite3
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from analysis.call_graph import CallGraph, normalize_proc_name
+
+FORMAT_VERSION = '2'
+
+READ = 1
+WRITE = 2
+ACCESS_NAMES = {'read': READ, 'write': WRITE}
+
+KINDS = ('table', 'column', 'procedure', 'rule')
+
+# Stay under SQLite's default bound-parameter limit in IN (...) queries
+_MAX_PARAMETERS = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS procedures (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    source TEXT,
+    risk_score INTEGER,
+    risk_level TEXT
+);
+CREATE TABLE IF NOT EXISTS objects (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE TABLE IF NOT EXISTS refs (
+    object_id INTEGER NOT NULL,
+    proc_id INTEGER NOT NULL,
+    access INTEGER NOT NULL,
+    PRIMARY KEY (object_id, proc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_by_proc ON refs (proc_id);
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL
+);
+"""
+
+
+class ProcedureInfo(NamedTuple):
+    """An indexed procedure."""
+    name: str
+    source: Optional[str]
+    risk_score: Optional[int]  # None if indexed without a risk assessment
+    risk_level: Optional[str]
+
+
+class IndexHit(NamedTuple):
+    """A procedure referencing the queried object."""
+    procedure: str
+    source: Optional[str]
+    access: int           # READ | WRITE bits for tables and columns, READ otherwise
+    
+    @property
+    def access_names(self) -> List[str]:
+        return [name for name, bit in ACCESS_NAMES.items() if self.access & bit]
+
+
+def object_key(kind: str, name: str) -> str:
+    """
+    Key under which an object is indexed.
+    
+    Tables and procedures follow the same naming rules as the call graph
+    (see normalize_proc_name); a column is 'table.column' with the table
+    normalized the same way; rule ids are upper-cased.
+    """
+    if kind == 'rule':
+        return name.strip().upper()
+    if kind == 'column':
+        table, _, column = name.replace('[', '').replace(']', '').rpartition('.')
+        return f"{normalize_proc_name(table)}.{column.strip().lower()}"
+    return normalize_proc_name(name)
+
+
+def _rule_ids(result) -> List[str]:
+    security = result.get('security', {})
+    findings = []
+    for key in ('sql_injection_risks', 'permission_issues', 'security_warnings'):
+        findings.extend(security.get(key, []))
+    findings.extend(result.get('quality', {}).get('issues', []))
+    findings.extend(result.get('performance', {}).get('issues', []))
+    return sorted({f.get('rule_id') for f in findings if f.get('rule_id')})
+
+
+class DependencyIndex:
+    """
+    SQLite-backed inverted dependency index.
+    
+    Procedures are added (or re-added after a change) one analysis result
+    at a time; re-adding a procedure replaces all of its references.
+    Call commit() - or use the index as a context manager - to make the
+    additions visible to other connections.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None:
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (FORMAT_VERSION,))
+            self.connection.commit()
+        elif row[0] != FORMAT_VERSION:
+            self.connection.close()
+            raise ValueError(f"{path} is a dependency index in format version {row[0]}, "
+                             f"expected {FORMAT_VERSION}")
+        self._object_ids: Optional[Dict[tuple, int]] = None
+        self._changed = False  # procedures added since the last commit
+    
+    def __enter__(self) -> 'DependencyIndex':
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        self.close()
+    
+    def commit(self):
+        self.connection.commit()
+        self._changed = False
+    
+    def close(self):
+        self.connection.close()
+    
+    def _object_id(self, kind: str, name: str) -> int:
+        if self._object_ids is None:
+            self._object_ids = {(k, key): i for i, k, key in
+                                self.connection.execute("SELECT id, kind, key FROM objects")}
+        key = (kind, object_key(kind, name))
+        object_id = self._object_ids.get(key)
+        if object_id is None:
+            cursor = self.connection.execute("INSERT INTO objects (kind, key, name) VALUES (?, ?, ?)",
+                                             (kind, key[1], name))
+            object_id = self._object_ids[key] = cursor.lastrowid
+        return object_id
+    
+    def add_procedure(self, name: str, source: Optional[str] = None,
+                      table_access: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                      calls: Iterable[str] = (), rule_ids: Iterable[str] = (),
+                      risk: Optional[Dict] = None) -> int:
+        """
+        Index one procedure, replacing whatever was indexed for it before.
+        
+        table_access has the shape returned by TSQLTextParser.extract_table_access;
+        risk is a RiskScorer assessment.
+        """
+        connection = self.connection
+        if not self._changed:
+            connection.execute("DELETE FROM cache")
+            self._changed = True
+        key = normalize_proc_name(name)
+        risk = risk or {}
+        values = (name, source, risk.get('risk_score'), risk.get('risk_level'))
+        row = connection.execute("SELECT id FROM procedures WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            proc_id = connection.execute(
+                "INSERT INTO procedures (name, source, risk_score, risk_level, key) VALUES (?, ?, ?, ?, ?)",
+                values + (key,)).lastrowid
+        else:
+            proc_id = row[0]
+            connection.execute("UPDATE procedures SET name = ?, source = ?, risk_score = ?, risk_level = ? "
+                               "WHERE id = ?", values + (proc_id,))
+            connection.execute("DELETE FROM refs WHERE proc_id = ?", (proc_id,))
+        
+        refs: Dict[int, int] = {}
+        for table, entry in (table_access or {}).items():
+            access = 0
+            for kind in entry.get('access', []):
+                access |= ACCESS_NAMES.get(kind, 0)
+            table_id = self._object_id('table', table)
+            refs[table_id] = refs.get(table_id, 0) | access
+            for column in entry.get('columns', []):
+                refs[self._object_id('column', f"{table}.{column}")] = WRITE
+        for callee in calls:
+            refs[self._object_id('procedure', callee)] = READ
+        for rule_id in rule_ids:
+            refs[self._object_id('rule', rule_id)] = READ
+        
+        connection.executemany("INSERT INTO refs (object_id, proc_id, access) VALUES (?, ?, ?)",
+                               [(object_id, proc_id, access) for object_id, access in refs.items()])
+        return proc_id
+    
+    def add_result(self, result) -> Optional[int]:
+        """Index a procedure from an analysis result; failed analyses are skipped."""
+        if not result.get('success', False):
+            return None
+        dependencies = result.get('dependencies', {})
+        return self.add_procedure(result.get('sp_name', 'Unknown'), result.get('source'),
+                                  dependencies.get('table_access', {}),
+                                  dependencies.get('procedures', []),
+                                  _rule_ids(result),
+                                  result.get('risk_assessment'))
+    
+    def lookup(self, kind: str, name: str, access: int = READ | WRITE) -> List[IndexHit]:
+        """
+        Procedures referencing an object, sorted by name.
+        
+        For tables and columns, `access` selects readers (READ), writers
+        (WRITE) or both; other kinds only have READ references.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown object kind: {kind} (expected one of {', '.join(KINDS)})")
+        rows = self.connection.execute(
+            "SELECT p.name, p.source, r.access FROM objects o "
+            "JOIN refs r ON r.object_id = o.id "
+            "JOIN procedures p ON p.id = r.proc_id "
+            "WHERE o.kind = ? AND o.key = ? AND (r.access & ?) != 0 "
+            "ORDER BY p.key",
+            (kind, object_key(kind, name), access))
+        return [IndexHit(*row) for row in rows]
+    
+    def procedure_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM procedures").fetchone()[0]
+    
+    def procedures(self, keys: Optional[Iterable[str]] = None) -> Dict[str, ProcedureInfo]:
+        """Indexed procedures (all, or those with the given normalized names), keyed by normalized name."""
+        query = "SELECT key, name, source, risk_score, risk_level FROM procedures"
+        if keys is None:
+            return {row[0]: ProcedureInfo(*row[1:]) for row in self.connection.execute(query)}
+        keys = list(keys)
+        found = {}
+        for start in range(0, len(keys), _MAX_PARAMETERS):
+            chunk = keys[start:start + _MAX_PARAMETERS]
+            rows = self.connection.execute(f"{query} WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((row[0], ProcedureInfo(*row[1:])) for row in rows)
+        return found
+    
+    def call_graph(self) -> CallGraph:
+        """
+        The EXEC call graph between indexed procedures.
+        
+        The frozen graph is cached in the index until a procedure is added,
+        so repeated impact queries do not rebuild it from the references.
+        """
+        row = self.connection.execute("SELECT value FROM cache WHERE key = 'call_graph'").fetchone()
+        if row is not None:
+            try:
+                return CallGraph.loads(row[0])
+            except ValueError:
+                pass
+        graph = CallGraph()
+        calls: Dict[int, List[str]] = {}
+        for proc_id, callee in self.connection.execute(
+                "SELECT r.proc_id, o.name FROM refs r JOIN objects o ON o.id = r.object_id "
+                "WHERE o.kind = 'procedure'"):
+            calls.setdefault(proc_id, []).append(callee)
+        for proc_id, name, source in self.connection.execute("SELECT id, name, source FROM procedures ORDER BY id"):
+            graph.add_procedure(name, calls.get(proc_id, ()), source)
+        if not self._changed:
+            self.connection.execute("INSERT OR REPLACE INTO cache (key, value) VALUES ('call_graph', ?)",
+                                    (graph.dumps(),))
+            self.connection.commit()
+        return graph
@@ -0,0 +1,208 @@
+"""
+Lock Contention - Procedures Likely to Block Each Other
+
+Build a procedure x table matrix of read and write access from the
+per-statement table access of every procedure, and score each pair of
+procedures by the tables they both touch where at least one of them
+writes: two writers of a table block each other (write-write), and a
+writer blocks readers (read-write).
+
+Writes made inside a transaction hold their locks until it commits, so
+they weigh double. With R and W the read and write matrices,
+
+    write_write = W @ W.T        read_write = R @ W.T + W @ R.T
+
+computed as sparse products (a sort-merge join of the non-zero entries on
+the table column), so the cost follows the pairs that actually share a
+table rather than procedures squared.
+
+Requires numpy.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from analysis.call_graph import normalize_proc_name
+
+READ_WEIGHT = 1.0
+WRITE_WEIGHT = 1.0
+TRANSACTION_WRITE_WEIGHT = 2.0
+_PAIR_BUDGET = 1 << 22  # candidate (entry, entry) pairs joined per step
+
+
+class ConflictPair(NamedTuple):
+    """Two procedures and how strongly their table access conflicts."""
+    first: str
+    second: str
+    write_write: float
+    read_write: float
+    tables: List[str]   # tables both touch and at least one writes
+    
+    @property
+    def score(self) -> float:
+        return self.write_write + self.read_write
+
+
+def _pairs_within(tables: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i, j), i < j, of entries with the same table; tables sorted."""
+    count = len(tables)
+    group_end = np.searchsorted(tables, tables, side='right')
+    lengths = group_end - np.arange(count) - 1
+    first = np.repeat(np.arange(count), lengths)
+    offsets = np.arange(len(first)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return first, first + offsets + 1
+
+
+def _pairs_across(left: np.ndarray, right: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i, j) with left[i] == right[j]; right sorted."""
+    low = np.searchsorted(right, left, side='left')
+    lengths = np.searchsorted(right, left, side='right') - low
+    first = np.repeat(np.arange(len(left)), lengths)
+    offsets = np.arange(len(first)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return first, np.repeat(low, lengths) + offsets
+
+
+class ConflictMatrix:
+    """
+    Sparse procedure x table access matrix and pairwise conflict scores.
+    
+    add() every procedure's statement access (from
+    TSQLTextParser.extract_statement_access), then call pairs().
+    """
+    
+    def __init__(self):
+        self.procedures: List[str] = []
+        self.tables: List[str] = []
+        self._table_ids: Dict[str, int] = {}
+        self._table_names: List[str] = []
+        # (procedure id, table id) -> weight, one dict per access kind
+        self._reads: Dict[Tuple[int, int], float] = {}
+        self._writes: Dict[Tuple[int, int], float] = {}
+    
+    def __len__(self) -> int:
+        return len(self.procedures)
+    
+    def _table_id(self, name: str) -> int:
+        key = normalize_proc_name(name)
+        table_id = self._table_ids.get(key)
+        if table_id is None:
+            table_id = self._table_ids[key] = len(self.tables)
+            self.tables.append(key)
+            self._table_names.append(name)
+        return table_id
+    
+    def add(self, key: str, statements: Iterable[Dict]) -> int:
+        """Add a procedure's statement access; returns its row."""
+        proc_id = len(self.procedures)
+        self.procedures.append(key)
+        for statement in statements:
+            write_weight = TRANSACTION_WRITE_WEIGHT if statement['in_transaction'] else WRITE_WEIGHT
+            for table in statement['reads']:
+                cell = (proc_id, self._table_id(table))
+                self._reads[cell] = READ_WEIGHT
+            for table in statement['writes']:
+                cell = (proc_id, self._table_id(table))
+                self._writes[cell] = max(self._writes.get(cell, 0.0), write_weight)
+        return proc_id
+    
+    def _tables_by_procedure(self, cells: Dict[Tuple[int, int], float]) -> List[set]:
+        tables = [set() for _ in self.procedures]
+        for proc_id, table_id in cells:
+            tables[proc_id].add(table_id)
+        return tables
+    
+    def access(self, key: str) -> Dict[str, str]:
+        """Tables a procedure touches, as 'read', 'write' or 'read/write'."""
+        proc_id = self.procedures.index(key)
+        reads = {table_id for row, table_id in self._reads if row == proc_id}
+        writes = {table_id for row, table_id in self._writes if row == proc_id}
+        return {self._table_names[table_id]: '/'.join(kind for kind, ids in (('read', reads), ('write', writes))
+                                                      if table_id in ids)
+                for table_id in sorted(reads | writes, key=lambda table_id: self._table_names[table_id])}
+    
+    @staticmethod
+    def _entries(cells: Dict[Tuple[int, int], float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(procedure, table, weight) arrays of the non-zero cells, sorted by table."""
+        if not cells:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        coordinates = np.array(list(cells), dtype=np.int64)
+        weights = np.fromiter(cells.values(), dtype=float, count=len(cells))
+        order = np.argsort(coordinates[:, 1], kind='stable')
+        return coordinates[order, 0], coordinates[order, 1], weights[order]
+    
+    def _scores(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Unique pair keys (lower id * n + higher id) with write-write and read-write scores."""
+        read_procs, read_tables, read_weights = self._entries(self._reads)
+        write_procs, write_tables, write_weights = self._entries(self._writes)
+        table_count = len(self.tables)
+        n = len(self.procedures)
+        
+        # Tables in steps whose joined pair count stays within the budget
+        writers = np.bincount(write_tables, minlength=table_count)
+        readers = np.bincount(read_tables, minlength=table_count)
+        cost = np.cumsum(writers * writers + readers * writers)
+        parts = []
+        low = 0
+        while low < table_count:
+            base = cost[low - 1] if low else 0
+            high = max(low + 1, int(np.searchsorted(cost, base + _PAIR_BUDGET, side='right')))
+            w = slice(*np.searchsorted(write_tables, [low, high]))
+            r = slice(*np.searchsorted(read_tables, [low, high]))
+            
+            first, second = _pairs_within(write_tables[w])
+            a, b = write_procs[w][first], write_procs[w][second]
+            keys = [np.minimum(a, b) * n + np.maximum(a, b)]
+            write_write = [write_weights[w][first] * write_weights[w][second]]
+            read_write = [np.zeros(len(first))]
+            
+            first, second = _pairs_across(read_tables[r], write_tables[w])
+            a, b = read_procs[r][first], write_procs[w][second]
+            other = a != b
+            a, b = a[other], b[other]
+            keys.append(np.minimum(a, b) * n + np.maximum(a, b))
+            write_write.append(np.zeros(len(a)))
+            read_write.append(read_weights[r][first][other] * write_weights[w][second][other])
+            
+            keys = np.concatenate(keys)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            parts.append((unique,
+                          np.bincount(inverse, weights=np.concatenate(write_write), minlength=len(unique)),
+                          np.bincount(inverse, weights=np.concatenate(read_write), minlength=len(unique))))
+            low = high
+        
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty(0), np.empty(0)
+        keys = np.concatenate([part[0] for part in parts])
+        unique, inverse = np.unique(keys, return_inverse=True)
+        return (unique,
+                np.bincount(inverse, weights=np.concatenate([part[1] for part in parts]), minlength=len(unique)),
+                np.bincount(inverse, weights=np.concatenate([part[2] for part in parts]), minlength=len(unique)))
+    
+    def pairs(self, top: Optional[int] = None, min_score: float = 0.0) -> List[ConflictPair]:
+        """
+        Conflicting pairs of distinct procedures, highest score first.
+        
+        A procedure running concurrently with itself is not reported.
+        """
+        keys, write_write, read_write = self._scores()
+        score = write_write + read_write
+        selected = np.flatnonzero(score > min_score) if min_score > 0 else np.flatnonzero(score)
+        # Highest score, then most write-write, then by procedure order
+        order = np.lexsort((keys[selected], -write_write[selected], -score[selected]))
+        selected = selected[order]
+        if top is not None:
+            selected = selected[:top]
+        
+        n = len(self.procedures)
+        reads = self._tables_by_procedure(self._reads)
+        writes = self._tables_by_procedure(self._writes)
+        pairs = []
+        for index in selected:
+            first, second = divmod(int(keys[index]), n)
+            shared = (writes[first] & (writes[second] | reads[second])) | (writes[second] & reads[first])
+            pairs.append(ConflictPair(self.procedures[first], self.procedures[second],
+                                      float(write_write[index]), float(read_write[index]),
+                                      sorted(self._table_names[table_id] for table_id in shared)))
+        return pairs
@@ -18,6 +18,28 @@ class RiskScorer:
         'LOW': 1
     }
     
+    # Lowest risk points for each level, highest level first
+    LEVEL_THRESHOLDS = (
+        (30, 'CRITICAL'),
+        (15, 'HIGH'),
+        (8, 'MEDIUM'),
+    )
+    
+    RECOMMENDATIONS = {
+        'CRITICAL': ' HIGH PRIORITY: Intensive testing required. Consider code review before deployment.',
+        'HIGH': '  ELEVATED RISK: Thorough testing recommended. Focus on edge cases.',
+        'MEDIUM': ' MODERATE RISK: Standard testing procedures apply.',
+        'LOW': ' LOW RISK: Basic smoke testing sufficient.'
+    }
+    
+    @classmethod
+    def level_for(cls, risk_points: int) -> str:
+        """Risk level of a risk point total."""
+        for threshold, level in cls.LEVEL_THRESHOLDS:
+            if risk_points >= threshold:
+                return level
+        return 'LOW'
+    
     def calculate_risk_score(self, sp_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
         Calculate comprehensive risk score for a stored procedure.
@@ -52,18 +74,8 @@ class RiskScorer:
         risk_factors.extend(complexity_factors)
         
         # Determine risk level
-        if risk_points >= 30:
-            risk_level = 'CRITICAL'
-            recommendation = ' HIGH PRIORITY: Intensive testing required. Consider code review before deployment.'
-        elif risk_points >= 15:
-            risk_level = 'HIGH'
-            recommendation = '  ELEVATED RISK: Thorough testing recommended. Focus on edge cases.'
-        elif risk_points >= 8:
-            risk_level = 'MEDIUM'
-            recommendation = ' MODERATE RISK: Standard testing procedures apply.'
-        else:
-            risk_level = 'LOW'
-            recommendation = ' LOW RISK: Basic smoke testing sufficient.'
+        risk_level = self.level_for(risk_points)
+        recommendation = self.RECOMMENDATIONS[risk_level]
         
         return {
             'risk_score': risk_points,
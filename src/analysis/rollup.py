@@ -0,0 +1,188 @@
+"""
+Call Tree Roll-Up - Complexity and Risk Including Everything a Procedure Calls
+
+Per-procedure complexity and risk miss what a procedure EXECs: a thin
+wrapper around ten risky procedures scores LOW on its own. Fold the
+per-procedure figures bottom-up over the call graph so every procedure
+also carries the totals of its whole call tree:
+
+    transitive complexity / risk   own value plus that of every callee's call tree
+    call depth                     longest chain of nested EXECs below it
+    table footprint                every table it or anything it calls touches
+
+Recursion cycles are collapsed into one node (their strongly connected
+component) first, so each component is computed once from its callee
+components, which are already done - linear in procedures plus calls.
+A callee shared by two branches of the call tree counts in each, as it
+runs in each; tables are a set and count once.
+"""
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from analysis.call_graph import CallGraph, normalize_proc_name
+from analysis.risk_scorer import RiskScorer
+
+
+class RolledUpProcedure(NamedTuple):
+    """A procedure's own metrics and those of its whole call tree."""
+    procedure: str
+    source: Optional[str]          # None if only called, never defined in the corpus
+    complexity: int
+    risk_score: int
+    transitive_complexity: int
+    transitive_risk: int
+    call_depth: int                # 0 = calls nothing; a recursion cycle counts as one level
+    tables: List[str]              # transitive table footprint
+    recursive: bool                # in a recursion cycle
+    
+    @property
+    def risk_level(self) -> str:
+        """Risk level of the transitive risk."""
+        return RiskScorer.level_for(self.transitive_risk)
+
+
+class CallTreeRollup:
+    """
+    Bottom-up aggregation of per-procedure metrics over a call graph.
+    
+    add_result() every analysis result (with risk scoring on), then call
+    procedures(); the roll-up is computed once and kept until the next add.
+    """
+    
+    def __init__(self, graph: Optional[CallGraph] = None):
+        self.graph = graph if graph is not None else CallGraph()
+        self.tables: List[str] = []
+        self._table_ids: Dict[str, int] = {}
+        self._complexity: Dict[int, int] = {}   # procedure id -> own value
+        self._risk: Dict[int, int] = {}
+        self._footprint: Dict[int, int] = {}    # procedure id -> bitset of table ids
+        self._rolled_up: Optional[List[RolledUpProcedure]] = None
+    
+    def __len__(self) -> int:
+        return len(self.graph)
+    
+    def _table_bits(self, tables: Iterable[str]) -> int:
+        bits = 0
+        for name in tables:
+            key = normalize_proc_name(name)
+            table_id = self._table_ids.get(key)
+            if table_id is None:
+                table_id = self._table_ids[key] = len(self.tables)
+                self.tables.append(name.replace('[', '').replace(']', ''))
+            bits |= 1 << table_id
+        return bits
+    
+    def add_procedure(self, name: str, calls: Iterable[str], complexity: int = 0, risk_score: int = 0,
+                      tables: Iterable[str] = (), source: Optional[str] = None) -> int:
+        """Record a procedure, what it EXECs and its own metrics; returns its id."""
+        proc_id = self.graph.add_procedure(name, calls, source)
+        self._complexity[proc_id] = complexity
+        self._risk[proc_id] = risk_score
+        self._footprint[proc_id] = self._table_bits(tables)
+        self._rolled_up = None
+        return proc_id
+    
+    def add_result(self, result) -> Optional[int]:
+        """
+        Add a procedure from an analysis result; failed analyses are skipped.
+        
+        The footprint comes from the schema-qualified table_access keys,
+        not the flat table list, which also holds aliases and CTE names.
+        """
+        if not result.get('success', False):
+            return None
+        dependencies = result.get('dependencies', {})
+        return self.add_procedure(result.get('sp_name', 'Unknown'),
+                                  dependencies.get('procedures', []),
+                                  complexity=result.get('complexity', {}).get('complexity', 0),
+                                  risk_score=result.get('risk_assessment', {}).get('risk_score', 0),
+                                  tables=dependencies.get('table_access', {}),
+                                  source=result.get('source'))
+    
+    def _roll_up(self) -> List[RolledUpProcedure]:
+        graph = self.graph
+        components = graph.component_ids()
+        count = len(graph.names)
+        component_count = max(components, default=-1) + 1
+        
+        # Members of each component, contiguous (counting sort by component)
+        starts = array('i', [0]) * (component_count + 1)
+        for component in components:
+            starts[component + 1] += 1
+        for component in range(component_count):
+            starts[component + 1] += starts[component]
+        members = array('i', [0]) * count
+        filled = array('i', starts)
+        for proc_id, component in enumerate(components):
+            members[filled[component]] = proc_id
+            filled[component] += 1
+        
+        complexity = [0] * component_count
+        risk = [0] * component_count
+        depth = [0] * component_count
+        footprint = [0] * component_count
+        recursive = bytearray(component_count)
+        seen = array('i', [-1]) * component_count  # callee component last added for this component
+        # Callees always have lower component numbers, so ascending order is bottom-up
+        for component in range(component_count):
+            own_complexity = own_risk = tables = nested = 0
+            for proc_id in members[starts[component]:starts[component + 1]]:
+                own_complexity += self._complexity.get(proc_id, 0)
+                own_risk += self._risk.get(proc_id, 0)
+                tables |= self._footprint.get(proc_id, 0)
+                for callee_id in graph.callee_ids(proc_id):
+                    callee = components[callee_id]
+                    if callee == component:
+                        recursive[component] = 1
+                    elif seen[callee] != component:
+                        seen[callee] = component
+                        own_complexity += complexity[callee]
+                        own_risk += risk[callee]
+                        tables |= footprint[callee]
+                        nested = max(nested, depth[callee] + 1)
+            complexity[component] = own_complexity
+            risk[component] = own_risk
+            footprint[component] = tables
+            depth[component] = nested
+        
+        table_names = self.tables
+        footprints: Dict[int, List[str]] = {}
+        rolled_up = []
+        for proc_id in range(count):
+            component = components[proc_id]
+            if component not in footprints:
+                bits, names = footprint[component], []
+                while bits:
+                    lowest = bits & -bits
+                    names.append(table_names[lowest.bit_length() - 1])
+                    bits ^= lowest
+                footprints[component] = sorted(names, key=str.lower)
+            rolled_up.append(RolledUpProcedure(graph.names[proc_id], graph.sources[proc_id],
+                                               self._complexity.get(proc_id, 0), self._risk.get(proc_id, 0),
+                                               complexity[component], risk[component], depth[component],
+                                               footprints[component], bool(recursive[component])))
+        return rolled_up
+    
+    def procedures(self) -> List[RolledUpProcedure]:
+        """Every procedure (defined or only called), by id."""
+        if self._rolled_up is None:
+            self._rolled_up = self._roll_up()
+        return self._rolled_up
+    
+    def procedure(self, name: str) -> RolledUpProcedure:
+        """
+        Roll-up of one procedure.
+        
+        Raises:
+            KeyError: if the procedure was neither defined nor called
+        """
+        return self.procedures()[self.graph.id_of(name)]
+    
+    def ranked(self, key: str = 'transitive_risk', top: Optional[int] = None) -> List[RolledUpProcedure]:
+        """Defined procedures, highest `key` (a RolledUpProcedure field) first."""
+        if key == 'tables':
+            sort_key = lambda item: (-len(item.tables), item.procedure.lower())
+        else:
+            sort_key = lambda item: (-getattr(item, key), item.procedure.lower())
+        ranked = sorted((item for item in self.procedures() if item.source is not None), key=sort_key)
+        return ranked[:top] if top is not None else ranked
@@ -0,0 +1,223 @@
+"""
+Analysis Context for T-SQL Stored Procedures
+Per-procedure data computed once and shared by every detector that
+looks at the same text
+"""
+import heapq
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Match, Optional, Pattern, Sequence, Tuple
+
+from parser.text_masking import mask_comments_and_literals
+from profiling.rule_stats import RULE_STATS
+
+# Keywords rules can declare as prerequisites; bit i of a mask is KEYWORDS[i]
+KEYWORDS: List[str] = []
+_KEYWORD_BITS: Dict[str, int] = {}
+
+
+def keyword_mask(keywords: Sequence[str]) -> int:
+    """Bitmask for keywords, registering any keyword seen for the first time."""
+    mask = 0
+    for keyword in keywords:
+        keyword = keyword.upper()
+        bit = _KEYWORD_BITS.get(keyword)
+        if bit is None:
+            bit = _KEYWORD_BITS[keyword] = len(KEYWORDS)
+            KEYWORDS.append(keyword)
+        mask |= 1 << bit
+    return mask
+
+
+# Literal anchors of AnchoredPatterns, found together in one pass per text
+ANCHORS: List[str] = []
+_anchor_scan: Optional[Tuple[Pattern, Dict[str, Tuple[str, ...]]]] = None
+
+
+class AnchoredPattern:
+    """
+    A case-insensitive regex whose every match starts with one of its anchors.
+    
+    Instead of scanning the whole text, the pattern is only tried at the
+    offsets where the shared anchor scan found one of its anchors.
+    """
+    
+    __slots__ = ('regex', 'anchors')
+    
+    def __init__(self, pattern: str, anchors: Sequence[str], flags: int = 0):
+        global _anchor_scan
+        self.regex = re.compile(pattern, flags | re.IGNORECASE)
+        self.anchors = tuple(a.upper() for a in anchors)
+        for anchor in self.anchors:
+            if anchor not in ANCHORS:
+                ANCHORS.append(anchor)
+                _anchor_scan = None
+    
+    def __repr__(self):
+        return f"AnchoredPattern({self.regex.pattern!r}, {self.anchors})"
+
+
+def anchored(pattern: str, *anchors: str, flags: int = 0) -> AnchoredPattern:
+    """Declare a regex anchored on literal keywords (see AnchoredPattern)."""
+    return AnchoredPattern(pattern, anchors, flags)
+
+
+def _compiled_anchor_scan() -> Tuple[Pattern, Dict[str, Tuple[str, ...]]]:
+    global _anchor_scan
+    if _anchor_scan is None:
+        # Zero-width lookahead finds anchors at every position, so anchors
+        # that overlap (EXEC inside SP_EXECUTESQL) are all reported; longest
+        # first, with shorter anchors sharing the same start (OPEN for
+        # OPENROWSET) recorded alongside
+        ordered = sorted(ANCHORS, key=len, reverse=True)
+        alternation = '|'.join(re.escape(a) for a in ordered)
+        prefixes = {a: tuple(b for b in ordered if a.startswith(b)) for a in ordered}
+        _anchor_scan = (re.compile(f"(?=({alternation}))"), prefixes)
+    return _anchor_scan
+
+
+# Characters that re.IGNORECASE matches to an ASCII letter other than their upper()
+_IGNORECASE_ASCII = {'\u0130': 'I', '\u212a': 'K'}
+
+
+def _unicode_upper(text: str) -> str:
+    # Upper-case character by character so offsets line up with text
+    # ('ß'.upper() is 'SS'), agreeing with re.IGNORECASE on ASCII letters
+    chars = []
+    for char in text:
+        upper = _IGNORECASE_ASCII.get(char) or char.upper()
+        chars.append(upper if len(upper) == 1 else char)
+    return ''.join(chars)
+
+
+class AnalysisContext:
+    """
+    Shared view of one procedure text.
+    
+    The keyword bitmap records which registered keywords occur anywhere
+    in the text (case-insensitive substring match, so it can only rule a
+    pattern out, never in). It is filled for all registered keywords on
+    creation; keywords registered later are looked up on first use.
+    
+    Anchor offsets for AnchoredPatterns are found by a single scan of
+    `upper` on first use, shared by every anchored rule.
+    
+    `code` is the context of the same text with comments and string
+    literals blanked (see mask_comments_and_literals), built on first use.
+    """
+    
+    __slots__ = ('text', 'upper', '_present', '_checked', '_anchors', '_anchor_scan', '_code')
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.upper = text.upper() if text.isascii() else _unicode_upper(text)
+        self._present = 0
+        self._checked = 0
+        self._anchors: Optional[Dict[str, List[int]]] = None
+        self._anchor_scan = None
+        self._code: Optional['AnalysisContext'] = None
+        self._scan((1 << len(KEYWORDS)) - 1)
+    
+    @property
+    def code(self) -> 'AnalysisContext':
+        """Context over the text with comments and string literal contents blanked."""
+        if self._code is None:
+            masked = mask_comments_and_literals(self.text)
+            if masked == self.text:
+                self._code = self
+            else:
+                self._code = AnalysisContext(masked)
+                # Masking a masked text changes nothing
+                self._code._code = self._code
+        return self._code
+    
+    @property
+    def masked(self) -> str:
+        """The text with comments and string literal contents blanked, offsets unchanged."""
+        return self.code.text
+    
+    def _scan(self, mask: int):
+        upper = self.upper
+        present = 0
+        bit = 0
+        remaining = mask
+        while remaining:
+            if remaining & 1 and KEYWORDS[bit] in upper:
+                present |= 1 << bit
+            remaining >>= 1
+            bit += 1
+        self._present |= present
+        self._checked |= mask
+    
+    def has_any(self, mask: int) -> bool:
+        """True if at least one keyword in mask occurs in the text."""
+        missing = mask & ~self._checked
+        if missing:
+            self._scan(missing)
+        return bool(self._present & mask)
+    
+    def allows(self, rule) -> bool:
+        """
+        True unless the rule declares required keywords and none of them occur.
+        
+        Skipped evaluations are counted in RULE_STATS while it is enabled.
+        """
+        required = rule.required_mask
+        if not required:
+            return True
+        allowed = self.has_any(required)
+        if RULE_STATS.enabled:
+            RULE_STATS.record_prefilter(rule.rule_id, skipped=not allowed)
+        return allowed
+    
+    def anchor_offsets(self, anchor: str) -> List[int]:
+        """Sorted offsets of every occurrence of a registered anchor."""
+        scan = _compiled_anchor_scan()
+        if self._anchors is None or self._anchor_scan is not scan:
+            pattern, prefixes = scan
+            offsets: Dict[str, List[int]] = {a: [] for a in ANCHORS}
+            for match in pattern.finditer(self.upper):
+                start = match.start()
+                for found in prefixes[match.group(1)]:
+                    offsets[found].append(start)
+            self._anchors = offsets
+            self._anchor_scan = scan
+        return self._anchors[anchor]
+    
+    def _candidates(self, pattern: AnchoredPattern) -> Iterator[int]:
+        if len(pattern.anchors) == 1:
+            return iter(self.anchor_offsets(pattern.anchors[0]))
+        return heapq.merge(*(self.anchor_offsets(a) for a in pattern.anchors))
+    
+    def search(self, pattern: AnchoredPattern) -> Optional[Match]:
+        """Same result as pattern.regex.search(text)."""
+        match_at = pattern.regex.match
+        text = self.text
+        for offset in self._candidates(pattern):
+            match = match_at(text, offset)
+            if match:
+                return match
+        return None
+    
+    def finditer(self, pattern: AnchoredPattern) -> Iterator[Match]:
+        """Same matches as pattern.regex.finditer(text)."""
+        match_at = pattern.regex.match
+        text = self.text
+        end = 0
+        for offset in self._candidates(pattern):
+            if offset < end:
+                continue
+            match = match_at(text, offset)
+            if match:
+                end = match.end()
+                yield match
+    
+    def count(self, pattern: AnchoredPattern) -> int:
+        """Same result as len(pattern.regex.findall(text))."""
+        return sum(1 for _ in self.finditer(pattern))
+
+
+@lru_cache(maxsize=32)
+def analysis_context(sql_text: str) -> AnalysisContext:
+    """Context for sql_text, shared by all detectors called with the same text."""
+    return AnalysisContext(sql_text)
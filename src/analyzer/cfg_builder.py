@@ -1,5 +1,4 @@
-import uuid
-from sqlglot import exp
+import os
 import re
 
 class CFGNode:
@@ -8,7 +7,7 @@ class CFGNode:
     Enhanced version with full control flow support.
     """
     def __init__(self, node_type, content=None, ast_node=None, line=None):
-        self.id = str(uuid.uuid4())[:8]
+        self.id = os.urandom(4).hex()
         self.node_type = node_type  # START, END, BLOCK, IF, WHILE_HEADER, WHILE_BODY, MERGE
         self.content = content
         self.ast_node = ast_node
@@ -45,6 +44,7 @@ class CFGBuilder:
 
     def build(self, ast, sql_code=None) -> CFG:
         """Build CFG from AST and optionally SQL source code for control flow."""
+        from sqlglot import exp  # only needed for AST input; keeps build_from_source sqlglot-free
         cfg = CFG()
         
         # Import control flow extractor
@@ -71,6 +71,7 @@ class CFGBuilder:
 
     def _process_statements(self, cfg, current_node, statements, control_flow, sql_code):
         """Process statements with control flow awareness."""
+        from sqlglot import exp
         prev_node = current_node
         
         for stmt in statements:
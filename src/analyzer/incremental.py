@@ -0,0 +1,323 @@
+"""
+Incremental Analyzer for T-SQL Stored Procedures
+Re-analyzes new versions of a procedure statement by statement, reusing
+rule results for statements that did not change
+"""
+import hashlib
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from parser.statement_splitter import Statement, statement_boundaries, statements_from_boundaries, update_boundaries
+from analyzer.security_analyzer import SecurityAnalyzer
+from analyzer.quality_analyzer import CodeQualityAnalyzer
+from analyzer.performance_analyzer import PerformanceAnalyzer, OR_KEYWORD, COUNT_STAR_SELECT
+from analyzer.analysis_context import analysis_context
+from analyzer.result_model import Finding
+from analyzer.statement_memo import StatementMemo
+
+_WHERE = re.compile(r'WHERE', re.IGNORECASE)
+
+
+class AnalysisCancelled(Exception):
+    """Raised when is_cancelled() reports that the analysis has become stale."""
+
+
+def statement_fingerprint(text: str) -> bytes:
+    """Identity of a statement's text; equal fingerprints share rule results."""
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+
+def changed_span(old: str, new: str) -> Tuple[int, int, int]:
+    """
+    Smallest (start, old_end, new_end) such that old and new differ only in
+    old[start:old_end] vs new[start:new_end].
+    """
+    limit = min(len(old), len(new))
+    # Binary search on slice equality keeps the comparisons in C
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    start = low
+    low, high = 0, limit - start
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle:] == new[len(new) - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    return start, len(old) - low, len(new) - low
+
+
+def line_boundaries(sql_text: str, boundaries: List[int]) -> List[int]:
+    """
+    The statement boundaries that do not split a line.
+    
+    Statements separated by ';' on one line stay together, so rule
+    patterns that run along a line (DECLARE.*?CURSOR, SELECT .* INTO)
+    see the same text as in the full analysis.
+    """
+    kept = [boundaries[0]]
+    for boundary in boundaries[1:-1]:
+        line_start = sql_text.rfind('\n', 0, boundary) + 1
+        line_end = sql_text.find('\n', boundary)
+        if line_end == -1:
+            line_end = len(sql_text)
+        if not sql_text[line_start:boundary].strip() or not sql_text[boundary:line_end].strip():
+            kept.append(boundary)
+    kept.append(boundaries[-1])
+    return kept
+
+
+class StatementSummary:
+    """Rule results for one statement text."""
+    
+    __slots__ = ('findings', 'or_count', 'count_star', 'select_star', 'has_where')
+    
+    def __init__(self, findings: Tuple[List[Finding], ...], or_count: int, count_star: int,
+                 select_star: List[Finding], has_where: bool):
+        self.findings = findings        # one list per statement rule
+        self.or_count = or_count
+        self.count_star = count_star
+        self.select_star = select_star  # SELECT * FROM with no WHERE later in the statement
+        self.has_where = has_where
+
+
+class IncrementalAnalyzer:
+    """
+    Analyze successive versions of one procedure.
+    
+    Rules fall into three groups:
+    
+    - statement rules report a finding if their pattern matches anywhere,
+      so they run once per distinct statement (statements sharing a line
+      count as one) and the procedure-level result is the set of rules
+      that fired in any statement;
+    - aggregate rules (OR count, COUNT(*) count, and the "is any statement
+      reporting rule X" counts above) keep running totals that are patched
+      with the summaries of added and removed statements;
+    - whole-text rules depend on the procedure as a whole (patterns that
+      span statements, presence/absence anywhere, naming) and run on the
+      full text every time.
+    
+    `analyze()` returns the same security/quality/performance dictionaries
+    as the three analyzers' own `analyze()` methods. The one exception is
+    a statement rule match that runs over a line break from the end of
+    one statement into the keyword starting the next (the cursor rule's
+    "OPEN <name>" on "@IsOpen", newline, "IF"), which only the full
+    analysis reports.
+    
+    A StatementMemo shared between analyzers (one per procedure of a batch)
+    also reuses statement summaries across procedures, for statements that
+    only differ from an earlier one in literals, parameters or layout.
+    """
+    
+    def __init__(self, security_analyzer: Optional[SecurityAnalyzer] = None,
+                 quality_analyzer: Optional[CodeQualityAnalyzer] = None,
+                 performance_analyzer: Optional[PerformanceAnalyzer] = None,
+                 memo: Optional[StatementMemo] = None):
+        self.security = security_analyzer or SecurityAnalyzer()
+        self.quality = quality_analyzer or CodeQualityAnalyzer()
+        self.performance = performance_analyzer or PerformanceAnalyzer()
+        self.memo = memo
+        
+        self.statement_rules = [
+            self.security.detect_permission_issues,
+            self.performance.detect_cursor_usage,
+            self.performance.detect_implicit_conversions,
+            self.performance.detect_scalar_functions,
+            self.performance.detect_leading_wildcards,
+            self.performance.detect_select_into,
+        ]
+        self.reset()
+    
+    def reset(self):
+        """Forget the previous version; the next analysis starts from scratch."""
+        self.text: Optional[str] = None
+        self.boundaries: List[int] = []
+        self.statements: List[Statement] = []
+        self.fingerprints: List[bytes] = []
+        self._summaries: Dict[bytes, StatementSummary] = {}
+        self._occurrences: Counter = Counter()  # fingerprint -> statements with that text
+        self._or_total = 0
+        self._count_star_total = 0
+        # (statement rule index, rule_id) -> statements reporting it
+        self._rule_counts: Counter = Counter()
+        self._rule_findings: Dict[str, Finding] = {}
+        self.statements_analyzed = 0
+        self.statements_reused = 0
+    
+    def _summarize(self, text: str, fingerprint: bytes) -> StatementSummary:
+        if self.memo is None:
+            return self._evaluate(text)
+        summary, key = self.memo.lookup(text, fingerprint)
+        if key is None:
+            return summary
+        if summary is None:
+            summary = self._evaluate(text)
+            self.memo.put(key, summary)
+        self.memo.put(fingerprint, summary)
+        return summary
+    
+    def _evaluate(self, text: str) -> StatementSummary:
+        code = analysis_context(text).code
+        return StatementSummary(
+            findings=tuple(rule(text) for rule in self.statement_rules),
+            or_count=len(OR_KEYWORD.findall(code.text)),
+            count_star=code.count(COUNT_STAR_SELECT),
+            select_star=self.performance.detect_select_star_without_where(text),
+            has_where=_WHERE.search(code.text) is not None,
+        )
+    
+    def _split(self, sql_text: str) -> List[int]:
+        if self.text is None:
+            return statement_boundaries(sql_text)
+        start, old_end, new_end = changed_span(self.text, sql_text)
+        return update_boundaries(self.boundaries, sql_text, start, old_end, new_end - start)
+    
+    def update(self, sql_text: str, is_cancelled: Optional[Callable[[], bool]] = None):
+        """
+        Bring statement results up to date with sql_text.
+        
+        Raises:
+            AnalysisCancelled: if is_cancelled() turns true part-way through;
+                               the previous version stays in place
+        """
+        if sql_text == self.text:
+            self.statements_analyzed = 0
+            self.statements_reused = len(self.statements)
+            return
+        
+        boundaries = self._split(sql_text)
+        statements = statements_from_boundaries(sql_text, line_boundaries(sql_text, boundaries))
+        fingerprints = [statement_fingerprint(s.text) for s in statements]
+        occurrences = Counter(fingerprints)
+        
+        # Statements whose text is new to this version are analyzed; all
+        # others reuse their summary from the previous version
+        new_summaries = {}
+        for statement, fingerprint in zip(statements, fingerprints):
+            if fingerprint in self._summaries or fingerprint in new_summaries:
+                continue
+            if is_cancelled and len(new_summaries) % 32 == 0 and is_cancelled():
+                raise AnalysisCancelled()
+            new_summaries[fingerprint] = self._summarize(statement.text, fingerprint)
+        
+        # Patch the aggregates with the multiset difference of statements
+        summaries = self._summaries
+        summaries.update(new_summaries)
+        added = occurrences - self._occurrences
+        removed = self._occurrences - occurrences
+        for changes, sign in ((added, 1), (removed, -1)):
+            for fingerprint, count in changes.items():
+                summary = summaries[fingerprint]
+                self._or_total += sign * count * summary.or_count
+                self._count_star_total += sign * count * summary.count_star
+                for rule_index, findings in enumerate(summary.findings):
+                    for finding in findings:
+                        self._rule_counts[rule_index, finding.rule_id] += sign * count
+                        self._rule_findings.setdefault(finding.rule_id, finding)
+        for fingerprint in removed:
+            if fingerprint not in occurrences:
+                del summaries[fingerprint]
+        
+        self.text = sql_text
+        self.boundaries = boundaries
+        self.statements = statements
+        self.fingerprints = fingerprints
+        self._occurrences = occurrences
+        self.statements_analyzed = len(new_summaries)
+        self.statements_reused = len(statements) - len(new_summaries)
+    
+    def summary(self, index: int) -> StatementSummary:
+        """Rule results for self.statements[index]."""
+        return self._summaries[self.fingerprints[index]]
+    
+    def _statement_rule_findings(self) -> List[List[Finding]]:
+        # One finding per rule that fired in any statement; rule ids follow
+        # the order in which each detector checks its rules
+        findings: List[List[Finding]] = [[] for _ in self.statement_rules]
+        for (rule_index, rule_id), count in sorted(self._rule_counts.items()):
+            if count > 0:
+                findings[rule_index].append(self._rule_findings[rule_id])
+        return findings
+    
+    def select_star_statement(self) -> Optional[int]:
+        """Index of the statement reporting SELECT * without a WHERE anywhere after it."""
+        for index in range(len(self.statements) - 1, -1, -1):
+            summary = self.summary(index)
+            if summary.select_star:
+                return index
+            if summary.has_where:
+                return None
+        return None
+    
+    def statement_findings(self) -> List[Tuple[Statement, List[Finding]]]:
+        """Findings attributable to a single statement, for the current version."""
+        located = []
+        select_star = self.select_star_statement()
+        for index, statement in enumerate(self.statements):
+            summary = self.summary(index)
+            findings = [f for rule_findings in summary.findings for f in rule_findings]
+            if index == select_star:
+                findings.extend(summary.select_star)
+            if findings:
+                located.append((statement, findings))
+        return located
+    
+    def analyze(self, sql_text: str, sp_name: str,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> Dict[str, Dict]:
+        """
+        Run all checks on a new version of the procedure.
+        
+        Raises:
+            AnalysisCancelled: if is_cancelled() turns true part-way through
+        """
+        def checkpoint():
+            if is_cancelled and is_cancelled():
+                raise AnalysisCancelled()
+        
+        self.update(sql_text, is_cancelled)
+        permissions, cursors, conversions, functions, wildcards, select_into = self._statement_rule_findings()
+        
+        checkpoint()
+        injection = self.security.detect_sql_injection(sql_text)
+        checkpoint()
+        security = {
+            'sql_injection_risks': injection,
+            'permission_issues': permissions,
+            'security_warnings': self.security.detect_security_warnings(sql_text),
+        }
+        
+        quality_issues = []
+        quality_issues.extend(self.quality.check_naming_conventions(sql_text, sp_name))
+        checkpoint()
+        quality_issues.extend(self.quality.check_code_smells(sql_text))
+        checkpoint()
+        quality_issues.extend(self.quality.check_best_practices(sql_text))
+        quality_score = self.quality.calculate_quality_score(sql_text, quality_issues)
+        quality = {
+            'issues': quality_issues,
+            'quality_score': quality_score,
+            'grade': self.quality.get_grade(quality_score),
+        }
+        
+        performance_issues = cursors + conversions + functions
+        performance_issues.extend(self.performance.or_condition_findings(self._or_total))
+        performance_issues.extend(wildcards + select_into)
+        select_star = self.select_star_statement()
+        if select_star is not None:
+            performance_issues.extend(self.summary(select_star).select_star)
+        performance_issues.extend(self.performance.count_query_findings(self._count_star_total))
+        performance_score = self.performance.calculate_performance_score(performance_issues)
+        performance = {
+            'issues': performance_issues,
+            'performance_score': performance_score,
+            'grade': self.performance.get_grade(performance_score),
+        }
+        
+        return {'security': security, 'quality': quality, 'performance': performance}
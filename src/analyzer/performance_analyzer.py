@@ -4,6 +4,174 @@ Detects performance anti-patterns and provides optimization recommendations
 """
 import re
 from typing import List, Dict
+from profiling.rule_stats import track_rule
+from analyzer.rule_registry import register_rule
+from analyzer.analysis_context import analysis_context, anchored
+from analyzer.result_model import Finding
+
+# Rule metadata - defined once, referenced by every Finding
+CURSOR_USAGE = register_rule(
+    'PERF001',
+    requires=('CURSOR', 'OPEN', 'FETCH'),
+    category='Performance',
+    severity='HIGH',
+    issue='Cursor Usage Detected',
+    impact='Cursors are slow and resource-intensive',
+    recommendation='Replace with SET-based operations',
+    example='''
+-- BAD:
+DECLARE cursor_name CURSOR FOR SELECT ...
+-- GOOD:
+UPDATE t1 SET ... FROM table1 t1 INNER JOIN table2 t2 ...
+'''
+)
+IMPLICIT_CONVERSION = register_rule(
+    'PERF002',
+    requires=('WHERE',),
+    category='Performance',
+    severity='MEDIUM',
+    issue='Potential Implicit Conversion',
+    impact='Can prevent index usage',
+    recommendation='Ensure data types match in WHERE clauses',
+    example='''
+-- BAD:
+WHERE varchar_column = 123
+-- GOOD:
+WHERE varchar_column = '123'
+OR
+WHERE int_column = 123
+'''
+)
+ID_COLUMN_CONVERSION = register_rule(
+    'PERF003',
+    requires=('WHERE',),
+    category='Performance',
+    severity='MEDIUM',
+    issue='Implicit Conversion on ID Column',
+    impact='String comparison on numeric ID column prevents index usage',
+    recommendation='Use numeric literals for ID columns',
+    example='''
+-- BAD:
+WHERE UserId = '123'
+-- GOOD:
+WHERE UserId = 123
+'''
+)
+FUNCTION_IN_WHERE = register_rule(
+    'PERF004',
+    requires=('WHERE',),
+    category='Performance',
+    severity='MEDIUM',
+    issue='Function on Column in WHERE Clause',
+    impact='Prevents index usage (non-SARGable)',
+    recommendation='Avoid functions on columns in WHERE',
+    example='''
+-- BAD:
+WHERE UPPER(name) = 'JOHN'
+WHERE YEAR(date_column) = 2024
+-- GOOD:
+WHERE name = 'JOHN' (use case-insensitive collation)
+WHERE date_column >= '2024-01-01' AND date_column < '2025-01-01'
+'''
+)
+OR_CONDITIONS = register_rule(
+    'PERF005',
+    requires=('OR',),
+    category='Performance',
+    severity='LOW',
+    issue='Multiple OR Conditions ({count} found)',
+    impact='May cause index scan instead of seek',
+    recommendation='Consider UNION ALL or IN clause',
+    example='''
+-- BAD:
+WHERE col1 = 'A' OR col1 = 'B' OR col1 = 'C'
+-- GOOD:
+WHERE col1 IN ('A', 'B', 'C')
+OR
+WHERE col1 = 'A' UNION ALL SELECT ... WHERE col1 = 'B'
+'''
+)
+LEADING_WILDCARD = register_rule(
+    'PERF006',
+    requires=('LIKE',),
+    category='Performance',
+    severity='MEDIUM',
+    issue='LIKE with Leading Wildcard',
+    impact='Cannot use index (table scan)',
+    recommendation='Avoid leading wildcards or use Full-Text Search',
+    example='''
+-- BAD:
+WHERE name LIKE '%smith'
+-- GOOD:
+WHERE name LIKE 'smith%' (can use index)
+OR use Full-Text Search for complex patterns
+'''
+)
+SELECT_INTO = register_rule(
+    'PERF007',
+    requires=('INTO',),
+    category='Performance',
+    severity='LOW',
+    issue='SELECT INTO Usage',
+    impact='Can cause blocking and logging overhead',
+    recommendation='Consider CREATE TABLE + INSERT for production',
+    example='''
+-- OK for temp tables:
+SELECT * INTO #temp FROM table1
+-- For permanent tables, prefer:
+CREATE TABLE dbo.NewTable (...);
+INSERT INTO dbo.NewTable SELECT ...
+'''
+)
+SELECT_STAR_WITHOUT_WHERE = register_rule(
+    'PERF008',
+    requires=('SELECT',),
+    category='Performance',
+    severity='HIGH',
+    issue='SELECT * Without WHERE Clause',
+    impact='Full table scan on potentially large table',
+    recommendation='Always filter with WHERE and specify columns explicitly',
+    example='''
+-- BAD:
+SELECT * FROM HugeTable
+-- GOOD:
+SELECT Col1, Col2 FROM HugeTable WHERE Id > 1000
+'''
+)
+MULTIPLE_COUNT_QUERIES = register_rule(
+    'PERF009',
+    requires=('COUNT',),
+    category='Performance',
+    severity='MEDIUM',
+    issue='Multiple COUNT(*) Queries ({count} found)',
+    impact='Multiple table scans can be expensive',
+    recommendation='Consider combining queries or using temporary results',
+    example='''
+-- BAD:
+SELECT COUNT(*) FROM Table1;
+SELECT COUNT(*) FROM Table2;
+SELECT COUNT(*) FROM Table3;
+-- BETTER:
+SELECT 
+    (SELECT COUNT(*) FROM Table1) AS Count1,
+    (SELECT COUNT(*) FROM Table2) AS Count2,
+    (SELECT COUNT(*) FROM Table3) AS Count3
+'''
+)
+
+# Patterns counted by the aggregate rules (counts add up across statements)
+OR_KEYWORD = re.compile(r'\bOR\b', re.IGNORECASE)
+COUNT_STAR_SELECT = anchored(r'SELECT\s+COUNT\s*\(\s*\*\s*\)', 'SELECT')
+
+# Patterns tried only where the shared anchor scan found their leading keyword
+CURSOR_PATTERN = anchored(r'\bDECLARE\s+\w+\s+CURSOR\s+FOR|DECLARE.*?CURSOR|OPEN\s+\w+|FETCH\s+(?:NEXT|PRIOR|FIRST|LAST)',
+                          'DECLARE', 'OPEN', 'FETCH')
+NUMERIC_COMPARISON_PATTERN = anchored(r"WHERE\s+\w+\s*=\s*\d+", 'WHERE')
+ID_STRING_COMPARISON_PATTERN = anchored(r"WHERE\s+\w*(?:Id|ID)\w*\s*=\s*'[^']*'", 'WHERE')
+FUNCTION_IN_WHERE_PATTERN = anchored(r"WHERE\s+\w+\s*\(\s*\w+\s*\)", 'WHERE')
+LIKE_LITERAL_PATTERN = anchored(r"LIKE\s+['\"]", 'LIKE')
+SELECT_INTO_PATTERN = anchored(r'\bSELECT\s+.*\s+INTO\s+', 'SELECT')
+SELECT_STAR_WITHOUT_WHERE_PATTERN = anchored(r'SELECT\s+\*\s+FROM\s+\w+(?!.*WHERE)', 'SELECT', flags=re.DOTALL)
 
 class PerformanceAnalyzer:
     """Analyze T-SQL for performance issues."""
@@ -29,216 +197,122 @@ class PerformanceAnalyzer:
             'grade': self.get_grade(score)
         }
     
-    def detect_cursor_usage(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_cursor_usage(self, sql_text: str) -> List[Finding]:
         """Detect cursor usage (major performance issue)."""
         issues = []
         
         # Enhanced pattern to catch DECLARE CURSOR, OPEN, FETCH, etc.
-        if re.search(r'\bDECLARE\s+\w+\s+CURSOR\s+FOR|DECLARE.*?CURSOR|OPEN\s+\w+|FETCH\s+(?:NEXT|PRIOR|FIRST|LAST)', sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'HIGH',
-                'issue': 'Cursor Usage Detected',
-                'impact': 'Cursors are slow and resource-intensive',
-                'recommendation': 'Replace with SET-based operations',
-                'example': '''
--- BAD:
-DECLARE cursor_name CURSOR FOR SELECT ...
--- GOOD:
-UPDATE t1 SET ... FROM table1 t1 INNER JOIN table2 t2 ...
-                '''.strip()
-            })
+        context = analysis_context(sql_text).code
+        if context.allows(CURSOR_USAGE) and context.search(CURSOR_PATTERN):
+            issues.append(Finding(CURSOR_USAGE))
         
         return issues
     
-    def detect_implicit_conversions(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_implicit_conversions(self, sql_text: str) -> List[Finding]:
         """Detect potential implicit conversions."""
         issues = []
+        context = analysis_context(sql_text).code
         
         # Pattern 1: VARCHAR comparison with bare numbers (e.g., WHERE varchar_col = 123)
-        if re.search(r"WHERE\s+\w+\s*=\s*\d+", sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'issue': 'Potential Implicit Conversion',
-                'impact': 'Can prevent index usage',
-                'recommendation': 'Ensure data types match in WHERE clauses',
-                'example': '''
--- BAD:
-WHERE varchar_column = 123
--- GOOD:
-WHERE varchar_column = '123'
-OR
-WHERE int_column = 123
-                '''.strip()
-            })
+        if context.allows(IMPLICIT_CONVERSION) and context.search(NUMERIC_COMPARISON_PATTERN):
+            issues.append(Finding(IMPLICIT_CONVERSION))
         
         # Pattern 2: ID columns (UserId, OrderId, CustomerId) compared with STRING literals
         # This catches cases like: WHERE UserId = '123' (should be numeric)
-        if re.search(r"WHERE\s+\w*(?:Id|ID)\w*\s*=\s*'[^']*'", sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'issue': 'Implicit Conversion on ID Column',
-                'impact': 'String comparison on numeric ID column prevents index usage',
-                'recommendation': 'Use numeric literals for ID columns',
-                'example': '''
--- BAD:
-WHERE UserId = '123'
--- GOOD:
-WHERE UserId = 123
-                '''.strip()
-            })
+        if context.allows(ID_COLUMN_CONVERSION) and context.search(ID_STRING_COMPARISON_PATTERN):
+            issues.append(Finding(ID_COLUMN_CONVERSION))
         
         return issues
     
-    def detect_scalar_functions(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_scalar_functions(self, sql_text: str) -> List[Finding]:
         """Detect scalar functions in WHERE clause."""
         issues = []
         
+        context = analysis_context(sql_text).code
+        
         # Functions on columns in WHERE
-        if re.search(r"WHERE\s+\w+\s*\(\s*\w+\s*\)", sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'issue': 'Function on Column in WHERE Clause',
-                'impact': 'Prevents index usage (non-SARGable)',
-                'recommendation': 'Avoid functions on columns in WHERE',
-                'example': '''
--- BAD:
-WHERE UPPER(name) = 'JOHN'
-WHERE YEAR(date_column) = 2024
--- GOOD:
-WHERE name = 'JOHN' (use case-insensitive collation)
-WHERE date_column >= '2024-01-01' AND date_column < '2025-01-01'
-                '''.strip()
-            })
+        if context.allows(FUNCTION_IN_WHERE) and context.search(FUNCTION_IN_WHERE_PATTERN):
+            issues.append(Finding(FUNCTION_IN_WHERE))
         
         return issues
     
-    def detect_or_conditions(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_or_conditions(self, sql_text: str) -> List[Finding]:
         """Detect OR conditions that may impact performance."""
+        context = analysis_context(sql_text).code
+        if not context.allows(OR_CONDITIONS):
+            return []
+        return self.or_condition_findings(len(OR_KEYWORD.findall(context.text)))
+    
+    def or_condition_findings(self, or_count: int) -> List[Finding]:
+        """Findings for a procedure containing or_count OR keywords."""
         issues = []
         
-        or_count = len(re.findall(r'\bOR\b', sql_text, re.IGNORECASE))
         if or_count > 3:
-            issues.append({
-                'category': 'Performance',
-                'severity': 'LOW',
-                'issue': f'Multiple OR Conditions ({or_count} found)',
-                'impact': 'May cause index scan instead of seek',
-                'recommendation': 'Consider UNION ALL or IN clause',
-                'example': '''
--- BAD:
-WHERE col1 = 'A' OR col1 = 'B' OR col1 = 'C'
--- GOOD:
-WHERE col1 IN ('A', 'B', 'C')
-OR
-WHERE col1 = 'A' UNION ALL SELECT ... WHERE col1 = 'B'
-                '''.strip()
-            })
+            issues.append(Finding(OR_CONDITIONS, count=or_count))
         
         return issues
     
-    def detect_leading_wildcards(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_leading_wildcards(self, sql_text: str) -> List[Finding]:
         """Detect LIKE with leading wildcard."""
         issues = []
         
-        if re.search(r"LIKE\s+['\"]%", sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'issue': 'LIKE with Leading Wildcard',
-                'impact': 'Cannot use index (table scan)',
-                'recommendation': 'Avoid leading wildcards or use Full-Text Search',
-                'example': '''
--- BAD:
-WHERE name LIKE '%smith'
--- GOOD:
-WHERE name LIKE 'smith%' (can use index)
-OR use Full-Text Search for complex patterns
-                '''.strip()
-            })
+        context = analysis_context(sql_text).code
+        # Literal contents are blanked in the masked text, so the wildcard
+        # is read from the original at the end of each match
+        if context.allows(LEADING_WILDCARD) and any(sql_text.startswith('%', match.end())
+                                                    for match in context.finditer(LIKE_LITERAL_PATTERN)):
+            issues.append(Finding(LEADING_WILDCARD))
         
         return issues
     
-    def detect_select_into(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_select_into(self, sql_text: str) -> List[Finding]:
         """Detect SELECT INTO usage."""
         issues = []
         
-        if re.search(r'\bSELECT\s+.*\s+INTO\s+', sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'LOW',
-                'issue': 'SELECT INTO Usage',
-                'impact': 'Can cause blocking and logging overhead',
-                'recommendation': 'Consider CREATE TABLE + INSERT for production',
-                'example': '''
--- OK for temp tables:
-SELECT * INTO #temp FROM table1
--- For permanent tables, prefer:
-CREATE TABLE dbo.NewTable (...);
-INSERT INTO dbo.NewTable SELECT ...
-                '''.strip()
-            })
+        context = analysis_context(sql_text).code
+        if context.allows(SELECT_INTO) and context.search(SELECT_INTO_PATTERN):
+            issues.append(Finding(SELECT_INTO))
         
         return issues
     
-    def detect_select_star_without_where(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_select_star_without_where(self, sql_text: str) -> List[Finding]:
         """Detect SELECT * from large tables without WHERE clause."""
         issues = []
         
+        context = analysis_context(sql_text).code
+        
         # Enhanced pattern to catch SELECT * with no WHERE
-        if re.search(r'SELECT\s+\*\s+FROM\s+\w+(?!.*WHERE)', sql_text, re.IGNORECASE | re.DOTALL):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'HIGH',
-                'issue': 'SELECT * Without WHERE Clause',
-                'impact': 'Full table scan on potentially large table',
-                'recommendation': 'Always filter with WHERE and specify columns explicitly',
-                'example': '''
--- BAD:
-SELECT * FROM HugeTable
--- GOOD:
-SELECT Col1, Col2 FROM HugeTable WHERE Id > 1000
-                '''.strip()
-            })
+        if context.allows(SELECT_STAR_WITHOUT_WHERE) and context.search(SELECT_STAR_WITHOUT_WHERE_PATTERN):
+            issues.append(Finding(SELECT_STAR_WITHOUT_WHERE))
         
         return issues
     
-    def detect_multiple_table_scans(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_multiple_table_scans(self, sql_text: str) -> List[Finding]:
         """Detect multiple SELECTs that could indicate table scans."""
+        context = analysis_context(sql_text).code
+        if not context.allows(MULTIPLE_COUNT_QUERIES):
+            return []
+        return self.count_query_findings(context.count(COUNT_STAR_SELECT))
+    
+    def count_query_findings(self, count_star: int) -> List[Finding]:
+        """Findings for a procedure containing count_star SELECT COUNT(*) queries."""
         issues = []
         
-        # Count SELECT statements
-        select_count = len(re.findall(r'\bSELECT\b', sql_text, re.IGNORECASE))
-        
         # If many SELECT statements with COUNT(*), likely multiple scans
-        count_star = len(re.findall(r'SELECT\s+COUNT\s*\(\s*\*\s*\)', sql_text, re.IGNORECASE))
-        
         if count_star >= 3:
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'issue': f'Multiple COUNT(*) Queries ({count_star} found)',
-                'impact': 'Multiple table scans can be expensive',
-                'recommendation': 'Consider combining queries or using temporary results',
-                'example': '''
--- BAD:
-SELECT COUNT(*) FROM Table1;
-SELECT COUNT(*) FROM Table2;
-SELECT COUNT(*) FROM Table3;
--- BETTER:
-SELECT 
-    (SELECT COUNT(*) FROM Table1) AS Count1,
-    (SELECT COUNT(*) FROM Table2) AS Count2,
-    (SELECT COUNT(*) FROM Table3) AS Count3
-                '''.strip()
-            })
+            issues.append(Finding(MULTIPLE_COUNT_QUERIES, count=count_star))
         
         return issues
     
-    def calculate_performance_score(self, issues: List[Dict]) -> int:
+    def calculate_performance_score(self, issues: List[Finding]) -> int:
         """Calculate performance score (0-100)."""
         score = 100
         
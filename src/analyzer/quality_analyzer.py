@@ -4,6 +4,94 @@ Best practices, naming conventions, code smells
 """
 import re
 from typing import List, Dict
+from profiling.rule_stats import track_rule
+from analyzer.rule_registry import register_rule
+from analyzer.analysis_context import analysis_context, anchored
+from analyzer.result_model import Finding
+
+# Rule metadata - defined once, referenced by every Finding
+PROC_NAMING = register_rule(
+    'QUAL001',
+    category='Naming',
+    severity='LOW',
+    message='SP name "{sp_name}" doesn\'t follow usp_/sp_/proc_ convention',
+    recommendation='Use consistent prefix for stored procedures'
+)
+VARIABLE_NAMING = register_rule(
+    'QUAL002',
+    requires=('DECLARE',),
+    category='Naming',
+    severity='LOW',
+    message='Variable "{name}" should start with @',
+    recommendation='Use @ prefix for all variables'
+)
+SELECT_STAR = register_rule(
+    'QUAL101',
+    requires=('SELECT',),
+    category='Performance',
+    severity='MEDIUM',
+    message='SELECT * detected',
+    recommendation='Specify column names explicitly for better performance'
+)
+UPDATE_WITHOUT_WHERE = register_rule(
+    'QUAL102',
+    requires=('UPDATE',),
+    category='Risk',
+    severity='HIGH',
+    message='UPDATE without WHERE clause',
+    recommendation='Always use WHERE clause to prevent unintended updates'
+)
+DELETE_WITHOUT_WHERE = register_rule(
+    'QUAL103',
+    requires=('DELETE',),
+    category='Risk',
+    severity='HIGH',
+    message='DELETE without WHERE clause',
+    recommendation='Always use WHERE clause to prevent data loss'
+)
+NOLOCK_OVERUSE = register_rule(
+    'QUAL104',
+    requires=('NOLOCK',),
+    category='Consistency',
+    severity='MEDIUM',
+    message='NOLOCK hint used {count} times',
+    recommendation='Review necessity - may lead to dirty reads'
+)
+MISSING_NOCOUNT = register_rule(
+    'QUAL201',
+    category='Performance',
+    severity='LOW',
+    message='Missing SET NOCOUNT ON',
+    recommendation='Add SET NOCOUNT ON to reduce network traffic'
+)
+UNQUALIFIED_TABLES = register_rule(
+    'QUAL202',
+    requires=('FROM',),
+    category='Best Practice',
+    severity='LOW',
+    message='Tables without schema qualification',
+    recommendation='Always specify schema (e.g., dbo.TableName)'
+)
+DML_WITHOUT_TRANSACTION = register_rule(
+    'QUAL203',
+    requires=('INSERT', 'UPDATE', 'DELETE'),
+    category='Data Integrity',
+    severity='MEDIUM',
+    message='DML operations without explicit transaction',
+    recommendation='Wrap DML in BEGIN TRAN...COMMIT/ROLLBACK'
+)
+
+# Patterns tried only where the shared anchor scan found their leading keyword
+DECLARE_PATTERN = anchored(r'DECLARE\s+(\w+)', 'DECLARE')
+SELECT_STAR_PATTERN = anchored(r'SELECT\s+\*', 'SELECT')
+UPDATE_WITHOUT_WHERE_PATTERN = anchored(r'UPDATE\s+\w+\s+SET\s+[^W]+(?:;|$)', 'UPDATE')
+DELETE_WITHOUT_WHERE_PATTERN = anchored(r'DELETE\s+FROM\s+\w+\s*(?:;|$)', 'DELETE')
+NOLOCK_PATTERN = anchored(r'WITH\s*\(NOLOCK\)', 'WITH')
+FROM_TABLE_PATTERN = anchored(r'FROM\s+(\w+)\s+(?!\.)', 'FROM')
+UNQUALIFIED_TABLE_PATTERN = anchored(r'FROM\s+(\w+)(?!\s*\.)', 'FROM')
+DML_PATTERN = anchored(r'\b(INSERT|UPDATE|DELETE)\b', 'INSERT', 'UPDATE', 'DELETE')
+BEGIN_TRAN_PATTERN = anchored(r'BEGIN\s+TRAN', 'BEGIN')
+
 
 class CodeQualityAnalyzer:
     """Analyze T-SQL code quality and best practices."""
@@ -30,113 +118,79 @@ class CodeQualityAnalyzer:
             'grade': self.get_grade(score)
         }
     
-    def check_naming_conventions(self, sql_text: str, sp_name: str) -> List[Dict]:
+    @track_rule
+    def check_naming_conventions(self, sql_text: str, sp_name: str) -> List[Finding]:
         """Check naming convention compliance."""
         issues = []
         
         # SP should start with usp_, sp_, or proc_
         if not re.match(r'(usp_|sp_|proc_)', sp_name, re.IGNORECASE):
-            issues.append({
-                'category': 'Naming',
-                'severity': 'LOW',
-                'message': f'SP name "{sp_name}" doesn\'t follow usp_/sp_/proc_ convention',
-                'recommendation': 'Use consistent prefix for stored procedures'
-            })
+            issues.append(Finding(PROC_NAMING, sp_name=sp_name))
         
         # Parameters should start with @
-        params = re.findall(r'DECLARE\s+(\w+)', sql_text, re.IGNORECASE)
+        context = analysis_context(sql_text).code
+        if not context.allows(VARIABLE_NAMING):
+            return issues
+        params = [match.group(1) for match in context.finditer(DECLARE_PATTERN)]
         for param in params:
             if not param.startswith('@'):
-                issues.append({
-                    'category': 'Naming',
-                    'severity': 'LOW',
-                    'message': f'Variable "{param}" should start with @',
-                    'recommendation': 'Use @ prefix for all variables'
-                })
+                issues.append(Finding(VARIABLE_NAMING, name=param))
         
         return issues
     
-    def check_code_smells(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def check_code_smells(self, sql_text: str) -> List[Finding]:
         """Detect code smells."""
         issues = []
+        context = analysis_context(sql_text).code
         
         # SELECT *
-        if re.search(r'SELECT\s+\*', sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Performance',
-                'severity': 'MEDIUM',
-                'message': 'SELECT * detected',
-                'recommendation': 'Specify column names explicitly for better performance'
-            })
+        if context.allows(SELECT_STAR) and context.search(SELECT_STAR_PATTERN):
+            issues.append(Finding(SELECT_STAR))
         
         # Missing WHERE clause in UPDATE/DELETE
-        if re.search(r'UPDATE\s+\w+\s+SET\s+[^W]+(?:;|$)', sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Risk',
-                'severity': 'HIGH',
-                'message': 'UPDATE without WHERE clause',
-                'recommendation': 'Always use WHERE clause to prevent unintended updates'
-            })
-        
-        if re.search(r'DELETE\s+FROM\s+\w+\s*(?:;|$)', sql_text, re.IGNORECASE):
-            issues.append({
-                'category': 'Risk',
-                'severity': 'HIGH',
-                'message': 'DELETE without WHERE clause',
-                'recommendation': 'Always use WHERE clause to prevent data loss'
-            })
+        if context.allows(UPDATE_WITHOUT_WHERE) and context.search(UPDATE_WITHOUT_WHERE_PATTERN):
+            issues.append(Finding(UPDATE_WITHOUT_WHERE))
+        
+        if context.allows(DELETE_WITHOUT_WHERE) and context.search(DELETE_WITHOUT_WHERE_PATTERN):
+            issues.append(Finding(DELETE_WITHOUT_WHERE))
         
         # NOLOCK hint overuse
-        nolock_count = len(re.findall(r'WITH\s*\(NOLOCK\)', sql_text, re.IGNORECASE))
+        nolock_count = 0
+        if context.allows(NOLOCK_OVERUSE):
+            nolock_count = context.count(NOLOCK_PATTERN)
         if nolock_count > 3:
-            issues.append({
-                'category': 'Consistency',
-                'severity': 'MEDIUM',
-                'message': f'NOLOCK hint used {nolock_count} times',
-                'recommendation': 'Review necessity - may lead to dirty reads'
-            })
+            issues.append(Finding(NOLOCK_OVERUSE, count=nolock_count))
         
         return issues
     
-    def check_best_practices(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def check_best_practices(self, sql_text: str) -> List[Finding]:
         """Check T-SQL best practices."""
         issues = []
+        context = analysis_context(sql_text).code
         
         # SET NOCOUNT ON
-        if 'SET NOCOUNT ON' not in sql_text.upper():
-            issues.append({
-                'category': 'Performance',
-                'severity': 'LOW',
-                'message': 'Missing SET NOCOUNT ON',
-                'recommendation': 'Add SET NOCOUNT ON to reduce network traffic'
-            })
+        if 'SET NOCOUNT ON' not in context.upper:
+            issues.append(Finding(MISSING_NOCOUNT))
         
         # Missing schema qualification
-        if re.search(r'FROM\s+(\w+)\s+(?!\.)', sql_text, re.IGNORECASE):
-            unqualified_tables = re.findall(r'FROM\s+(\w+)(?!\s*\.)', sql_text, re.IGNORECASE)
+        if context.allows(UNQUALIFIED_TABLES) and context.search(FROM_TABLE_PATTERN):
+            unqualified_tables = [match.group(1) for match in context.finditer(UNQUALIFIED_TABLE_PATTERN)]
             if unqualified_tables and len([t for t in unqualified_tables if not t.upper() in ['DUAL', 'DELETED', 'INSERTED']]) > 0:
-                issues.append({
-                    'category': 'Best Practice',
-                    'severity': 'LOW',
-                    'message': 'Tables without schema qualification',
-                    'recommendation': 'Always specify schema (e.g., dbo.TableName)'
-                })
+                issues.append(Finding(UNQUALIFIED_TABLES))
         
         # No transaction for DML operations
-        has_dml = bool(re.search(r'\b(INSERT|UPDATE|DELETE)\b', sql_text, re.IGNORECASE))
-        has_transaction = bool(re.search(r'BEGIN\s+TRAN', sql_text, re.IGNORECASE))
-        
-        if has_dml and not has_transaction:
-            issues.append({
-                'category': 'Data Integrity',
-                'severity': 'MEDIUM',
-                'message': 'DML operations without explicit transaction',
-                'recommendation': 'Wrap DML in BEGIN TRAN...COMMIT/ROLLBACK'
-            })
+        if context.allows(DML_WITHOUT_TRANSACTION):
+            has_dml = context.search(DML_PATTERN) is not None
+            has_transaction = context.search(BEGIN_TRAN_PATTERN) is not None
+            
+            if has_dml and not has_transaction:
+                issues.append(Finding(DML_WITHOUT_TRANSACTION))
         
         return issues
     
-    def calculate_quality_score(self, sql_text: str, issues: List[Dict]) -> int:
+    def calculate_quality_score(self, sql_text: str, issues: List[Finding]) -> int:
         """Calculate overall quality score (0-100)."""
         score = 100
         
@@ -149,11 +203,12 @@ class CodeQualityAnalyzer:
                 score -= 3
         
         # Bonus for good practices
-        if 'SET NOCOUNT ON' in sql_text.upper():
+        upper = analysis_context(sql_text).code.upper
+        if 'SET NOCOUNT ON' in upper:
             score += 5
-        if 'BEGIN TRY' in sql_text.upper():
+        if 'BEGIN TRY' in upper:
             score += 5
-        if 'BEGIN TRAN' in sql_text.upper():
+        if 'BEGIN TRAN' in upper:
             score += 5
         
         return max(0, min(100, score))
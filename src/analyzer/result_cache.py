@@ -0,0 +1,177 @@
+"""
+Result Caches
+
+Map the content hash of a procedure's SQL text to its analysis result so
+that re-analyzing unchanged text is a lookup. ResultCache keeps results in
+memory (long-running daemon); DiskResultCache persists them between CLI
+runs (incremental PR analysis); DuplicateFiles shares one result between
+the identical files of a batch.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results keyed by SQL content hash."""
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, object]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(sql_text: str) -> str:
+        """Content hash used as the cache key."""
+        return hashlib.sha256(sql_text.encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    def get(self, key: str) -> Optional[object]:
+        with self._lock:
+            result = self._find(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return result
+    
+    def _find(self, key: str) -> Optional[object]:
+        # Caller holds the lock; marks the entry most recently used
+        result = self._entries.get(key)
+        if result is not None:
+            self._entries.move_to_end(key)
+        return result
+    
+    def put(self, key: str, result: object):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskResultCache:
+    """
+    On-disk cache of pickled analysis results keyed by SQL content hash.
+    
+    The salt is mixed into every key; callers derive it from the analyzer
+    code and options so that results from another version or configuration
+    are never reused. Entries are written atomically, so concurrent runs
+    sharing a cache directory see either a whole entry or none.
+    """
+    
+    def __init__(self, cache_dir: str, salt: str = ''):
+        self.cache_dir = cache_dir
+        self.salt = salt
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def key(self, sql_text: str) -> str:
+        digest = hashlib.sha256(self.salt.encode('utf-8'))
+        digest.update(sql_text.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.pickle')
+    
+    def get(self, key: str) -> Optional[object]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                result = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError, ImportError):
+            # Missing, truncated or written by an incompatible version
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+    
+    def put(self, key: str, result: object):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+
+class DuplicateFiles:
+    """
+    Files of one batch grouped by identical content.
+    
+    A pre-pass hashes every file; during the batch, the result recorded
+    for the first copy of a text is handed out (under their own source)
+    to the other copies, and dropped once the last copy has been served,
+    so only texts with copies still to come are kept in memory.
+    """
+    
+    def __init__(self, paths: Iterable[str]):
+        self._keys: Dict[str, str] = {}
+        self._pending: Counter = Counter()  # key -> copies not yet analyzed or served
+        self._results: Dict[str, object] = {}
+        self.total = 0
+        self.served = 0
+        for path in paths:
+            self.total += 1
+            try:
+                # Read as SPAnalyzer.analyze_file does; unreadable files are
+                # analyzed (and reported) on their own
+                with open(path, 'r', encoding='utf-8') as f:
+                    key = ResultCache.key(f.read())
+            except (OSError, UnicodeDecodeError):
+                continue
+            self._keys[path] = key
+            self._pending[key] += 1
+    
+    @property
+    def unique(self) -> int:
+        """Distinct texts, counting each unreadable file as its own."""
+        return len(self._pending) + self.total - len(self._keys)
+    
+    @property
+    def ratio(self) -> float:
+        """Files per distinct text (1.0 when there are no duplicates)."""
+        return self.total / self.unique if self.unique else 1.0
+    
+    def result_for(self, path: str):
+        """The result of an identical file analyzed earlier, re-sourced to path; None if there is none."""
+        key = self._keys.get(path)
+        result = self._results.get(key)
+        if result is None:
+            return None
+        self._release(key)
+        self.served += 1
+        return result.replace(source=path, timings={})
+    
+    def record(self, path: str, result):
+        """Keep a file's result for the copies still to come; failed analyses are not shared."""
+        key = self._keys.get(path)
+        if key is None:
+            return
+        if result.get('success', False):
+            self._results[key] = result
+        self._release(key)
+    
+    def _release(self, key: str):
+        self._pending[key] -= 1
+        if self._pending[key] <= 0:
+            self._results.pop(key, None)
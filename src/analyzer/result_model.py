@@ -0,0 +1,156 @@
+"""
+Compact result model for analysis output
+__slots__ classes for findings, metrics and per-procedure results; plain
+dicts are only produced by to_dict() at the serialization boundary
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
+
+from analyzer.rule_registry import Rule, get_rule
+
+
+class Finding(Mapping):
+    """
+    One rule hit. Holds a reference to its Rule plus the few values that
+    vary per hit (counts, names); everything else is read from the rule.
+    
+    Supports read-only dict access (finding['severity'], .get, in) so
+    existing consumers keep working.
+    """
+    
+    __slots__ = ('rule', 'params')
+    
+    def __init__(self, rule: Rule, **params):
+        self.rule = rule
+        self.params = params or None
+    
+    @property
+    def rule_id(self) -> str:
+        return self.rule.rule_id
+    
+    @property
+    def severity(self) -> str:
+        return self.rule.severity
+    
+    def __getitem__(self, key: str) -> Any:
+        if key == 'rule_id':
+            return self.rule.rule_id
+        if key not in self.rule.fields:
+            raise KeyError(key)
+        value = self.rule.get(key)
+        if self.params and key in self.rule.templated:
+            return value.format(**self.params)
+        return value
+    
+    def __iter__(self):
+        yield 'rule_id'
+        yield from self.rule.fields
+    
+    def __len__(self) -> int:
+        return len(self.rule.fields) + 1
+    
+    def __reduce__(self):
+        return (_make_finding, (self.rule.rule_id, self.params or {}))
+    
+    def __repr__(self):
+        return f"Finding({self.rule.rule_id}, {self.params or {}})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+
+def _make_finding(rule_id: str, params: Dict) -> Finding:
+    return Finding(get_rule(rule_id), **params)
+
+
+class Metrics:
+    """Scalar metrics of one analyzed procedure."""
+    
+    __slots__ = ('lines_of_code', 'security_score', 'quality_score', 'quality_grade',
+                 'performance_score', 'performance_grade', 'complexity', 'issue_count')
+    
+    def __init__(self, lines_of_code: int = 0, security_score: int = 0, quality_score: int = 0,
+                 quality_grade: str = 'F', performance_score: int = 0, performance_grade: str = 'F',
+                 complexity: int = 0, issue_count: int = 0):
+        self.lines_of_code = lines_of_code
+        self.security_score = security_score
+        self.quality_score = quality_score
+        self.quality_grade = quality_grade
+        self.performance_score = performance_score
+        self.performance_grade = performance_grade
+        self.complexity = complexity
+        self.issue_count = issue_count
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ProcResult:
+    """
+    Analysis result for one procedure.
+    
+    Behaves like the result dict it replaces (result['security'],
+    result.get('risk_assessment'), 'error' in result); fields that are
+    None are treated as absent.
+    """
+    
+    __slots__ = ('success', 'source', 'sp_name', 'basic', 'control_flow', 'cfg_nodes',
+                 'unreachable_blocks', 'infinite_loops', 'complexity', 'security', 'quality',
+                 'performance', 'dependencies', 'risk_assessment', 'timings', 'metrics', 'error')
+    
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown result fields: {', '.join(fields)}")
+    
+    def __getitem__(self, key: str) -> Any:
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+    
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+    
+    def get(self, key: str, default: Optional[Any] = None) -> Any:
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+    
+    def keys(self):
+        return [name for name in self.__slots__ if getattr(self, name) is not None]
+    
+    def __iter__(self):
+        return iter(self.keys())
+    
+    def __len__(self) -> int:
+        return len(self.keys())
+    
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.keys()]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to plain nested dicts/lists for JSON or report output."""
+        return {name: to_serializable(value) for name, value in self.items()}
+    
+    def replace(self, **changes) -> 'ProcResult':
+        """Return a shallow copy with the given fields replaced."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return ProcResult(**fields)
+
+
+def to_serializable(value: Any) -> Any:
+    """Recursively convert result model objects into plain JSON types."""
+    if isinstance(value, (Finding, Metrics, ProcResult)):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {k: to_serializable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_serializable(v) for v in value]
+    return value
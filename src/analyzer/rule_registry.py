@@ -0,0 +1,61 @@
+"""
+Rule Registry for analyzer findings
+Rule metadata (message, recommendation, example, ...) is defined once per
+rule and referenced by id from every Finding instead of being copied
+"""
+from typing import Dict, Sequence, Tuple
+
+from analyzer.analysis_context import keyword_mask
+
+
+class Rule:
+    """Static metadata for one analyzer rule."""
+    
+    __slots__ = ('rule_id', 'fields', 'templated', '_values', 'requires', 'required_mask')
+    
+    def __init__(self, rule_id: str, requires: Sequence[str] = (), **fields):
+        """
+        Args:
+            rule_id: Stable rule identifier (e.g. 'PERF001')
+            requires: Keywords of which at least one must occur in the text
+                      for the rule to possibly match; empty means always run
+            **fields: Finding fields in serialization order. String values
+                      may contain {placeholders} filled from Finding params.
+        """
+        self.rule_id = rule_id
+        self.requires: Tuple[str, ...] = tuple(k.upper() for k in requires)
+        self.required_mask = keyword_mask(self.requires)
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.templated = frozenset(k for k, v in fields.items() if isinstance(v, str) and '{' in v)
+        self._values: Dict[str, str] = {k: (v.strip() if k == 'example' else v) for k, v in fields.items()}
+    
+    def get(self, field: str, default=None):
+        return self._values.get(field, default)
+    
+    @property
+    def severity(self) -> str:
+        return self._values.get('severity', 'LOW')
+    
+    def __reduce__(self):
+        # Pickle by reference: workers resolve the id in their own registry
+        return (get_rule, (self.rule_id,))
+    
+    def __repr__(self):
+        return f"Rule({self.rule_id})"
+
+
+RULES: Dict[str, Rule] = {}
+
+
+def register_rule(rule_id: str, requires: Sequence[str] = (), **fields) -> Rule:
+    """Create a rule and add it to the shared registry."""
+    if rule_id in RULES:
+        raise ValueError(f"Duplicate rule id: {rule_id}")
+    rule = Rule(rule_id, requires=requires, **fields)
+    RULES[rule_id] = rule
+    return rule
+
+
+def get_rule(rule_id: str) -> Rule:
+    """Look up a registered rule by id."""
+    return RULES[rule_id]
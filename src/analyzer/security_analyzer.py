@@ -4,16 +4,133 @@ Detects SQL injection risks, permission issues, and security anti-patterns
 """
 import re
 from typing import List, Dict
+from profiling.rule_stats import track_rule
+from analyzer.rule_registry import register_rule
+from analyzer.analysis_context import analysis_context, anchored
+from analyzer.result_model import Finding
+
+# Rule metadata - defined once, referenced by every Finding
+DYNAMIC_SQL = register_rule(
+    'SEC001',
+    requires=('EXEC',),
+    severity='HIGH',
+    type='Dynamic SQL',
+    message='Dynamic SQL with variables detected - potential SQL injection risk',
+    recommendation='Use sp_executesql with parameters instead of EXEC(@sql)'
+)
+STRING_CONCATENATION = register_rule(
+    'SEC002',
+    severity='MEDIUM',
+    type='String Concatenation',
+    message='String concatenation detected - ensure proper sanitization',
+    recommendation='Use parameterized queries'
+)
+EXECUTESQL_CONCATENATION = register_rule(
+    'SEC003',
+    requires=('SP_EXECUTESQL',),
+    severity='HIGH',
+    type='Dynamic SQL',
+    message='sp_executesql with string concatenation detected',
+    recommendation='Use sp_executesql with proper @params definition'
+)
+OPENROWSET_INJECTION = register_rule(
+    'SEC004',
+    requires=('OPENROWSET',),
+    severity='CRITICAL',
+    type='OPENROWSET Injection',
+    message='OPENROWSET with concatenated parameters - SQL injection risk',
+    recommendation='Never concatenate user input in OPENROWSET statements'
+)
+SECOND_ORDER_INJECTION = register_rule(
+    'SEC005',
+    requires=('EXEC',),
+    severity='HIGH',
+    type='Second-Order Injection',
+    message='Potential second-order injection: data from DB used in dynamic SQL',
+    recommendation='Sanitize all data before using in dynamic queries'
+)
+FROM_CLAUSE_CONCATENATION = register_rule(
+    'SEC006',
+    requires=('FROM',),
+    severity='HIGH',
+    type='String Concatenation',
+    message='String concatenation in FROM clause - SQL injection risk',
+    recommendation='Use parameterized table names or whitelisting'
+)
+UNSAFE_WHERE = register_rule(
+    'SEC007',
+    requires=('WHERE',),
+    severity='HIGH',
+    type='Unsafe WHERE Clause',
+    message='WHERE clause with concatenated user input',
+    recommendation='Use parameterized WHERE conditions'
+)
+TAINTED_DYNAMIC_SQL = register_rule(
+    'SEC008',
+    requires=('EXEC',),
+    severity='HIGH',
+    type='Dynamic SQL',
+    message='Parameter-derived {variables} reaches {sink} on line {line} - SQL injection risk',
+    recommendation='Pass values as sp_executesql parameters and wrap identifiers in QUOTENAME()'
+)
+EXTENDED_PROCEDURE = register_rule(
+    'SEC101',
+    requires=('XP_',),
+    severity='HIGH',
+    type='Extended Stored Procedure',
+    message='Usage of xp_ extended procedures detected',
+    recommendation='Review necessity - these require elevated privileges'
+)
+IMPERSONATION = register_rule(
+    'SEC102',
+    requires=('EXECUTE',),
+    severity='MEDIUM',
+    type='Impersonation',
+    message='EXECUTE AS detected - context switching',
+    recommendation='Ensure minimal privilege escalation'
+)
+NO_ERROR_HANDLING = register_rule(
+    'SEC201',
+    severity='LOW',
+    type='Error Handling',
+    message='No TRY-CATCH block found',
+    recommendation='Add error handling to prevent information disclosure'
+)
+SENSITIVE_COMMENT = register_rule(
+    'SEC202',
+    requires=('--',),
+    severity='MEDIUM',
+    type='Sensitive Data',
+    message='Potential sensitive data in comments',
+    recommendation='Remove sensitive information from code'
+)
+
+# Patterns tried only where the shared anchor scan found their leading keyword
+EXECUTESQL_CONCAT_PATTERN = anchored(r"sp_executesql\s+N?['\"].*?\+|sp_executesql.*?\+\s*(?:CAST|CONVERT)", 'SP_EXECUTESQL')
+OPENROWSET_CONCAT_PATTERN = anchored(r'OPENROWSET\s*\(.*?\+|OPENROWSET.*?[\'"]\s*\+', 'OPENROWSET')
+SECOND_ORDER_PATTERN = anchored(r'SELECT\s+@\w+\s*=.*?FROM.*?EXEC\s*\(.*?@\w+', 'SELECT', flags=re.DOTALL)
+FROM_CONCAT_PATTERN = anchored(r'FROM\s+[\'"]?\s*\+|SELECT\s+\*\s+FROM\s+[\'"]\s*\+', 'FROM', 'SELECT')
+UNSAFE_WHERE_PATTERN = anchored(r"WHERE\s+\w+\s*=\s*['\"']\s*\+\s*@", 'WHERE')
+EXTENDED_PROCEDURE_PATTERN = anchored(r'\bxp_\w+', 'XP_')
+EXECUTE_AS_PATTERN = anchored(r'EXECUTE\s+AS', 'EXECUTE')
+SENSITIVE_COMMENT_PATTERN = anchored(r'--.*(?:password|secret|key|token)', '--')
+
 
 class SecurityAnalyzer:
     """Analyze stored procedures for security vulnerabilities."""
     
-    def __init__(self):
+    def __init__(self, taint: bool = False):
         # SQL Injection patterns
-        self.dynamic_sql_pattern = re.compile(r'EXEC(?:UTE)?\s*\(?\s*@', re.IGNORECASE)
+        self.dynamic_sql_pattern = anchored(r'EXEC(?:UTE)?\s*\(?\s*@', 'EXEC')
         self.concat_pattern = re.compile(r'\+\s*@\w+\s*\+|@\w+\s*\+', re.IGNORECASE)
-        
-    def analyze(self, sql_text: str) -> Dict[str, List[Dict]]:
+        # Data-flow analysis from parameters to dynamic SQL, replacing the
+        # dynamic SQL and concatenation patterns (SEC001-003, SEC006, SEC007)
+        self.taint_analyzer = None
+        if taint:
+            from analyzer.taint_analyzer import TaintAnalyzer
+            self.taint_analyzer = TaintAnalyzer()
+        
+    def analyze(self, sql_text: str) -> Dict[str, List[Finding]]:
         """Run all security checks."""
         return {
             'sql_injection_risks': self.detect_sql_injection(sql_text),
@@ -21,130 +138,92 @@ class SecurityAnalyzer:
             'security_warnings': self.detect_security_warnings(sql_text)
         }
     
-    def detect_sql_injection(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_sql_injection(self, sql_text: str) -> List[Finding]:
         """Detect potential SQL injection vulnerabilities."""
         issues = []
-        
-        # Dynamic SQL execution
-        if self.dynamic_sql_pattern.search(sql_text):
-            issues.append({
-                'severity': 'HIGH',
-                'type': 'Dynamic SQL',
-                'message': 'Dynamic SQL with variables detected - potential SQL injection risk',
-                'recommendation': 'Use sp_executesql with parameters instead of EXEC(@sql)'
-            })
-        
-        # String concatenation in SQL
-        if self.concat_pattern.search(sql_text):
-            issues.append({
-                'severity': 'MEDIUM',
-                'type': 'String Concatenation',
-                'message': 'String concatenation detected - ensure proper sanitization',
-                'recommendation': 'Use parameterized queries'
-            })
-        
-        # sp_executesql with concatenation (enhanced check for tests)
-        if re.search(r"sp_executesql\s+N?['\"].*?\+|sp_executesql.*?\+\s*(?:CAST|CONVERT)", sql_text, re.IGNORECASE):
-            if not any(issue['type'] == 'Dynamic SQL' for issue in issues):
-                issues.append({
-                    'severity': 'HIGH',
-                    'type': 'Dynamic SQL',
-                    'message': 'sp_executesql with string concatenation detected',
-                    'recommendation': 'Use sp_executesql with proper @params definition'
-                })
+        context = analysis_context(sql_text)
+        
+        if self.taint_analyzer is not None:
+            # Parameters flowing into dynamic SQL, one finding per reached sink
+            if context.allows(TAINTED_DYNAMIC_SQL):
+                for flow in self.taint_analyzer.analyze(sql_text):
+                    issues.append(Finding(TAINTED_DYNAMIC_SQL, variables=', '.join(flow.variables),
+                                          sink=flow.sink, line=flow.line))
+        else:
+            # Dynamic SQL execution
+            if context.allows(DYNAMIC_SQL) and context.search(self.dynamic_sql_pattern):
+                issues.append(Finding(DYNAMIC_SQL))
+            
+            # String concatenation in SQL
+            if self.concat_pattern.search(sql_text):
+                issues.append(Finding(STRING_CONCATENATION))
+            
+            # sp_executesql with concatenation (enhanced check for tests)
+            if context.allows(EXECUTESQL_CONCATENATION) and context.search(EXECUTESQL_CONCAT_PATTERN):
+                if not any(issue['type'] == 'Dynamic SQL' for issue in issues):
+                    issues.append(Finding(EXECUTESQL_CONCATENATION))
         
         # OPENROWSET with concatenation (external data source injection)
-        if re.search(r'OPENROWSET\s*\(.*?\+|OPENROWSET.*?[\'"]\s*\+', sql_text, re.IGNORECASE):
-            issues.append({
-                'severity': 'CRITICAL',
-                'type': 'OPENROWSET Injection',
-                'message': 'OPENROWSET with concatenated parameters - SQL injection risk',
-                'recommendation': 'Never concatenate user input in OPENROWSET statements'
-            })
+        if context.allows(OPENROWSET_INJECTION) and context.search(OPENROWSET_CONCAT_PATTERN):
+            issues.append(Finding(OPENROWSET_INJECTION))
         
         # Second-order injection (storing user input then using in EXEC)
-        if re.search(r'SELECT\s+@\w+\s*=.*?FROM.*?EXEC\s*\(.*?@\w+', sql_text, re.IGNORECASE | re.DOTALL):
+        if context.allows(SECOND_ORDER_INJECTION) and context.search(SECOND_ORDER_PATTERN):
             if not any(issue['type'] == 'Dynamic SQL' or issue['type'] == 'Second-Order Injection' for issue in issues):
-                issues.append({
-                    'severity': 'HIGH',
-                    'type': 'Second-Order Injection',
-                    'message': 'Potential second-order injection: data from DB used in dynamic SQL',
-                    'recommendation': 'Sanitize all data before using in dynamic queries'
-                })
-        
-        # String concatenation used in FROM clause (classic SQL injection)
-        if re.search(r'FROM\s+[\'"]?\s*\+|SELECT\s+\*\s+FROM\s+[\'"]\s*\+', sql_text, re.IGNORECASE):
-            if not any(issue['type'] == 'String Concatenation' for issue in issues):
-                issues.append({
-                    'severity': 'HIGH',
-                    'type': 'String Concatenation',
-                    'message': 'String concatenation in FROM clause - SQL injection risk',
-                    'recommendation': 'Use parameterized table names or whitelisting'
-                })
-        
-        # Direct string comparison (potential injection)
-        if re.search(r"WHERE\s+\w+\s*=\s*['\"']\s*\+\s*@", sql_text, re.IGNORECASE):
-            issues.append({
-                'severity': 'HIGH',
-                'type': 'Unsafe WHERE Clause',
-                'message': 'WHERE clause with concatenated user input',
-                'recommendation': 'Use parameterized WHERE conditions'
-            })
+                issues.append(Finding(SECOND_ORDER_INJECTION))
+        
+        if self.taint_analyzer is None:
+            # String concatenation used in FROM clause (classic SQL injection)
+            if context.allows(FROM_CLAUSE_CONCATENATION) and context.search(FROM_CONCAT_PATTERN):
+                if not any(issue['type'] == 'String Concatenation' for issue in issues):
+                    issues.append(Finding(FROM_CLAUSE_CONCATENATION))
+            
+            # Direct string comparison (potential injection)
+            if context.allows(UNSAFE_WHERE) and context.search(UNSAFE_WHERE_PATTERN):
+                issues.append(Finding(UNSAFE_WHERE))
         
         return issues
     
-    def detect_permission_issues(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_permission_issues(self, sql_text: str) -> List[Finding]:
         """Detect permission and privilege issues."""
         issues = []
+        # Calls and EXECUTE AS in comments or string literals are not run
+        code = analysis_context(sql_text).code
         
         # Usage of xp_ procedures (high privilege)
-        if re.search(r'\bxp_\w+', sql_text, re.IGNORECASE):
-            issues.append({
-                'severity': 'HIGH',
-                'type': 'Extended Stored Procedure',
-                'message': 'Usage of xp_ extended procedures detected',
-                'recommendation': 'Review necessity - these require elevated privileges'
-            })
+        if code.allows(EXTENDED_PROCEDURE) and code.search(EXTENDED_PROCEDURE_PATTERN):
+            issues.append(Finding(EXTENDED_PROCEDURE))
         
         # EXECUTE AS usage
-        if re.search(r'EXECUTE\s+AS', sql_text, re.IGNORECASE):
-            issues.append({
-                'severity': 'MEDIUM',
-                'type': 'Impersonation',
-                'message': 'EXECUTE AS detected - context switching',
-                'recommendation': 'Ensure minimal privilege escalation'
-            })
+        if code.allows(IMPERSONATION) and code.search(EXECUTE_AS_PATTERN):
+            issues.append(Finding(IMPERSONATION))
         
         return issues
     
-    def detect_security_warnings(self, sql_text: str) -> List[Dict]:
+    @track_rule
+    def detect_security_warnings(self, sql_text: str) -> List[Finding]:
         """Detect general security warnings."""
         warnings = []
+        context = analysis_context(sql_text)
         
         # No TRY-CATCH error handling
-        if 'BEGIN TRY' not in sql_text.upper():
-            warnings.append({
-                'severity': 'LOW',
-                'type': 'Error Handling',
-                'message': 'No TRY-CATCH block found',
-                'recommendation': 'Add error handling to prevent information disclosure'
-            })
+        if 'BEGIN TRY' not in context.upper:
+            warnings.append(Finding(NO_ERROR_HANDLING))
         
         # Sensitive data in comments
-        if re.search(r'--.*(?:password|secret|key|token)', sql_text, re.IGNORECASE):
-            warnings.append({
-                'severity': 'MEDIUM',
-                'type': 'Sensitive Data',
-                'message': 'Potential sensitive data in comments',
-                'recommendation': 'Remove sensitive information from code'
-            })
+        if context.allows(SENSITIVE_COMMENT) and context.search(SENSITIVE_COMMENT_PATTERN):
+            warnings.append(Finding(SENSITIVE_COMMENT))
         
         return warnings
     
     def get_security_score(self, sql_text: str) -> int:
         """Calculate security score (0-100, higher is better)."""
-        analysis = self.analyze(sql_text)
-        
+        return self.calculate_security_score(self.analyze(sql_text))
+    
+    def calculate_security_score(self, analysis: Dict[str, List[Finding]]) -> int:
+        """Calculate security score from an existing analyze() result."""
         score = 100
         
         # Deduct points for issues (VERY STRICT for production safety)
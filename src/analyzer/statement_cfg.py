@@ -0,0 +1,261 @@
+"""
+Statement-Level Control Flow Graph for T-SQL
+One node per statement (and per IF/WHILE condition), with the edges of
+IF/ELSE, WHILE/BREAK/CONTINUE, BEGIN...END, TRY/CATCH, RETURN and GOTO,
+for data-flow analyses that need to know which statement can follow which
+"""
+import re
+from typing import Dict, List, Tuple
+
+from parser.statement_splitter import STATEMENT_KEYWORDS, statement_boundaries
+from analyzer.analysis_context import analysis_context
+
+ENTRY = 0
+EXIT = 1
+
+_BLOCK_BEGIN = r"BEGIN(?!\s+(?:TRAN|TRANSACTION|DISTRIBUTED|DIALOG|CONVERSATION)\b)"
+
+# Control keywords that open or close structure at the start of a statement
+_CONTROL = re.compile(
+    r"\s*(?:(?P<try>BEGIN\s+TRY)|(?P<catch>BEGIN\s+CATCH)|(?P<end_try>END\s+TRY)|(?P<end_catch>END\s+CATCH)"
+    r"|(?P<begin>" + _BLOCK_BEGIN + r")"
+    r"|(?P<end>END)(?!\s+CONVERSATION\b)|(?P<else>ELSE)|(?P<if>IF)|(?P<while>WHILE))\b",
+    re.IGNORECASE
+)
+_LEADING_WORD = re.compile(r"\s*(\w+)(?:\s+(\w+))?")
+_LABEL_LINE = re.compile(r"^[ \t]*(\w+)[ \t]*:[ \t]*$", re.MULTILINE)
+_ANY_KEYWORD = re.compile(r"[()]|\b(?:CASE|" + '|'.join(STATEMENT_KEYWORDS) + r")\b", re.IGNORECASE)
+_BLOCK_KEYWORD = re.compile(r"[()]|\b(?:CASE|ELSE|END|" + _BLOCK_BEGIN + r")\b", re.IGNORECASE)
+
+_CLOSERS = frozenset(('end', 'end_try', 'end_catch'))
+_JUMPS = frozenset(('RETURN', 'BREAK', 'CONTINUE', 'GOTO', 'THROW'))
+
+
+def _next_keyword(masked: str, pattern, start: int, end: int) -> int:
+    """Offset of the first keyword of pattern outside parentheses and CASE...END, or end."""
+    depth = 0
+    case_depth = 0
+    for match in pattern.finditer(masked, start, end):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(0, depth - 1)
+        elif depth == 0:
+            word = token.upper()
+            if word == 'CASE':
+                case_depth += 1
+            elif case_depth and word == 'END':
+                case_depth -= 1
+            elif not case_depth or word not in ('ELSE', 'END'):
+                return match.start()
+    return end
+
+
+class StatementNode:
+    """A statement, condition or structural point: text[start:end] of the procedure."""
+    
+    __slots__ = ('kind', 'start', 'end')
+    
+    def __init__(self, kind: str, start: int, end: int):
+        self.kind = kind    # ENTRY, EXIT, STATEMENT, IF, WHILE, CATCH, LABEL or a jump (RETURN, BREAK, ...)
+        self.start = start
+        self.end = end
+    
+    def __repr__(self) -> str:
+        return f"StatementNode({self.kind}, {self.start}, {self.end})"
+
+
+class StatementCFG:
+    """
+    Control flow graph with one node per statement.
+    
+    Node ENTRY (0) precedes the first statement and node EXIT (1) follows
+    the last one and every RETURN. Statements inside a TRY block also have
+    an edge to the CATCH node. Statements no path reaches (e.g. after a
+    RETURN) have no predecessors.
+    """
+    
+    def __init__(self, sql_text: str):
+        self.text = sql_text
+        self.masked = analysis_context(sql_text).code.text
+        self.nodes: List[StatementNode] = [StatementNode('ENTRY', 0, 0),
+                                           StatementNode('EXIT', len(sql_text), len(sql_text))]
+        self.successors: List[List[int]] = [[], []]
+        self._units: List[Tuple[str, int, int]] = []
+        self._position = 0
+        self._loops: List[Tuple[int, List[int]]] = []  # (WHILE node, BREAK nodes)
+        self._labels: Dict[str, int] = {}
+        self._gotos: List[Tuple[int, str]] = []
+        self._build()
+    
+    def __len__(self) -> int:
+        return len(self.nodes)
+    
+    def line_of(self, node_id: int) -> int:
+        """1-based line on which a node's text starts."""
+        node = self.nodes[node_id]
+        start = node.start + len(self.text[node.start:node.end]) - len(self.text[node.start:node.end].lstrip())
+        return self.text.count('\n', 0, start) + 1
+    
+    def node_text(self, node_id: int) -> str:
+        node = self.nodes[node_id]
+        return self.text[node.start:node.end]
+    
+    def predecessors(self) -> List[List[int]]:
+        predecessors: List[List[int]] = [[] for _ in self.nodes]
+        for node_id, successors in enumerate(self.successors):
+            for successor in successors:
+                predecessors[successor].append(node_id)
+        return predecessors
+    
+    # -- construction --------------------------------------------------
+    
+    def _build(self):
+        masked = self.masked
+        boundaries = statement_boundaries(self.text)
+        # Labels are not statement keywords, so they are split off here
+        labels = [m.start() for m in _LABEL_LINE.finditer(masked)]
+        if labels:
+            boundaries = sorted(set(boundaries).union(labels))
+        for start, end in zip(boundaries, boundaries[1:]):
+            self._peel(start, end)
+        
+        exits = [ENTRY]
+        while self._position < len(self._units):
+            if self._units[self._position][0] in _CLOSERS:
+                self._position += 1  # unbalanced END
+                continue
+            exits = self._statement(exits)
+        self._link(exits, EXIT)
+        for node_id, label in self._gotos:
+            self._link([node_id], self._labels.get(label.upper(), EXIT))
+        del self._units, self._loops, self._labels, self._gotos
+    
+    def _peel(self, start: int, end: int):
+        """Split one statement into control keywords, conditions and plain statements."""
+        masked = self.masked
+        units = self._units
+        position = start
+        while position < end:
+            match = _CONTROL.match(masked, position, end)
+            if match is None:
+                if not masked[position:end].strip():
+                    return
+                # A plain statement runs up to a BEGIN, ELSE or END on the same line
+                stop = _next_keyword(masked, _BLOCK_KEYWORD, position, end)
+                units.append(('statement', position, stop))
+                position = stop
+                continue
+            kind = match.lastgroup
+            if kind in ('if', 'while'):
+                condition_end = _next_keyword(masked, _ANY_KEYWORD, match.end(), end)
+                units.append((kind, match.end(), condition_end))
+                position = condition_end
+            else:
+                units.append((kind, match.start(kind), match.end()))
+                position = match.end()
+    
+    def _node(self, kind: str, start: int, end: int, predecessors: List[int]) -> int:
+        node_id = len(self.nodes)
+        self.nodes.append(StatementNode(kind, start, end))
+        self.successors.append([])
+        self._link(predecessors, node_id)
+        return node_id
+    
+    def _link(self, predecessors: List[int], node_id: int):
+        for predecessor in predecessors:
+            successors = self.successors[predecessor]
+            if node_id not in successors:
+                successors.append(node_id)
+    
+    def _statement(self, predecessors: List[int]) -> List[int]:
+        """Add the next statement after predecessors; returns the nodes that fall through past it."""
+        units = self._units
+        if self._position >= len(units) or units[self._position][0] in _CLOSERS:
+            return predecessors  # empty statement
+        kind, start, end = units[self._position]
+        self._position += 1
+        
+        if kind == 'if':
+            exits = []
+            while True:
+                condition = self._node('IF', start, end, predecessors)
+                exits.extend(self._statement([condition]))
+                if self._position >= len(units) or units[self._position][0] != 'else':
+                    exits.append(condition)
+                    return exits
+                self._position += 1
+                if self._position < len(units) and units[self._position][0] == 'if':
+                    # ELSE IF chains are followed iteratively, not recursively
+                    _, start, end = units[self._position]
+                    self._position += 1
+                    predecessors = [condition]
+                    continue
+                exits.extend(self._statement([condition]))
+                return exits
+        
+        if kind == 'while':
+            header = self._node('WHILE', start, end, predecessors)
+            self._loops.append((header, []))
+            body = self._statement([header])
+            self._link(body, header)
+            _, breaks = self._loops.pop()
+            return [header] + breaks
+        
+        if kind == 'begin':
+            return self._block(predecessors, 'end')
+        
+        if kind == 'try':
+            first = len(self.nodes)
+            exits = self._block(predecessors, 'end_try')
+            if self._position < len(units) and units[self._position][0] == 'catch':
+                _, start, end = units[self._position]
+                self._position += 1
+                catch = self._node('CATCH', start, end, list(range(first, len(self.nodes))))
+                exits = exits + self._block([catch], 'end_catch')
+            return exits
+        
+        if kind == 'catch':
+            return self._block(predecessors, 'end_catch')
+        
+        if kind == 'else':
+            return predecessors  # ELSE without IF
+        
+        match = _LEADING_WORD.match(self.masked, start, end)
+        word = match.group(1).upper() if match else ''
+        if word in _JUMPS:
+            node_id = self._node(word, start, end, predecessors)
+            if word == 'BREAK' and self._loops:
+                self._loops[-1][1].append(node_id)
+            elif word == 'CONTINUE' and self._loops:
+                self._link([node_id], self._loops[-1][0])
+            elif word == 'GOTO' and match.group(2):
+                self._gotos.append((node_id, match.group(2)))
+            else:
+                self._link([node_id], EXIT)
+            return []
+        label = _LABEL_LINE.match(self.masked, start, end)
+        if label:
+            node_id = self._node('LABEL', start, end, predecessors)
+            self._labels[label.group(1).upper()] = node_id
+            return [node_id]
+        return [self._node('STATEMENT', start, end, predecessors)]
+    
+    def _block(self, predecessors: List[int], closer: str) -> List[int]:
+        units = self._units
+        exits = predecessors
+        while self._position < len(units):
+            kind = units[self._position][0]
+            if kind == closer:
+                self._position += 1
+                break
+            if kind in _CLOSERS:
+                break  # closes an outer block
+            exits = self._statement(exits)
+        return exits
+
+
+def build_statement_cfg(sql_text: str) -> StatementCFG:
+    """Statement-level control flow graph of a procedure or batch."""
+    return StatementCFG(sql_text)
@@ -0,0 +1,147 @@
+"""
+Statement Memo - Analyze Boilerplate Once per Batch
+
+Procedures generated from templates or copied from each other repeat the
+same statements with different literals, parameter names, layout and
+casing. normalize_statement() maps all such variants to one form and
+StatementMemo shares the statement rule results for that form across
+every procedure in a batch.
+
+The normalization only discards what the memoized rules cannot observe:
+they match case-insensitive patterns against the masked text (comments
+and literal contents blanked), so
+- comments become whitespace and whitespace runs collapse to one space,
+  or one newline if they contain any ('.' does not cross lines);
+- a string literal keeps only its quotes, whether its content starts
+  with '%' (leading LIKE wildcards are read from the original) and
+  whether it spans lines;
+- every run of digits becomes 0;
+- @parameters become @p unless the name contains a keyword some rule or
+  prefilter looks for (a parameter named @Cursor stays as it is);
+- ASCII letters are lower-cased.
+"""
+import hashlib
+import re
+from typing import Optional, Pattern, Tuple
+
+from analyzer.analysis_context import ANCHORS, KEYWORDS
+from analyzer.result_cache import ResultCache
+
+# Same token boundaries as the masker: comments, literals and delimited
+# identifiers are consumed whole, so quotes and dashes inside them are not
+# taken for anything else
+_HIDDEN_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|'(?P<string>(?:[^']|'')*)(?P<closing>')?"
+    r"|(?P<ident>\[[^\]\n]*\]|\"[^\"\n]*\")",
+    re.DOTALL
+)
+_NUMBER = re.compile(r'\d+')
+_NEWLINE_RUN = re.compile(r'[^\S\n]*\n\s*')
+_SPACE_RUN = re.compile(r'[^\S\n]{2,}|[^\S \n]')
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+VARIABLE_PLACEHOLDER = '@p'
+
+# Parameters whose name contains no keyword; rebuilt whenever rules
+# register new keywords or anchors
+_variables: Optional[Tuple[int, int, Pattern]] = None
+
+
+def _variable_pattern() -> Pattern:
+    global _variables
+    if _variables is None or _variables[:2] != (len(KEYWORDS), len(ANCHORS)):
+        # OR and WHERE are matched by aggregate patterns that declare no keywords
+        keywords = sorted(set(KEYWORDS) | set(ANCHORS) | {'OR', 'WHERE'}, key=len, reverse=True)
+        pattern = re.compile(r'(?<![@\w])@(?!\w*?(?:' + '|'.join(map(re.escape, keywords)) + r'))\w+',
+                             re.IGNORECASE)
+        _variables = (len(KEYWORDS), len(ANCHORS), pattern)
+    return _variables[2]
+
+
+def _hide(match) -> str:
+    kind = match.lastgroup
+    if kind == 'ident':
+        return match.group()
+    if kind == 'comment':
+        return '\n' if '\n' in match.group() else ' '
+    content = match.group('string')
+    return ("'" + ('%' if content.startswith('%') else '') + ('\n' if '\n' in content else '')
+            + ("'" if match.group('closing') is not None else ''))
+
+
+def normalize_statement(text: str) -> str:
+    """
+    Normalized form of a statement; statements with equal forms get the
+    same results from every memoized rule (see the module docstring).
+    """
+    normalized = _HIDDEN_PATTERN.sub(_hide, text)
+    normalized = _variable_pattern().sub(VARIABLE_PLACEHOLDER, normalized)
+    normalized = _NUMBER.sub('0', normalized)
+    normalized = _SPACE_RUN.sub(' ', _NEWLINE_RUN.sub('\n', normalized))
+    return normalized.lower() if normalized.isascii() else normalized.translate(_ASCII_LOWER)
+
+
+def normalized_fingerprint(text: str) -> bytes:
+    """Hash of normalize_statement(text), the key under which StatementMemo stores results."""
+    # A personalized hash, so it never equals the exact-text fingerprint of a statement
+    return hashlib.blake2b(normalize_statement(text).encode('utf-8', 'surrogatepass'),
+                           digest_size=16, person=b'normalized').digest()
+
+
+class StatementMemo(ResultCache):
+    """
+    Bounded LRU of per-statement rule results, shared by every
+    IncrementalAnalyzer of a batch so a statement repeated across
+    procedures is analyzed once.
+    
+    Results are found by the fingerprint of the statement's exact text
+    first (cheap, and covers copies verbatim) and by its normalized
+    fingerprint second.
+    """
+    
+    def __init__(self, max_entries: int = 65536):
+        super().__init__(max_entries)
+        self.exact_hits = 0
+    
+    def lookup(self, text: str, fingerprint: bytes) -> Tuple[Optional[object], Optional[bytes]]:
+        """
+        Result for a statement with the given exact-text fingerprint, and
+        its normalized key.
+        
+        The key is None when the exact text was found; otherwise the result
+        (if any) came from another statement with the same normalized form.
+        Store new results under the key and under the fingerprint.
+        """
+        with self._lock:
+            result = self._find(fingerprint)
+            if result is not None:
+                self.hits += 1
+                self.exact_hits += 1
+                return result, None
+        key = normalized_fingerprint(text)
+        with self._lock:
+            result = self._find(key)
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result, key
+    
+    def clear(self):
+        super().clear()
+        self.exact_hits = 0
+    
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the memo (0.0 before the first one)."""
+        return self.hits / self.lookups if self.lookups else 0.0
+    
+    def generate_report(self) -> str:
+        return (f"Statement memo: {self.hits:,} of {self.lookups:,} statements reused "
+                f"({self.hit_rate:.1%} hit rate; {self.exact_hits:,} exact copies, "
+                f"{self.hits - self.exact_hits:,} up to literals and layout)")
@@ -0,0 +1,322 @@
+"""
+Taint Analyzer - Untrusted Input Reaching Dynamic SQL
+
+Data-flow analysis over the statement-level control flow graph: which
+variables may hold text derived from the procedure's parameters at each
+statement, and which dynamic SQL sinks they reach (EXEC(...), EXEC @name
+and the statement argument of sp_executesql).
+
+- Sources are parameters of string (or unknown, e.g. alias) types, plus
+  variables used without being declared (when analyzing a fragment they
+  are most likely parameters).
+- SET, SELECT @v = and DECLARE ... = taint their target if the expression
+  uses a tainted variable and clear it otherwise. A SELECT with a FROM
+  clause may assign nothing, so it only adds taint; so do OUTPUT
+  arguments of EXEC.
+- Variables inside QUOTENAME(...), REPLACE(..., '''', ...) and a CAST or
+  CONVERT to a non-string type are sanitized.
+
+Each variable is one bit of an int, so the tainted set at a statement is
+one integer and the worklist iteration to a fixed point costs a few
+integer operations per statement and pass.
+"""
+import re
+from collections import deque
+from typing import Dict, List, NamedTuple, Tuple
+
+from parser.tsql_text_parser import TSQLTextParser
+from analyzer.statement_cfg import ENTRY, StatementCFG
+
+_VARIABLE = re.compile(r'(?<![@\w])@\w+')
+_LEADING_KEYWORD = re.compile(r'\s*(\w+)')
+_PAREN = re.compile(r'[()]')
+_PAREN_OR_COMMA = re.compile(r'[(),]')
+
+_SET = re.compile(r'\s*SET\s+(@\w+)\s*([-+*/%&|^]?)=', re.IGNORECASE)
+_SELECT = re.compile(r'\s*SELECT\s+(?:(?:ALL|DISTINCT)\s+)?(?:TOP\s*(?:\([^)]*\)|\d+)\s+(?:PERCENT\s+)?)?',
+                     re.IGNORECASE)
+_SELECT_LIST_END = re.compile(r'[()]|\b(?:FROM|WHERE|INTO|GROUP|HAVING|ORDER|UNION|EXCEPT|INTERSECT|OPTION)\b',
+                              re.IGNORECASE)
+_DECLARE = re.compile(r'\s*DECLARE\s+', re.IGNORECASE)
+_DECLARED_ITEM = re.compile(r'\s*(@\w+)\s+(?:AS\s+)?[\w.\[\]]+\s*(?:\([^)]*\))?\s*(=)?', re.IGNORECASE)
+_ASSIGNMENT = re.compile(r'\s*(@\w+)\s*([-+*/%&|^]?)=', re.IGNORECASE)
+
+_EXEC_PAREN = re.compile(r'\bEXEC(?:UTE)?\s*\(', re.IGNORECASE)
+_EXEC_VARIABLE = re.compile(r'\bEXEC(?:UTE)?\s+(@\w+)\b(?!\s*=)', re.IGNORECASE)
+_EXECUTESQL = re.compile(r'\bsp_executesql\b\s*(?:@stmt\s*=\s*)?', re.IGNORECASE)
+_EXEC_RESULT = re.compile(r'\bEXEC(?:UTE)?\s+(@\w+)\s*=', re.IGNORECASE)
+_OUTPUT_ARGUMENT = re.compile(r'(?<![@\w])(@\w+)\s+OUT(?:PUT)?\b', re.IGNORECASE)
+
+_QUOTENAME = re.compile(r'\bQUOTENAME\s*\(', re.IGNORECASE)
+_REPLACE = re.compile(r'\bREPLACE\s*\(', re.IGNORECASE)
+_CAST = re.compile(r'\b(?:TRY_)?CAST\s*\(', re.IGNORECASE)
+_CAST_TYPE = re.compile(r'.*\bAS\s+([\w.\[\]]+)', re.IGNORECASE | re.DOTALL)
+_CONVERT = re.compile(r'\b(?:TRY_)?CONVERT\s*(\()\s*([\w.\[\]]+)', re.IGNORECASE)
+_QUOTE_CHARACTER = re.compile(r"\s*(?:N?''''|N?CHAR\s*\(\s*39\s*\))\s*$", re.IGNORECASE)
+_TYPE_NAME = re.compile(r'[\w.\[\]]+')
+
+# Types whose values cannot carry SQL text
+NON_STRING_TYPES = frozenset((
+    'BIGINT', 'INT', 'SMALLINT', 'TINYINT', 'BIT', 'DECIMAL', 'DEC', 'NUMERIC', 'MONEY', 'SMALLMONEY',
+    'FLOAT', 'REAL', 'DATE', 'TIME', 'DATETIME', 'DATETIME2', 'SMALLDATETIME', 'DATETIMEOFFSET',
+    'UNIQUEIDENTIFIER', 'ROWVERSION', 'TIMESTAMP', 'CURSOR', 'TABLE',
+))
+
+# Per-statement operations, applied in textual order
+_ASSIGN, _SINK = 0, 1
+
+
+def is_string_type(type_name: str) -> bool:
+    """False for types whose values cannot carry SQL text; True for strings and unknown types."""
+    match = _TYPE_NAME.match(type_name.strip())
+    if match is None:
+        return True
+    return match.group().strip('[]').upper().rsplit('.', 1)[-1] not in NON_STRING_TYPES
+
+
+def _closing_paren(masked: str, open_paren: int, limit: int) -> Tuple[int, int]:
+    """
+    Offsets of the parenthesis closing the one at open_paren and just past
+    it; both limit if unbalanced, so the contents run to the limit.
+    """
+    depth = 0
+    for match in _PAREN.finditer(masked, open_paren, limit):
+        if match.group() == '(':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.start(), match.end()
+    return limit, limit
+
+
+def _top_level_items(masked: str, start: int, end: int) -> List[Tuple[int, int]]:
+    """(start, end) of the comma-separated items of masked[start:end], ignoring nested commas."""
+    items = []
+    depth = 0
+    item_start = start
+    for match in _PAREN_OR_COMMA.finditer(masked, start, end):
+        token = match.group()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(0, depth - 1)
+        elif depth == 0:
+            items.append((item_start, match.start()))
+            item_start = match.end()
+    items.append((item_start, end))
+    return items
+
+
+class TaintFlow(NamedTuple):
+    """A dynamic SQL sink reached by tainted variables."""
+    line: int
+    sink: str                    # 'EXEC(...)', 'EXEC @name' or 'sp_executesql'
+    variables: Tuple[str, ...]   # tainted variables used in the sink, as first written
+
+
+class _Procedure:
+    """Variables, bits and per-node operations of one analysis."""
+    
+    def __init__(self, cfg: StatementCFG):
+        self.cfg = cfg
+        self.masked = cfg.masked
+        self.text = cfg.text
+        self.bits: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.declared = 0
+        self.operations: List[list] = [self._operations(node) for node in cfg.nodes]
+    
+    def bit(self, name: str) -> int:
+        key = name.lower()
+        bit = self.bits.get(key)
+        if bit is None:
+            bit = self.bits[key] = 1 << len(self.names)
+            self.names.append(name)
+        return bit
+    
+    def variables(self, mask: int) -> Tuple[str, ...]:
+        return tuple(name for index, name in enumerate(self.names) if mask >> index & 1)
+    
+    def uses(self, start: int, end: int) -> int:
+        """Bits of the variables used in masked[start:end] outside sanitizing calls."""
+        masked = self.masked
+        sanitized = []
+        for match in _QUOTENAME.finditer(masked, start, end):
+            sanitized.append((match.start(), _closing_paren(masked, match.end() - 1, end)[1]))
+        for match in _REPLACE.finditer(masked, start, end):
+            inner_end, close = _closing_paren(masked, match.end() - 1, end)
+            arguments = _top_level_items(masked, match.end(), inner_end)
+            # Literal contents are blanked in the masked text, so the quote is read from the original
+            if len(arguments) >= 2 and _QUOTE_CHARACTER.match(self.text, *arguments[1]):
+                sanitized.append((match.start(), close))
+        for match in _CAST.finditer(masked, start, end):
+            inner_end, close = _closing_paren(masked, match.end() - 1, end)
+            cast_type = _CAST_TYPE.match(masked, match.end(), inner_end)
+            if cast_type and not is_string_type(cast_type.group(1)):
+                sanitized.append((match.start(), close))
+        for match in _CONVERT.finditer(masked, start, end):
+            if not is_string_type(match.group(2)):
+                sanitized.append((match.start(), _closing_paren(masked, match.start(1), end)[1]))
+        
+        mask = 0
+        for match in _VARIABLE.finditer(masked, start, end):
+            position = match.start()
+            if not any(low <= position < high for low, high in sanitized):
+                mask |= self.bit(match.group())
+        return mask
+    
+    def _operations(self, node) -> list:
+        if node.kind != 'STATEMENT':
+            return []
+        masked = self.masked
+        start, end = node.start, node.end
+        operations = []
+        
+        # Sinks read the values from before the statement's own assignments
+        for match in _EXEC_PAREN.finditer(masked, start, end):
+            inner_end, _ = _closing_paren(masked, match.end() - 1, end)
+            operations.append((_SINK, self.uses(match.end(), inner_end), 'EXEC(...)', match.start()))
+        for match in _EXEC_VARIABLE.finditer(masked, start, end):
+            operations.append((_SINK, self.bit(match.group(1)), 'EXEC @name', match.start()))
+        for match in _EXECUTESQL.finditer(masked, start, end):
+            statement_end = _top_level_items(masked, match.end(), end)[0][1]
+            operations.append((_SINK, self.uses(match.end(), statement_end), 'sp_executesql', match.start()))
+        
+        leading = _LEADING_KEYWORD.match(masked, start, end)
+        keyword = leading.group(1).upper() if leading else ''
+        if keyword == 'SET':
+            assignment = _SET.match(masked, start, end)
+            if assignment:
+                self._assign(operations, assignment, end, strong=True)
+        elif keyword == 'SELECT':
+            select = _SELECT.match(masked, start, end)
+            list_end = end
+            depth = 0
+            for token in _SELECT_LIST_END.finditer(masked, select.end(), end):
+                if token.group() == '(':
+                    depth += 1
+                elif token.group() == ')':
+                    depth -= 1
+                elif depth == 0:
+                    list_end = token.start()
+                    break
+            # Without a FROM the assignments always run; with one they run once per row, possibly never
+            strong = list_end == end or masked[list_end:list_end + 4].upper() != 'FROM'
+            for item_start, item_end in _top_level_items(masked, select.end(), list_end):
+                assignment = _ASSIGNMENT.match(masked, item_start, item_end)
+                if assignment:
+                    self._assign(operations, assignment, item_end, strong=strong)
+        elif keyword == 'DECLARE':
+            declare = _DECLARE.match(masked, start, end)
+            for item_start, item_end in _top_level_items(masked, declare.end(), end):
+                item = _DECLARED_ITEM.match(masked, item_start, item_end)
+                if item:
+                    self.declared |= self.bit(item.group(1))
+                    if item.group(2):
+                        operations.append((_ASSIGN, self.bit(item.group(1)),
+                                           self.uses(item.end(), item_end), True))
+        elif keyword in ('EXEC', 'EXECUTE'):
+            result = _EXEC_RESULT.search(masked, start, end)
+            if result:
+                operations.append((_ASSIGN, self.bit(result.group(1)), 0, True))
+            outputs = list(_OUTPUT_ARGUMENT.finditer(masked, start, end))
+            if outputs:
+                arguments = self.uses(start, end)
+                for output in outputs:
+                    operations.append((_ASSIGN, self.bit(output.group(1)), arguments, False))
+        return operations
+    
+    def _assign(self, operations: list, assignment, end: int, strong: bool):
+        target = self.bit(assignment.group(1))
+        uses = self.uses(assignment.end(), end)
+        if assignment.group(2):
+            uses |= target  # compound assignment (+=) keeps the old value
+        operations.append((_ASSIGN, target, uses, strong))
+
+
+def _transfer(operations: list, state: int) -> int:
+    for operation in operations:
+        if operation[0] == _ASSIGN:
+            _, target, uses, strong = operation
+            if state & uses:
+                state |= target
+            elif strong:
+                state &= ~target
+    return state
+
+
+class TaintAnalyzer:
+    """Find parameter-derived text reaching dynamic SQL, following assignments through the CFG."""
+    
+    def __init__(self):
+        self.text_parser = TSQLTextParser()
+    
+    def sources(self, sql_text: str) -> Dict[str, bool]:
+        """Parameters by lower-cased name, with whether each is a taint source."""
+        return {parameter['name'].lower(): is_string_type(parameter['type']) and 'READONLY' not in parameter['type'].upper()
+                for parameter in self.text_parser.extract_parameters(sql_text)}
+    
+    def analyze(self, sql_text: str) -> List[TaintFlow]:
+        """Tainted flows into dynamic SQL sinks, in text order."""
+        cfg = StatementCFG(sql_text)
+        procedure = _Procedure(cfg)
+        operations = procedure.operations
+        if not any(operation[0] == _SINK for node in operations for operation in node):
+            return []
+        
+        parameters = self.sources(sql_text)
+        entry = 0
+        for key, bit in procedure.bits.items():
+            if key in parameters:
+                tainted = parameters[key]
+            else:
+                tainted = not procedure.declared & bit
+            if tainted:
+                entry |= bit
+        
+        # Worklist iteration to the least fixed point; None marks nodes not reached yet
+        successors = cfg.successors
+        predecessors = cfg.predecessors()
+        out: List[object] = [None] * len(cfg.nodes)
+        out[ENTRY] = entry
+        queued = [False] * len(cfg.nodes)
+        worklist = deque(successors[ENTRY])
+        for node_id in worklist:
+            queued[node_id] = True
+        while worklist:
+            node_id = worklist.popleft()
+            queued[node_id] = False
+            state = 0
+            reached = False
+            for predecessor in predecessors[node_id]:
+                if out[predecessor] is not None:
+                    state |= out[predecessor]
+                    reached = True
+            if not reached:
+                continue
+            state = _transfer(operations[node_id], state)
+            if state != out[node_id]:
+                out[node_id] = state
+                for successor in successors[node_id]:
+                    if not queued[successor]:
+                        queued[successor] = True
+                        worklist.append(successor)
+        
+        flows = []
+        for node_id, node_operations in enumerate(operations):
+            if out[node_id] is None or not any(operation[0] == _SINK for operation in node_operations):
+                continue
+            state = 0
+            for predecessor in predecessors[node_id]:
+                state |= out[predecessor] or 0
+            for operation in node_operations:
+                if operation[0] == _SINK:
+                    _, uses, sink, position = operation
+                    if state & uses:
+                        flows.append(TaintFlow(sql_text.count('\n', 0, position) + 1, sink,
+                                               procedure.variables(state & uses)))
+                else:
+                    state = _transfer((operation,), state)
+        flows.sort()
+        return flows
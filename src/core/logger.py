@@ -5,7 +5,6 @@ Provides consistent logging across all modules
 import logging
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
 from typing import Optional
 
 
@@ -48,6 +47,8 @@ def setup_logging(
     
     # File handler with detailed format (if log file specified)
     if log_file:
+        # logging.handlers pulls in socket/pickle; only load it when needed
+        from logging.handlers import RotatingFileHandler
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         
@@ -0,0 +1,23 @@
+"""Daemon module initialization.
+
+The server (socketserver/threading) is resolved on first access so the
+thin client only pays for socket and json.
+"""
+import importlib
+
+_EXPORTS = {
+    'AnalysisServer': '.server',
+    'run_client': '.client',
+    'split_client_args': '.client',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
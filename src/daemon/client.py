@@ -0,0 +1,72 @@
+"""
+Thin CLI client for the analyzer daemon.
+
+Forwards an `analyze` command line to a running `sp_analyze.py serve`
+daemon and replays its stdout, stderr and exit code, so the output is
+identical to running the command locally. Kept free of analyzer imports
+so that client start-up costs only the interpreter and a socket.
+"""
+import os
+import socket
+import sys
+from typing import List, Optional, Tuple
+
+from .protocol import read_message, write_message
+
+
+def split_client_args(argv: List[str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Remove `--client SOCKET` / `--client=SOCKET` from argv.
+    
+    Returns:
+        (socket_path or None, remaining argv)
+    """
+    remaining = []
+    socket_path = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == '--client' and i + 1 < len(argv):
+            socket_path = argv[i + 1]
+            i += 2
+            continue
+        if arg.startswith('--client='):
+            socket_path = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+        i += 1
+    return socket_path, remaining
+
+
+def request(socket_path: str, message: dict, timeout: Optional[float] = None) -> dict:
+    """Send one request to the daemon and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        with sock.makefile('rwb') as stream:
+            write_message(stream, message)
+            response = read_message(stream)
+    if response is None:
+        raise ConnectionError(f"Daemon at {socket_path} closed the connection")
+    return response
+
+
+def run_client(socket_path: str, argv: List[str]) -> Optional[int]:
+    """
+    Run a CLI command on the daemon, printing its output locally.
+    
+    Returns:
+        The command's exit code, or None if the daemon is unreachable
+        (the caller then falls back to analyzing in-process).
+    """
+    try:
+        response = request(socket_path, {'op': 'run', 'argv': argv, 'cwd': os.getcwd()})
+    except OSError as e:
+        print(f"Analyzer daemon unavailable at {socket_path} ({e}); analyzing locally", file=sys.stderr)
+        return None
+    
+    sys.stdout.write(response.get('stdout', ''))
+    sys.stdout.flush()
+    sys.stderr.write(response.get('stderr', ''))
+    sys.stderr.flush()
+    return response.get('exit_code', 1)
@@ -0,0 +1,22 @@
+"""
+Wire protocol shared by the analyzer daemon and its CLI client.
+
+Each message is one JSON object terminated by a newline, sent over a
+Unix domain stream socket. A connection carries exactly one request and
+one response.
+"""
+import json
+from typing import Any, BinaryIO, Dict, Optional
+
+
+def write_message(stream: BinaryIO, message: Dict[str, Any]):
+    stream.write(json.dumps(message).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Read one message; returns None if the peer closed the connection."""
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
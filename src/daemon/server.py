@@ -0,0 +1,154 @@
+"""
+Long-running Analyzer Daemon
+
+Serves CLI command lines over a Unix domain socket so that CI jobs and
+editor integrations pay interpreter start-up, imports and analyzer
+construction once instead of on every invocation. Warm analyzers and the
+result cache live in the daemon process.
+
+Connections are accepted concurrently, one thread each. Command execution
+is serialized: analysis is CPU-bound under the GIL, and each command
+switches to the client's working directory and redirects stdout/stderr,
+which are process-wide. Clients queue rather than interleave output.
+"""
+import contextlib
+import io
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .protocol import read_message, write_message
+
+# Runs a CLI argv (already stripped of --client) and returns its exit code
+CommandRunner = Callable[[List[str]], int]
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    
+    def handle(self):
+        server = self.server
+        server.begin_request()
+        try:
+            message = read_message(self.rfile)
+            if message is None:
+                return
+            write_message(self.wfile, server.dispatch(message))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            server.end_request()
+
+
+class AnalysisServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket daemon that runs analyze commands on warm analyzers."""
+    
+    daemon_threads = True
+    
+    def __init__(self, socket_path: str, run_command: CommandRunner,
+                 idle_timeout: Optional[float] = 600.0, status: Optional[Callable[[], Dict]] = None):
+        """
+        Args:
+            socket_path: Filesystem path of the Unix domain socket
+            run_command: Executes one CLI argv, writing to sys.stdout/stderr
+            idle_timeout: Seconds without requests before shutting down (None = never)
+            status: Optional callable adding daemon statistics to 'status' replies
+        """
+        self.socket_path = socket_path
+        self.run_command = run_command
+        self.idle_timeout = idle_timeout
+        self.status = status
+        self.requests_served = 0
+        self._active = 0
+        self._last_activity = time.monotonic()
+        self._state_lock = threading.Lock()
+        self._exec_lock = threading.Lock()
+        self._remove_stale_socket()
+        super().__init__(socket_path, _RequestHandler)
+    
+    def _remove_stale_socket(self):
+        """Unlink a socket file left by a dead daemon; refuse to replace a live one."""
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise RuntimeError(f"An analyzer daemon is already listening on {self.socket_path}")
+    
+    def begin_request(self):
+        with self._state_lock:
+            self._active += 1
+            self._last_activity = time.monotonic()
+    
+    def end_request(self):
+        with self._state_lock:
+            self._active -= 1
+            self._last_activity = time.monotonic()
+    
+    def dispatch(self, message: Dict) -> Dict:
+        """Handle one decoded request and build its response."""
+        op = message.get('op')
+        if op == 'run':
+            return self.execute(message.get('argv', []), message.get('cwd'))
+        if op == 'status':
+            reply = {'requests_served': self.requests_served, 'pid': os.getpid()}
+            if self.status:
+                reply.update(self.status())
+            return reply
+        if op == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'stopping': True}
+        return {'stdout': '', 'stderr': f"Unknown daemon request: {op!r}\n", 'exit_code': 2}
+    
+    def execute(self, argv: List[str], cwd: Optional[str] = None) -> Dict:
+        """Run one command line with captured output in the client's directory."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with self._exec_lock:
+            previous_cwd = os.getcwd()
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                    try:
+                        exit_code = self.run_command(argv)
+                    except SystemExit as e:
+                        # argparse errors and --help exit through SystemExit
+                        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                    except Exception as e:
+                        print(f"Daemon error: {e}", file=stderr)
+                        exit_code = 1
+            finally:
+                os.chdir(previous_cwd)
+            self.requests_served += 1
+        return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'exit_code': exit_code}
+    
+    def _watch_idle(self):
+        poll = min(1.0, self.idle_timeout / 4)
+        while not self._stopped.wait(poll):
+            with self._state_lock:
+                idle = self._active == 0 and time.monotonic() - self._last_activity >= self.idle_timeout
+            if idle:
+                self.shutdown()
+                return
+    
+    def serve(self):
+        """Serve until idle timeout or a shutdown request, then remove the socket."""
+        self._stopped = threading.Event()
+        watcher = None
+        if self.idle_timeout:
+            watcher = threading.Thread(target=self._watch_idle, daemon=True)
+            watcher.start()
+        try:
+            self.serve_forever(poll_interval=0.2)
+        finally:
+            self._stopped.set()
+            self.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
@@ -0,0 +1,6 @@
+"""LSP module initialization."""
+from .document import TextDocument
+from .diagnostics import DocumentAnalyzer
+from .server import LanguageServer
+
+__all__ = ['TextDocument', 'DocumentAnalyzer', 'LanguageServer']
@@ -0,0 +1,86 @@
+"""
+Incremental diagnostics for an open document.
+
+Rule results come from an IncrementalAnalyzer, so after an edit only
+new or changed statements are re-analyzed. Findings of statement-scoped
+rules are reported on the statement that produced them; findings that
+depend on the whole procedure are anchored on the procedure header.
+"""
+from typing import Callable, Dict, List, Optional
+
+from parser.tsql_text_parser import TSQLTextParser
+from analyzer.incremental import AnalysisCancelled, IncrementalAnalyzer
+from analyzer.result_model import Finding
+from analyzer.statement_memo import StatementMemo
+from lsp.document import TextDocument
+
+# LSP DiagnosticSeverity: 1 Error, 2 Warning, 3 Information
+SEVERITY = {'CRITICAL': 1, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+
+SOURCE = 'sp-analyze'
+
+def _trimmed(start: int, text: str):
+    """Offsets of text without its surrounding whitespace."""
+    return start + len(text) - len(text.lstrip()), start + len(text.rstrip())
+
+
+class DocumentAnalyzer:
+    """
+    Analyze one document, reusing per-statement results between edits
+    (and, through a shared memo, between documents).
+    """
+    
+    def __init__(self, memo: Optional[StatementMemo] = None):
+        self.text_parser = TSQLTextParser()
+        self.engine = IncrementalAnalyzer(memo=memo)
+    
+    @property
+    def statements_analyzed(self) -> int:
+        return self.engine.statements_analyzed
+    
+    @property
+    def statements_reused(self) -> int:
+        return self.engine.statements_reused
+    
+    def analyze(self, document: TextDocument,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> List[Dict]:
+        """
+        Compute LSP diagnostics for the document.
+        
+        Raises:
+            AnalysisCancelled: if is_cancelled() turns true part-way through
+        """
+        text = document.text
+        sp_name = self.text_parser.extract_proc_name(text)
+        results = self.engine.analyze(text, sp_name, is_cancelled)
+        
+        diagnostics = []
+        located = set()
+        for statement, findings in self.engine.statement_findings():
+            start, end = _trimmed(statement.start, statement.text)
+            for finding in findings:
+                located.add(finding.rule_id)
+                diagnostics.append(self._diagnostic(document, finding, start, end))
+        
+        statements = self.engine.statements
+        start, end = _trimmed(statements[0].start, statements[0].text) if statements else (0, 0)
+        security = results['security']
+        document_findings = (security['sql_injection_risks'] + security['security_warnings'] +
+                             results['quality']['issues'] + results['performance']['issues'])
+        diagnostics.extend(self._diagnostic(document, f, start, end)
+                           for f in document_findings if f.rule_id not in located)
+        return diagnostics
+    
+    @staticmethod
+    def _diagnostic(document: TextDocument, finding: Finding, start: int, end: int) -> Dict:
+        message = finding.get('message') or finding.get('issue', '')
+        recommendation = finding.get('recommendation')
+        if recommendation:
+            message = f"{message}. {recommendation}"
+        return {
+            'range': document.range_of(start, end),
+            'severity': SEVERITY.get(finding.severity, 3),
+            'code': finding.rule_id,
+            'source': SOURCE,
+            'message': message,
+        }
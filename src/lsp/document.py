@@ -0,0 +1,75 @@
+"""
+In-memory text document with LSP position mapping.
+
+LSP positions are (line, character) with characters counted in UTF-16
+code units; offsets here are Python string indices.
+"""
+import bisect
+import re
+from typing import Dict, List, Tuple
+
+_NEWLINE = re.compile(r'\r\n|\r|\n')
+
+
+def _utf16_len(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+
+class TextDocument:
+    """An open editor buffer that accepts full and incremental edits."""
+    
+    def __init__(self, uri: str, text: str, version: int = 0):
+        self.uri = uri
+        self.version = version
+        self._set_text(text)
+    
+    def _set_text(self, text: str):
+        self.text = text
+        self.line_starts: List[int] = [0] + [m.end() for m in _NEWLINE.finditer(text)]
+    
+    def offset_at(self, line: int, character: int) -> int:
+        """Convert an LSP position to a string offset (clamped to the document)."""
+        if line >= len(self.line_starts):
+            return len(self.text)
+        start = self.line_starts[line]
+        end = self.line_starts[line + 1] if line + 1 < len(self.line_starts) else len(self.text)
+        line_text = self.text[start:end].rstrip('\r\n')
+        end = start + len(line_text)
+        if line_text.isascii():
+            return start + min(character, len(line_text))
+        units = 0
+        for i, ch in enumerate(line_text):
+            if units >= character:
+                return start + i
+            units += 2 if ord(ch) > 0xFFFF else 1
+        return end
+    
+    def position_at(self, offset: int) -> Dict[str, int]:
+        """Convert a string offset to an LSP position."""
+        offset = max(0, min(offset, len(self.text)))
+        line = bisect.bisect_right(self.line_starts, offset) - 1
+        start = self.line_starts[line]
+        return {'line': line, 'character': _utf16_len(self.text[start:offset])}
+    
+    def range_of(self, start: int, end: int) -> Dict[str, Dict[str, int]]:
+        return {'start': self.position_at(start), 'end': self.position_at(end)}
+    
+    def apply_change(self, change: Dict) -> Tuple[int, int, int]:
+        """
+        Apply one TextDocumentContentChangeEvent.
+        
+        Returns:
+            (start offset, end offset of the replaced text, length of the new text)
+        """
+        new_text = change['text']
+        if 'range' not in change:
+            old_length = len(self.text)
+            self._set_text(new_text)
+            return 0, old_length, len(new_text)
+        start = self.offset_at(change['range']['start']['line'], change['range']['start']['character'])
+        end = self.offset_at(change['range']['end']['line'], change['range']['end']['character'])
+        self._set_text(self.text[:start] + new_text + self.text[end:])
+        return start, end, len(new_text)
+
@@ -0,0 +1,177 @@
+"""
+Language Server Protocol endpoint over stdio.
+
+Publishes SecurityAnalyzer, CodeQualityAnalyzer and PerformanceAnalyzer
+findings as diagnostics. Documents are synchronized incrementally
+(TextDocumentSyncKind.Incremental). Edits are applied as they arrive;
+analysis only runs once no further messages are queued, and a running
+analysis is abandoned as soon as a newer message arrives, so bursts of
+keystrokes never queue up stale work. A message or analysis that fails
+is answered with a JSON-RPC error (requests) or logged and dropped, and
+the server keeps running.
+"""
+import logging
+import queue
+import threading
+from typing import Any, BinaryIO, Dict, Optional
+
+from analyzer.statement_memo import StatementMemo
+from lsp.document import TextDocument
+from lsp.diagnostics import AnalysisCancelled, DocumentAnalyzer
+from lsp.jsonrpc import read_message, write_message
+
+# JSON-RPC error codes
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+
+TEXT_DOCUMENT_SYNC_INCREMENTAL = 2
+
+# Raised by handlers reading a message that lacks or mistypes a field
+_PARAMS_ERRORS = (KeyError, IndexError, TypeError, ValueError, AttributeError)
+
+logger = logging.getLogger(__name__)
+
+
+class LanguageServer:
+    """Minimal diagnostics-only language server."""
+    
+    def __init__(self, reader: BinaryIO, writer: BinaryIO):
+        self.reader = reader
+        self.writer = writer
+        self.documents: Dict[str, TextDocument] = {}
+        self.analyzers: Dict[str, DocumentAnalyzer] = {}
+        self.statement_memo = StatementMemo()  # shared by all documents
+        self.pending: Dict[str, None] = {}  # URIs awaiting analysis, in edit order
+        self.messages: 'queue.Queue[Optional[Dict]]' = queue.Queue()
+        self.initialized = False
+        self.shutdown_requested = False
+        self.cancelled_analyses = 0
+    
+    def _read_loop(self):
+        try:
+            while True:
+                message = read_message(self.reader)
+                self.messages.put(message)
+                if message is None:
+                    return
+        except (OSError, ValueError):
+            self.messages.put(None)
+    
+    def serve(self) -> int:
+        """Process messages until `exit` or end of input; returns the exit code."""
+        threading.Thread(target=self._read_loop, daemon=True).start()
+        while True:
+            if self.pending and self.messages.empty():
+                self.analyze_pending()
+                continue
+            message = self.messages.get()
+            if message is None:
+                return 0 if self.shutdown_requested else 1
+            if not isinstance(message, dict):
+                logger.warning("Dropping malformed LSP message: %r", message)
+                continue
+            if message.get('method') == 'exit':
+                return 0 if self.shutdown_requested else 1
+            try:
+                self.handle(message)
+            except Exception as e:
+                self._handle_failed(message, e)
+    
+    def _handle_failed(self, message: Dict, error: Exception):
+        """Answer a failed request with a JSON-RPC error; log and drop a failed notification."""
+        method = message.get('method')
+        if 'id' not in message:
+            logger.warning("Dropping %s notification: %s: %s", method, type(error).__name__, error)
+            return
+        if isinstance(error, _PARAMS_ERRORS):
+            code, text = INVALID_PARAMS, f"Invalid params for {method}"
+        else:
+            code, text = INTERNAL_ERROR, f"Internal error in {method}"
+        self.respond(message['id'], error={'code': code, 'message': f"{text}: {type(error).__name__}: {error}"})
+    
+    def analyze_pending(self):
+        """Analyze edited documents, yielding to any message that arrives meanwhile."""
+        for uri in list(self.pending):
+            document = self.documents.get(uri)
+            if document is None:
+                del self.pending[uri]
+                continue
+            try:
+                diagnostics = self.analyzers[uri].analyze(document, is_cancelled=self._has_messages)
+            except AnalysisCancelled:
+                self.cancelled_analyses += 1
+                return
+            except Exception:
+                # Retrying would fail the same way until the next edit
+                logger.exception("Analysis of %s failed", uri)
+                del self.pending[uri]
+                continue
+            del self.pending[uri]
+            self.publish(uri, document.version, diagnostics)
+    
+    def _has_messages(self) -> bool:
+        return not self.messages.empty()
+    
+    def publish(self, uri: str, version: Optional[int], diagnostics):
+        params = {'uri': uri, 'diagnostics': diagnostics}
+        if version is not None:
+            params['version'] = version
+        self.notify('textDocument/publishDiagnostics', params)
+    
+    def notify(self, method: str, params: Any):
+        write_message(self.writer, {'jsonrpc': '2.0', 'method': method, 'params': params})
+    
+    def respond(self, request_id, result: Any = None, error: Optional[Dict] = None):
+        message = {'jsonrpc': '2.0', 'id': request_id}
+        if error is not None:
+            message['error'] = error
+        else:
+            message['result'] = result
+        write_message(self.writer, message)
+    
+    def handle(self, message: Dict):
+        method = message.get('method')
+        params = message.get('params') or {}
+        request_id = message.get('id')
+        is_request = 'id' in message
+        
+        if method == 'initialize':
+            self.initialized = True
+            self.respond(request_id, {
+                'capabilities': {
+                    'textDocumentSync': {'openClose': True, 'change': TEXT_DOCUMENT_SYNC_INCREMENTAL},
+                },
+                'serverInfo': {'name': 'sp-analyze'},
+            })
+        elif method == 'shutdown':
+            self.shutdown_requested = True
+            self.respond(request_id, None)
+        elif not self.initialized and is_request:
+            self.respond(request_id, error={'code': SERVER_NOT_INITIALIZED, 'message': 'Server not initialized'})
+        elif method == 'textDocument/didOpen':
+            item = params['textDocument']
+            uri = item['uri']
+            self.documents[uri] = TextDocument(uri, item.get('text', ''), item.get('version', 0))
+            self.analyzers[uri] = DocumentAnalyzer(self.statement_memo)
+            self.pending[uri] = None
+        elif method == 'textDocument/didChange':
+            uri = params['textDocument']['uri']
+            document = self.documents.get(uri)
+            if document is None:
+                return
+            for change in params.get('contentChanges', []):
+                document.apply_change(change)
+            document.version = params['textDocument'].get('version', document.version)
+            self.pending.pop(uri, None)
+            self.pending[uri] = None
+        elif method == 'textDocument/didClose':
+            uri = params['textDocument']['uri']
+            self.documents.pop(uri, None)
+            self.analyzers.pop(uri, None)
+            self.pending.pop(uri, None)
+            self.publish(uri, None, [])
+        elif is_request:
+            self.respond(request_id, error={'code': METHOD_NOT_FOUND, 'message': f"Unsupported method: {method}"})
+        # Other notifications ($/cancelRequest, initialized, didSave, ...) need no action
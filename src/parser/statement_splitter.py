@@ -0,0 +1,168 @@
+"""
+Statement Splitter for T-SQL
+Splits procedure text into top-level statements with source offsets
+"""
+import bisect
+import re
+from typing import Iterator, List, Optional
+
+# Keywords that start a new statement when they begin a line at the top level
+STATEMENT_KEYWORDS = (
+    'ALTER', 'BEGIN', 'BREAK', 'CLOSE', 'COMMIT', 'CONTINUE', 'CREATE', 'DEALLOCATE',
+    'DECLARE', 'DELETE', 'DROP', 'ELSE', 'END', 'EXEC', 'EXECUTE', 'FETCH', 'GO', 'GOTO',
+    'IF', 'INSERT', 'MERGE', 'OPEN', 'PRINT', 'RAISERROR', 'RETURN', 'ROLLBACK', 'SAVE',
+    'SELECT', 'SET', 'THROW', 'TRUNCATE', 'UPDATE', 'WHILE', 'WITH',
+)
+
+_KEYWORD_ALTERNATION = '|'.join(STATEMENT_KEYWORDS)
+
+# Single pass over the text. Runs of uninteresting characters are skipped
+# by the leading character class; comments, literals and bracketed
+# identifiers are consumed whole so keywords inside them never split a
+# statement.
+_TOKEN_PATTERN = re.compile(
+    r"[^-/'\[\"();\n]*(?:"
+    r"(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<string>'(?:[^']|'')*(?:'|\Z))"
+    r"|(?P<ident>\[[^\]\n]*\]|\"[^\"\n]*\")"
+    r"|(?P<open>\()"
+    r"|(?P<close>\))"
+    r"|(?P<semi>;)"
+    r"|\n[ \t]*(?P<kw>(?i:" + _KEYWORD_ALTERNATION + r"))\b"
+    r"|[-/\n])",
+    re.DOTALL
+)
+_FIRST_KEYWORD = re.compile(r"\s*(" + _KEYWORD_ALTERNATION + r")\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s*")
+_MAX_KEYWORD_LENGTH = max(len(k) for k in STATEMENT_KEYWORDS) + 1
+_CASE_OR_END = re.compile(r"\b(?:CASE|END)\b", re.IGNORECASE)
+
+# A line-initial SELECT continues the statement after these words
+_SELECT_CONTINUATIONS = ('UNION', 'ALL', 'EXCEPT', 'INTERSECT', 'FOR', 'AS', '(', ',', '=')
+
+
+def _inside_case(segment: str) -> bool:
+    """True if segment leaves a CASE expression open."""
+    if 'case' not in segment.lower():
+        return False
+    depth = 0
+    for match in _CASE_OR_END.finditer(segment):
+        if match.group().upper() == 'CASE':
+            depth += 1
+        elif depth:
+            depth -= 1
+    return depth > 0
+
+
+class Statement:
+    """One top-level statement: text[start:end] of the source."""
+    
+    __slots__ = ('start', 'end', 'text')
+    
+    def __init__(self, start: int, end: int, text: str):
+        self.start = start
+        self.end = end
+        self.text = text
+    
+    def __repr__(self) -> str:
+        return f"Statement({self.start}, {self.end}, {self.text[:30]!r})"
+
+
+def _scan_boundaries(sql_text: str, start: int = 0) -> Iterator[int]:
+    """Yield statement boundaries after `start`, which must itself be a boundary."""
+    depth = 0
+    previous = start
+    leading = _leading_keyword(sql_text, start)
+    
+    for match in _TOKEN_PATTERN.finditer(sql_text, start):
+        kind = match.lastgroup
+        if kind is None or kind in ('comment', 'string', 'ident'):
+            continue
+        if kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            depth = max(0, depth - 1)
+        elif kind == 'semi':
+            if depth == 0:
+                previous = match.end()
+                leading = _leading_keyword(sql_text, previous)
+                yield previous
+        elif depth == 0:
+            keyword = match.group('kw').upper()
+            position = match.start('kw')
+            if keyword == 'SET' and leading in ('UPDATE', 'MERGE'):
+                continue
+            if keyword == 'SELECT' and (leading in ('INSERT', 'WITH') or
+                                        sql_text[max(0, position - 20):position].rstrip().upper()
+                                        .endswith(_SELECT_CONTINUATIONS)):
+                continue
+            if keyword in ('ELSE', 'END') and _inside_case(sql_text[previous:position]):
+                continue
+            previous = position
+            leading = keyword
+            yield position
+
+
+def _leading_keyword(sql_text: str, position: int) -> Optional[str]:
+    match = _FIRST_KEYWORD.match(sql_text, position)
+    return match.group(1).upper() if match else None
+
+
+def statement_boundaries(sql_text: str) -> List[int]:
+    """Offsets where statements start, plus len(sql_text) as the final entry."""
+    return [0] + list(_scan_boundaries(sql_text)) + [len(sql_text)]
+
+
+def update_boundaries(boundaries: List[int], sql_text: str, edit_start: int, edit_end: int,
+                      new_length: int) -> List[int]:
+    """
+    Recompute boundaries after text[edit_start:edit_end] was replaced by new_length characters.
+    
+    Scanning resumes at the last boundary before the edit (the state there
+    is always top level) and stops as soon as it reproduces an old boundary
+    past the edit; the remaining boundaries are shifted instead of rescanned.
+    """
+    delta = new_length - (edit_end - edit_start)
+    new_edit_end = edit_start + new_length
+    # The state at a boundary also depends on the keyword that follows it,
+    # so resume from a boundary whose leading keyword ends before the edit
+    index = bisect.bisect_left(boundaries, edit_start) - 1
+    while index > 0 and _WHITESPACE.match(sql_text, boundaries[index]).end() + _MAX_KEYWORD_LENGTH >= edit_start:
+        index -= 1
+    resume = boundaries[index] if index >= 0 else 0
+    
+    updated = boundaries[:index + 1] if index >= 0 else [0]
+    old_after = boundaries[bisect.bisect_left(boundaries, edit_end):-1]
+    old_positions = set(old_after)
+    
+    for position in _scan_boundaries(sql_text, resume):
+        updated.append(position)
+        if position >= new_edit_end and position - delta in old_positions:
+            tail = old_after[bisect.bisect_right(old_after, position - delta):]
+            updated.extend(b + delta for b in tail)
+            break
+    updated.append(len(sql_text))
+    return updated
+
+
+def statements_from_boundaries(sql_text: str, boundaries: List[int]) -> List[Statement]:
+    """Build statements from boundaries, dropping whitespace-only pieces."""
+    statements = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        text = sql_text[start:end]
+        if text.strip():
+            statements.append(Statement(start, end, text))
+    return statements
+
+
+def split_statements(sql_text: str) -> List[Statement]:
+    """
+    Split T-SQL into top-level statements.
+    
+    A statement ends at `;` or where a line starts with a statement
+    keyword outside parentheses and CASE expressions. SET directly inside
+    an UPDATE/MERGE and SELECT feeding an INSERT, cursor or set operator
+    stay with their statement. Whitespace-only pieces are dropped; the
+    remaining statements cover the text in order.
+    """
+    return statements_from_boundaries(sql_text, statement_boundaries(sql_text))
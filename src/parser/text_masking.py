@@ -0,0 +1,54 @@
+"""
+Comment and Literal Masking for T-SQL
+Blanks comments and string literal contents so pattern-based checks only
+see code, without moving any offsets
+"""
+import re
+
+# Comments, string literals and delimited identifiers, consumed whole in a
+# single left-to-right pass; the rules for where each one ends match the
+# statement splitter, so masking a statement gives the same result as
+# masking the whole procedure and slicing
+_MASKED_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<string>'(?:[^']|'')*(?P<closing>')?)"
+    r"|(?P<ident>\[[^\]\n]*\]|\"[^\"\n]*\")",
+    re.DOTALL
+)
+_NOT_NEWLINE = re.compile(r"[^\n]")
+
+
+def _blank(segment: str) -> str:
+    return _NOT_NEWLINE.sub(' ', segment)
+
+
+def mask_comments_and_literals(sql_text: str) -> str:
+    """
+    Copy of sql_text with comments and string literals blanked.
+    
+    Comments become spaces; string literals keep their quotes and lose
+    their contents (N'abc' -> N'   '). Newlines are kept, so offsets and
+    line numbers are unchanged. Bracketed and double-quoted identifiers
+    are left alone, but quotes and dashes inside them do not start a
+    literal or comment.
+    """
+    pieces = []
+    position = 0
+    for match in _MASKED_PATTERN.finditer(sql_text):
+        kind = match.lastgroup
+        if kind == 'ident':
+            continue
+        start, end = match.span()
+        pieces.append(sql_text[position:start])
+        if kind == 'comment':
+            pieces.append(_blank(match.group()))
+        else:
+            closing = match.group('closing') or ''
+            pieces.append("'")
+            pieces.append(_blank(sql_text[start + 1:end - len(closing)]))
+            pieces.append(closing)
+        position = end
+    if not pieces:
+        return sql_text
+    pieces.append(sql_text[position:])
+    return ''.join(pieces)
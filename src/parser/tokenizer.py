@@ -0,0 +1,47 @@
+"""
+Normalizing Tokenizer for T-SQL
+Turns procedure text into a token list that ignores formatting, comments,
+casing, identifier quoting and literal values, for comparing code by shape
+"""
+import re
+from typing import List
+
+# Comments, literals and delimited identifiers end where the statement
+# splitter and the masker say they do; leading whitespace is consumed with
+# each token rather than retried one character at a time
+_TOKEN_PATTERN = re.compile(
+    r"\s*(?:(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<string>[Nn]?'(?:[^']|'')*(?:'|\Z))"
+    r"|(?P<ident>\[[^\]\n]*\]|\"[^\"\n]*\")"
+    r"|(?P<number>0[xX][0-9A-Fa-f]*|\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|\.\d+)"
+    r"|(?P<word>[@#]*\w[\w@#$]*)"
+    r"|(?P<op><>|!=|<=|>=|\S))",
+    re.DOTALL
+)
+
+STRING_TOKEN = "''"
+NUMBER_TOKEN = '0'
+
+
+def tokenize(sql_text: str) -> List[str]:
+    """
+    Normalized tokens of sql_text.
+    
+    Comments are dropped, words and identifiers are lower-cased with
+    their brackets or quotes removed, every string literal becomes ''
+    and every number 0. Two procedures that differ only in layout,
+    comments or constants give the same tokens.
+    """
+    tokens = []
+    append = tokens.append
+    for match in _TOKEN_PATTERN.finditer(sql_text):
+        kind = match.lastgroup
+        if kind == 'word' or kind == 'op':
+            append(match.group(kind).lower())
+        elif kind == 'ident':
+            append(match.group(kind)[1:-1].lower())
+        elif kind == 'string':
+            append(STRING_TOKEN)
+        elif kind == 'number':
+            append(NUMBER_TOKEN)
+    return tokens
@@ -5,20 +5,58 @@ Works without sqlglot limitations - parses raw SQL text
 import re
 from typing import Dict, List, Any
 
+from parser.text_masking import mask_comments_and_literals
+from parser.statement_splitter import split_statements
+
+# Object name: up to four dot-separated parts, each plain or [bracketed]
+_OBJECT_NAME = r"((?:\[[^\]]+\]|[\w#@]+)(?:\s*\.\s*(?:\[[^\]]*\]|\w*)){0,3})(?![\w\].])"
+# Keywords that follow a write verb without a table: MERGE's "THEN UPDATE SET" /
+# "THEN INSERT VALUES" / "THEN DELETE WHEN ...", UPDATE STATISTICS, ...
+_NOT_A_WRITE_TARGET = r"(?!(?:SET|STATISTICS|VALUES|DEFAULT|WHEN|OUTPUT|WHERE|OPTION|TOP)\b)"
+_WRITE_TARGET = re.compile(
+    r"\b(?:INSERT\s+(?:INTO\s+)?|UPDATE\s+|DELETE\s+(?:FROM\s+)?|MERGE\s+(?:INTO\s+)?"
+    r"|TRUNCATE\s+TABLE\s+|INTO\s+)" + _NOT_A_WRITE_TARGET + _OBJECT_NAME,
+    re.IGNORECASE
+)
+_READ_SOURCE = re.compile(r"\b(?:FROM|JOIN|USING)\s+" + _OBJECT_NAME + r"(?!\s*\()(?:\s+(?:AS\s+)?(\w+))?",
+                          re.IGNORECASE)
+# FROM clauses that name a cursor or a DELETE target rather than a read
+_NOT_A_READ = re.compile(r"\b(?:FETCH(?:\s+(?:NEXT|PRIOR|FIRST|LAST|ABSOLUTE\s+\S+|RELATIVE\s+\S+))?|DELETE)\s+$",
+                         re.IGNORECASE)
+_CURSOR_NAME = re.compile(r"\bDECLARE\s+(\w+)\s+(?:INSENSITIVE\s+|SCROLL\s+)*CURSOR\b", re.IGNORECASE)
+_CTE_NAME = re.compile(r"(?:\bWITH|,)\s*(\w+)\s*(?:\([^)]*\)\s*)?AS\s*\(", re.IGNORECASE)
+_INSERT_COLUMNS = re.compile(r"\bINSERT\s+(?:INTO\s+)?" + _OBJECT_NAME + r"\s*\(([^)]*)\)", re.IGNORECASE)
+_UPDATE_SET = re.compile(r"\bUPDATE\s+" + _OBJECT_NAME + r"\s+SET\s+(.*?)(?=\bFROM\b|\bWHERE\b|\bOUTPUT\b|;|\Z)",
+                         re.IGNORECASE | re.DOTALL)
+_SET_COLUMN = re.compile(r"(?:^|,)\s*(?:\w+\.)?\[?(\w+)\]?\s*=")
+_DML_KEYWORD = re.compile(r"[()]|\b(SELECT|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+_BEGIN_TRAN = re.compile(r"\bBEGIN\s+(?:DISTRIBUTED\s+)?TRAN(?:SACTION)?\b", re.IGNORECASE)
+_COMMIT = re.compile(r"\bCOMMIT\b", re.IGNORECASE)
+_ROLLBACK = re.compile(r"\bROLLBACK(?:\s+TRAN(?:SACTION)?(?:\s+(\w+))?)?", re.IGNORECASE)
+_SAVEPOINT = re.compile(r"\bSAVE\s+TRAN(?:SACTION)?\s+(\w+)", re.IGNORECASE)
+# Words that can follow a table name but are never its alias
+_NOT_AN_ALIAS = {
+    'WHERE', 'JOIN', 'INNER', 'LEFT', 'RIGHT', 'FULL', 'CROSS', 'OUTER', 'ON', 'SET', 'WITH',
+    'GROUP', 'ORDER', 'UNION', 'EXCEPT', 'INTERSECT', 'HAVING', 'OPTION', 'SELECT', 'INSERT',
+    'UPDATE', 'DELETE', 'MERGE', 'BEGIN', 'END', 'IF', 'ELSE', 'WHILE', 'RETURN', 'EXEC',
+    'EXECUTE', 'DECLARE', 'PRINT', 'FOR', 'OUTPUT', 'VALUES', 'WHEN', 'APPLY', 'PIVOT', 'UNPIVOT',
+}
+
 class TSQLTextParser:
     """Parse T-SQL stored procedures from raw text."""
     
     def __init__(self):
-        self.proc_name_pattern = re.compile(r'CREATE\s+(?:OR\s+ALTER\s+)?PROCEDURE\s+(\[?[\w.]+\]?)', re.IGNORECASE)
+        self.proc_name_pattern = re.compile(r'CREATE\s+(?:OR\s+ALTER\s+)?PROCEDURE\s+((?:\[[^\]]+\]|[\w.]+)(?:\.(?:\[[^\]]+\]|[\w.]+))*)', re.IGNORECASE)
         self.table_pattern = re.compile(r'\b(?:FROM|JOIN|INTO|UPDATE)\s+(\[?[\w.]+\]?)', re.IGNORECASE)
-        self.exec_pattern = re.compile(r'\bEXEC(?:UTE)?\s+(\[?[\w.]+\]?)', re.IGNORECASE)
-        
+        self.exec_pattern = re.compile(r'\bEXEC(?:UTE)?\s+(?!AS\b)(?:@\w+\s*=\s*)?((?:\[[^\]]+\]|[@\w.]+)(?:\.(?:\[[^\]]+\]|[\w.]+))*)', re.IGNORECASE)
+    
     def parse(self, sql_text: str) -> Dict[str, Any]:
         """Parse SP and return structured data."""
         return {
             'name': self.extract_proc_name(sql_text),
             'parameters': self.extract_parameters(sql_text),
             'tables': self.extract_tables(sql_text),
+            'table_access': self.extract_table_access(sql_text),
             'exec_calls': self.extract_exec_calls(sql_text),
             'lines_of_code': self.count_lines_of_code(sql_text),
             'has_try_catch': 'BEGIN TRY' in sql_text.upper(),
@@ -29,7 +67,7 @@ class TSQLTextParser:
         """Extract procedure name."""
         match = self.proc_name_pattern.search(sql_text)
         if match:
-            name = match.group(1).strip('[]')
+            name = match.group(1).replace('[', '').replace(']', '')
             return name
         return 'Unknown'
     
@@ -87,11 +125,121 @@ class TSQLTextParser:
         
         return sorted(list(tables))
     
+    def extract_table_access(self, sql_text: str) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Tables read and written, with the columns written where the text names them.
+        
+        Returns {table: {'access': ['read', 'write'], 'columns': [...]}}.
+        Comments and string literals are ignored, so tables used only in
+        dynamic SQL are not reported. Temp tables, table variables, CTEs
+        and cursors are left out; UPDATE/DELETE targets given by alias
+        are resolved to the aliased table.
+        """
+        code = mask_comments_and_literals(sql_text)
+        excluded = {m.group(1).upper() for m in _CTE_NAME.finditer(code)}
+        excluded.update(m.group(1).upper() for m in _CURSOR_NAME.finditer(code))
+        
+        access: Dict[str, Dict[str, set]] = {}
+        
+        def record(name: str, kind: str, columns=()):
+            name = re.sub(r'\s+', '', name).replace('[', '').replace(']', '').strip('.')
+            if not name or name[0] in '#@' or name.upper() in excluded:
+                return
+            entry = access.setdefault(name, {'access': set(), 'columns': set()})
+            entry['access'].add(kind)
+            entry['columns'].update(columns)
+        
+        aliases = {}
+        for match in _READ_SOURCE.finditer(code):
+            if _NOT_A_READ.search(code, max(0, match.start() - 40), match.start()):
+                continue
+            record(match.group(1), 'read')
+            alias = match.group(2)
+            if alias and alias.upper() not in _NOT_AN_ALIAS:
+                aliases[alias.upper()] = match.group(1)
+        
+        columns_written: Dict[int, List[str]] = {}
+        for match in _INSERT_COLUMNS.finditer(code):
+            columns_written[match.start(1)] = [c.strip().strip('[]') for c in match.group(2).split(',') if c.strip()]
+        for match in _UPDATE_SET.finditer(code):
+            columns_written[match.start(1)] = _SET_COLUMN.findall(match.group(2).strip())
+        
+        for match in _WRITE_TARGET.finditer(code):
+            target = match.group(1)
+            table = aliases.get(target.upper(), target)
+            record(table, 'write', columns_written.get(match.start(1), ()))
+        
+        return {name: {'access': sorted(entry['access']), 'columns': sorted(entry['columns'])}
+                for name, entry in sorted(access.items())}
+    
+    def extract_statement_access(self, sql_text: str) -> List[Dict[str, Any]]:
+        """
+        Table access per statement, in text order.
+        
+        Returns one {'line', 'operation', 'reads', 'writes', 'in_transaction'}
+        dict per statement that reads or writes a table extract_table_access
+        reports. 'operation' is the statement's SELECT/INSERT/UPDATE/DELETE/
+        MERGE keyword outside parentheses (so the main statement after a
+        CTE), or the first one anywhere in IF/SET/... statements.
+        'in_transaction' is True between BEGIN TRAN and the COMMIT or
+        ROLLBACK that closes the outermost transaction, counted in text
+        order without following branches.
+        """
+        tables = self.extract_table_access(sql_text)
+        statements = []
+        depth = 0
+        savepoints = set()
+        line = 1
+        position = 0
+        for statement in split_statements(sql_text):
+            line += sql_text.count('\n', position, statement.start)
+            position = statement.start
+            code = mask_comments_and_literals(statement.text)
+            
+            if _BEGIN_TRAN.search(code):
+                depth += 1
+            elif _COMMIT.search(code):
+                depth = max(0, depth - 1)
+            else:
+                savepoint = _SAVEPOINT.search(code)
+                rollback = _ROLLBACK.search(code)
+                if savepoint:
+                    savepoints.add(savepoint.group(1).upper())
+                elif rollback and (rollback.group(1) or '').upper() not in savepoints:
+                    depth = 0  # a rollback to a savepoint keeps the transaction open
+            
+            # Cursor and CTE names are only known from the whole text
+            access = {name: entry['access'] for name, entry in self.extract_table_access(statement.text).items()
+                      if name in tables}
+            if not access:
+                continue
+            operation = None
+            nesting = 0
+            for match in _DML_KEYWORD.finditer(code):
+                if match.group() == '(':
+                    nesting += 1
+                elif match.group() == ')':
+                    nesting -= 1
+                elif nesting <= 0:
+                    operation = match.group(1).upper()
+                    break
+                elif operation is None:
+                    operation = match.group(1).upper()
+            statements.append({
+                'line': line + statement.text.count('\n', 0, len(statement.text) - len(statement.text.lstrip())),
+                'operation': operation,
+                'reads': [name for name, kinds in access.items() if 'read' in kinds],
+                'writes': [name for name, kinds in access.items() if 'write' in kinds],
+                'in_transaction': depth > 0,
+            })
+        return statements
+    
     def extract_exec_calls(self, sql_text: str) -> List[str]:
         """Extract EXEC procedure calls."""
         procs = set()
-        for match in self.exec_pattern.finditer(sql_text):
-            proc = match.group(1).strip('[]')
+        # Commented-out calls and EXEC inside dynamic SQL strings are not calls
+        for match in self.exec_pattern.finditer(mask_comments_and_literals(sql_text)):
+            proc = match.group(1).replace('[', '').replace(']', '')
             if not proc.startswith('@'):  # Exclude variable execution
                 procs.add(proc)
         return sorted(list(procs))
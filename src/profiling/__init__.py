@@ -0,0 +1,27 @@
+"""Profiling module initialization.
+
+Submodules are loaded on first attribute access so that importing the
+lightweight rule counters (used by every analyzer) does not pull in
+tracemalloc/json for the memory profiler on CLI startup.
+"""
+import importlib
+
+_EXPORTS = {
+    'StageTimer': '.stage_timer',
+    'ProfileAggregator': '.profile_report',
+    'RuleStats': '.rule_stats',
+    'RULE_STATS': '.rule_stats',
+    'track_rule': '.rule_stats',
+    'MemoryProfiler': '.memory_profiler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
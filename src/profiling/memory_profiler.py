@@ -0,0 +1,153 @@
+"""
+Memory Profiler - tracemalloc-based memory accounting for batch runs
+
+Tracks, per analysis stage and per file, the peak bytes allocated while
+it ran and the bytes still retained once it finished, plus the top
+allocation sites that grew over the whole run. The JSON summary is
+stable (sorted keys) so it can be diffed between releases.
+"""
+import json
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+
+class MemoryProfiler:
+    """Collect per-stage and per-file memory statistics with tracemalloc."""
+    
+    def __init__(self, top_n: int = 10, frames: int = 1):
+        self.top_n = top_n
+        self.frames = frames
+        self.stages: Dict[str, Dict[str, int]] = {}
+        self.files: List[Tuple[int, int, str]] = []  # (peak, retained, source), N largest peaks
+        self.file_count = 0
+        self.run_peak = 0
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._end_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_here = False
+        self._windows: List[List[int]] = []  # open regions: [start bytes, highest peak seen]
+    
+    def start(self):
+        """Start tracing (if not already) and take the baseline snapshot."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_here = True
+        self._start_snapshot = tracemalloc.take_snapshot()
+    
+    def stop(self):
+        """Take the final snapshot and stop tracing if we started it."""
+        self._end_snapshot = tracemalloc.take_snapshot()
+        self.run_peak = max(self.run_peak, tracemalloc.get_traced_memory()[1])
+        if self._started_here:
+            tracemalloc.stop()
+            self._started_here = False
+    
+    def _fold_peak(self) -> int:
+        """Fold the peak since the last reset into every open region; returns current bytes."""
+        current, peak = tracemalloc.get_traced_memory()
+        self.run_peak = max(self.run_peak, peak)
+        for window in self._windows:
+            window[1] = max(window[1], peak)
+        return current
+    
+    def begin(self) -> List[int]:
+        """
+        Mark the start of a measured region; returns a token for end().
+        
+        Regions may nest (a file around its stages). Every begin() resets
+        the tracemalloc peak, so the peak so far is first folded into the
+        regions still open, which would otherwise lose it.
+        """
+        current = self._fold_peak()
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        window = [current, current]  # start bytes, highest peak seen
+        self._windows.append(window)
+        return window
+    
+    def end(self, token: List[int]) -> Tuple[int, int]:
+        """Return (peak, retained) bytes for the region started by begin()."""
+        current = self._fold_peak()
+        for index in range(len(self._windows) - 1, -1, -1):
+            if self._windows[index] is token:
+                del self._windows[index]
+                break
+        start_current, peak = token
+        return max(peak - start_current, 0), current - start_current
+    
+    def record_stage(self, name: str, peak: int, retained: int):
+        """Fold one stage measurement into the per-stage totals."""
+        stats = self.stages.setdefault(name, {'calls': 0, 'peak_bytes': 0, 'retained_bytes': 0})
+        stats['calls'] += 1
+        stats['peak_bytes'] = max(stats['peak_bytes'], peak)
+        stats['retained_bytes'] += retained
+    
+    def record_file(self, source: str, peak: int, retained: int):
+        """Record one file measurement, keeping only the N largest peaks."""
+        self.file_count += 1
+        self.files.append((peak, retained, source))
+        if len(self.files) > self.top_n * 2:
+            self.files = sorted(self.files, reverse=True)[:self.top_n]
+    
+    def top_allocation_sites(self) -> List[Dict]:
+        """Allocation sites that grew the most between start() and stop()."""
+        if not self._start_snapshot or not self._end_snapshot:
+            return []
+        
+        diffs = self._end_snapshot.compare_to(self._start_snapshot, 'lineno')
+        sites = []
+        for diff in diffs[:self.top_n]:
+            frame = diff.traceback[0]
+            sites.append({
+                'site': f"{frame.filename}:{frame.lineno}",
+                'size_diff_bytes': diff.size_diff,
+                'count_diff': diff.count_diff
+            })
+        return sites
+    
+    def summary(self) -> Dict:
+        """Return the diffable memory summary."""
+        return {
+            'file_count': self.file_count,
+            'run_peak_bytes': self.run_peak,
+            'stages': self.stages,
+            'largest_files': [
+                {'source': source, 'peak_bytes': peak, 'retained_bytes': retained}
+                for peak, retained, source in sorted(self.files, reverse=True)[:self.top_n]
+            ],
+            'top_allocation_sites': self.top_allocation_sites()
+        }
+    
+    def write_summary(self, output_file: str):
+        """Write the summary as JSON with sorted keys for stable diffs."""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2, sort_keys=True)
+    
+    def generate_report(self) -> str:
+        """Generate human-readable memory report."""
+        summary = self.summary()
+        lines = []
+        lines.append("=" * 70)
+        lines.append(f"MEMORY PROFILE ({summary['file_count']} files, run peak {_kb(summary['run_peak_bytes'])})")
+        lines.append("=" * 70)
+        lines.append(f"{'Stage':<16}{'calls':>8}{'peak':>16}{'retained':>16}")
+        for name, stats in sorted(self.stages.items(), key=lambda item: item[1]['peak_bytes'], reverse=True):
+            lines.append(f"{name:<16}{stats['calls']:>8}{_kb(stats['peak_bytes']):>16}{_kb(stats['retained_bytes']):>16}")
+        
+        if summary['largest_files']:
+            lines.append("")
+            lines.append("Largest files by peak:")
+            for entry in summary['largest_files']:
+                lines.append(f"  {_kb(entry['peak_bytes']):>12} peak {_kb(entry['retained_bytes']):>12} retained  {entry['source']}")
+        
+        if summary['top_allocation_sites']:
+            lines.append("")
+            lines.append("Top allocation sites (growth over run):")
+            for site in summary['top_allocation_sites']:
+                lines.append(f"  {_kb(site['size_diff_bytes']):>12}  {site['count_diff']:>8} blocks  {site['site']}")
+        lines.append("=" * 70)
+        
+        return "\n".join(lines)
+
+
+def _kb(num_bytes: int) -> str:
+    return f"{num_bytes / 1024:.1f} KB"
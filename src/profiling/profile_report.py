@@ -0,0 +1,91 @@
+"""
+Profile Report - Aggregate stage timings across a batch run
+
+Collects the 'timings' block of each analysis result and reports
+p50/p95/max per stage plus the slowest files for each stage.
+"""
+import heapq
+import math
+from typing import Dict, List, Tuple
+
+
+class ProfileAggregator:
+    """Aggregate per-stage timings across many analyzed files."""
+    
+    def __init__(self, top_n: int = 10):
+        self.top_n = top_n
+        self.file_count = 0
+        self._samples: Dict[str, List[float]] = {}
+        self._slowest: Dict[str, List[Tuple[float, str]]] = {}
+    
+    def add(self, source: str, timings: Dict[str, float]):
+        """Record the timings block of one analysis result."""
+        if not timings:
+            return
+        
+        self.file_count += 1
+        for stage, elapsed_ms in timings.items():
+            self._samples.setdefault(stage, []).append(elapsed_ms)
+            
+            # Bounded min-heap keeps only the N slowest files per stage
+            heap = self._slowest.setdefault(stage, [])
+            if len(heap) < self.top_n:
+                heapq.heappush(heap, (elapsed_ms, source))
+            elif elapsed_ms > heap[0][0]:
+                heapq.heapreplace(heap, (elapsed_ms, source))
+    
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return p50/p95/max/total per stage in milliseconds."""
+        stats = {}
+        for stage, samples in self._samples.items():
+            ordered = sorted(samples)
+            stats[stage] = {
+                'count': len(ordered),
+                'p50': self._percentile(ordered, 50),
+                'p95': self._percentile(ordered, 95),
+                'max': ordered[-1],
+                'total': round(sum(ordered), 3)
+            }
+        return stats
+    
+    def slowest_files(self, stage: str) -> List[Tuple[float, str]]:
+        """Return (elapsed_ms, source) pairs for a stage, slowest first."""
+        return sorted(self._slowest.get(stage, []), reverse=True)
+    
+    def generate_report(self) -> str:
+        """Generate human-readable profile report."""
+        stats = self.stage_stats()
+        lines = []
+        lines.append("=" * 70)
+        lines.append(f"PROFILE ({self.file_count} files, times in ms)")
+        lines.append("=" * 70)
+        lines.append(f"{'Stage':<14}{'p50':>12}{'p95':>12}{'max':>12}{'total':>14}")
+        
+        # Slowest stages first, 'total' always last
+        stages = sorted((s for s in stats if s != 'total'), key=lambda s: stats[s]['total'], reverse=True)
+        if 'total' in stats:
+            stages.append('total')
+        
+        for stage in stages:
+            s = stats[stage]
+            lines.append(f"{stage:<14}{s['p50']:>12.3f}{s['p95']:>12.3f}{s['max']:>12.3f}{s['total']:>14.3f}")
+        
+        for stage in stages:
+            slowest = self.slowest_files(stage)
+            if not slowest:
+                continue
+            lines.append("")
+            lines.append(f"Slowest files - {stage}:")
+            for elapsed_ms, source in slowest:
+                lines.append(f"  {elapsed_ms:>10.3f}  {source}")
+        lines.append("=" * 70)
+        
+        return "\n".join(lines)
+    
+    @staticmethod
+    def _percentile(ordered: List[float], pct: int) -> float:
+        """Nearest-rank percentile of an already sorted list."""
+        if not ordered:
+            return 0.0
+        rank = max(1, math.ceil(pct * len(ordered) / 100))
+        return ordered[rank - 1]
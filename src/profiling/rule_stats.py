@@ -0,0 +1,134 @@
+"""
+Rule Stats - Per-rule execution counters for analyzer detectors
+
+Every detector method decorated with @track_rule records call count,
+total/max time and hit count (findings returned) into the shared
+RULE_STATS registry while collection is enabled.
+"""
+import functools
+from time import perf_counter_ns
+from typing import Callable, Dict, List
+
+
+class RuleCounter:
+    """Execution counters for a single rule."""
+    
+    __slots__ = ('name', 'calls', 'total_ns', 'max_ns', 'hits')
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.hits = 0
+    
+    def record(self, elapsed_ns: int, hits: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.hits += hits
+    
+    def cost_per_finding_ms(self) -> float:
+        """Total milliseconds spent per finding (total time if no findings)."""
+        return self.total_ns / max(self.hits, 1) / 1_000_000
+    
+    def to_dict(self) -> Dict:
+        return {
+            'rule': self.name,
+            'calls': self.calls,
+            'hits': self.hits,
+            'total_ms': round(self.total_ns / 1_000_000, 3),
+            'max_ms': round(self.max_ns / 1_000_000, 3),
+            'cost_per_finding_ms': round(self.cost_per_finding_ms(), 3)
+        }
+
+
+class RuleStats:
+    """Registry of RuleCounter objects keyed by rule name."""
+    
+    def __init__(self):
+        self.enabled = False
+        self.counters: Dict[str, RuleCounter] = {}
+        # rule_id -> [evaluations guarded by the keyword prefilter, skipped]
+        self.prefilter: Dict[str, List[int]] = {}
+    
+    def record(self, name: str, elapsed_ns: int, hits: int):
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = RuleCounter(name)
+        counter.record(elapsed_ns, hits)
+    
+    def record_prefilter(self, rule_id: str, skipped: bool):
+        counts = self.prefilter.get(rule_id)
+        if counts is None:
+            counts = self.prefilter[rule_id] = [0, 0]
+        counts[0] += 1
+        if skipped:
+            counts[1] += 1
+    
+    def skipped_evaluations(self) -> int:
+        """Rule evaluations skipped because their required keywords were absent."""
+        return sum(skipped for _, skipped in self.prefilter.values())
+    
+    def reset(self):
+        self.counters.clear()
+        self.prefilter.clear()
+    
+    def ranked(self) -> List[RuleCounter]:
+        """
+        Rank rules by cost per finding, most expensive first.
+        
+        Rules that ran without ever finding anything come first - they
+        are pure cost and the best candidates to optimize or disable.
+        """
+        return sorted(
+            self.counters.values(),
+            key=lambda c: (c.hits == 0, c.cost_per_finding_ms()),
+            reverse=True
+        )
+    
+    def generate_report(self) -> str:
+        """Generate human-readable slow-rule report."""
+        lines = []
+        lines.append("=" * 100)
+        lines.append("RULE STATS (ranked by cost per finding, times in ms)")
+        lines.append("=" * 100)
+        lines.append(f"{'Rule':<52}{'calls':>8}{'hits':>8}{'total':>11}{'max':>10}{'per hit':>11}")
+        for counter in self.ranked():
+            per_hit = f"{counter.cost_per_finding_ms():.3f}" if counter.hits else '-'
+            lines.append(
+                f"{counter.name:<52}{counter.calls:>8}{counter.hits:>8}"
+                f"{counter.total_ns / 1_000_000:>11.3f}{counter.max_ns / 1_000_000:>10.3f}{per_hit:>11}"
+            )
+        if self.prefilter:
+            guarded = sum(evaluated for evaluated, _ in self.prefilter.values())
+            skipped = self.skipped_evaluations()
+            lines.append("-" * 100)
+            lines.append(f"Keyword prefilter: {skipped} of {guarded} guarded rule evaluations skipped "
+                         f"({skipped / guarded * 100:.1f}%)")
+            for rule_id, (evaluated, rule_skipped) in sorted(self.prefilter.items()):
+                lines.append(f"  {rule_id:<10}{rule_skipped:>8} / {evaluated:<8} skipped")
+        lines.append("=" * 100)
+        return "\n".join(lines)
+
+
+# Shared registry used by all analyzers
+RULE_STATS = RuleStats()
+
+
+def track_rule(func: Callable) -> Callable:
+    """Decorate a detector method so its executions are counted in RULE_STATS."""
+    name = func.__qualname__
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not RULE_STATS.enabled:
+            return func(*args, **kwargs)
+        
+        start = perf_counter_ns()
+        findings = func(*args, **kwargs)
+        RULE_STATS.record(name, perf_counter_ns() - start, len(findings) if findings else 0)
+        return findings
+    
+    return wrapper
@@ -0,0 +1,45 @@
+"""
+Stage Timer - Lightweight per-stage timing for the analysis pipeline
+
+Always-on instrumentation: one perf_counter_ns() pair per stage, cheap
+enough to leave enabled for every analyzed procedure. An optional
+MemoryProfiler gets the same stage boundaries for tracemalloc accounting.
+"""
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Dict
+
+
+class StageTimer:
+    """Accumulate elapsed time per named analysis stage."""
+    
+    def __init__(self, memory_profiler=None):
+        self._elapsed_ns: Dict[str, int] = {}
+        self.memory_profiler = memory_profiler
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to the given stage."""
+        mem_token = self.memory_profiler.begin() if self.memory_profiler else None
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._elapsed_ns[name] = self._elapsed_ns.get(name, 0) + (perf_counter_ns() - start)
+            if self.memory_profiler:
+                self.memory_profiler.record_stage(name, *self.memory_profiler.end(mem_token))
+    
+    def elapsed_ns(self, name: str) -> int:
+        """Return accumulated nanoseconds for a stage (0 if never run)."""
+        return self._elapsed_ns.get(name, 0)
+    
+    def as_dict(self) -> Dict[str, float]:
+        """
+        Return stage timings in milliseconds, plus a 'total' entry.
+        
+        Returns:
+            Dict mapping stage name to elapsed milliseconds
+        """
+        timings = {name: round(ns / 1_000_000, 3) for name, ns in self._elapsed_ns.items()}
+        timings['total'] = round(sum(self._elapsed_ns.values()) / 1_000_000, 3)
+        return timings
@@ -0,0 +1,98 @@
+"""
+Streaming Batch Aggregator
+Folds analysis results into running batch statistics one file at a time,
+so batch memory stays constant regardless of corpus size
+"""
+from typing import Dict, List, Optional
+
+from reports.csv_generator import CSVSummaryGenerator
+
+
+class BatchSummaryRecord:
+    """Compact per-file summary kept instead of the full result dict."""
+    
+    __slots__ = ('sp_name', 'source', 'success', 'lines_of_code', 'security_score',
+                 'quality_score', 'quality_grade', 'performance_score', 'complexity',
+                 'injection_issues', 'quality_issues', 'tables', 'procedures')
+    
+    def __init__(self, result: Dict):
+        self.sp_name = result.get('sp_name', 'Unknown')
+        self.source = result.get('source', 'Unknown')
+        self.success = result.get('success', False)
+        self.lines_of_code = result.get('basic', {}).get('lines_of_code', 0)
+        self.security_score = result.get('security', {}).get('score', 0)
+        self.quality_score = result.get('quality', {}).get('quality_score', 0)
+        self.quality_grade = result.get('quality', {}).get('grade', 'N/A')
+        self.performance_score = result.get('performance', {}).get('performance_score', 0)
+        self.complexity = result.get('complexity', {}).get('complexity', 0)
+        self.injection_issues = len(result.get('security', {}).get('sql_injection_risks', []))
+        self.quality_issues = len(result.get('quality', {}).get('issues', []))
+        self.tables = tuple(result.get('dependencies', {}).get('tables', []))
+        self.procedures = tuple(result.get('dependencies', {}).get('procedures', []))
+
+
+class StreamingBatchAggregator:
+    """
+    Incrementally aggregate batch results.
+    
+    Running averages, issue totals and CI/CD threshold gates are updated
+    per result, CSV rows are written as each file finishes, and the full
+    result can be dropped by the caller right after add(). Per-file
+    BatchSummaryRecord objects are only retained when keep_records=True.
+    """
+    
+    def __init__(self, csv_file: Optional[str] = None, keep_records: bool = False,
+                 min_quality: int = 0, min_security: int = 0, min_performance: int = 0):
+        self.count = 0
+        self.security_total = 0
+        self.quality_total = 0
+        self.total_issues = 0
+        self.min_quality = min_quality
+        self.min_security = min_security
+        self.min_performance = min_performance
+        self.quality_failures = 0
+        self.security_failures = 0
+        self.performance_failures = 0
+        self.keep_records = keep_records
+        self.records: List[BatchSummaryRecord] = []
+        self.csv_file = csv_file
+        self._csv = None
+        if csv_file:
+            self._csv = CSVSummaryGenerator()
+            self._csv.open(csv_file)
+    
+    def add(self, result: Dict) -> BatchSummaryRecord:
+        """Fold one analysis result into the aggregate."""
+        record = BatchSummaryRecord(result)
+        
+        self.count += 1
+        self.security_total += record.security_score
+        self.quality_total += record.quality_score
+        self.total_issues += record.injection_issues + record.quality_issues
+        
+        if record.quality_score < self.min_quality:
+            self.quality_failures += 1
+        if record.security_score < self.min_security:
+            self.security_failures += 1
+        if record.performance_score < self.min_performance:
+            self.performance_failures += 1
+        
+        if self._csv:
+            self._csv.write_result(result)
+        if self.keep_records:
+            self.records.append(record)
+        return record
+    
+    def close(self):
+        """Flush and close the streaming CSV output."""
+        if self._csv:
+            self._csv.close()
+            self._csv = None
+    
+    @property
+    def avg_security(self) -> float:
+        return self.security_total / self.count if self.count else 0.0
+    
+    @property
+    def avg_quality(self) -> float:
+        return self.quality_total / self.count if self.count else 0.0
@@ -3,62 +3,91 @@ CSV Batch Summary Generator
 Creates Excel-friendly CSV summaries for batch analysis
 """
 import csv
-from typing import List, Dict
+from typing import Any, Dict, List
 
 class CSVSummaryGenerator:
     """Generate CSV batch summaries."""
     
+    HEADER = [
+        'Procedure Name',
+        'File',
+        'LOC',
+        'Security Score',
+        'Quality Grade',
+        'Quality Score',
+        'Performance Score',
+        'Complexity',
+        'Tables',
+        'Procedures',
+        'Security Issues',
+        'Quality Issues',
+        'Performance Issues',
+        'Status'
+    ]
+    
+    def __init__(self):
+        self._file = None
+        self._writer = None
+    
     def generate(self, results: List[Dict], output_file: str):
         """Generate CSV summary from batch results."""
-        with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
-            # Header
-            writer.writerow([
-                'Procedure Name',
-                'File',
-                'LOC',
-                'Security Score',
-                'Quality Grade',
-                'Quality Score',
-                'Performance Score',
-                'Complexity',
-                'Tables',
-                'Procedures',
-                'Security Issues',
-                'Quality Issues',
-                'Performance Issues',
-                'Status'
-            ])
-            
-            # Data rows
+        self.open(output_file)
+        try:
             for result in results:
-                security_issues = len(result.get('security', {}).get('sql_injection_risks', [])) + \
-                                len(result.get('security', {}).get('permission_issues', []))
-                quality_issues = len(result.get('quality', {}).get('issues', []))
-                perf_issues = len(result.get('performance', {}).get('issues', []))
-                
-                status = 'PASS'
-                if result.get('security', {}).get('score', 100) < 70:
-                    status = 'FAIL-SECURITY'
-                elif result.get('quality', {}).get('quality_score', 100) < 70:
-                    status = 'FAIL-QUALITY'
-                elif perf_issues > 5:
-                    status = 'WARN-PERFORMANCE'
-                
-                writer.writerow([
-                    result.get('sp_name', 'Unknown'),
-                    result.get('source', 'Unknown'),
-                    result.get('basic', {}).get('lines_of_code', 0),
-                    result.get('security', {}).get('score', 0),
-                    result.get('quality', {}).get('grade', 'N/A'),
-                    result.get('quality', {}).get('quality_score', 0),
-                    result.get('performance', {}).get('performance_score', 0),
-                    result.get('complexity', {}).get('complexity', 0),
-                    len(result.get('dependencies', {}).get('tables', [])),
-                    len(result.get('dependencies', {}).get('procedures', [])),
-                    security_issues,
-                    quality_issues,
-                    perf_issues,
-                    status
-                ])
+                self.write_result(result)
+        finally:
+            self.close()
+    
+    def open(self, output_file: str):
+        """Open output_file for streaming and write the header row."""
+        self._file = open(output_file, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.HEADER)
+    
+    def write_result(self, result: Dict):
+        """Write the summary row for one analysis result."""
+        self.write_row(self.build_row(result))
+    
+    def write_row(self, row: List[Any]):
+        """Write an already built summary row."""
+        self._writer.writerow(row)
+    
+    def close(self):
+        """Close the streaming output file."""
+        if self._file:
+            self._file.close()
+        self._file = None
+        self._writer = None
+    
+    @staticmethod
+    def build_row(result: Dict) -> List[Any]:
+        """Build the CSV row for one analysis result."""
+        security_issues = len(result.get('security', {}).get('sql_injection_risks', [])) + \
+                        len(result.get('security', {}).get('permission_issues', []))
+        quality_issues = len(result.get('quality', {}).get('issues', []))
+        perf_issues = len(result.get('performance', {}).get('issues', []))
+        
+        status = 'PASS'
+        if result.get('security', {}).get('score', 100) < 70:
+            status = 'FAIL-SECURITY'
+        elif result.get('quality', {}).get('quality_score', 100) < 70:
+            status = 'FAIL-QUALITY'
+        elif perf_issues > 5:
+            status = 'WARN-PERFORMANCE'
+        
+        return [
+            result.get('sp_name', 'Unknown'),
+            result.get('source', 'Unknown'),
+            result.get('basic', {}).get('lines_of_code', 0),
+            result.get('security', {}).get('score', 0),
+            result.get('quality', {}).get('grade', 'N/A'),
+            result.get('quality', {}).get('quality_score', 0),
+            result.get('performance', {}).get('performance_score', 0),
+            result.get('complexity', {}).get('complexity', 0),
+            len(result.get('dependencies', {}).get('tables', [])),
+            len(result.get('dependencies', {}).get('procedures', [])),
+            security_issues,
+            quality_issues,
+            perf_issues,
+            status
+        ]
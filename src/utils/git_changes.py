@@ -0,0 +1,96 @@
+"""
+Git change detection for incremental analysis.
+
+Uses the local git executable only (no fetch/network) to find which
+`.sql` files the current branch changed since it forked from a ref,
+including uncommitted and untracked work.
+"""
+import os
+import subprocess
+from typing import Dict, List, Optional, Set
+
+
+class GitChangesError(RuntimeError):
+    """Raised when git is unavailable or the ref cannot be diffed."""
+
+
+class ChangeSet:
+    """SQL files changed since a ref, as absolute normalized paths."""
+    
+    def __init__(self, ref: str, base: Optional[str] = None):
+        self.ref = ref
+        self.base = base  # merge base of ref and HEAD the diff starts from
+        self.changed: Set[str] = set()
+        self.deleted: Set[str] = set()
+        self.renamed: Dict[str, str] = {}  # new path -> old path
+    
+    @staticmethod
+    def normalize(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+    
+    def __contains__(self, path: str) -> bool:
+        return self.normalize(path) in self.changed
+    
+    def renamed_from(self, path: str) -> Optional[str]:
+        """Previous path of a renamed file, or None."""
+        return self.renamed.get(self.normalize(path))
+
+
+def _git(args: List[str], cwd: Optional[str]) -> str:
+    try:
+        proc = subprocess.run(['git'] + args, cwd=cwd, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise GitChangesError("git executable not found")
+    if proc.returncode != 0:
+        raise GitChangesError(proc.stderr.strip() or f"git {' '.join(args)} failed")
+    return proc.stdout
+
+
+def changed_sql_files(ref: str, cwd: Optional[str] = None, include_untracked: bool = True) -> ChangeSet:
+    """
+    Collect .sql files added, modified, copied or renamed since ref.
+    
+    Like `git diff REF...HEAD`, changes are counted from the merge base of
+    ref and HEAD, so files changed on ref after the current branch forked
+    from it are not reported; the diff runs against the working tree, so
+    uncommitted edits are. Paths from `git diff --name-status -M` are
+    relative to the repository root and are resolved to absolute paths.
+    Untracked (not ignored) files are treated as added unless
+    include_untracked is False.
+    """
+    top = _git(['rev-parse', '--show-toplevel'], cwd).strip()
+    base = _git(['merge-base', ref, 'HEAD'], cwd).strip()
+    changes = ChangeSet(ref, base)
+    
+    def resolve(rel: str) -> str:
+        return ChangeSet.normalize(os.path.join(top, rel))
+    
+    output = _git(['diff', '--name-status', '-M', '-z', base, '--'], cwd)
+    fields = output.split('\0')
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i]
+        kind = status[0]
+        if kind in ('R', 'C'):
+            old, new = fields[i + 1], fields[i + 2]
+            i += 3
+            if new.lower().endswith('.sql'):
+                changes.changed.add(resolve(new))
+                if kind == 'R':
+                    changes.renamed[resolve(new)] = resolve(old)
+            continue
+        path = fields[i + 1]
+        i += 2
+        if not path.lower().endswith('.sql'):
+            continue
+        if kind == 'D':
+            changes.deleted.add(resolve(path))
+        else:
+            changes.changed.add(resolve(path))
+    
+    if include_untracked:
+        for path in _git(['ls-files', '--others', '--exclude-standard', '-z'], top).split('\0'):
+            if path.lower().endswith('.sql'):
+                changes.changed.add(resolve(path))
+    
+    return changes
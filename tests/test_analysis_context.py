@@ -0,0 +1,126 @@
+"""
+Tests for the shared analysis context and keyword prefilter
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.analysis_context import AnalysisContext, KEYWORDS, analysis_context, anchored, keyword_mask
+from analyzer.rule_registry import Rule
+from analyzer.security_analyzer import SecurityAnalyzer, OPENROWSET_INJECTION
+from analyzer.performance_analyzer import PerformanceAnalyzer, CURSOR_USAGE, CURSOR_PATTERN
+from profiling.rule_stats import RULE_STATS
+
+
+@pytest.fixture
+def rule_stats():
+    RULE_STATS.reset()
+    RULE_STATS.enabled = True
+    yield RULE_STATS
+    RULE_STATS.enabled = False
+    RULE_STATS.reset()
+
+
+class TestAnalysisContext:
+    """Test suite for AnalysisContext"""
+    
+    def test_keyword_presence_is_case_insensitive_substring(self):
+        context = AnalysisContext("exec master..xp_cmdshell 'dir'")
+        
+        assert context.has_any(keyword_mask(['XP_']))
+        assert context.has_any(keyword_mask(['EXEC', 'OPENROWSET']))
+        assert not context.has_any(keyword_mask(['OPENROWSET']))
+    
+    def test_keywords_registered_later_are_checked_on_demand(self):
+        context = AnalysisContext('SELECT 1 FROM dbo.Ledger')
+        mask = keyword_mask(['LEDGER_TEST_ONLY', 'LEDGER'])
+        
+        assert 'LEDGER' in KEYWORDS
+        assert context.has_any(mask)
+        assert not context.has_any(keyword_mask(['LEDGER_TEST_ONLY']))
+    
+    def test_context_is_shared_per_text(self):
+        sql = 'SELECT 1'
+        
+        assert analysis_context(sql) is analysis_context(sql)
+    
+    def test_rules_declare_required_keywords(self):
+        assert OPENROWSET_INJECTION.requires == ('OPENROWSET',)
+        assert Rule('TEST001', message='x').required_mask == 0
+        assert AnalysisContext('SELECT 1').allows(Rule('TEST002', message='x'))
+
+
+class TestKeywordPrefilter:
+    """Test suite for detectors guarded by required keywords"""
+    
+    def test_absent_keywords_skip_rules(self, rule_stats):
+        SecurityAnalyzer().analyze('SELECT Id FROM dbo.Users WHERE Id = @Id')
+        PerformanceAnalyzer().analyze('SELECT Id FROM dbo.Users WHERE Id = @Id')
+        
+        assert rule_stats.prefilter[OPENROWSET_INJECTION.rule_id] == [1, 1]
+        assert rule_stats.prefilter[CURSOR_USAGE.rule_id] == [1, 1]
+        assert rule_stats.prefilter['SEC007'] == [1, 0]
+        assert rule_stats.skipped_evaluations() >= 5
+        assert 'Keyword prefilter:' in rule_stats.generate_report()
+    
+    def test_present_keywords_still_match(self):
+        findings = PerformanceAnalyzer().detect_cursor_usage('declare c cursor for select 1')
+        
+        assert [f.rule_id for f in findings] == ['PERF001']
+    
+    def test_nothing_recorded_while_disabled(self):
+        RULE_STATS.reset()
+        SecurityAnalyzer().analyze('SELECT 1')
+        
+        assert RULE_STATS.prefilter == {}
+
+
+class TestAnchoredPattern:
+    """Test suite for anchored patterns and the shared anchor scan"""
+    
+    @pytest.mark.parametrize('sql', [
+        'declare c cursor for select 1',
+        'OPEN c; FETCH NEXT FROM c',
+        'SELECT 1 -- reopen later',
+        'DECLARE @x INT; SELECT 1',
+    ])
+    def test_same_matches_as_regex(self, sql):
+        context = AnalysisContext(sql)
+        expected = [m.span() for m in CURSOR_PATTERN.regex.finditer(sql)]
+        found = context.search(CURSOR_PATTERN)
+        
+        assert [m.span() for m in context.finditer(CURSOR_PATTERN)] == expected
+        assert (found.span() if found else None) == (expected[0] if expected else None)
+    
+    def test_overlapping_anchors_are_all_found(self):
+        """Shorter anchors are reported inside longer ones starting at the same offset"""
+        execute_as = anchored(r'EXECUTE\s+AS', 'EXECUTE')
+        dynamic_sql = anchored(r'EXEC\s*\(', 'EXEC')
+        context = AnalysisContext('EXECUTE AS OWNER; exec (@sql)')
+        
+        assert context.anchor_offsets('EXEC') == [0, 18]
+        assert context.anchor_offsets('EXECUTE') == [0]
+        assert context.search(execute_as).span() == (0, 10)
+        assert context.search(dynamic_sql).group() == 'exec ('
+    
+    def test_word_boundary_before_anchor(self):
+        extended = anchored(r'\bxp_\w+', 'XP_')
+        
+        assert AnalysisContext('SELECT tmpxp_a').search(extended) is None
+        assert AnalysisContext('EXEC master..xp_cmdshell').search(extended).group() == 'xp_cmdshell'
+    
+    def test_offsets_survive_case_mapping_that_changes_length(self):
+        """'ß' upper-cases to 'SS'; offsets must still point into the original text"""
+        like = anchored(r"LIKE\s+'%", 'LIKE')
+        sql = "SELECT 'straße' WHERE Name like '%x'"
+        
+        assert len(AnalysisContext(sql).upper) == len(sql)
+        assert AnalysisContext(sql).search(like).start() == sql.index('like')
+        assert AnalysisContext('WHERE Name LI\u212aE \'%x\'').search(like) is not None
+    
+    def test_count_matches_findall(self):
+        nolock = anchored(r'WITH\s*\(NOLOCK\)', 'WITH')
+        sql = 'FROM a WITH (NOLOCK) JOIN b with(nolock) ON 1 = 1 WITH x AS (SELECT 1)'
+        
+        assert AnalysisContext(sql).count(nolock) == 2
@@ -0,0 +1,101 @@
+"""
+Tests for streaming batch aggregation
+"""
+import csv
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from reports.batch_aggregator import StreamingBatchAggregator, BatchSummaryRecord
+from reports.csv_generator import CSVSummaryGenerator
+
+
+def make_result(name, security=90, quality=85, performance=80, injections=0, quality_issues=0):
+    return {
+        'success': True,
+        'sp_name': name,
+        'source': f'{name}.sql',
+        'basic': {'lines_of_code': 10},
+        'security': {'score': security, 'sql_injection_risks': [{}] * injections, 'permission_issues': []},
+        'quality': {'quality_score': quality, 'grade': 'B', 'issues': [{}] * quality_issues},
+        'performance': {'performance_score': performance, 'issues': []},
+        'complexity': {'complexity': 2},
+        'control_flow': {'if_blocks': [{'condition': 'x' * 1000}]},
+        'dependencies': {'tables': ['Orders'], 'procedures': ['dbo.usp_Log']}
+    }
+
+
+class TestStreamingBatchAggregator:
+    """Test suite for StreamingBatchAggregator"""
+    
+    def test_running_averages_and_issue_total(self):
+        """Averages and issue totals match a full-list computation"""
+        batch = StreamingBatchAggregator()
+        batch.add(make_result('a', security=100, quality=80, injections=1, quality_issues=2))
+        batch.add(make_result('b', security=70, quality=90, quality_issues=1))
+        
+        assert batch.count == 2
+        assert batch.avg_security == 85.0
+        assert batch.avg_quality == 85.0
+        assert batch.total_issues == 4
+    
+    def test_threshold_gates(self):
+        """Gate failures are counted as results stream in"""
+        batch = StreamingBatchAggregator(min_quality=70, min_security=80, min_performance=60)
+        batch.add(make_result('ok'))
+        batch.add(make_result('bad_quality', quality=50))
+        batch.add(make_result('bad_security', security=40, performance=10))
+        
+        assert batch.quality_failures == 1
+        assert batch.security_failures == 1
+        assert batch.performance_failures == 1
+    
+    def test_records_not_kept_by_default(self):
+        """Memory stays constant unless the summary index is requested"""
+        batch = StreamingBatchAggregator()
+        for i in range(100):
+            batch.add(make_result(f'p{i}'))
+        
+        assert batch.records == []
+    
+    def test_keep_records_compact(self):
+        """Kept records hold only the compact per-file summary"""
+        batch = StreamingBatchAggregator(keep_records=True)
+        record = batch.add(make_result('a'))
+        
+        assert batch.records == [record]
+        assert not hasattr(record, '__dict__')
+        assert record.tables == ('Orders',)
+        assert record.procedures == ('dbo.usp_Log',)
+    
+    def test_csv_rows_written_per_file(self, tmp_path):
+        """CSV rows stream out and match the list-based generator"""
+        streamed = tmp_path / 'streamed.csv'
+        listed = tmp_path / 'listed.csv'
+        results = [make_result('a'), make_result('b', security=50)]
+        
+        batch = StreamingBatchAggregator(csv_file=str(streamed))
+        for result in results:
+            batch.add(result)
+        batch.close()
+        CSVSummaryGenerator().generate(results, str(listed))
+        
+        assert streamed.read_text() == listed.read_text()
+        rows = list(csv.reader(streamed.open()))
+        assert rows[0] == CSVSummaryGenerator.HEADER
+        assert rows[2][-1] == 'FAIL-SECURITY'
+    
+    def test_empty_batch(self):
+        """Averages are defined for an empty batch"""
+        batch = StreamingBatchAggregator()
+        
+        assert batch.avg_security == 0.0
+        assert batch.avg_quality == 0.0
+    
+    def test_record_from_error_result(self):
+        """Error results with missing sections still summarize"""
+        record = BatchSummaryRecord({'success': False, 'source': 'x.sql'})
+        
+        assert record.sp_name == 'Unknown'
+        assert record.security_score == 0
@@ -0,0 +1,170 @@
+"""
+Tests for the benchmark suite: corpus generator and regression gate
+"""
+import pytest
+import subprocess
+import sys
+import re
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from benchmarks.corpus_generator import SyntheticCorpusGenerator
+from benchmarks.run_benchmarks import parse_size, run_point, compare_results
+from benchmarks.startup_benchmark import LAZY_MODULES, parse_importtime
+from parser.control_flow_extractor import ControlFlowExtractor
+from sp_analyze import SPAnalyzer
+
+
+class TestSyntheticCorpusGenerator:
+    """Test suite for SyntheticCorpusGenerator"""
+    
+    def test_same_seed_is_reproducible(self):
+        """Identical seeds produce identical procedures"""
+        a = SyntheticCorpusGenerator(seed=7).generate_procedure(size_bytes=4096)
+        b = SyntheticCorpusGenerator(seed=7).generate_procedure(size_bytes=4096)
+        c = SyntheticCorpusGenerator(seed=8).generate_procedure(size_bytes=4096)
+        
+        assert a == b
+        assert a != c
+    
+    @pytest.mark.parametrize('size_bytes', [1024, 10_240, 200_000])
+    def test_size_is_close_to_target(self, size_bytes):
+        """Generated text lands close to the requested size"""
+        sql = SyntheticCorpusGenerator().generate_procedure(size_bytes=size_bytes, if_count=1, while_count=1)
+        
+        assert size_bytes <= len(sql) < size_bytes + 600
+    
+    def test_exact_control_flow_counts(self):
+        """IF/WHILE counts match the request and are detectable"""
+        sql = SyntheticCorpusGenerator().generate_procedure(size_bytes=8192, if_count=6, while_count=3, nesting_depth=3)
+        control_flow = ControlFlowExtractor().extract_all(sql)
+        
+        assert len(control_flow['if_blocks']) == 6
+        assert len(control_flow['while_loops']) == 3
+    
+    def test_nesting_depth_respected(self):
+        """BEGIN/END nesting never exceeds the procedure body plus the requested depth"""
+        sql = SyntheticCorpusGenerator().generate_procedure(size_bytes=4096, if_count=4, while_count=4, nesting_depth=3)
+        
+        depth = max_depth = 0
+        for line in sql.split('\n'):
+            stripped = line.strip()
+            if stripped == 'BEGIN':
+                depth += 1
+                max_depth = max(max_depth, depth)
+            elif stripped == 'END':
+                depth -= 1
+        
+        assert depth == 0
+        assert max_depth == 1 + 3
+    
+    def test_dynamic_sql_and_comment_density(self):
+        """Zero density disables dynamic SQL and comments entirely"""
+        gen = SyntheticCorpusGenerator()
+        plain = gen.generate_procedure(size_bytes=20_000, dynamic_sql_density=0, comment_ratio=0)
+        noisy = gen.generate_procedure(size_bytes=20_000, dynamic_sql_density=1, comment_ratio=1)
+        
+        assert 'sp_executesql' not in plain and 'EXEC(@sql)' not in plain
+        assert '--' not in plain and '/*' not in plain
+        assert re.search(r'sp_executesql|EXEC\(@sql\)', noisy)
+        assert '--' in noisy or '/*' in noisy
+    
+    def test_generate_corpus_writes_files(self, tmp_path):
+        """Corpus files are written with distinct procedure names"""
+        paths = SyntheticCorpusGenerator().generate_corpus(str(tmp_path), 3, size_bytes=1024)
+        
+        assert len(paths) == 3
+        assert 'usp_Synthetic00002' in Path(paths[2]).read_text(encoding='utf-8')
+
+
+class TestBenchmarkRunner:
+    """Test suite for throughput measurement and comparison"""
+    
+    def test_parse_size(self):
+        assert parse_size('1KB') == 1024
+        assert parse_size('50MB') == 50 * 1024 * 1024
+        assert parse_size('2048') == 2048
+    
+    def test_run_point_reports_throughput(self):
+        """A point reports per-stage and end-to-end throughput"""
+        point = run_point(SPAnalyzer(), SyntheticCorpusGenerator(), 2048, 8192, {})
+        
+        assert point['procs'] == 4
+        assert point['end_to_end']['procs_per_s'] > 0
+        assert point['stages']['security']['mb_per_s'] > 0
+    
+    def _report(self, security_mb_s, e2e_mb_s=1.0):
+        return {'points': [{
+            'size_bytes': 1024,
+            'stages': {'security': {'ms': 100.0, 'mb_per_s': security_mb_s},
+                       'risk': {'ms': 0.01, 'mb_per_s': 0.001}},
+            'end_to_end': {'seconds': 1.0, 'mb_per_s': e2e_mb_s, 'procs_per_s': 10}
+        }]}
+    
+    def test_compare_flags_regression(self):
+        """Throughput drops beyond the threshold are regressions"""
+        comparisons = compare_results(self._report(10.0), self._report(8.0), threshold_pct=10)
+        
+        security = [c for c in comparisons if c['stage'] == 'security'][0]
+        assert security['regressed']
+        assert security['change_pct'] == -20.0
+    
+    def test_compare_within_threshold(self):
+        """Small drops and improvements pass"""
+        comparisons = compare_results(self._report(10.0), self._report(9.5, 1.5), threshold_pct=10)
+        
+        assert not any(c['regressed'] for c in comparisons)
+    
+    def test_compare_skips_noisy_stages(self):
+        """Stages below min_ms in the baseline are not compared"""
+        comparisons = compare_results(self._report(10.0), self._report(10.0), threshold_pct=10, min_ms=1.0)
+        
+        assert 'risk' not in {c['stage'] for c in comparisons}
+
+
+
+class TestStartupBenchmark:
+    """Test suite for the CLI startup budget"""
+    
+    def test_parse_importtime(self):
+        """importtime lines become (module, cumulative_us, depth)"""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:      2300 |       5400 | argparse\n"
+        )
+        
+        assert parse_importtime(stderr) == [('_io', 120, 1), ('argparse', 5400, 0)]
+    
+    def test_lazy_modules_name_real_modules(self):
+        """A misspelled entry would make its guard pass vacuously"""
+        src = Path(__file__).parent.parent / 'src'
+        for module in LAZY_MODULES:
+            package, _, name = module.rpartition('.')
+            if package and (src / package.replace('.', '/')).is_dir():
+                assert (src / package.replace('.', '/') / f'{name}.py').exists(), module
+    
+    def test_import_does_not_load_lazy_modules(self):
+        """Importing the CLI must not pull in sqlglot, report generators or exporters"""
+        root = Path(__file__).parent.parent
+        code = (
+            f"import sys; sys.path.insert(0, {str(root)!r}); import sp_analyze; "
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        
+        assert output.stdout.strip() == ''
+    
+    def test_risk_scorer_import_stays_light(self):
+        """`--risk` loads the risk scorer without the call graph, index or sqlite3"""
+        src = Path(__file__).parent.parent / 'src'
+        heavy = ['sqlite3', 'pickle', 'analysis.call_graph', 'analysis.dependency_index',
+                 'analysis.impact', 'analysis.dead_code']
+        code = (
+            f"import sys; sys.path.insert(0, {str(src)!r}); from analysis.risk_scorer import RiskScorer; "
+            f"print(','.join(m for m in {heavy!r} if m in sys.modules))"
+        )
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        
+        assert output.stdout.strip() == ''
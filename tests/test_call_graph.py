@@ -0,0 +1,144 @@
+"""
+Tests for the cross-procedure call graph
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.call_graph import CallGraph, normalize_proc_name
+from sp_analyze import SPAnalyzer
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def graph():
+    """
+    usp_Main -> usp_Load -> usp_Validate -> usp_Log
+                usp_Load <-> usp_Retry (cycle)
+    usp_Self -> usp_Self
+    """
+    graph = CallGraph()
+    graph.add_procedure('dbo.usp_Main', ['usp_Load'], 'main.sql')
+    graph.add_procedure('dbo.usp_Load', ['dbo.usp_Validate', '[dbo].[usp_Retry]'], 'load.sql')
+    graph.add_procedure('dbo.usp_Retry', ['usp_load'], 'retry.sql')
+    graph.add_procedure('dbo.usp_Validate', ['usp_Log'], 'validate.sql')
+    graph.add_procedure('usp_Self', ['usp_Self'], 'self.sql')
+    return graph
+
+
+class TestNormalizeProcName:
+    """Test suite for normalize_proc_name"""
+    
+    @pytest.mark.parametrize('name', ['usp_X', 'dbo.usp_X', '[DBO].[usp_x]', 'Sales..usp_X', 'srv.Sales.dbo.usp_X'])
+    def test_same_procedure(self, name):
+        assert normalize_proc_name(name) == 'dbo.usp_x'
+    
+    def test_schema_is_kept(self):
+        assert normalize_proc_name('audit.usp_X') == 'audit.usp_x'
+
+
+class TestCallGraph:
+    """Test suite for CallGraph"""
+    
+    def test_names_are_interned(self, graph):
+        assert len(graph) == 6
+        assert graph.edge_count == 6
+        assert graph.id_of('USP_LOAD') == graph.id_of('[dbo].[usp_Load]')
+        assert graph.callees('usp_Load') == ['dbo.usp_Validate', 'dbo.usp_Retry']
+        assert graph.callers('usp_Load') == ['dbo.usp_Main', 'dbo.usp_Retry']
+    
+    def test_called_only_procedures_are_not_defined(self, graph):
+        assert graph.is_defined('usp_Main')
+        assert not graph.is_defined('usp_Log')
+        assert 'usp_Missing' not in graph
+    
+    def test_recursion_cycles(self, graph):
+        assert graph.recursion_cycles() == [['dbo.usp_Load', 'dbo.usp_Retry'], ['usp_Self']]
+    
+    def test_topological_order_puts_callees_first(self, graph):
+        order = graph.topological_order()
+        position = {name: i for i, name in enumerate(order)}
+        
+        assert sorted(order) == sorted(graph.names)
+        assert position['usp_Log'] < position['dbo.usp_Validate'] < position['dbo.usp_Load'] < position['dbo.usp_Main']
+        assert abs(position['dbo.usp_Load'] - position['dbo.usp_Retry']) == 1
+    
+    def test_transitive_queries(self, graph):
+        assert graph.reachable_from('usp_Main') == ['dbo.usp_Load', 'dbo.usp_Retry', 'dbo.usp_Validate', 'usp_Log']
+        assert 'dbo.usp_Load' in graph.reachable_from('usp_Load')
+        assert graph.reachable_from('usp_Log') == []
+        assert graph.callers_of('usp_Log') == ['dbo.usp_Load', 'dbo.usp_Main', 'dbo.usp_Retry', 'dbo.usp_Validate']
+        assert graph.reaches('usp_Retry', 'usp_Log')
+        assert not graph.reaches('usp_Log', 'usp_Main')
+    
+    def test_caller_depths(self, graph):
+        depths = graph.caller_depths(['usp_Log'])
+        named = {graph.names[i]: (depth, graph.names[via]) for i, (depth, via) in depths.items()}
+        
+        assert named == {'dbo.usp_Validate': (1, 'usp_Log'), 'dbo.usp_Load': (2, 'dbo.usp_Validate'),
+                         'dbo.usp_Main': (3, 'dbo.usp_Load'), 'dbo.usp_Retry': (3, 'dbo.usp_Load')}
+        assert graph.caller_depths(['[dbo].[usp_log]']) is depths
+        assert graph.caller_depths(['usp_Missing']) == {}
+    
+    def test_caller_depths_forgotten_after_changes(self, graph):
+        depths = graph.caller_depths(['usp_Log'])
+        graph.add_procedure('usp_Audit', ['usp_Main'])
+        
+        assert graph.caller_depths(['usp_Log']) is not depths
+        assert graph.caller_depths(['usp_Log'])[graph.id_of('usp_Audit')][0] == 4
+    
+    def test_adding_after_queries(self, graph):
+        assert graph.reachable_from('usp_Log') == []
+        graph.add_procedure('usp_Log', ['usp_Main'], 'log.sql')
+        
+        assert graph.is_defined('usp_Log')
+        assert graph.recursion_cycles()[0] == ['dbo.usp_Load', 'dbo.usp_Main', 'dbo.usp_Retry',
+                                                'dbo.usp_Validate', 'usp_Log']
+    
+    def test_long_call_chain(self):
+        """SCCs are found iteratively, so deep chains do not hit the recursion limit"""
+        graph = CallGraph()
+        for i in range(5000):
+            graph.add_procedure(f'usp_{i}', [f'usp_{i + 1}'])
+        graph.add_procedure('usp_5000', ['usp_0'])
+        
+        assert len(graph.recursion_cycles()) == 1
+        assert len(graph.recursion_cycles()[0]) == 5001
+    
+    def test_save_and_load(self, graph, tmp_path):
+        path = tmp_path / 'procs.callgraph'
+        graph.save(str(path))
+        loaded = CallGraph.load(str(path))
+        
+        assert loaded.names == graph.names
+        assert loaded.sources == graph.sources
+        assert loaded.recursion_cycles() == graph.recursion_cycles()
+        assert loaded.reachable_from('usp_Main') == graph.reachable_from('usp_Main')
+        loaded.add_procedure('usp_Log', [], 'log.sql')
+        assert loaded.is_defined('usp_Log')
+    
+    def test_dumps_and_loads(self, graph):
+        loaded = CallGraph.loads(graph.dumps())
+        
+        assert loaded.names == graph.names
+        assert loaded.callers_of('usp_Log') == graph.callers_of('usp_Log')
+    
+    def test_load_rejects_other_files(self, tmp_path):
+        path = tmp_path / 'other.pickle'
+        path.write_bytes(b'\x80\x04N.')
+        
+        with pytest.raises(ValueError):
+            CallGraph.load(str(path))
+    
+    def test_from_analysis_results(self):
+        analyzer = SPAnalyzer()
+        results = [analyzer.analyze_file(str(path)) for path in sorted(EXAMPLES.glob('*.sql'))]
+        graph = CallGraph.from_results(results + [analyzer._error_result('bad.sql', 'boom')])
+        
+        defined = [name for name in graph.names if graph.is_defined(name)]
+        assert len(defined) == len({r['sp_name'].lower() for r in results if r['success']})
+        assert graph.edge_count == sum(len(set(r['dependencies']['procedures'])) for r in results)
@@ -0,0 +1,140 @@
+"""
+Tests for MinHash/LSH near-duplicate procedure detection
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.clone_detector import CloneDetector
+from sp_analyze import analyze_command, build_parser, clones_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+def example(name):
+    return (EXAMPLES / name).read_text()
+
+
+def chained(offset):
+    """100 of 140 statements from `offset`; 6 apart is ~0.86 similar, 18 apart ~0.77"""
+    statements = [f'UPDATE t{i} SET c = {i} WHERE id = @id;' for i in range(140)]
+    return 'CREATE PROCEDURE p AS\n' + '\n'.join(statements[offset:offset + 100])
+
+
+@pytest.fixture
+def detector():
+    detector = CloneDetector()
+    for path in sorted(EXAMPLES.glob('*.sql')):
+        detector.add(path.name, path.read_text())
+    payment = example('usp_ProcessPayment.sql')
+    detector.add('payment_tenant_a.sql', payment.replace('dbo.', '[dbo].').replace('-- ', '-- tenant A '))
+    detector.add('payment_tenant_b.sql', payment + "\nPRINT 'done'\n")
+    return detector
+
+
+class TestCloneDetector:
+    """Test suite for CloneDetector"""
+    
+    def test_clusters_copies_only(self, detector):
+        clusters = detector.clusters()
+        
+        assert len(clusters) == 1
+        cluster = clusters[0]
+        assert cluster.size == 3
+        names = {cluster.representative} | {key for key, _ in cluster.members}
+        assert names == {'usp_ProcessPayment.sql', 'payment_tenant_a.sql', 'payment_tenant_b.sql'}
+        assert all(similarity >= 0.8 for _, similarity in cluster.members)
+    
+    def test_similarity_estimates(self, detector):
+        assert detector.similarity('usp_ProcessPayment.sql', 'payment_tenant_a.sql') == 1.0
+        assert detector.similarity('usp_ProcessPayment.sql', 'payment_tenant_b.sql') >= 0.8
+        assert detector.similarity('usp_ProcessPayment.sql', 'GetUserOrders.sql') < 0.2
+    
+    def test_signatures_are_deterministic(self):
+        sql = example('usp_ProcessCustomerOrder.sql')
+        
+        assert (CloneDetector().signature(sql) == CloneDetector().signature(sql)).all()
+    
+    def test_large_procedure_signature_matches_unchunked(self):
+        """Shingles are hashed in chunks; the minimum must not depend on it"""
+        detector = CloneDetector()
+        sql = ' '.join(f'SELECT c{i} FROM t{i};' for i in range(3000))
+        shingles = detector.shingles(sql)
+        assert len(shingles) > 4096
+        
+        expected = ((detector._a * shingles + detector._b) % ((1 << 61) - 1) & 0xFFFFFFFF).min(axis=1)
+        assert (detector.signature(sql) == expected).all()
+    
+    def test_empty_text_is_skipped(self):
+        detector = CloneDetector()
+        
+        assert not detector.add('empty.sql', '-- nothing here')
+        assert len(detector) == 0
+        assert detector.clusters() == []
+    
+    def test_bands_fit_threshold(self):
+        detector = CloneDetector(threshold=0.5)
+        
+        assert detector.bands * detector.rows == detector.num_perm
+        assert (1 / detector.bands) ** (1 / detector.rows) <= 0.5
+        with pytest.raises(ValueError):
+            CloneDetector(threshold=0)
+    
+    def test_many_copies(self):
+        """A bucket of identical procedures is verified linearly, not pairwise"""
+        detector = CloneDetector()
+        sql = example('GetUserOrders.sql')
+        for i in range(500):
+            detector.add(f'tenant_{i}.sql', sql.replace('Orders', f'Orders /* tenant {i} */'))
+        
+        clusters = detector.clusters()
+        assert [cluster.size for cluster in clusters] == [500]
+    
+    def test_chained_members_below_threshold(self):
+        detector = CloneDetector()
+        for name, offset in (('a', 0), ('b', 6), ('c', 12), ('d', 18)):
+            detector.add(name, chained(offset))
+        
+        cluster, = detector.clusters()
+        assert (cluster.representative, cluster.size) == ('c', 4)
+        assert dict(cluster.members)['a'] < 0.8
+        assert sorted(cluster.duplicates(0.8)) == ['b', 'd']
+
+
+class TestClonesCommand:
+    """Test suite for `sp_analyze.py clones`"""
+    
+    def test_output(self, tmp_path, capsys):
+        payment = example('usp_ProcessPayment.sql')
+        (tmp_path / 'a.sql').write_text(payment)
+        (tmp_path / 'b.sql').write_text(payment.replace('dbo.', '[dbo].'))
+        (tmp_path / 'c.sql').write_text(example('GetUserOrders.sql'))
+        args = build_parser().parse_args(['clones', str(tmp_path / '*.sql')])
+        
+        assert clones_command(args) == 0
+        output = capsys.readouterr().out
+        assert '3 files, 1 clone cluster(s), 1 near-duplicate(s)' in output
+        assert '(2 procedures)' in output
+        assert 'c.sql' not in output
+    
+    def test_skip_clones_analyzes_members_below_threshold(self, tmp_path, capsys):
+        for name, offset in (('a', 0), ('b', 6), ('c', 12), ('d', 18)):
+            (tmp_path / f'{name}.sql').write_text(chained(offset))
+        args = build_parser().parse_args(['analyze', str(tmp_path / '*.sql'), '--batch', '--skip-clones'])
+        
+        assert analyze_command(args) == 0
+        output = capsys.readouterr().out
+        assert 'Skipping 2 near-duplicate file(s) in 1 clone cluster(s)' in output
+        assert 'a.sql' in output and 'c.sql' in output
+        assert 'b.sql' not in output and 'd.sql' not in output
+    
+    @pytest.mark.parametrize('threshold', ['0', '1.5', '-0.2', 'high'])
+    def test_threshold_out_of_range(self, threshold, capsys):
+        for argv in (['clones', '*.sql', '--threshold', threshold],
+                     ['analyze', '*.sql', '--skip-clones', '--clone-threshold', threshold]):
+            with pytest.raises(SystemExit):
+                build_parser().parse_args(argv)
+        assert 'similarity' in capsys.readouterr().err
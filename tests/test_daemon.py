@@ -0,0 +1,175 @@
+"""
+Tests for the result cache, analyzer daemon and thin CLI client
+"""
+import pytest
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.result_cache import ResultCache
+from daemon.client import request, run_client, split_client_args
+from daemon.server import AnalysisServer
+from sp_analyze import SPAnalyzer, analyze_command, build_parser
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def socket_path():
+    # Unix socket paths are limited to ~100 bytes, so avoid deep pytest tmp dirs
+    directory = tempfile.mkdtemp(prefix='spa')
+    yield str(Path(directory) / 'd.sock')
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def start_server(socket_path, run_command, **kwargs):
+    server = AnalysisServer(socket_path, run_command, **kwargs)
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    return server, thread
+
+
+class TestResultCache:
+    """Test suite for ResultCache"""
+    
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted first"""
+        cache = ResultCache(max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.hits == 2 and cache.misses == 1
+    
+    def test_analyzer_reuses_result_for_same_text(self):
+        """Identical text is served from the cache under the new source name"""
+        analyzer = SPAnalyzer(result_cache=ResultCache())
+        sql = (EXAMPLES / 'GetUserOrders.sql').read_text()
+        
+        first = analyzer.analyze_text(sql, 'a.sql')
+        second = analyzer.analyze_text(sql, 'b.sql')
+        
+        assert analyzer.result_cache.hits == 1
+        assert second['source'] == 'b.sql'
+        assert second['security'] is first['security']
+        assert first['source'] == 'a.sql'
+    
+    def test_failed_results_are_not_cached(self):
+        """Error results are recomputed rather than cached"""
+        analyzer = SPAnalyzer(result_cache=ResultCache())
+        analyzer.text_parser = None  # force analyze_text to fail
+        
+        assert not analyzer.analyze_text('SELECT 1', 'x.sql')['success']
+        assert len(analyzer.result_cache) == 0
+
+
+class TestClientArgs:
+    """Test suite for split_client_args"""
+    
+    @pytest.mark.parametrize('argv', [
+        ['analyze', 'a.sql', '--client', '/tmp/s', '--html'],
+        ['analyze', 'a.sql', '--client=/tmp/s', '--html'],
+    ])
+    def test_strips_client_option(self, argv):
+        assert split_client_args(argv) == ('/tmp/s', ['analyze', 'a.sql', '--html'])
+
+
+class TestAnalysisServer:
+    """Test suite for AnalysisServer"""
+    
+    def test_run_replays_output_and_exit_code(self, socket_path):
+        """stdout, stderr and exit code of the command reach the client"""
+        def run_command(argv):
+            print(' '.join(argv))
+            print('warn', file=sys.stderr)
+            return 3
+        
+        server, thread = start_server(socket_path, run_command, idle_timeout=None)
+        try:
+            response = request(socket_path, {'op': 'run', 'argv': ['analyze', 'x.sql'], 'cwd': '/'})
+        finally:
+            server.shutdown()
+            thread.join(5)
+        
+        assert response == {'stdout': 'analyze x.sql\n', 'stderr': 'warn\n', 'exit_code': 3}
+        assert not Path(socket_path).exists()
+    
+    def test_concurrent_clients(self, socket_path):
+        """Many clients can connect at once and each gets its own output"""
+        def run_command(argv):
+            time.sleep(0.01)
+            print(argv[0])
+            return 0
+        
+        server, thread = start_server(socket_path, run_command, idle_timeout=None)
+        responses = {}
+        
+        def client(i):
+            responses[i] = request(socket_path, {'op': 'run', 'argv': [str(i)]})['stdout']
+        
+        try:
+            clients = [threading.Thread(target=client, args=(i,)) for i in range(8)]
+            for c in clients:
+                c.start()
+            for c in clients:
+                c.join(10)
+        finally:
+            server.shutdown()
+            thread.join(5)
+        
+        assert responses == {i: f"{i}\n" for i in range(8)}
+    
+    def test_idle_shutdown(self, socket_path):
+        """The daemon exits on its own after the idle timeout"""
+        server, thread = start_server(socket_path, lambda argv: 0, idle_timeout=0.2)
+        thread.join(5)
+        
+        assert not thread.is_alive()
+        assert not Path(socket_path).exists()
+    
+    def test_refuses_live_socket(self, socket_path):
+        """A second daemon cannot take over a live socket"""
+        server, thread = start_server(socket_path, lambda argv: 0, idle_timeout=None)
+        try:
+            with pytest.raises(RuntimeError):
+                AnalysisServer(socket_path, lambda argv: 0)
+        finally:
+            server.shutdown()
+            thread.join(5)
+    
+    def test_client_output_matches_local_run(self, socket_path, capsys):
+        """Forwarded analyze prints exactly what a local run prints"""
+        parser = build_parser()
+        analyzer = SPAnalyzer()
+        argv = ['analyze', str(EXAMPLES / 'GetUserOrders.sql')]
+        
+        local = StringIO()
+        with redirect_stdout(local):
+            local_code = analyze_command(parser.parse_args(argv))
+        
+        server, thread = start_server(
+            socket_path, lambda a: analyze_command(parser.parse_args(a), analyzer=analyzer), idle_timeout=None)
+        try:
+            capsys.readouterr()
+            exit_code = run_client(socket_path, argv)
+            remote = capsys.readouterr().out
+        finally:
+            server.shutdown()
+            thread.join(5)
+        
+        assert exit_code == local_code
+        assert remote == local.getvalue()
+    
+    def test_client_falls_back_when_daemon_missing(self, socket_path):
+        """An unreachable daemon yields None so the CLI analyzes locally"""
+        assert run_client(socket_path, ['analyze', 'x.sql']) is None
@@ -0,0 +1,125 @@
+"""
+Tests for dead and orphan procedure detection
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.call_graph import CallGraph
+from analysis.dead_code import call_graph_from_files, find_dead_procedures, load_entry_points
+from sp_analyze import analyze_command, build_parser, dead_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def graph():
+    """
+    job_Nightly -> usp_Load -> usp_Log
+    usp_Api -> usp_Log
+    usp_Old -> usp_OldHelper -> usp_Log
+    usp_PingA <-> usp_PingB (orphan cycle)
+    usp_Self -> usp_Self
+    """
+    graph = CallGraph()
+    graph.add_procedure('dbo.job_Nightly', ['usp_Load'], 'nightly.sql')
+    graph.add_procedure('dbo.usp_Load', ['usp_Log', 'usp_External'], 'load.sql')
+    graph.add_procedure('dbo.usp_Log', [], 'log.sql')
+    graph.add_procedure('dbo.usp_Api', ['usp_Log'], 'api.sql')
+    graph.add_procedure('dbo.usp_Old', ['usp_OldHelper'], 'old.sql')
+    graph.add_procedure('dbo.usp_OldHelper', ['usp_Log'], 'old_helper.sql')
+    graph.add_procedure('dbo.usp_PingA', ['usp_PingB'], 'ping_a.sql')
+    graph.add_procedure('dbo.usp_PingB', ['usp_PingA'], 'ping_b.sql')
+    graph.add_procedure('dbo.usp_Self', ['usp_Self'], 'self.sql')
+    return graph
+
+
+class TestFindDeadProcedures:
+    """Test suite for find_dead_procedures"""
+    
+    def test_without_entry_points(self, graph):
+        report = find_dead_procedures(graph)
+        
+        assert report.unreferenced == ['dbo.job_Nightly', 'dbo.usp_Api', 'dbo.usp_Old', 'dbo.usp_Self']
+        assert report.unreachable == [['dbo.usp_PingA', 'dbo.usp_PingB']]
+    
+    def test_with_entry_points(self, graph):
+        report = find_dead_procedures(graph, ['dbo.job_*', 'usp_API', 'usp_NotThere'])
+        
+        assert report.entry_points == ['dbo.job_Nightly', 'dbo.usp_Api']
+        assert report.unreferenced == ['dbo.usp_Old', 'dbo.usp_Self']
+        assert report.unreachable == [['dbo.usp_Old', 'dbo.usp_OldHelper'], ['dbo.usp_PingA', 'dbo.usp_PingB'],
+                                      ['dbo.usp_Self']]
+        assert 'dbo.usp_Log' not in report.dead
+    
+    def test_called_only_procedures_are_not_reported(self, graph):
+        report = find_dead_procedures(graph, [])
+        
+        assert 'usp_External' not in report.dead
+        assert len(report.dead) == 9
+    
+    def test_scripts_are_always_live(self, graph):
+        graph.add_procedure('deploy/run_old.sql', ['usp_Old'], 'deploy/run_old.sql')
+        report = find_dead_procedures(graph, ['job_*'], scripts=['deploy/run_old.sql'])
+        
+        assert 'dbo.usp_OldHelper' not in report.dead
+        assert 'deploy/run_old.sql' not in report.unreferenced
+    
+    def test_load_entry_points(self, tmp_path):
+        path = tmp_path / 'entry_points.txt'
+        path.write_text("# SQL Agent jobs\ndbo.job_*\n\nusp_Api  # called by the web app\n")
+        
+        assert load_entry_points(str(path)) == ['dbo.job_*', 'usp_Api']
+
+
+class TestCallGraphFromFiles:
+    """Test suite for the pre-analysis EXEC scan"""
+    
+    def test_matches_full_analysis_names(self, tmp_path):
+        script = tmp_path / 'deploy.sql'
+        script.write_text("EXEC dbo.usp_ProcessCustomerOrder @OrderId = 1")
+        paths = [str(p) for p in sorted(EXAMPLES.glob('*.sql'))] + [str(script), str(tmp_path / 'missing.sql')]
+        graph, scripts = call_graph_from_files(paths)
+        
+        assert scripts == [str(script)]
+        assert graph.callers('usp_ProcessPayment') == ['dbo.usp_ProcessCustomerOrder']
+        assert graph.callers('usp_ProcessCustomerOrder') == [str(script)]
+        assert find_dead_procedures(graph, [], scripts).dead == [
+            'dbo.GetUserOrders', 'dbo.ProcessOrders']
+
+
+class TestDeadCommand:
+    """Test suite for `sp_analyze.py dead` and `analyze --skip-dead`"""
+    
+    def test_report(self, tmp_path, capsys):
+        entry_points = tmp_path / 'entry_points.txt'
+        entry_points.write_text('dbo.usp_ProcessCustomerOrder\ndbo.Get*\n')
+        args = build_parser().parse_args(['dead', str(EXAMPLES / '*.sql'), '--entry-points', str(entry_points)])
+        
+        assert dead_command(args) == 0
+        output = capsys.readouterr().out
+        assert '2 entry point(s)' in output
+        assert 'Unreachable (1 in 1 group(s))' in output
+        assert '  dbo.ProcessOrders\n' in output
+    
+    def test_skip_dead(self, tmp_path, capsys):
+        entry_points = tmp_path / 'entry_points.txt'
+        entry_points.write_text('dbo.usp_ProcessCustomerOrder\ndbo.Get*\n')
+        args = build_parser().parse_args(['analyze', str(EXAMPLES / '*.sql'), '--batch', '--skip-dead',
+                                          '--entry-points', str(entry_points)])
+        
+        assert analyze_command(args) == 0
+        output = capsys.readouterr().out
+        assert 'Skipping 1 dead procedure file(s)' in output
+        assert 'ProcessOrders.sql' not in output
+        assert 'usp_ProcessPayment.sql' in output
+    
+    def test_skip_dead_missing_entry_points(self, tmp_path, capsys):
+        args = build_parser().parse_args(['analyze', str(EXAMPLES / '*.sql'), '--batch', '--skip-dead',
+                                          '--entry-points', str(tmp_path / 'missing.txt')])
+        
+        assert analyze_command(args) == 1
+        assert 'cannot read entry points' in capsys.readouterr().out
@@ -0,0 +1,130 @@
+"""
+Tests for the SQLite dependency index and the query command
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.dependency_index import DependencyIndex, READ, WRITE, object_key
+from sp_analyze import SPAnalyzer, build_parser, query_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DependencyIndex(str(tmp_path / 'deps.db'))
+    index.add_procedure('dbo.usp_Load', 'load.sql',
+                        {'dbo.Orders': {'access': ['read', 'write'], 'columns': ['Status']},
+                         'Customers': {'access': ['read'], 'columns': []}},
+                        calls=['usp_Log'], rule_ids=['QUAL201'])
+    index.add_procedure('dbo.usp_Report', 'report.sql',
+                        {'[dbo].[Orders]': {'access': ['read'], 'columns': []}},
+                        calls=['dbo.usp_Log'])
+    yield index
+    index.close()
+
+
+def names(hits):
+    return [hit.procedure for hit in hits]
+
+
+class TestDependencyIndex:
+    """Test suite for DependencyIndex"""
+    
+    def test_object_keys(self):
+        assert object_key('table', '[DBO].[Orders]') == object_key('table', 'orders') == 'dbo.orders'
+        assert object_key('column', 'Orders.[Status]') == 'dbo.orders.status'
+        assert object_key('rule', 'sec001') == 'SEC001'
+    
+    def test_table_readers_and_writers(self, index):
+        assert names(index.lookup('table', 'Orders')) == ['dbo.usp_Load', 'dbo.usp_Report']
+        assert names(index.lookup('table', 'dbo.Orders', WRITE)) == ['dbo.usp_Load']
+        assert names(index.lookup('table', 'dbo.Customers', READ)) == ['dbo.usp_Load']
+        assert index.lookup('table', 'dbo.Orders', WRITE)[0].access_names == ['read', 'write']
+    
+    def test_columns_procedures_and_rules(self, index):
+        assert names(index.lookup('column', 'dbo.Orders.Status')) == ['dbo.usp_Load']
+        assert names(index.lookup('procedure', 'usp_Log')) == ['dbo.usp_Load', 'dbo.usp_Report']
+        assert names(index.lookup('rule', 'QUAL201')) == ['dbo.usp_Load']
+        assert index.lookup('table', 'dbo.Missing') == []
+    
+    def test_reindexing_replaces_references(self, index):
+        index.add_procedure('USP_LOAD', 'load2.sql', {'dbo.Orders': {'access': ['read'], 'columns': []}})
+        
+        assert index.procedure_count() == 2
+        assert names(index.lookup('table', 'dbo.Orders', WRITE)) == []
+        assert index.lookup('table', 'dbo.Orders')[0].source == 'load2.sql'
+        assert index.lookup('rule', 'QUAL201') == []
+    
+    def test_persists_after_commit(self, index):
+        index.commit()
+        
+        with DependencyIndex(index.path) as reopened:
+            assert names(reopened.lookup('table', 'orders')) == ['dbo.usp_Load', 'dbo.usp_Report']
+    
+    def test_rejects_other_versions(self, tmp_path):
+        path = str(tmp_path / 'old.db')
+        DependencyIndex(path).close()
+        with sqlite3.connect(path) as connection:
+            connection.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+        
+        with pytest.raises(ValueError):
+            DependencyIndex(path)
+    
+    def test_risk_is_stored(self, index):
+        index.add_procedure('usp_Risky', 'risky.sql', risk={'risk_score': 31, 'risk_level': 'CRITICAL'})
+        
+        procedures = index.procedures(['dbo.usp_risky', 'dbo.usp_load', 'dbo.usp_missing'])
+        assert procedures['dbo.usp_risky'] == ('usp_Risky', 'risky.sql', 31, 'CRITICAL')
+        assert procedures['dbo.usp_load'].risk_level is None
+        assert 'dbo.usp_missing' not in procedures
+        assert len(index.procedures()) == 3
+    
+    def test_call_graph_is_cached_until_changed(self, index):
+        index.commit()
+        assert index.call_graph().callers('usp_Log') == ['dbo.usp_Load', 'dbo.usp_Report']
+        assert index.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 1
+        
+        index.add_procedure('usp_Log', 'log.sql', calls=['usp_Report'])
+        assert index.connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] == 0
+        assert index.call_graph().recursion_cycles() == [['dbo.usp_Report', 'usp_Log']]
+    
+    def test_unknown_kind(self, index):
+        with pytest.raises(ValueError):
+            index.lookup('view', 'dbo.Orders')
+    
+    def test_from_analysis_results(self, tmp_path):
+        analyzer = SPAnalyzer()
+        with DependencyIndex(str(tmp_path / 'deps.db')) as index:
+            for path in sorted(EXAMPLES.glob('*.sql')):
+                index.add_result(analyzer.analyze_file(str(path)))
+            index.add_result(analyzer._error_result('bad.sql', 'boom'))
+            
+            assert index.procedure_count() == len(list(EXAMPLES.glob('*.sql')))
+            assert 'dbo.usp_ProcessCustomerOrder' in names(index.lookup('table', 'dbo.Orders', WRITE))
+            assert names(index.lookup('procedure', 'dbo.usp_ProcessPayment')) == ['dbo.usp_ProcessCustomerOrder']
+
+
+class TestQueryCommand:
+    """Test suite for `sp_analyze.py query`"""
+    
+    def test_query_writers(self, index, capsys):
+        index.commit()
+        args = build_parser().parse_args(['query', '--table', 'dbo.Orders', '--writes', '--index', index.path])
+        
+        assert query_command(args) == 0
+        output = capsys.readouterr().out
+        assert 'dbo.usp_Load' in output and 'read,write' in output
+        assert 'dbo.usp_Report' not in output
+        assert '1 procedure(s)' in output
+    
+    def test_missing_index(self, tmp_path, capsys):
+        args = build_parser().parse_args(['query', '--rule', 'SEC001', '--index', str(tmp_path / 'none.db')])
+        
+        assert query_command(args) == 1
+        assert 'not found' in capsys.readouterr().out
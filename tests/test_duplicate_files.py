@@ -0,0 +1,85 @@
+"""
+Tests for exact-duplicate deduplication of batch runs
+"""
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.result_cache import DuplicateFiles
+from sp_analyze import SPAnalyzer, analyze_command, build_parser
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def tenants(tmp_path):
+    """The same procedure deployed to three tenant databases, plus one other procedure"""
+    orders = (EXAMPLES / 'GetUserOrders.sql').read_text()
+    for tenant in ('acme', 'globex', 'initech'):
+        (tmp_path / f'{tenant}_GetUserOrders.sql').write_text(orders)
+    (tmp_path / 'acme_ProcessPayment.sql').write_text((EXAMPLES / 'usp_ProcessPayment.sql').read_text())
+    return tmp_path
+
+
+class TestDuplicateFiles:
+    """Test suite for DuplicateFiles"""
+    
+    def test_groups_identical_texts(self, tenants):
+        paths = sorted(str(p) for p in tenants.glob('*.sql'))
+        duplicates = DuplicateFiles(paths + [str(tenants / 'missing.sql')])
+        
+        assert (duplicates.total, duplicates.unique) == (5, 3)
+        assert duplicates.ratio == pytest.approx(5 / 3)
+    
+    def test_result_is_fanned_out_and_released(self, tenants):
+        paths = sorted(str(p) for p in tenants.glob('*_GetUserOrders.sql'))
+        duplicates = DuplicateFiles(paths)
+        analyzer = SPAnalyzer()
+        
+        assert duplicates.result_for(paths[0]) is None
+        first = analyzer.analyze_file(paths[0])
+        duplicates.record(paths[0], first)
+        copies = [duplicates.result_for(path) for path in paths[1:]]
+        
+        assert [copy['source'] for copy in copies] == paths[1:]
+        assert all(copy['metrics'] is first['metrics'] for copy in copies)
+        assert first['source'] == paths[0]
+        assert duplicates.served == 2
+        # The last copy has been served, so nothing is kept
+        assert duplicates.result_for(paths[1]) is None
+    
+    def test_failed_results_are_not_shared(self, tenants):
+        paths = sorted(str(p) for p in tenants.glob('*_GetUserOrders.sql'))
+        duplicates = DuplicateFiles(paths)
+        analyzer = SPAnalyzer()
+        analyzer.text_parser = None  # force analyze_text to fail
+        
+        duplicates.record(paths[0], analyzer.analyze_file(paths[0]))
+        
+        assert duplicates.result_for(paths[1]) is None
+
+
+class TestAnalyzeDedupe:
+    """Test suite for deduplication in `sp_analyze.py analyze --batch`"""
+    
+    def test_each_source_is_reported(self, tenants, capsys):
+        summary = tenants / 'summary.csv'
+        args = build_parser().parse_args(['analyze', str(tenants / '*.sql'), '--batch', '--csv', str(summary)])
+        
+        assert analyze_command(args) == 0
+        output = capsys.readouterr().out
+        assert 'Deduplicated 4 files to 2 unique procedure texts (dedup ratio 2.00x)' in output
+        with open(summary, newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert sorted(Path(row['File']).name for row in rows) == sorted(p.name for p in tenants.glob('*.sql'))
+        assert len({row['Security Score'] for row in rows if 'GetUserOrders' in row['File']}) == 1
+    
+    def test_no_dedupe(self, tenants, capsys):
+        args = build_parser().parse_args(['analyze', str(tenants / '*.sql'), '--batch', '--no-dedupe'])
+        
+        assert analyze_command(args) == 0
+        assert 'Deduplicated' not in capsys.readouterr().out
@@ -0,0 +1,104 @@
+"""
+Tests for the polling file watcher and watch mode
+"""
+import pytest
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.result_cache import ResultCache
+from utils.file_watcher import FileWatcher
+from sp_analyze import SPAnalyzer, build_parser, process_changes, watch_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+def touch(path: Path, text: str):
+    """Write text and force a distinct mtime even on coarse-grained filesystems"""
+    path.write_text(text)
+    stamp = time.time_ns() + 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+class TestFileWatcher:
+    """Test suite for FileWatcher"""
+    
+    def test_poll_reports_added_modified_removed(self, tmp_path):
+        """Each poll diffs against the previous scan"""
+        (tmp_path / 'a.sql').write_text('SELECT 1')
+        (tmp_path / 'b.sql').write_text('SELECT 2')
+        watcher = FileWatcher(str(tmp_path))
+        
+        touch(tmp_path / 'a.sql', 'SELECT 10')
+        (tmp_path / 'b.sql').unlink()
+        (tmp_path / 'c.SQL').write_text('SELECT 3')
+        (tmp_path / 'notes.txt').write_text('ignored')
+        
+        changed, removed = watcher.poll()
+        assert changed == {str(tmp_path / 'a.sql'), str(tmp_path / 'c.SQL')}
+        assert removed == {str(tmp_path / 'b.sql')}
+        assert watcher.poll() == (set(), set())
+    
+    def test_skips_vcs_and_cache_dirs(self, tmp_path):
+        """Files under .git and the result cache are not watched"""
+        (tmp_path / '.git').mkdir()
+        (tmp_path / '.git' / 'x.sql').write_text('SELECT 1')
+        (tmp_path / 'sub').mkdir()
+        (tmp_path / 'sub' / 'y.sql').write_text('SELECT 1')
+        
+        assert set(FileWatcher(str(tmp_path)).files) == {str(tmp_path / 'sub' / 'y.sql')}
+    
+    def test_burst_is_debounced(self, tmp_path):
+        """Rapid saves of several files come back as one change set"""
+        watcher = FileWatcher(str(tmp_path))
+        
+        def burst():
+            for i in range(5):
+                touch(tmp_path / f"p{i % 2}.sql", f"SELECT {i}")
+                time.sleep(0.01)
+        writer = threading.Thread(target=burst)
+        writer.start()
+        changed, removed = watcher.wait_for_changes(interval=0.01, debounce=0.1, timeout=5)
+        writer.join()
+        
+        assert changed == {str(tmp_path / 'p0.sql'), str(tmp_path / 'p1.sql')}
+        assert removed == set()
+    
+    def test_timeout_without_changes(self, tmp_path):
+        """wait_for_changes gives up after the timeout"""
+        watcher = FileWatcher(str(tmp_path))
+        assert watcher.wait_for_changes(interval=0.01, timeout=0.05) == (set(), set())
+
+
+class TestWatchMode:
+    """Test suite for watch-mode re-analysis"""
+    
+    def test_process_changes_refreshes_and_removes_reports(self, tmp_path, capsys):
+        """Changed files get fresh JSON reports; removed files lose theirs"""
+        sql_file = tmp_path / 'GetUserOrders.sql'
+        shutil.copy(EXAMPLES / 'GetUserOrders.sql', sql_file)
+        args = build_parser().parse_args(['watch', str(tmp_path), '--json'])
+        analyzer = SPAnalyzer(result_cache=ResultCache())
+        
+        process_changes(analyzer, {str(sql_file)}, set(), args)
+        report = tmp_path / 'GetUserOrders_analysis.json'
+        assert report.exists()
+        assert 'GetUserOrders.sql: security' in capsys.readouterr().out
+        
+        sql_file.unlink()
+        process_changes(analyzer, set(), {str(sql_file)}, args)
+        assert not report.exists()
+        assert 'removed' in capsys.readouterr().out
+    
+    def test_watch_command_stops(self, tmp_path, capsys):
+        """The watch loop runs the initial pass and exits when asked to stop"""
+        shutil.copy(EXAMPLES / 'GetUserOrders.sql', tmp_path / 'GetUserOrders.sql')
+        args = build_parser().parse_args(['watch', str(tmp_path)])
+        
+        assert watch_command(args, should_stop=lambda: True) == 0
+        assert '1 files matching *.sql' in capsys.readouterr().out
@@ -0,0 +1,142 @@
+"""
+Tests for git-aware incremental analysis (--changed-since) and the on-disk result cache
+"""
+import pytest
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.result_cache import DiskResultCache
+from utils.git_changes import GitChangesError, changed_sql_files
+from sp_analyze import SPAnalyzer, analyze_command, build_parser
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git not installed')
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.email=t@example.com', '-c', 'user.name=t'] + list(args),
+                   cwd=str(repo), check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository with three committed procedures"""
+    for name in ('GetUserOrders.sql', 'ProcessOrders.sql', 'usp_ProcessPayment.sql'):
+        shutil.copy(EXAMPLES / name, tmp_path / name)
+    (tmp_path / 'README.txt').write_text('docs')
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '-qm', 'init')
+    return tmp_path
+
+
+class TestChangedSqlFiles:
+    """Test suite for changed_sql_files"""
+    
+    def test_modified_renamed_deleted_and_untracked(self, repo):
+        """Each kind of change is classified; non-SQL files are ignored"""
+        (repo / 'GetUserOrders.sql').write_text((repo / 'GetUserOrders.sql').read_text() + '\n-- edit\n')
+        git(repo, 'mv', 'ProcessOrders.sql', 'Renamed.sql')
+        git(repo, 'rm', '-q', 'usp_ProcessPayment.sql')
+        (repo / 'New.sql').write_text('CREATE PROCEDURE dbo.New AS SELECT 1')
+        (repo / 'README.txt').write_text('changed docs')
+        
+        changes = changed_sql_files('HEAD', cwd=str(repo))
+        
+        assert str(repo / 'GetUserOrders.sql') in changes
+        assert str(repo / 'Renamed.sql') in changes
+        assert str(repo / 'New.sql') in changes
+        assert str(repo / 'README.txt') not in changes
+        assert changes.renamed_from(str(repo / 'Renamed.sql')) == changes.normalize(str(repo / 'ProcessOrders.sql'))
+        assert changes.deleted == {changes.normalize(str(repo / 'usp_ProcessPayment.sql'))}
+    
+    def test_changes_on_the_base_branch_are_ignored(self, repo):
+        """Only the current branch's own changes since it forked count"""
+        git(repo, 'branch', '-M', 'main')
+        git(repo, 'checkout', '-qb', 'feature')
+        (repo / 'ProcessOrders.sql').write_text((repo / 'ProcessOrders.sql').read_text() + '\n-- feature\n')
+        git(repo, 'commit', '-qam', 'feature change')
+        git(repo, 'checkout', '-q', 'main')
+        (repo / 'usp_ProcessPayment.sql').write_text((repo / 'usp_ProcessPayment.sql').read_text() + '\n-- main\n')
+        (repo / 'MainOnly.sql').write_text('CREATE PROCEDURE dbo.MainOnly AS SELECT 1')
+        git(repo, 'add', '.')
+        git(repo, 'commit', '-qm', 'main change')
+        git(repo, 'checkout', '-q', 'feature')
+        (repo / 'GetUserOrders.sql').write_text((repo / 'GetUserOrders.sql').read_text() + '\n-- wip\n')
+        
+        changes = changed_sql_files('main', cwd=str(repo))
+        
+        assert str(repo / 'ProcessOrders.sql') in changes
+        assert str(repo / 'GetUserOrders.sql') in changes
+        assert str(repo / 'usp_ProcessPayment.sql') not in changes
+        assert not changes.deleted
+    
+    def test_bad_ref(self, repo):
+        """Unknown refs raise GitChangesError"""
+        with pytest.raises(GitChangesError):
+            changed_sql_files('no-such-ref', cwd=str(repo))
+
+
+class TestDiskResultCache:
+    """Test suite for DiskResultCache"""
+    
+    def test_round_trip_and_salt(self, tmp_path):
+        """Results survive a round trip; a different salt never hits"""
+        sql = (EXAMPLES / 'GetUserOrders.sql').read_text()
+        result = SPAnalyzer().analyze_text(sql, 'a.sql')
+        
+        cache = DiskResultCache(str(tmp_path), salt='v1')
+        cache.put(cache.key(sql), result)
+        loaded = cache.get(cache.key(sql))
+        
+        assert loaded.to_dict() == result.to_dict()
+        assert DiskResultCache(str(tmp_path), salt='v2').get(DiskResultCache(str(tmp_path), salt='v2').key(sql)) is None
+    
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """Truncated cache files are treated as missing"""
+        cache = DiskResultCache(str(tmp_path))
+        key = cache.key('SELECT 1')
+        cache.put(key, {'x': 1})
+        Path(cache._path(key)).write_bytes(b'\x80')
+        
+        assert cache.get(key) is None
+
+
+class TestChangedSinceCommand:
+    """Test suite for analyze --changed-since"""
+    
+    def run(self, repo, monkeypatch, *extra):
+        monkeypatch.chdir(repo)
+        args = build_parser().parse_args(['analyze', '*.sql', '--batch', '--csv', 'summary.csv'] + list(extra))
+        assert analyze_command(args) == 0
+        return sorted((repo / 'summary.csv').read_text().splitlines())
+    
+    def test_only_changed_files_are_reported(self, repo, monkeypatch, capsys):
+        """Unchanged files are merged silently; CSV stays complete"""
+        full_csv = self.run(repo, monkeypatch)
+        (repo / 'GetUserOrders.sql').write_text((repo / 'GetUserOrders.sql').read_text() + '\n-- edit\n')
+        capsys.readouterr()
+        
+        incremental_csv = self.run(repo, monkeypatch, '--changed-since', 'HEAD')
+        output = capsys.readouterr().out
+        
+        assert 'Analyzing: GetUserOrders.sql' in output
+        assert 'Analyzing: ProcessOrders.sql' not in output
+        assert 'BATCH SUMMARY (3 files)' in output
+        assert len(incremental_csv) == len(full_csv)
+    
+    def test_unchanged_files_come_from_cache(self, repo, monkeypatch):
+        """A second incremental run reuses cached results without re-analyzing"""
+        first_csv = self.run(repo, monkeypatch, '--changed-since', 'HEAD')
+        assert len(list((repo / '.sp_analyze_cache').rglob('*.pickle'))) == 3
+        
+        def fail(*args, **kwargs):
+            raise AssertionError('analysis should have been served from the cache')
+        monkeypatch.setattr('sp_analyze.CFGBuilder', fail)
+        
+        assert self.run(repo, monkeypatch, '--changed-since', 'HEAD') == first_csv
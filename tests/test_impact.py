@@ -0,0 +1,118 @@
+"""
+Tests for impact analysis over the dependency index
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.dependency_index import DependencyIndex, READ, WRITE
+from analysis.impact import impact_of
+from sp_analyze import SPAnalyzer, build_parser, impact_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+def risk(score, level):
+    return {'risk_score': score, 'risk_level': level}
+
+
+@pytest.fixture
+def index(tmp_path):
+    """
+    usp_Write writes dbo.Orders, usp_Read reads it
+    usp_Batch -> usp_Write, usp_Nightly -> usp_Batch, usp_Api -> usp_Read
+    usp_Self -> usp_Self, usp_Self -> usp_Write
+    """
+    index = DependencyIndex(str(tmp_path / 'deps.db'))
+    index.add_procedure('dbo.usp_Write', 'write.sql', {'dbo.Orders': {'access': ['write'], 'columns': []}},
+                        risk=risk(3, 'LOW'))
+    index.add_procedure('dbo.usp_Read', 'read.sql', {'dbo.Orders': {'access': ['read'], 'columns': []}},
+                        risk=risk(9, 'MEDIUM'))
+    index.add_procedure('dbo.usp_Batch', 'batch.sql', calls=['usp_Write'], risk=risk(20, 'HIGH'))
+    index.add_procedure('dbo.usp_Nightly', 'nightly.sql', calls=['dbo.usp_Batch'], risk=risk(1, 'LOW'))
+    index.add_procedure('dbo.usp_Api', 'api.sql', calls=['usp_Read'])
+    index.add_procedure('dbo.usp_Self', 'self.sql', calls=['usp_Self', 'usp_Write'], risk=risk(9, 'MEDIUM'))
+    index.commit()
+    yield index
+    index.close()
+
+
+def summary(impacted):
+    return [(item.procedure, item.depth, item.via) for item in impacted]
+
+
+class TestImpactOf:
+    """Test suite for impact_of"""
+    
+    def test_table_impact_ranked_by_risk(self, index):
+        assert summary(impact_of(index, 'Orders')) == [
+            ('dbo.usp_Batch', 2, 'dbo.usp_Write'),
+            ('dbo.usp_Read', 1, 'read'),
+            ('dbo.usp_Self', 2, 'dbo.usp_Write'),
+            ('dbo.usp_Write', 1, 'write'),
+            ('dbo.usp_Nightly', 3, 'dbo.usp_Batch'),
+            ('dbo.usp_Api', 2, 'dbo.usp_Read'),  # no risk assessment: last
+        ]
+    
+    def test_writers_only(self, index):
+        impacted = impact_of(index, 'dbo.Orders', access=WRITE)
+        
+        assert 'dbo.usp_Read' not in [item.procedure for item in impacted]
+        assert [item.risk_level for item in impacted] == ['HIGH', 'MEDIUM', 'LOW', 'LOW']
+    
+    def test_procedure_impact_excludes_itself(self, index):
+        assert summary(impact_of(index, 'usp_Write')) == [
+            ('dbo.usp_Batch', 1, 'calls'),
+            ('dbo.usp_Self', 1, 'calls'),
+            ('dbo.usp_Nightly', 2, 'dbo.usp_Batch'),
+        ]
+        assert impact_of(index, 'usp_Self') == []
+    
+    def test_max_depth(self, index):
+        impacted = impact_of(index, 'dbo.Orders', access=READ | WRITE, max_depth=2)
+        
+        assert max(item.depth for item in impacted) == 2
+        assert 'dbo.usp_Nightly' not in [item.procedure for item in impacted]
+    
+    def test_kind(self, index):
+        assert impact_of(index, 'usp_Write', kind='table') == []
+        with pytest.raises(ValueError):
+            impact_of(index, 'dbo.Orders', kind='rule')
+    
+    def test_shared_graph(self, index):
+        graph = index.call_graph()
+        
+        assert impact_of(index, 'dbo.Orders', graph=graph) == impact_of(index, 'dbo.Orders')
+        assert impact_of(index, 'usp_Unknown', graph=graph) == []
+    
+    def test_from_analysis_results(self, tmp_path):
+        analyzer = SPAnalyzer(include_risk_scoring=True)
+        with DependencyIndex(str(tmp_path / 'deps.db')) as index:
+            for path in sorted(EXAMPLES.glob('*.sql')):
+                index.add_result(analyzer.analyze_file(str(path)))
+            
+            impacted = impact_of(index, 'dbo.usp_ProcessPayment')
+            assert summary(impacted) == [('dbo.usp_ProcessCustomerOrder', 1, 'calls')]
+            assert impacted[0].risk_level in ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+
+
+class TestImpactCommand:
+    """Test suite for `sp_analyze.py impact`"""
+    
+    def test_output(self, index, capsys):
+        args = build_parser().parse_args(['impact', 'dbo.Orders', '--limit', '2', '--index', index.path])
+        
+        assert impact_command(args) == 0
+        output = capsys.readouterr().out.splitlines()
+        assert output[0] == 'Impact of changing dbo.Orders: 6 procedure(s), 2 direct'
+        assert output[2].split()[:4] == ['HIGH', '20', '2', 'dbo.usp_Batch']
+        assert output[-1] == '... 4 more'
+    
+    def test_missing_index(self, tmp_path, capsys):
+        args = build_parser().parse_args(['impact', 'dbo.Orders', '--index', str(tmp_path / 'none.db')])
+        
+        assert impact_command(args) == 1
+        assert 'not found' in capsys.readouterr().out
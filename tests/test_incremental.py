@@ -0,0 +1,176 @@
+"""
+Tests for the statement-level incremental analyzer
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.incremental import AnalysisCancelled, IncrementalAnalyzer, changed_span
+from analyzer.security_analyzer import SecurityAnalyzer
+from analyzer.quality_analyzer import CodeQualityAnalyzer
+from analyzer.performance_analyzer import PerformanceAnalyzer
+from parser.tsql_text_parser import TSQLTextParser
+from sp_analyze import SPAnalyzer
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+PROC = """CREATE PROCEDURE dbo.usp_Report
+AS
+BEGIN
+    SELECT COUNT(*) FROM Orders WHERE Status = 1 OR Status = 2
+    SELECT COUNT(*) FROM Users WHERE Active = 1 OR Locked = 1
+    SELECT COUNT(*) FROM Items WHERE Qty = 0 OR Qty IS NULL
+    DECLARE c CURSOR FOR SELECT Id FROM Orders
+    SELECT * FROM Archive
+END
+"""
+
+
+def summarize(results):
+    """Rule ids and templated counts per section, for comparing results."""
+    def ids(findings):
+        return [(f.rule_id, (f.params or {}).get('count')) for f in findings]
+    security, quality, performance = results['security'], results['quality'], results['performance']
+    return {
+        'security': {k: ids(v) for k, v in security.items() if k != 'score'},
+        'quality': (ids(quality['issues']), quality['quality_score'], quality['grade']),
+        'performance': (ids(performance['issues']), performance['performance_score'], performance['grade']),
+    }
+
+
+def full_analysis(sql_text):
+    sp_name = TSQLTextParser().extract_proc_name(sql_text)
+    return summarize({
+        'security': SecurityAnalyzer().analyze(sql_text),
+        'quality': CodeQualityAnalyzer().analyze(sql_text, sp_name),
+        'performance': PerformanceAnalyzer().analyze(sql_text),
+    })
+
+
+def incremental_analysis(analyzer, sql_text):
+    return summarize(analyzer.analyze(sql_text, TSQLTextParser().extract_proc_name(sql_text)))
+
+
+class TestChangedSpan:
+    """Test suite for changed_span"""
+    
+    @pytest.mark.parametrize('old,new,expected', [
+        ('abcdef', 'abcdef', (6, 6, 6)),
+        ('abcdef', 'abXdef', (2, 3, 3)),
+        ('abcdef', 'abcXYdef', (3, 3, 5)),
+        ('aaaa', 'aa', (2, 4, 2)),
+        ('', 'abc', (0, 0, 3)),
+    ])
+    def test_span(self, old, new, expected):
+        start, old_end, new_end = changed_span(old, new)
+        
+        assert (start, old_end, new_end) == expected
+        assert old[:start] + new[start:new_end] + old[old_end:] == new
+
+
+class TestIncrementalAnalyzer:
+    """Test suite for IncrementalAnalyzer"""
+    
+    @pytest.mark.parametrize('sql_file', sorted(EXAMPLES.glob('*.sql')), ids=lambda p: p.name)
+    def test_matches_full_analysis(self, sql_file):
+        sql = sql_file.read_text()
+        
+        assert incremental_analysis(IncrementalAnalyzer(), sql) == full_analysis(sql)
+    
+    def test_only_changed_statements_are_reanalyzed(self):
+        analyzer = IncrementalAnalyzer()
+        analyzer.analyze(PROC, 'usp_Report')
+        total = len(analyzer.statements)
+        
+        edited = PROC.replace('FROM Items', 'FROM dbo.Items')
+        analyzer.analyze(edited, 'usp_Report')
+        
+        assert analyzer.statements_analyzed == 1
+        assert analyzer.statements_reused == total - 1
+    
+    def test_aggregates_are_patched(self):
+        """OR and COUNT(*) totals follow statements being added and removed"""
+        analyzer = IncrementalAnalyzer()
+        before = incremental_analysis(analyzer, PROC)
+        assert ('PERF005', 3) not in before['performance'][0]
+        assert ('PERF009', 3) in before['performance'][0]
+        
+        added = PROC.replace('END\n', '    SELECT COUNT(*) FROM Logs WHERE A = 1 OR B = 2\nEND\n')
+        after = incremental_analysis(analyzer, added)
+        assert ('PERF005', 4) in after['performance'][0]
+        assert ('PERF009', 4) in after['performance'][0]
+        
+        removed = added.replace('    SELECT COUNT(*) FROM Users WHERE Active = 1 OR Locked = 1\n', '')
+        assert incremental_analysis(analyzer, removed) == full_analysis(removed)
+        assert incremental_analysis(analyzer, PROC) == before
+    
+    def test_select_star_depends_on_later_statements(self):
+        """SELECT * without WHERE is only reported if no WHERE follows it anywhere"""
+        analyzer = IncrementalAnalyzer()
+        assert 'PERF008' in [r for r, _ in incremental_analysis(analyzer, PROC)['performance'][0]]
+        
+        filtered = PROC.replace('END\n', '    DELETE FROM Logs WHERE Id = 1\nEND\n')
+        assert 'PERF008' not in [r for r, _ in incremental_analysis(analyzer, filtered)['performance'][0]]
+    
+    def test_random_edits_match_full_analysis(self):
+        rnd = random.Random(11)
+        sql = (EXAMPLES / 'usp_ProcessCustomerOrder.sql').read_text()
+        snippets = ['\n    SELECT * FROM t', ' OR x = 1', '\n    SELECT COUNT(*) FROM t', 'WHERE ',
+                    '\n    DECLARE c CURSOR FOR SELECT 1', "'", '(', ';', '\n', '']
+        analyzer = IncrementalAnalyzer()
+        for _ in range(60):
+            start = rnd.randrange(len(sql))
+            end = min(len(sql), start + rnd.choice([0, 1, 10]))
+            sql = sql[:start] + rnd.choice(snippets) + sql[end:]
+            assert incremental_analysis(analyzer, sql) == full_analysis(sql)
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_random_procedures_with_same_line_statements(self, seed):
+        """Statements joined by ';' on one line are checked together, as in the full analysis"""
+        rnd = random.Random(seed)
+        statements = [
+            "DECLARE @a INT", "SELECT @a = CURSOR_STATUS('global', 'c')", "DECLARE c CURSOR FOR SELECT Id FROM t",
+            "OPEN c", "FETCH NEXT FROM c INTO @a", "SELECT 1", "INSERT INTO dbo.Log VALUES (1)",
+            "SELECT * FROM Archive", "SELECT * INTO #tmp FROM t", "UPDATE t SET a = 1 WHERE Id = 5",
+            "SELECT Name FROM Users WHERE Name LIKE '%x'", "DELETE FROM t WHERE UserId = '7'",
+            "SELECT COUNT(*) FROM t WHERE a = 1 OR b = 2", "EXEC('SELECT ' + @a)", "GRANT SELECT ON t TO u",
+            "SET @a = @a + 1", "IF @a > 0 PRINT 'x'", "SELECT Id FROM t WHERE UPPER(Name) = 'X'",
+        ]
+        separators = ['\n    ', '; ', ';', ';\n    ', ' ']
+        analyzer = IncrementalAnalyzer()
+        for _ in range(20):
+            body = ''
+            for statement in rnd.sample(statements, rnd.randint(1, 8)):
+                body += statement + rnd.choice(separators)
+            sql = f"CREATE PROCEDURE dbo.usp_Random\nAS\nBEGIN\n    {body}\nEND\n"
+            
+            assert incremental_analysis(IncrementalAnalyzer(), sql) == full_analysis(sql)
+            assert incremental_analysis(analyzer, sql) == full_analysis(sql)
+    
+    def test_cancelled_update_keeps_previous_version(self):
+        analyzer = IncrementalAnalyzer()
+        analyzer.analyze(PROC, 'usp_Report')
+        
+        with pytest.raises(AnalysisCancelled):
+            analyzer.update(PROC + 'PRINT 1\n', is_cancelled=lambda: True)
+        
+        assert analyzer.text == PROC
+        assert incremental_analysis(analyzer, PROC + 'PRINT 1\n') == full_analysis(PROC + 'PRINT 1\n')
+
+
+class TestSPAnalyzerIncremental:
+    """Test suite for SPAnalyzer(incremental=True)"""
+    
+    def test_same_scores_as_full_analysis(self):
+        sql = (EXAMPLES / 'usp_ProcessPayment.sql').read_text()
+        incremental = SPAnalyzer(incremental=True)
+        incremental.analyze_text(sql, 'p.sql')
+        edited = incremental.analyze_text(sql.replace('BEGIN TRY', 'BEGIN TRY\n    PRINT 1'), 'p.sql')
+        full = SPAnalyzer().analyze_text(sql.replace('BEGIN TRY', 'BEGIN TRY\n    PRINT 1'), 'p.sql')
+        
+        assert edited['metrics'].to_dict() == full['metrics'].to_dict()
+        assert 'rules' in edited['timings']
@@ -0,0 +1,96 @@
+"""
+Tests for the procedure x table lock contention matrix
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.lock_contention import ConflictMatrix
+from parser.tsql_text_parser import TSQLTextParser
+from sp_analyze import build_parser, conflicts_command
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+def access(reads=(), writes=(), in_transaction=False):
+    return {'line': 1, 'operation': 'UPDATE' if writes else 'SELECT', 'reads': list(reads),
+            'writes': list(writes), 'in_transaction': in_transaction}
+
+
+class TestConflictMatrix:
+    """Test suite for ConflictMatrix"""
+    
+    def test_scores_and_ranking(self):
+        matrix = ConflictMatrix()
+        matrix.add('transfer', [access(writes=['dbo.Accounts'], in_transaction=True), access(writes=['dbo.Ledger'])])
+        matrix.add('deposit', [access(reads=['dbo.Accounts'], writes=['[dbo].[accounts]'])])
+        matrix.add('report', [access(reads=['Ledger', 'dbo.Accounts'])])
+        matrix.add('ping', [access(reads=['dbo.Ledger'])])
+        
+        pairs = {(pair.first, pair.second): pair for pair in matrix.pairs()}
+        
+        # Transaction-held writes weigh double; names normalize like procedures
+        assert pairs['transfer', 'deposit'][2:] == (2.0, 2.0, ['dbo.Accounts'])
+        assert pairs['transfer', 'report'][2:] == (0.0, 3.0, ['dbo.Accounts', 'dbo.Ledger'])
+        assert pairs['deposit', 'report'].score == 1.0
+        # Readers never conflict with each other
+        assert ('report', 'ping') not in pairs
+        assert [(p.first, p.second) for p in matrix.pairs(top=2)] == [('transfer', 'deposit'), ('transfer', 'report')]
+        assert len(matrix.pairs(min_score=1.5)) == 2
+    
+    def test_matches_dense_products(self):
+        rng = np.random.RandomState(7)
+        matrix = ConflictMatrix()
+        for proc in range(40):
+            matrix.add(f'p{proc}', [access(reads=[f't{t}' for t in rng.randint(0, 10, 2)],
+                                           writes=[f't{rng.randint(0, 10)}'], in_transaction=proc % 2 == 0)])
+        
+        index = {name: i for i, name in enumerate(matrix.procedures)}
+        reads = np.zeros((len(matrix), len(matrix.tables)))
+        writes = np.zeros_like(reads)
+        for (proc, table), weight in matrix._reads.items():
+            reads[proc, table] = weight
+        for (proc, table), weight in matrix._writes.items():
+            writes[proc, table] = weight
+        write_write = writes @ writes.T
+        read_write = reads @ writes.T + writes @ reads.T
+        
+        pairs = matrix.pairs()
+        assert len(pairs) == int(np.count_nonzero(np.triu(write_write + read_write, 1)))
+        for pair in pairs:
+            first, second = index[pair.first], index[pair.second]
+            assert (pair.write_write, pair.read_write) == (write_write[first, second], read_write[first, second])
+    
+    def test_access(self):
+        matrix = ConflictMatrix()
+        matrix.add('p', [access(reads=['dbo.A', 'dbo.B'], writes=['dbo.A'])])
+        
+        assert matrix.access('p') == {'dbo.A': 'read/write', 'dbo.B': 'read'}
+    
+    def test_merge_updates_of_different_tables_do_not_conflict(self):
+        parser = TSQLTextParser()
+        matrix = ConflictMatrix()
+        for table in ('dbo.A', 'dbo.B'):
+            matrix.add(table, parser.extract_statement_access(
+                f"MERGE {table} AS t USING dbo.Staging{table[-1]} AS s ON t.Id = s.Id\n"
+                f"WHEN MATCHED THEN UPDATE SET V = s.V\n"
+                f"WHEN NOT MATCHED THEN INSERT (Id, V) VALUES (s.Id, s.V);"))
+        
+        assert sorted(matrix.tables) == ['dbo.a', 'dbo.b', 'dbo.staginga', 'dbo.stagingb']
+        assert matrix.pairs() == []
+    
+    def test_empty(self):
+        assert ConflictMatrix().pairs() == []
+
+
+def test_conflicts_command(capsys):
+    args = build_parser().parse_args(['conflicts', str(EXAMPLES / '*.sql'), '--top', '1'])
+    
+    assert conflicts_command(args) == 0
+    output = capsys.readouterr().out
+    assert '1 conflicting pair(s) shown' in output
+    assert 'ProcessOrders.sql' in output and '[dbo.Orders]' in output
@@ -0,0 +1,255 @@
+"""
+Tests for the statement splitter and the LSP diagnostics server
+"""
+import json
+import random
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from parser.statement_splitter import split_statements, statement_boundaries, update_boundaries
+from lsp.document import TextDocument
+from lsp.diagnostics import AnalysisCancelled, DocumentAnalyzer
+from lsp.jsonrpc import read_message, write_message
+from lsp.server import LanguageServer
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+PROC = """CREATE PROCEDURE dbo.usp_GetOrders
+    @UserId INT
+AS
+BEGIN
+    SET NOCOUNT ON;
+    -- SELECT in a comment does not split
+    SELECT OrderId, Total FROM Orders WHERE UserId = @UserId
+    UPDATE Orders
+    SET Total = CASE WHEN Total > 0 THEN Total
+        ELSE 0
+        END
+    WHERE UserId = @UserId
+    INSERT INTO Archive (Id)
+    SELECT OrderId FROM Orders WHERE Name LIKE '%x'
+END
+"""
+
+
+def edit(line, character, text, end_line=None, end_character=None):
+    return {
+        'range': {
+            'start': {'line': line, 'character': character},
+            'end': {'line': line if end_line is None else end_line,
+                    'character': character if end_character is None else end_character},
+        },
+        'text': text,
+    }
+
+
+class TestStatementSplitter:
+    """Test suite for split_statements and update_boundaries"""
+    
+    def test_splits_top_level_statements(self):
+        """Line-initial keywords start statements; continuations stay attached"""
+        heads = [s.text.split()[0].upper() for s in split_statements(PROC)]
+        
+        assert heads == ['CREATE', 'BEGIN', 'SET', '--', 'SELECT', 'UPDATE', 'INSERT', 'END']
+        assert split_statements(PROC)[5].text.strip().endswith('WHERE UserId = @UserId')
+    
+    def test_statements_cover_source(self):
+        """Statement offsets point back into the original text"""
+        for statement in split_statements(PROC):
+            assert PROC[statement.start:statement.end] == statement.text
+    
+    def test_keywords_inside_literals_and_parentheses_do_not_split(self):
+        sql = "SELECT 'a\nSELECT b'\nFROM (\nSELECT 1 AS x) t;\nPRINT 1"
+        
+        assert len(split_statements(sql)) == 2
+    
+    def test_incremental_update_matches_full_split(self):
+        """update_boundaries gives the same result as rescanning after every edit"""
+        rnd = random.Random(3)
+        text = PROC * 4
+        boundaries = statement_boundaries(text)
+        snippets = ['x', '\n', '\nSELECT 1', '(', ')', "'", '/*', '*/', '\nEND', 'CASE ', ';', '']
+        for _ in range(300):
+            start = rnd.randrange(len(text))
+            end = min(len(text), start + rnd.choice([0, 0, 1, 5]))
+            new = rnd.choice(snippets)
+            text = text[:start] + new + text[end:]
+            boundaries = update_boundaries(boundaries, text, start, end, len(new))
+            assert boundaries == statement_boundaries(text)
+
+
+class TestTextDocument:
+    """Test suite for TextDocument"""
+    
+    def test_incremental_edits(self):
+        document = TextDocument('file:///a.sql', 'SELECT 1\nFROM t\n')
+        assert document.apply_change(edit(1, 5, 'table', 1, 6)) == (14, 15, 5)
+        document.apply_change(edit(0, 0, '-- x\n'))
+        
+        assert document.text == '-- x\nSELECT 1\nFROM table\n'
+    
+    def test_positions_use_utf16_code_units(self):
+        """Characters outside the BMP count as two UTF-16 units"""
+        document = TextDocument('file:///a.sql', "PRINT '😀'\r\nSELECT 1")
+        
+        assert document.offset_at(0, 10) == 9
+        assert document.position_at(document.text.index('SELECT')) == {'line': 1, 'character': 0}
+        assert document.range_of(7, 8) == {'start': {'line': 0, 'character': 7},
+                                           'end': {'line': 0, 'character': 9}}
+    
+    def test_full_replacement(self):
+        document = TextDocument('file:///a.sql', 'SELECT 1')
+        assert document.apply_change({'text': 'PRINT 2'}) == (0, 8, 7)
+        assert document.text == 'PRINT 2'
+
+
+class TestDocumentAnalyzer:
+    """Test suite for DocumentAnalyzer"""
+    
+    def test_reports_statement_and_document_findings(self):
+        document = TextDocument('file:///a.sql', PROC)
+        diagnostics = DocumentAnalyzer().analyze(document)
+        codes = {d['code'] for d in diagnostics}
+        
+        assert 'PERF006' in codes
+        wildcard = next(d for d in diagnostics if d['code'] == 'PERF006')
+        assert wildcard['range']['start']['line'] == 12
+        assert wildcard['source'] == 'sp-analyze'
+        assert 'Avoid leading wildcards' in wildcard['message']
+    
+    def test_edit_reanalyzes_only_changed_statement(self):
+        document = TextDocument('file:///a.sql', PROC)
+        analyzer = DocumentAnalyzer()
+        analyzer.analyze(document)
+        
+        document.apply_change(edit(6, 11, 'Id, ', 6, 11))
+        diagnostics = analyzer.analyze(document)
+        
+        assert analyzer.statements_analyzed == 1
+        assert analyzer.statements_reused == len(split_statements(document.text)) - 1
+        assert diagnostics == DocumentAnalyzer().analyze(TextDocument('file:///b.sql', document.text))
+    
+    def test_cancellation(self):
+        document = TextDocument('file:///a.sql', PROC)
+        
+        with pytest.raises(AnalysisCancelled):
+            DocumentAnalyzer().analyze(document, is_cancelled=lambda: True)
+
+
+def frame(messages):
+    stream = BytesIO()
+    for message in messages:
+        write_message(stream, message)
+    stream.seek(0)
+    return stream
+
+
+def read_all(stream):
+    stream.seek(0)
+    messages = []
+    while True:
+        message = read_message(stream)
+        if message is None:
+            return messages
+        messages.append(message)
+
+
+class TestLanguageServer:
+    """Test suite for LanguageServer"""
+    
+    def test_round_trip(self):
+        """initialize, open, edit, close and shut down over framed stdio"""
+        uri = 'file:///GetUserOrders.sql'
+        text = (EXAMPLES / 'GetUserOrders.sql').read_text()
+        requests = frame([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'initialized', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': uri, 'languageId': 'sql', 'version': 1, 'text': text}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': uri, 'version': 2},
+                        'contentChanges': [edit(0, 0, '-- edited\n')]}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'textDocument/hover', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didClose', 'params': {'textDocument': {'uri': uri}}},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ])
+        output = BytesIO()
+        
+        assert LanguageServer(requests, output).serve() == 0
+        
+        messages = read_all(output)
+        responses = {m['id']: m for m in messages if 'id' in m}
+        published = [m['params'] for m in messages if m.get('method') == 'textDocument/publishDiagnostics']
+        
+        assert responses[1]['result']['capabilities']['textDocumentSync']['change'] == 2
+        assert responses[2]['error']['code'] == -32601
+        assert responses[3]['result'] is None
+        assert published[-1] == {'uri': uri, 'diagnostics': []}
+        assert all(p['uri'] == uri for p in published)
+    
+    def test_malformed_messages_do_not_stop_the_server(self):
+        """Bad notifications are dropped, bad requests get an error, valid ones are still served"""
+        uri = 'file:///GetUserOrders.sql'
+        text = (EXAMPLES / 'GetUserOrders.sql').read_text()
+        requests = frame([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen', 'params': {}},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'textDocument/didOpen', 'params': {'textDocument': {}}},
+            [1, 2, 3],
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': uri, 'version': 1, 'text': text}}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didChange',
+             'params': {'textDocument': {'uri': uri, 'version': 2}, 'contentChanges': [{'range': {}, 'text': 'x'}]}},
+            {'jsonrpc': '2.0', 'id': 3, 'method': 'textDocument/hover', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didClose', 'params': {'textDocument': {'uri': uri}}},
+            {'jsonrpc': '2.0', 'id': 4, 'method': 'shutdown'},
+            {'jsonrpc': '2.0', 'method': 'exit'},
+        ])
+        output = BytesIO()
+        
+        assert LanguageServer(requests, output).serve() == 0
+        
+        messages = read_all(output)
+        responses = {m['id']: m for m in messages if 'id' in m}
+        published = [m['params'] for m in messages if m.get('method') == 'textDocument/publishDiagnostics']
+        assert responses[2]['error']['code'] == -32602
+        assert responses[3]['error']['code'] == -32601
+        assert responses[4]['result'] is None
+        assert published == [{'uri': uri, 'diagnostics': []}]
+    
+    def test_failed_analysis_is_not_retried(self, monkeypatch):
+        """An analysis that raises is logged and its document leaves the queue"""
+        def fail(self, document, is_cancelled=None):
+            raise RuntimeError('boom')
+        monkeypatch.setattr(DocumentAnalyzer, 'analyze', fail)
+        requests = frame([
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'initialize', 'params': {}},
+            {'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+             'params': {'textDocument': {'uri': 'file:///a.sql', 'version': 1, 'text': 'SELECT 1'}}},
+        ])
+        server = LanguageServer(requests, BytesIO())
+        server.handle(read_message(requests))
+        server.handle(read_message(requests))
+        
+        server.analyze_pending()
+        
+        assert server.pending == {}
+    
+    def test_exit_without_shutdown_is_an_error(self):
+        requests = frame([{'jsonrpc': '2.0', 'method': 'exit'}])
+        
+        assert LanguageServer(requests, BytesIO()).serve() == 1
+    
+    def test_content_length_framing(self):
+        stream = BytesIO()
+        write_message(stream, {'text': 'é'})
+        
+        header, body = stream.getvalue().split(b'\r\n\r\n', 1)
+        assert header == f"Content-Length: {len(body)}".encode()
+        assert json.loads(body) == {'text': 'é'}
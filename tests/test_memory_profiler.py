@@ -0,0 +1,99 @@
+"""
+Tests for tracemalloc-based memory profiling
+"""
+import json
+import pytest
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from profiling.memory_profiler import MemoryProfiler
+from profiling.stage_timer import StageTimer
+from sp_analyze import SPAnalyzer
+
+
+@pytest.fixture
+def profiler():
+    mem = MemoryProfiler(top_n=3)
+    mem.start()
+    yield mem
+    if tracemalloc.is_tracing():
+        mem.stop()
+
+
+class TestMemoryProfiler:
+    """Test suite for MemoryProfiler"""
+    
+    def test_region_reports_peak_and_retained(self, profiler):
+        """A region that keeps an allocation reports it as retained"""
+        token = profiler.begin()
+        kept = [bytearray(200_000)]
+        peak, retained = profiler.end(token)
+        
+        assert peak >= 200_000
+        assert retained >= 200_000
+        del kept
+    
+    def test_temporary_allocation_not_retained(self, profiler):
+        """Freed allocations count toward peak but not retained"""
+        token = profiler.begin()
+        temp = bytearray(300_000)
+        del temp
+        peak, retained = profiler.end(token)
+        
+        assert peak >= 300_000
+        assert retained < 300_000
+    
+    def test_file_peak_includes_its_stages(self, profiler):
+        """A file region keeps the peak of a stage that reset tracemalloc's peak"""
+        timer = StageTimer(memory_profiler=profiler)
+        file_token = profiler.begin()
+        with timer.stage('a'):
+            temp = bytearray(5_000_000)
+            del temp
+        with timer.stage('b'):
+            small = bytearray(1_000)
+            del small
+        file_peak, _ = profiler.end(file_token)
+        
+        assert profiler.stages['a']['peak_bytes'] >= 5_000_000
+        assert file_peak >= profiler.stages['a']['peak_bytes']
+    
+    def test_stop_only_stops_own_tracing(self):
+        """Tracing started elsewhere is left running"""
+        tracemalloc.start()
+        try:
+            mem = MemoryProfiler()
+            mem.start()
+            mem.stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+    
+    def test_files_keep_largest_peaks(self, profiler):
+        """Only the N largest files are kept in the summary"""
+        for i in range(10):
+            profiler.record_file(f'f{i}.sql', peak=i * 100, retained=i)
+        profiler.stop()
+        
+        largest = profiler.summary()['largest_files']
+        assert profiler.file_count == 10
+        assert [f['source'] for f in largest] == ['f9.sql', 'f8.sql', 'f7.sql']
+    
+    def test_analyzer_stages_are_profiled(self, profiler, tmp_path):
+        """SPAnalyzer reports every stage to an attached profiler"""
+        analyzer = SPAnalyzer()
+        analyzer.memory_profiler = profiler
+        analyzer.analyze_text("CREATE PROCEDURE dbo.usp_X AS SELECT Id FROM dbo.T WHERE Id = 1", 'x.sql')
+        profiler.stop()
+        
+        for stage in ('parse', 'control_flow', 'cfg', 'security', 'quality', 'performance'):
+            assert profiler.stages[stage]['calls'] == 1
+        
+        out = tmp_path / 'mem.json'
+        profiler.write_summary(str(out))
+        summary = json.loads(out.read_text())
+        assert 'top_allocation_sites' in summary
+        assert 'MEMORY PROFILE' in profiler.generate_report()
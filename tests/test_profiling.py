@@ -0,0 +1,107 @@
+"""
+Tests for stage timing and batch profile aggregation
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from profiling.stage_timer import StageTimer
+from profiling.profile_report import ProfileAggregator
+from sp_analyze import SPAnalyzer
+
+
+class TestStageTimer:
+    """Test suite for StageTimer"""
+    
+    def test_stage_accumulates(self):
+        """Repeated stages accumulate into one entry"""
+        timer = StageTimer()
+        with timer.stage('parse'):
+            sum(range(1000))
+        first = timer.elapsed_ns('parse')
+        with timer.stage('parse'):
+            sum(range(1000))
+        
+        assert timer.elapsed_ns('parse') > first
+        assert timer.elapsed_ns('missing') == 0
+    
+    def test_as_dict_has_total(self):
+        """Timings are reported in ms with a total"""
+        timer = StageTimer()
+        with timer.stage('a'):
+            pass
+        with timer.stage('b'):
+            pass
+        
+        timings = timer.as_dict()
+        assert set(timings) == {'a', 'b', 'total'}
+        assert timings['total'] >= timings['a']
+    
+    def test_stage_recorded_on_exception(self):
+        """A failing stage is still timed"""
+        timer = StageTimer()
+        with pytest.raises(ValueError):
+            with timer.stage('boom'):
+                raise ValueError()
+        
+        assert 'boom' in timer.as_dict()
+
+
+class TestProfileAggregator:
+    """Test suite for ProfileAggregator"""
+    
+    def test_percentiles(self):
+        """p50/p95/max use nearest-rank over all samples"""
+        profile = ProfileAggregator()
+        for i in range(1, 101):
+            profile.add(f'f{i}.sql', {'parse': float(i), 'total': float(i)})
+        
+        stats = profile.stage_stats()
+        assert stats['parse']['p50'] == 50.0
+        assert stats['parse']['p95'] == 95.0
+        assert stats['parse']['max'] == 100.0
+        assert stats['parse']['count'] == 100
+    
+    def test_top_n_slowest(self):
+        """Only the N slowest files per stage are kept"""
+        profile = ProfileAggregator(top_n=3)
+        for i in range(20):
+            profile.add(f'f{i}.sql', {'quality': float(i)})
+        
+        slowest = profile.slowest_files('quality')
+        assert [src for _, src in slowest] == ['f19.sql', 'f18.sql', 'f17.sql']
+    
+    def test_empty_timings_ignored(self):
+        """Error results without timings do not count as files"""
+        profile = ProfileAggregator()
+        profile.add('broken.sql', {})
+        
+        assert profile.file_count == 0
+        assert profile.stage_stats() == {}
+    
+    def test_generate_report(self):
+        """Report lists every stage and the slowest files"""
+        profile = ProfileAggregator()
+        profile.add('a.sql', {'parse': 1.0, 'security': 3.0, 'total': 4.0})
+        profile.add('b.sql', {'parse': 2.0, 'security': 1.0, 'total': 3.0})
+        
+        report = profile.generate_report()
+        assert 'PROFILE (2 files' in report
+        assert 'security' in report
+        assert 'Slowest files - parse:' in report
+        assert 'b.sql' in report
+
+
+def test_analyze_text_attaches_timings():
+    """Every successful result carries a per-stage timings block"""
+    analyzer = SPAnalyzer(include_risk_scoring=True)
+    sql = "CREATE PROCEDURE dbo.usp_Test @Id INT AS BEGIN SELECT Name FROM dbo.Users WHERE Id = @Id END"
+    
+    result = analyzer.analyze_text(sql, 'test.sql')
+    
+    timings = result['timings']
+    for stage in ('parse', 'control_flow', 'cfg', 'security', 'quality', 'performance', 'risk', 'total'):
+        assert stage in timings
+        assert timings[stage] >= 0
@@ -0,0 +1,130 @@
+"""
+Tests for the compact result model and rule registry
+"""
+import json
+import pickle
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.rule_registry import RULES, register_rule, get_rule
+from analyzer.result_model import Finding, Metrics, ProcResult, to_serializable
+from analyzer.performance_analyzer import PerformanceAnalyzer, OR_CONDITIONS, CURSOR_USAGE
+from analyzer.quality_analyzer import CodeQualityAnalyzer
+from analyzer.security_analyzer import SecurityAnalyzer
+
+
+class TestRuleRegistry:
+    """Test suite for the rule registry"""
+    
+    def test_all_analyzer_rules_registered(self):
+        """Every analyzer rule has a unique id in the shared registry"""
+        prefixes = {rule_id[:3] for rule_id in RULES}
+        assert {'SEC', 'QUA', 'PER'} <= prefixes
+        assert get_rule('PERF001') is CURSOR_USAGE
+    
+    def test_duplicate_id_rejected(self):
+        with pytest.raises(ValueError):
+            register_rule('PERF001', severity='LOW')
+    
+    def test_example_stored_once(self):
+        """Findings share the rule's example string instead of copying it"""
+        analyzer = PerformanceAnalyzer()
+        a = analyzer.detect_cursor_usage("DECLARE c CURSOR FOR SELECT 1")[0]
+        b = analyzer.detect_cursor_usage("DECLARE d CURSOR FOR SELECT 2")[0]
+        
+        assert a['example'] is b['example']
+
+
+class TestFinding:
+    """Test suite for Finding"""
+    
+    def test_dict_access(self):
+        """Findings read like the dicts they replace"""
+        finding = Finding(CURSOR_USAGE)
+        
+        assert finding['severity'] == 'HIGH'
+        assert finding['issue'] == 'Cursor Usage Detected'
+        assert finding.get('missing', 'x') == 'x'
+        assert 'example' in finding
+        assert 'message' not in finding
+        with pytest.raises(KeyError):
+            finding['message']
+    
+    def test_templated_fields(self):
+        """Per-hit values are formatted into templated fields"""
+        finding = Finding(OR_CONDITIONS, count=7)
+        
+        assert finding['issue'] == 'Multiple OR Conditions (7 found)'
+    
+    def test_to_dict_matches_legacy_shape(self):
+        """Serialized findings keep the legacy keys plus rule_id"""
+        data = Finding(CURSOR_USAGE).to_dict()
+        
+        assert list(data) == ['rule_id', 'category', 'severity', 'issue', 'impact', 'recommendation', 'example']
+        assert data['example'].startswith('-- BAD:')
+        assert json.dumps(data)
+    
+    def test_no_instance_dict(self):
+        """Findings are __slots__ objects"""
+        assert not hasattr(Finding(CURSOR_USAGE), '__dict__')
+    
+    def test_pickles_by_rule_reference(self):
+        """Pickled findings carry the rule id, not the rule metadata"""
+        finding = Finding(OR_CONDITIONS, count=5)
+        payload = pickle.dumps(finding)
+        restored = pickle.loads(payload)
+        
+        assert restored.rule is OR_CONDITIONS
+        assert restored == finding
+        assert b'UNION ALL' not in payload
+        assert len(payload) < len(pickle.dumps(finding.to_dict())) / 3
+    
+    def test_naming_message(self):
+        """Quality naming findings keep their per-procedure message"""
+        issues = CodeQualityAnalyzer().check_naming_conventions("DECLARE cur CURSOR", "GetOrders")
+        
+        messages = [i['message'] for i in issues]
+        assert 'SP name "GetOrders" doesn\'t follow usp_/sp_/proc_ convention' in messages
+        assert 'Variable "cur" should start with @' in messages
+
+
+class TestProcResult:
+    """Test suite for ProcResult"""
+    
+    def test_mapping_behaviour(self):
+        """Unset fields behave as absent keys"""
+        result = ProcResult(success=True, source='a.sql', sp_name='dbo.X', basic={'lines_of_code': 3})
+        
+        assert result['sp_name'] == 'dbo.X'
+        assert 'risk_assessment' not in result
+        assert result.get('risk_assessment') is None
+        assert result.get('basic', {}).get('lines_of_code') == 3
+        with pytest.raises(KeyError):
+            result['error']
+    
+    def test_setitem_known_fields_only(self):
+        result = ProcResult(success=True)
+        result['timings'] = {'total': 1.0}
+        
+        assert result.timings == {'total': 1.0}
+        with pytest.raises(KeyError):
+            result['not_a_field'] = 1
+    
+    def test_unknown_constructor_field(self):
+        with pytest.raises(TypeError):
+            ProcResult(bogus=1)
+    
+    def test_to_dict_serializes_nested_models(self):
+        """to_dict() is the only place plain dicts are produced"""
+        security = SecurityAnalyzer().analyze("EXEC(@sql)")
+        result = ProcResult(success=True, security=security, metrics=Metrics(security_score=70))
+        
+        data = result.to_dict()
+        assert isinstance(data['security']['sql_injection_risks'][0], dict)
+        assert data['metrics']['security_score'] == 70
+        assert json.loads(json.dumps(data)) == data
+    
+    def test_to_serializable_passthrough(self):
+        assert to_serializable({'a': (1, 2)}) == {'a': [1, 2]}
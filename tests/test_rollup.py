@@ -0,0 +1,157 @@
+"""
+Tests for the call tree complexity and risk roll-up
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analysis.call_graph import CallGraph, normalize_proc_name
+from analysis.risk_scorer import RiskScorer
+from analysis.rollup import CallTreeRollup
+from sp_analyze import SPAnalyzer, build_parser
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+@pytest.fixture
+def rollup():
+    """
+    usp_Wrapper -> usp_A -> usp_Shared -> usp_Log (not defined)
+                -> usp_B -> usp_Shared
+    usp_Loop1 <-> usp_Loop2 -> usp_A
+    """
+    rollup = CallTreeRollup()
+    rollup.add_procedure('dbo.usp_Wrapper', ['usp_A', 'usp_B'], complexity=0, risk_score=0, source='wrapper.sql')
+    rollup.add_procedure('dbo.usp_A', ['usp_Shared'], complexity=2, risk_score=10,
+                         tables=['dbo.Orders'], source='a.sql')
+    rollup.add_procedure('dbo.usp_B', ['[dbo].[usp_Shared]'], complexity=3, risk_score=10,
+                         tables=['[dbo].[Orders]', 'Customers'], source='b.sql')
+    rollup.add_procedure('dbo.usp_Shared', ['usp_Log'], complexity=1, risk_score=5,
+                         tables=['dbo.Audit'], source='shared.sql')
+    rollup.add_procedure('dbo.usp_Loop1', ['usp_Loop2'], complexity=1, risk_score=1, source='loop1.sql')
+    rollup.add_procedure('dbo.usp_Loop2', ['usp_Loop1', 'usp_A'], complexity=1, risk_score=2,
+                         tables=['dbo.Queue'], source='loop2.sql')
+    return rollup
+
+
+class TestCallTreeRollup:
+    """Test suite for CallTreeRollup"""
+    
+    def test_wrapper_carries_its_callees(self, rollup):
+        wrapper = rollup.procedure('usp_Wrapper')
+        
+        assert (wrapper.complexity, wrapper.risk_score) == (0, 0)
+        # usp_Shared runs under both usp_A and usp_B
+        assert wrapper.transitive_complexity == 2 + 3 + 2 * 1
+        assert wrapper.transitive_risk == 10 + 10 + 2 * 5
+        assert wrapper.risk_level == 'CRITICAL'
+        assert wrapper.call_depth == 3
+        assert wrapper.tables == ['Customers', 'dbo.Audit', 'dbo.Orders']
+        assert not wrapper.recursive
+    
+    def test_leaves_and_undefined_callees(self, rollup):
+        shared = rollup.procedure('usp_Shared')
+        log = rollup.procedure('usp_Log')
+        
+        assert (shared.transitive_complexity, shared.transitive_risk, shared.call_depth) == (1, 5, 1)
+        assert log.source is None
+        assert (log.transitive_risk, log.call_depth, log.tables) == (0, 0, [])
+    
+    def test_recursion_cycle_is_one_node(self, rollup):
+        loop1, loop2 = rollup.procedure('usp_Loop1'), rollup.procedure('usp_Loop2')
+        
+        assert loop1.recursive and loop2.recursive
+        assert loop1.transitive_complexity == loop2.transitive_complexity == 1 + 1 + 2 + 1
+        assert loop1.transitive_risk == loop2.transitive_risk == 1 + 2 + 10 + 5
+        assert loop1.call_depth == loop2.call_depth == 3
+        assert loop1.tables == ['dbo.Audit', 'dbo.Orders', 'dbo.Queue']
+        assert (loop1.complexity, loop1.risk_score) == (1, 1)
+    
+    def test_ranked_skips_undefined_procedures(self, rollup):
+        ranked = rollup.ranked()
+        
+        assert [item.procedure for item in ranked[:2]] == ['dbo.usp_Wrapper', 'dbo.usp_Loop1']
+        assert 'usp_Log' not in [item.procedure for item in ranked]
+        assert [item.procedure for item in rollup.ranked('tables', top=1)] == ['dbo.usp_B']
+    
+    def test_recomputed_after_add(self, rollup):
+        assert rollup.procedure('usp_Log').transitive_risk == 0
+        rollup.add_procedure('usp_Log', [], risk_score=4, source='log.sql')
+        
+        assert rollup.procedure('usp_Log').transitive_risk == 4
+        assert rollup.procedure('usp_Wrapper').transitive_risk == 30 + 2 * 4
+    
+    def test_shares_an_existing_call_graph(self):
+        graph = CallGraph()
+        rollup = CallTreeRollup(graph)
+        rollup.add_procedure('usp_Top', ['usp_Leaf'], complexity=1)
+        
+        assert graph.callees('usp_Top') == ['usp_Leaf']
+        assert rollup.procedure('usp_Top').call_depth == 1
+    
+    def test_linear_on_long_chains_and_wide_diamonds(self):
+        rollup = CallTreeRollup()
+        # 20000-deep chain, each link also calling the two links below it
+        for i in range(20000):
+            rollup.add_procedure(f'usp_{i}', [f'usp_{i + 1}', f'usp_{i + 2}'], complexity=1,
+                                 risk_score=1, tables=[f'T{i % 50}'])
+        
+        start = time.perf_counter()
+        top = rollup.procedure('usp_0')
+        elapsed = time.perf_counter() - start
+        
+        assert top.call_depth == 20000
+        assert len(top.tables) == 50
+        assert top.transitive_complexity > 10 ** 1000  # Fibonacci-sized call tree
+        assert elapsed < 5.0
+
+
+class TestRollupFromResults:
+    """Test suite for CallTreeRollup.add_result and `rollup`"""
+    
+    def test_examples(self):
+        analyzer = SPAnalyzer(include_risk_scoring=True)
+        rollup = CallTreeRollup()
+        results = {}
+        for sql_file in sorted(EXAMPLES.glob('*.sql')):
+            result = analyzer.analyze_file(str(sql_file))
+            results[result['sp_name']] = result
+            rollup.add_result(result)
+        
+        for name, result in results.items():
+            item = rollup.procedure(name)
+            assert item.complexity == result['complexity']['complexity']
+            assert item.risk_score == result['risk_assessment']['risk_score']
+            assert item.transitive_complexity >= item.complexity
+            own_tables = {normalize_proc_name(table) for table in result['dependencies']['table_access']}
+            assert own_tables <= {normalize_proc_name(table) for table in item.tables}
+            assert item.call_depth == 0 or result['dependencies']['procedures']
+    
+    def test_footprint_ignores_aliases(self):
+        result = SPAnalyzer().analyze_file(str(EXAMPLES / 'usp_ProcessCustomerOrder.sql'))
+        rollup = CallTreeRollup()
+        rollup.add_result(result)
+        tables = rollup.procedure(result['sp_name']).tables
+        
+        assert tables == sorted(result['dependencies']['table_access'], key=str.lower)
+        assert not {'p', 'customer', 'inventory', 'Orders'} & set(tables)
+        assert 'dbo.Orders' in tables
+    
+    def test_failed_results_are_skipped(self):
+        rollup = CallTreeRollup()
+        
+        assert rollup.add_result({'success': False, 'sp_name': 'UNKNOWN'}) is None
+        assert len(rollup) == 0
+    
+    def test_risk_levels_match_the_scorer(self):
+        for points, level in ((0, 'LOW'), (8, 'MEDIUM'), (15, 'HIGH'), (30, 'CRITICAL')):
+            assert RiskScorer.level_for(points) == level
+    
+    def test_cli_options(self):
+        args = build_parser().parse_args(['rollup', 'procs/*.sql', '--sort', 'depth', '--top', '5'])
+        
+        assert (args.command, args.sort, args.top) == ('rollup', 'depth', 5)
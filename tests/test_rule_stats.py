@@ -0,0 +1,83 @@
+"""
+Tests for per-rule execution counters
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from profiling.rule_stats import RuleStats, RULE_STATS, track_rule
+from analyzer.security_analyzer import SecurityAnalyzer
+from analyzer.performance_analyzer import PerformanceAnalyzer
+
+
+@pytest.fixture
+def rule_stats():
+    """Enable the shared registry for one test and restore it afterwards"""
+    RULE_STATS.reset()
+    RULE_STATS.enabled = True
+    yield RULE_STATS
+    RULE_STATS.enabled = False
+    RULE_STATS.reset()
+
+
+class TestRuleStats:
+    """Test suite for RuleStats"""
+    
+    def test_disabled_by_default_records_nothing(self):
+        """Counters stay empty while collection is disabled"""
+        RULE_STATS.reset()
+        PerformanceAnalyzer().analyze("DECLARE c CURSOR FOR SELECT 1")
+        
+        assert RULE_STATS.counters == {}
+    
+    def test_detectors_are_counted(self, rule_stats):
+        """Each detector call records calls and hits"""
+        PerformanceAnalyzer().analyze("DECLARE c CURSOR FOR SELECT 1")
+        PerformanceAnalyzer().analyze("SELECT Id FROM dbo.Users")
+        
+        cursor = rule_stats.counters['PerformanceAnalyzer.detect_cursor_usage']
+        assert cursor.calls == 2
+        assert cursor.hits == 1
+        assert cursor.total_ns >= cursor.max_ns > 0
+    
+    def test_security_score_does_not_rerun_rules(self, rule_stats):
+        """Scoring an existing analysis does not evaluate rules again"""
+        analyzer = SecurityAnalyzer()
+        analysis = analyzer.analyze("EXEC(@sql)")
+        analyzer.calculate_security_score(analysis)
+        
+        assert rule_stats.counters['SecurityAnalyzer.detect_sql_injection'].calls == 1
+    
+    def test_ranked_puts_zero_hit_rules_first(self):
+        """Rules that never find anything rank above productive ones"""
+        stats = RuleStats()
+        stats.record('cheap_hitter', 1_000, 10)
+        stats.record('slow_hitter', 9_000_000, 1)
+        stats.record('never_hits', 500, 0)
+        
+        names = [c.name for c in stats.ranked()]
+        assert names == ['never_hits', 'slow_hitter', 'cheap_hitter']
+    
+    def test_track_rule_preserves_metadata(self):
+        """Decorated methods keep their name and docstring"""
+        assert PerformanceAnalyzer.detect_cursor_usage.__name__ == 'detect_cursor_usage'
+        assert 'Cursor' in PerformanceAnalyzer.detect_cursor_usage.__doc__ or \
+               'cursor' in PerformanceAnalyzer.detect_cursor_usage.__doc__
+    
+    def test_generate_report(self, rule_stats):
+        """Report lists each recorded rule"""
+        SecurityAnalyzer().analyze("EXEC xp_cmdshell 'dir'")
+        
+        report = rule_stats.generate_report()
+        assert 'RULE STATS' in report
+        assert 'SecurityAnalyzer.detect_permission_issues' in report
+    
+    def test_to_dict(self):
+        """Counters serialize with millisecond values"""
+        stats = RuleStats()
+        stats.record('rule', 2_000_000, 2)
+        
+        data = stats.counters['rule'].to_dict()
+        assert data['total_ms'] == 2.0
+        assert data['cost_per_finding_ms'] == 1.0
@@ -35,6 +35,20 @@ def test_permission_execute_as():
     result = analyzer.analyze(sql)
     assert len(result['permission_issues']) > 0
 
+def test_permission_xp_procedures_in_comments_and_literals():
+    """Test commented-out and quoted extended procedures are not reported."""
+    analyzer = SecurityAnalyzer()
+    sql = "-- old: EXEC xp_cmdshell 'dir'\nPRINT 'Never use xp_cmdshell'\n/* EXEC master..xp_regread */"
+    result = analyzer.analyze(sql)
+    assert result['permission_issues'] == []
+
+def test_permission_execute_as_in_comments_and_literals():
+    """Test commented-out and quoted EXECUTE AS is not reported."""
+    analyzer = SecurityAnalyzer()
+    sql = "-- old: EXECUTE AS OWNER\nPRINT 'EXECUTE AS is not used here'"
+    result = analyzer.analyze(sql)
+    assert result['permission_issues'] == []
+
 def test_security_warnings_no_try_catch():
     """Test warning for missing TRY-CATCH."""
     analyzer = SecurityAnalyzer()
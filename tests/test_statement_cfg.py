@@ -0,0 +1,93 @@
+"""
+Tests for the statement-level control flow graph
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.statement_cfg import ENTRY, EXIT, build_statement_cfg
+
+
+def nodes_by_text(cfg):
+    return {cfg.node_text(node_id).strip(): node_id for node_id in range(2, len(cfg))}
+
+
+def successor_texts(cfg, node_id):
+    return sorted(cfg.node_text(successor).strip() or cfg.nodes[successor].kind
+                  for successor in cfg.successors[node_id])
+
+
+class TestStatementCFG:
+    """Test suite for build_statement_cfg"""
+    
+    def test_sequence(self):
+        cfg = build_statement_cfg("SELECT 1;\nSELECT 2;\n")
+        nodes = nodes_by_text(cfg)
+        
+        assert cfg.successors[ENTRY] == [nodes['SELECT 1;']]
+        assert cfg.successors[nodes['SELECT 1;']] == [nodes['SELECT 2;']]
+        assert cfg.successors[nodes['SELECT 2;']] == [EXIT]
+    
+    def test_if_else_if_chain(self):
+        sql = "IF @a = 1 SET @x = 1 ELSE IF @a = 2 SET @x = 2 ELSE SET @x = 3\nSELECT @x"
+        cfg = build_statement_cfg(sql)
+        nodes = nodes_by_text(cfg)
+        
+        assert successor_texts(cfg, nodes['@a = 1']) == ['@a = 2', 'SET @x = 1']
+        assert successor_texts(cfg, nodes['@a = 2']) == ['SET @x = 2', 'SET @x = 3']
+        for branch in ('SET @x = 1', 'SET @x = 2', 'SET @x = 3'):
+            assert successor_texts(cfg, nodes[branch]) == ['SELECT @x']
+    
+    def test_while_with_break_and_continue(self):
+        sql = """WHILE @i < 10
+BEGIN
+    IF @i = 5 BREAK
+    SET @i = @i + 1
+    CONTINUE
+END
+SELECT @i"""
+        cfg = build_statement_cfg(sql)
+        nodes = nodes_by_text(cfg)
+        
+        assert successor_texts(cfg, nodes['@i < 10']) == ['@i = 5', 'SELECT @i']
+        assert successor_texts(cfg, nodes['BREAK']) == ['SELECT @i']
+        assert successor_texts(cfg, nodes['CONTINUE']) == ['@i < 10']
+    
+    def test_try_catch_and_return(self):
+        sql = """BEGIN TRY
+    EXEC dbo.a
+    EXEC dbo.b
+END TRY
+BEGIN CATCH
+    RETURN
+END CATCH
+SELECT 1"""
+        cfg = build_statement_cfg(sql)
+        nodes = nodes_by_text(cfg)
+        catch = nodes['BEGIN CATCH']
+        
+        assert catch in cfg.successors[nodes['EXEC dbo.a']]
+        assert catch in cfg.successors[nodes['EXEC dbo.b']]
+        assert cfg.successors[nodes['RETURN']] == [EXIT]
+        assert cfg.predecessors()[nodes['SELECT 1']] == [nodes['EXEC dbo.b']]
+    
+    def test_goto_and_unreachable_code(self):
+        sql = "GOTO done\nSELECT 1\ndone:\nSELECT 2"
+        cfg = build_statement_cfg(sql)
+        nodes = nodes_by_text(cfg)
+        
+        assert successor_texts(cfg, nodes['GOTO done']) == ['done:']
+        assert cfg.predecessors()[nodes['SELECT 1']] == []
+    
+    def test_procedure_body_and_case_expressions(self):
+        sql = """CREATE PROCEDURE dbo.p @a INT AS BEGIN
+    SELECT CASE WHEN @a = 1 THEN 'x' ELSE 'y' END
+    BEGIN TRANSACTION
+    COMMIT
+END
+GO"""
+        cfg = build_statement_cfg(sql)
+        
+        kinds = [cfg.nodes[node_id].kind for node_id in range(2, len(cfg))]
+        assert kinds == ['STATEMENT'] * 5
+        assert cfg.line_of(nodes_by_text(cfg)['COMMIT']) == 4
@@ -0,0 +1,109 @@
+"""
+Tests for the cross-procedure statement memo
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.incremental import IncrementalAnalyzer
+from analyzer.statement_memo import StatementMemo, normalize_statement, normalized_fingerprint
+from sp_analyze import SPAnalyzer
+from test_incremental import EXAMPLES, full_analysis, incremental_analysis
+
+
+class TestNormalizeStatement:
+    """Test suite for normalize_statement"""
+    
+    @pytest.mark.parametrize('first, second', [
+        ("SELECT a FROM t WHERE b = 'x'", "select a from t where b = 'something else'"),
+        ("SELECT a FROM t WHERE b = 1", "SELECT a FROM t WHERE b = 12345"),
+        ("SELECT a FROM t WHERE b = @CustomerName", "SELECT a FROM t WHERE b = @ProductCode"),
+        ("SELECT a  FROM\tt", "SELECT a /* note */ FROM t"),
+        ("SELECT a FROM t -- first\n", "SELECT a FROM t -- second\n"),
+    ])
+    def test_variants_share_a_form(self, first, second):
+        assert normalize_statement(first) == normalize_statement(second)
+        assert normalized_fingerprint(first) == normalized_fingerprint(second)
+    
+    @pytest.mark.parametrize('first, second', [
+        # Leading wildcards are read from the literal
+        ("SELECT a FROM t WHERE b LIKE '%x'", "SELECT a FROM t WHERE b LIKE 'x%'"),
+        # '.' in rule patterns does not cross lines
+        ("SELECT a INTO #t FROM b", "SELECT a\nINTO #t FROM b"),
+        ("SELECT a /* x */ INTO #t FROM b", "SELECT a /*\n*/ INTO #t FROM b"),
+        # Names containing a keyword some rule looks for are kept
+        ("SELECT a FROM t WHERE b = @x OR c = 1", "SELECT a FROM t WHERE b = @OR OR c = 1"),
+        ("OPEN @c", "OPEN @cursor"),
+        # Identifiers are code
+        ("SELECT a FROM Orders", "SELECT a FROM Archive"),
+        ("SELECT a FROM [x y]", "SELECT a FROM [x z]"),
+    ])
+    def test_observable_differences_are_kept(self, first, second):
+        assert normalize_statement(first) != normalize_statement(second)
+    
+    def test_delimited_identifiers_hide_quotes_and_dashes(self):
+        assert normalize_statement("SELECT [it's -- @a 1] FROM t") == "select [it's -- @p 0] from t"
+        assert normalize_statement("SELECT @@ROWCOUNT") == "select @@rowcount"
+    
+    def test_normalized_form_is_stable(self):
+        text = (EXAMPLES / 'usp_ProcessCustomerOrder.sql').read_text()
+        normalized = normalize_statement(text)
+        assert normalize_statement(normalized) == normalized
+
+
+class TestStatementMemo:
+    """Test suite for IncrementalAnalyzer with a shared StatementMemo"""
+    
+    def test_shared_memo_matches_full_analysis(self):
+        memo = StatementMemo()
+        variants = []
+        for sql_file in sorted(EXAMPLES.glob('*.sql')):
+            sql = sql_file.read_text()
+            variants += [sql, sql.upper(), sql.replace("'", "'x").replace('1', '7'), sql.replace('@', '@v_')]
+        for sql in variants:
+            assert incremental_analysis(IncrementalAnalyzer(memo=memo), sql) == full_analysis(sql)
+        assert memo.exact_hits < memo.hits
+    
+    def test_literal_contents_do_not_change_results(self):
+        """Normalization hides literals; no memoized rule reads them"""
+        memo = StatementMemo()
+        plain = "CREATE PROCEDURE dbo.p AS\nEXEC dbo.run 'dir'\n"
+        extended = "CREATE PROCEDURE dbo.p AS\nEXEC dbo.run 'xp_cmdshell'\n"
+        incremental_analysis(IncrementalAnalyzer(memo=memo), plain)
+        
+        assert incremental_analysis(IncrementalAnalyzer(memo=memo), extended) == full_analysis(extended)
+        assert memo.hits > memo.exact_hits
+    
+    def test_hit_rate(self):
+        memo = StatementMemo()
+        for table in ('Orders', 'Orders', 'Users'):
+            IncrementalAnalyzer(memo=memo).analyze(f"SELECT * FROM {table} WHERE Id = 1\n", 'p')
+        
+        assert (memo.hits, memo.misses, memo.exact_hits) == (1, 2, 1)
+        assert memo.hit_rate == pytest.approx(1 / 3)
+        assert '33.3% hit rate' in memo.generate_report()
+    
+    def test_bounded(self):
+        memo = StatementMemo(max_entries=4)
+        for column in 'abcdefghij':
+            IncrementalAnalyzer(memo=memo).analyze(f"SELECT {column} FROM t\n", 'p')
+        
+        assert len(memo) == 4
+        assert memo.hit_rate == 0.0
+
+
+class TestSPAnalyzerStatementMemo:
+    """Test suite for SPAnalyzer(statement_memo=...)"""
+    
+    def test_batch_shares_statements_across_procedures(self):
+        memo = StatementMemo()
+        analyzer = SPAnalyzer(statement_memo=memo)
+        for sql_file in sorted(EXAMPLES.glob('*.sql')):
+            result = analyzer.analyze_file(str(sql_file))
+            full = SPAnalyzer().analyze_file(str(sql_file))
+            assert result['metrics'].to_dict() == full['metrics'].to_dict()
+        
+        assert memo.hits > 0
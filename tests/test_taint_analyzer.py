@@ -0,0 +1,175 @@
+"""
+Tests for taint-tracking SQL injection detection
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from analyzer.security_analyzer import SecurityAnalyzer
+from analyzer.taint_analyzer import TaintAnalyzer, TaintFlow, is_string_type
+from sp_analyze import SPAnalyzer, build_parser, result_cache_salt
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+def procedure(body: str, parameters: str = "@Name NVARCHAR(100), @Id INT") -> str:
+    return f"CREATE PROCEDURE dbo.p {parameters}\nAS\nBEGIN\n{body}\nEND\n"
+
+
+class TestTaintAnalyzer:
+    """Test suite for TaintAnalyzer"""
+    
+    def test_flow_through_intermediate_variables(self):
+        sql = procedure("""    DECLARE @filter NVARCHAR(200) = N'Name = ''' + @Name + N''''
+    DECLARE @sql NVARCHAR(MAX)
+    SELECT @sql = N'SELECT * FROM Users WHERE ' + @filter
+    EXEC(@sql)""")
+        
+        assert TaintAnalyzer().analyze(sql) == [TaintFlow(7, 'EXEC(...)', ('@sql',))]
+    
+    @pytest.mark.parametrize('expression', [
+        "QUOTENAME(@Name)",
+        "N'''' + REPLACE(@Name, '''', '''''') + N''''",
+        "N'''' + REPLACE(@Name, CHAR(39), CHAR(39) + CHAR(39)) + N''''",
+        "CAST(@Name AS INT)",
+        "CONVERT(BIGINT, @Name)",
+        "CAST(@Id AS NVARCHAR(10))",
+    ])
+    def test_sanitizers_and_typed_parameters(self, expression):
+        sql = procedure(f"    DECLARE @sql NVARCHAR(MAX) = N'SELECT * FROM ' + {expression}\n    EXEC sp_executesql @sql")
+        
+        assert TaintAnalyzer().analyze(sql) == []
+    
+    @pytest.mark.parametrize('expression', [
+        "REPLACE(@Name, 'a', 'b')",
+        "CAST(@Name AS NVARCHAR(50))",
+        "UPPER(@Name)",
+    ])
+    def test_non_sanitizing_functions(self, expression):
+        sql = procedure(f"    DECLARE @sql NVARCHAR(MAX) = N'SELECT * FROM ' + {expression}\n    EXEC sp_executesql @sql")
+        
+        assert TaintAnalyzer().analyze(sql) == [TaintFlow(5, 'sp_executesql', ('@sql',))]
+    
+    def test_reassignment_clears_taint(self):
+        sql = procedure("""    DECLARE @sql NVARCHAR(MAX) = @Name
+    SET @sql = N'SELECT 1'
+    EXEC(@sql)""")
+        
+        assert TaintAnalyzer().analyze(sql) == []
+    
+    def test_taint_merges_across_branches(self):
+        sql = procedure("""    DECLARE @sql NVARCHAR(MAX) = N'SELECT 1'
+    IF @Id > 0
+        SET @sql = @Name
+    EXEC(@sql)""")
+        
+        assert [flow.line for flow in TaintAnalyzer().analyze(sql)] == [7]
+    
+    def test_taint_around_loop_back_edge(self):
+        sql = procedure("""    DECLARE @sql NVARCHAR(MAX) = N'SELECT 1', @next NVARCHAR(MAX) = N''
+    WHILE @Id > 0
+    BEGIN
+        EXEC(@sql)
+        SET @sql = @next
+        SET @next = @Name
+        SET @Id -= 1
+    END""")
+        
+        assert TaintAnalyzer().analyze(sql) == [TaintFlow(7, 'EXEC(...)', ('@sql',))]
+    
+    def test_select_from_only_adds_taint(self):
+        sql = procedure("""    DECLARE @sql NVARCHAR(MAX) = @Name
+    SELECT @sql = Query FROM dbo.SavedQueries WHERE Id = @Id
+    EXEC(@sql)""")
+        
+        assert len(TaintAnalyzer().analyze(sql)) == 1
+    
+    def test_parameter_bound_by_sp_executesql_is_safe(self):
+        sql = procedure("""    EXEC sp_executesql N'SELECT * FROM Users WHERE Name = @n', N'@n NVARCHAR(100)', @n = @Name
+    EXEC @Id = dbo.Audit @Name""")
+        
+        assert TaintAnalyzer().analyze(sql) == []
+    
+    def test_undeclared_variables_in_fragments_are_sources(self):
+        flows = TaintAnalyzer().analyze("SET @Part1 = 'SELECT '; SET @Part2 = @Columns + ' FROM Users'; EXEC(@Part1 + @Part2)")
+        
+        assert flows == [TaintFlow(1, 'EXEC(...)', ('@Part2',))]
+    
+    def test_unclosed_parentheses_run_to_the_statement_end(self):
+        assert TaintAnalyzer().analyze("EXEC(@sql") == [TaintFlow(1, 'EXEC(...)', ('@sql',))]
+        assert TaintAnalyzer().analyze("EXEC sp_executesql CAST(@Name AS INT") == []
+    
+    def test_is_string_type(self):
+        assert is_string_type('NVARCHAR(100)') and is_string_type('SYSNAME') and is_string_type('dbo.Code')
+        assert not is_string_type('INT OUTPUT') and not is_string_type('[datetime2](7)')
+    
+    def test_linear_on_large_procedures(self):
+        blocks = []
+        for i in range(1000):
+            blocks.append(f"""    DECLARE @v{i} NVARCHAR(100) = @Name
+    IF @Id = {i}
+        SET @sql = @sql + @v{i}
+    WHILE @Id < {i}
+    BEGIN
+        SET @v{i} = QUOTENAME(@v{i})
+        SET @Id += 1
+    END
+    EXEC(@sql)""")
+        sql = procedure("    DECLARE @sql NVARCHAR(MAX) = N''\n" + '\n'.join(blocks))
+        
+        start = time.perf_counter()
+        flows = TaintAnalyzer().analyze(sql)
+        elapsed = time.perf_counter() - start
+        
+        assert len(flows) == 1000
+        assert elapsed < 5.0
+
+
+class TestSecurityAnalyzerTaint:
+    """Test suite for SecurityAnalyzer(taint=True)"""
+    
+    def test_replaces_pattern_rules(self):
+        sql = procedure("""    DECLARE @counter INT = 0
+    SET @counter = @counter + 1
+    DECLARE @sql NVARCHAR(MAX) = N'SELECT * FROM ' + QUOTENAME(@Name)
+    EXEC(@sql)""")
+        
+        assert [f.rule_id for f in SecurityAnalyzer().detect_sql_injection(sql)] == ['SEC001', 'SEC002']
+        assert SecurityAnalyzer(taint=True).detect_sql_injection(sql) == []
+    
+    def test_reports_each_reached_sink(self):
+        sql = procedure("    EXEC('SELECT * FROM ' + @Name)\n    EXEC sp_executesql @Name")
+        issues = SecurityAnalyzer(taint=True).detect_sql_injection(sql)
+        
+        assert [issue['message'] for issue in issues] == [
+            'Parameter-derived @Name reaches EXEC(...) on line 4 - SQL injection risk',
+            'Parameter-derived @Name reaches sp_executesql on line 5 - SQL injection risk',
+        ]
+        assert all(issue['severity'] == 'HIGH' for issue in issues)
+    
+    def test_examples_have_no_injection_findings(self):
+        analyzer = SecurityAnalyzer(taint=True)
+        for sql_file in sorted(EXAMPLES.glob('*.sql')):
+            assert analyzer.detect_sql_injection(sql_file.read_text()) == []
+
+
+class TestSPAnalyzerTaint:
+    """Test suite for SPAnalyzer(taint=True) and `analyze --taint`"""
+    
+    def test_incremental_matches_full_analysis(self):
+        sql = procedure("    DECLARE @sql NVARCHAR(MAX) = @Name\n    EXEC(@sql)")
+        full = SPAnalyzer(taint=True).analyze_text(sql, 'p.sql')
+        incremental = SPAnalyzer(taint=True, incremental=True).analyze_text(sql, 'p.sql')
+        
+        assert [f.rule_id for f in full['security']['sql_injection_risks']] == ['SEC008']
+        assert incremental['security'] == full['security']
+    
+    def test_cli_option_and_cache_salt(self):
+        args = build_parser().parse_args(['analyze', 'p.sql', '--taint'])
+        
+        assert args.taint
+        assert result_cache_salt(False, taint=True) != result_cache_salt(False)
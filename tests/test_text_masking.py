@@ -0,0 +1,89 @@
+"""
+Tests for comment and string literal masking
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from parser.text_masking import mask_comments_and_literals
+from parser.statement_splitter import split_statements
+from analyzer.analysis_context import AnalysisContext
+from analyzer.security_analyzer import SecurityAnalyzer
+from analyzer.quality_analyzer import CodeQualityAnalyzer
+from analyzer.performance_analyzer import PerformanceAnalyzer
+
+EXAMPLES = Path(__file__).parent.parent / 'examples'
+
+
+class TestMaskCommentsAndLiterals:
+    """Test suite for mask_comments_and_literals"""
+    
+    @pytest.mark.parametrize('sql,expected', [
+        ("SELECT 1 -- DELETE FROM x;\nFROM t", "SELECT 1                  \nFROM t"),
+        ("a /* OPEN c\nFETCH */ b", "a " + " " * 9 + "\n" + " " * 8 + " b"),
+        ("PRINT N'DELETE FROM x;'", "PRINT N'              '"),
+        ("SET @s = 'it''s'", "SET @s = '     '"),
+        ("SELECT [col--name], \"a'b\" FROM t", "SELECT [col--name], \"a'b\" FROM t"),
+        ("PRINT 'unterminated -- x", "PRINT '                 "),
+        ("/* unterminated", "               "),
+    ])
+    def test_masking(self, sql, expected):
+        assert mask_comments_and_literals(sql) == expected
+    
+    @pytest.mark.parametrize('sql_file', sorted(EXAMPLES.glob('*.sql')), ids=lambda p: p.name)
+    def test_offsets_preserved(self, sql_file):
+        sql = sql_file.read_text()
+        masked = mask_comments_and_literals(sql)
+        
+        assert len(masked) == len(sql)
+        assert [i for i, c in enumerate(masked) if c == '\n'] == [i for i, c in enumerate(sql) if c == '\n']
+    
+    @pytest.mark.parametrize('sql_file', sorted(EXAMPLES.glob('*.sql')), ids=lambda p: p.name)
+    def test_statements_mask_like_whole_text(self, sql_file):
+        """Statement boundaries never fall inside a comment or literal"""
+        sql = sql_file.read_text()
+        masked = mask_comments_and_literals(sql)
+        
+        for statement in split_statements(sql):
+            assert mask_comments_and_literals(statement.text) == masked[statement.start:statement.end]
+    
+    def test_context_exposes_masked_text(self):
+        context = AnalysisContext("SELECT 1 -- x")
+        
+        assert context.masked == 'SELECT 1     '
+        assert context.code.code is context.code
+        assert AnalysisContext('SELECT 1').code.text == 'SELECT 1'
+
+
+class TestDetectorsIgnoreCommentsAndLiterals:
+    """Test suite for detectors running on the masked text"""
+    
+    def test_commented_out_cursor(self):
+        sql = "-- DECLARE c CURSOR FOR SELECT 1\nSELECT Id FROM dbo.Orders WHERE Id = @Id"
+        
+        assert PerformanceAnalyzer().detect_cursor_usage(sql) == []
+    
+    def test_keywords_inside_message_string(self):
+        sql = "RAISERROR('Run DELETE FROM x; manually', 16, 1)"
+        
+        assert CodeQualityAnalyzer().check_code_smells(sql) == []
+    
+    def test_commented_out_nocount_does_not_count(self):
+        findings = CodeQualityAnalyzer().check_best_practices('-- SET NOCOUNT ON\nSELECT 1')
+        
+        assert 'QUAL201' in [f.rule_id for f in findings]
+    
+    def test_leading_wildcard_inside_literal_still_found(self):
+        findings = PerformanceAnalyzer().detect_leading_wildcards("WHERE Name LIKE '%smith'")
+        
+        assert [f.rule_id for f in findings] == ['PERF006']
+        assert PerformanceAnalyzer().detect_leading_wildcards("WHERE Name LIKE 'smith%'") == []
+    
+    def test_security_checks_still_see_literals(self):
+        """Dynamic SQL is built from literals, so injection checks use the original text"""
+        sql = "SET @sql = 'SELECT * FROM ' + @Table; EXEC(@sql)"
+        
+        assert SecurityAnalyzer().detect_sql_injection(sql) != []
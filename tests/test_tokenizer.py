@@ -0,0 +1,32 @@
+"""
+Tests for the normalizing T-SQL tokenizer
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+from parser.tokenizer import tokenize
+
+
+class TestTokenize:
+    """Test suite for tokenize"""
+    
+    @pytest.mark.parametrize('sql,expected', [
+        ("SELECT [Id] FROM dbo.T", ['select', 'id', 'from', 'dbo', '.', 't']),
+        ("WHERE Name = N'it''s' -- note", ['where', 'name', '=', "''"]),
+        ("SET @x = 1.5e3 + 0x1F", ['set', '@x', '=', '0', '+', '0']),
+        ("IF @@ROWCOUNT<>0 /* multi\nline */ SELECT #t.c", ['if', '@@rowcount', '<>', '0', 'select', '#t', '.', 'c']),
+        ('SELECT "Quoted Name" FROM t', ['select', 'quoted name', 'from', 't']),
+        ("PRINT 'unterminated", ['print', "''"]),
+        ("", []),
+    ])
+    def test_tokens(self, sql, expected):
+        assert tokenize(sql) == expected
+    
+    def test_layout_comments_and_constants_are_ignored(self):
+        first = "SELECT Id\nFROM dbo.Orders\nWHERE Status = 1 -- open"
+        second = "select [Id] from [dbo].[Orders]   where Status=2"
+        
+        assert tokenize(first) == tokenize(second)
@@ -133,3 +133,76 @@ def test_empty_sql():
     sql = ""
     result = parser.parse(sql)
     assert result['lines_of_code'] == 0
+
+def test_extract_proc_name_bracketed_parts():
+    """Test bracketed schema and procedure names are both kept."""
+    parser = TSQLTextParser()
+    sql = "CREATE PROCEDURE [dbo].[usp_GetOrders] AS SELECT 1"
+    assert parser.extract_proc_name(sql) == 'dbo.usp_GetOrders'
+
+def test_extract_exec_calls_skips_comments_and_strings():
+    """Test commented-out calls, dynamic SQL and EXECUTE AS are not calls."""
+    parser = TSQLTextParser()
+    sql = "EXEC [dbo].[usp_A]\nEXEC @rc = dbo.usp_B\n-- EXEC usp_C\nEXEC('usp_D')\nEXECUTE AS USER = 'x'"
+    assert parser.extract_exec_calls(sql) == ['dbo.usp_A', 'dbo.usp_B']
+
+def test_extract_table_access():
+    """Test read/write classification of tables and written columns."""
+    parser = TSQLTextParser()
+    sql = """
+    WITH recent AS (SELECT Id FROM dbo.Orders WHERE Status = 1)
+    UPDATE o SET o.Status = 2, Total = 0 FROM dbo.Orders o JOIN recent r ON r.Id = o.Id
+    INSERT INTO [dbo].[Archive] (Id, [Total]) SELECT Id, Total FROM dbo.Orders
+    DELETE FROM #Work
+    DELETE FROM dbo.Logs WHERE Id = 1
+    DECLARE c CURSOR FOR SELECT Id FROM dbo.Users
+    FETCH NEXT FROM c INTO @Id
+    -- TRUNCATE TABLE dbo.Ghost
+    """
+    access = parser.extract_table_access(sql)
+    assert access == {
+        'dbo.Archive': {'access': ['write'], 'columns': ['Id', 'Total']},
+        'dbo.Logs': {'access': ['write'], 'columns': []},
+        'dbo.Orders': {'access': ['read', 'write'], 'columns': ['Status', 'Total']},
+        'dbo.Users': {'access': ['read'], 'columns': []},
+    }
+
+def test_merge_actions_are_not_tables():
+    """Test MERGE's THEN UPDATE SET / INSERT VALUES / DELETE and UPDATE STATISTICS name no table."""
+    parser = TSQLTextParser()
+    sql = """MERGE dbo.Target AS t USING dbo.Source AS s ON t.Id = s.Id
+    WHEN MATCHED THEN UPDATE SET V = s.V
+    WHEN NOT MATCHED THEN INSERT VALUES (s.Id, s.V)
+    WHEN NOT MATCHED BY SOURCE THEN DELETE
+    OUTPUT inserted.Id INTO dbo.Audit;
+    UPDATE STATISTICS dbo.Target"""
+    assert sorted(parser.extract_table_access(sql)) == ['dbo.Audit', 'dbo.Source', 'dbo.Target']
+    statements = parser.extract_statement_access(sql)
+    assert [(s['operation'], s['reads'], s['writes']) for s in statements] == [
+        ('MERGE', ['dbo.Source'], ['dbo.Audit', 'dbo.Target']),
+    ]
+
+def test_extract_statement_access():
+    """Test per-statement operations and BEGIN TRAN scopes."""
+    parser = TSQLTextParser()
+    sql = """CREATE PROCEDURE dbo.usp_Move AS
+BEGIN TRY
+    BEGIN TRANSACTION;
+    ;WITH c AS (SELECT Id FROM dbo.Orders) UPDATE o SET o.Moved = 1 FROM dbo.Orders o JOIN c ON c.Id = o.Id
+    SAVE TRAN before_delete
+    IF @@ROWCOUNT = 0 DELETE FROM dbo.Queue
+    ROLLBACK TRAN before_delete
+    INSERT INTO dbo.Archive (Id) SELECT Id FROM dbo.Orders
+    COMMIT
+    SELECT COUNT(*) FROM dbo.Archive
+END TRY
+BEGIN CATCH
+    IF @@TRANCOUNT > 0 ROLLBACK;
+END CATCH"""
+    statements = parser.extract_statement_access(sql)
+    assert [(s['line'], s['operation'], s['reads'], s['writes'], s['in_transaction']) for s in statements] == [
+        (4, 'UPDATE', ['dbo.Orders'], ['dbo.Orders'], True),
+        (6, 'DELETE', [], ['dbo.Queue'], True),
+        (8, 'INSERT', ['dbo.Orders'], ['dbo.Archive'], True),
+        (10, 'SELECT', ['dbo.Archive'], [], False),
+    ]